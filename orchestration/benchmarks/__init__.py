@@ -0,0 +1,7 @@
+"""
+Standalone benchmarks for performance-sensitive code paths. Each module is runnable on its own, e.g.
+
+    python -m benchmarks.dedupe_staging_area
+
+These are not collected by pytest and do not talk to any cloud services.
+"""
@@ -0,0 +1,47 @@
+"""
+Benchmarks the per-query client overhead removed by the shared BigQuery client registry.
+
+"fresh" builds a new bigquery.Client for every query, as BQRowManager.bigquery_client used to; "shared" looks the
+client up in the registry. By default no query is sent and only client setup, including application default
+credential discovery, is timed. Set --project to also run a trivial query through each client against a real
+project; that is where most of the difference shows, since every fresh client opens a new HTTP session and pays a
+TLS handshake and token refresh on its first request. --anonymous skips credential discovery, which isolates the
+(small) cost of constructing the client object itself.
+"""
+import argparse
+import time
+from typing import Callable, Optional
+
+from google.auth.credentials import AnonymousCredentials, Credentials
+from google.cloud import bigquery
+
+from hca_orchestration.contrib.bigquery_clients import clear_bigquery_clients, get_bigquery_client
+
+
+def run(get_client: Callable[[], bigquery.Client], iterations: int, query: Optional[str]) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        client = get_client()
+        if query:
+            list(client.query(query).result())
+    return (time.perf_counter() - started) / iterations
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("-n", "--iterations", type=int, default=50)
+    argparser.add_argument("-p", "--project", help="Run a trivial query against this project on each iteration")
+    argparser.add_argument("--anonymous", action="store_true", help="Skip application default credential lookup")
+    args = argparser.parse_args()
+
+    project = args.project or "benchmark-project"
+    credentials: Optional[Credentials] = AnonymousCredentials() if args.anonymous else None
+    query = "SELECT 1" if args.project else None
+
+    clear_bigquery_clients()
+    fresh = run(lambda: bigquery.Client(project=project, credentials=credentials), args.iterations, query)
+    shared = run(lambda: get_bigquery_client(project, credentials), args.iterations, query)
+
+    print(f"{'client':>8} {'ms/query':>10}")
+    print(f"{'fresh':>8} {fresh * 1000:>10.2f}")
+    print(f"{'shared':>8} {shared * 1000:>10.2f}")
@@ -0,0 +1,52 @@
+"""
+Benchmarks streaming outdated-file detection (deduplicate_staging_areas) against synthetic staging area listings.
+
+The number of distinct entities is held fixed while the number of staged versions per entity grows, which is the
+shape of a staging area that has been re-exported many times. Peak memory should stay flat as the object count
+grows, since only the latest version per (path, entity) is retained.
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Iterator
+
+from hca_manage.deduplicate_staging_areas import OutdatedFileTracker, iter_outdated_files
+
+ENTITY_TYPES = ["project", "donor_organism", "specimen_from_organism", "cell_suspension", "sequence_file"]
+
+
+def synthetic_listing(num_objects: int, num_entities: int) -> Iterator[list[str]]:
+    """
+    Yields [blob, path, entity, version] records in listing order for num_entities entities,
+    spread evenly over a handful of metadata paths
+    """
+    versions_per_entity = max(num_objects // num_entities, 1)
+    for entity_index in range(num_entities):
+        path = f"staging/metadata/{ENTITY_TYPES[entity_index % len(ENTITY_TYPES)]}"
+        entity = f"{entity_index:08d}-0000-0000-0000-000000000000"
+        for version_index in range(versions_per_entity):
+            version = f"2021-01-01T00:00:00.{version_index:06d}Z.json"
+            yield [f"{path}/{entity}_{version}", path, entity, version]
+
+
+def run(num_objects: int, num_entities: int) -> tuple[float, int, int]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    tracker = OutdatedFileTracker()
+    outdated = sum(1 for _ in iter_outdated_files(synthetic_listing(num_objects, num_entities), tracker))
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, outdated
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("-e", "--num-entities", type=int, default=10_000)
+    argparser.add_argument("-n", "--object-counts", type=int, nargs="+", default=[100_000, 1_000_000, 3_000_000])
+    args = argparser.parse_args()
+
+    print(f"{'objects':>12} {'outdated':>12} {'seconds':>10} {'peak MiB':>10}")
+    for num_objects in args.object_counts:
+        elapsed, peak, outdated = run(num_objects, args.num_entities)
+        print(f"{num_objects:>12} {outdated:>12} {elapsed:>10.2f} {peak / 1024 ** 2:>10.2f}")
@@ -0,0 +1,10 @@
+"""
+End-to-end benchmark of load_hca and the hca_manage checks that follow it, run entirely offline. GCS, BigQuery and
+TDR are replaced at the client layer by local stand-ins (a directory tree, a DuckDB database and a fake
+RepositoryApi), so the pipeline's own GCS, BigQueryService and DataRepoService code runs unchanged, e.g.
+
+    python -m benchmarks.offline --work-dir /tmp/hca-benchmark --files 100000 --projects 4
+
+generates a synthetic staging area, then loads and verifies it, printing the wall time, peak RSS and number of
+API calls of each stage. These need duckdb, which is not a project dependency (pip install duckdb).
+"""
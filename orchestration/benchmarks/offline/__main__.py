@@ -0,0 +1,104 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+import uuid
+
+from benchmarks.offline.staging_area import generate_staging_area
+from benchmarks.offline.stages import (
+    STAGES,
+    BenchmarkEnvironment,
+    BenchmarkSettings,
+    StageResult,
+    format_results,
+    run_stage,
+)
+
+# everything a benchmark writes to its work dir, so a rerun with --overwrite only removes its own files
+WORK_DIR_ENTRIES = ["benchmark.json", "bench.duckdb", "bench.duckdb.wal", "gcs", "manifest.csv", "logs"]
+
+
+def prepare(work_dir: str, settings: BenchmarkSettings, overwrite: bool) -> None:
+    if os.path.exists(BenchmarkSettings.path(work_dir)):
+        if not overwrite:
+            sys.exit(f"{work_dir} already holds a benchmark, pass --overwrite to replace it")
+        for entry in WORK_DIR_ENTRIES:
+            path = os.path.join(work_dir, entry)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+    os.makedirs(work_dir, exist_ok=True)
+
+    start = time.monotonic()
+    size = generate_staging_area(os.path.join(work_dir, "gcs"), settings.staging_area, settings.files,
+                                 settings.projects)
+    settings.dataset_id = str(uuid.uuid4())
+    settings.project_ids = size.project_ids
+    settings.save(work_dir)
+    BenchmarkEnvironment(work_dir, settings).close()
+    print(f"Generated {settings.staging_area} in {time.monotonic() - start:.1f}s [files={size.files}, "
+          f"metadata_entities={size.metadata_entities}, links={size.links}]")
+
+
+def run_in_subprocess(work_dir: str, stage: str) -> StageResult:
+    log_path = os.path.join(work_dir, "logs", f"{stage}.log")
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    with open(log_path, "w") as log:
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.offline", "--work-dir", work_dir, "--stage", stage],
+            stdout=subprocess.PIPE,
+            stderr=log,
+            text=True
+        )
+    if completed.returncode:
+        sys.exit(f"Stage {stage} failed with exit code {completed.returncode}, see {log_path}")
+    # the result is the last line of the stage's output, anything before it was logged by the pipeline
+    return StageResult(**json.loads(completed.stdout.strip().splitlines()[-1]))
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser(prog="python -m benchmarks.offline")
+    argparser.add_argument("-w", "--work-dir", required=True)
+    argparser.add_argument("-n", "--files", type=int, default=1000)
+    argparser.add_argument("-p", "--projects", type=int, default=1)
+    argparser.add_argument("-s", "--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    argparser.add_argument("--job-latency-seconds", type=float, default=0.0,
+                           help="Minimum time a simulated TDR job takes to complete")
+    argparser.add_argument("--files-per-second", type=float, default=0.0,
+                           help="Simulated TDR bulk file load throughput per job, 0 for unlimited")
+    argparser.add_argument("--max-workers", type=int, default=4)
+    argparser.add_argument("--max-concurrent-bulk-loads", type=int, default=4)
+    argparser.add_argument("--control-file-max-files", type=int, default=10_000)
+    argparser.add_argument("--pool-size", type=int, default=8)
+    argparser.add_argument("--reuse", action="store_true", default=False,
+                           help="Run the stages against the benchmark already in the work dir")
+    argparser.add_argument("--overwrite", action="store_true", default=False)
+    argparser.add_argument("--stage", choices=list(STAGES), help=argparse.SUPPRESS)
+    args = argparser.parse_args()
+
+    if args.stage:
+        result = run_stage(args.work_dir, args.stage)
+        print(json.dumps(result.__dict__))
+        sys.exit(0)
+
+    if not args.reuse:
+        prepare(args.work_dir, BenchmarkSettings(
+            files=args.files,
+            projects=args.projects,
+            job_latency_seconds=args.job_latency_seconds,
+            files_per_second=args.files_per_second,
+            max_workers=args.max_workers,
+            bigquery_concurrency=args.max_workers,
+            tdr_ingest_concurrency=args.max_workers,
+            max_concurrent_bulk_loads=args.max_concurrent_bulk_loads,
+            control_file_max_files=args.control_file_max_files,
+            pool_size=args.pool_size,
+        ), args.overwrite)
+
+    results = [run_in_subprocess(args.work_dir, stage) for stage in args.stages]
+    for line in format_results(results):
+        print(line)
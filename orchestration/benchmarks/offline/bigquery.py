@@ -0,0 +1,475 @@
+"""
+DuckDB-backed stand-in for the BigQuery client. It implements the handful of bigquery.Client methods the
+orchestration code calls (query, extract_table, get_table, create_dataset), so BigQueryService, TableRowCounts and
+the hca_manage checks run unchanged on top of it. Queries are translated from the BigQuery dialect the code base
+uses to DuckDB SQL: `project.dataset.table` references become "dataset"."table" (datasets map to DuckDB schemas,
+projects are dropped), EXPORT DATA and extracts write to the local GCS root, and external tables read from it.
+Jobs run on a thread pool, each on its own cursor, so submitted jobs overlap as they would in BigQuery.
+
+Only the SQL this repository issues is supported; scripting (ASSERT, EXECUTE IMMEDIATE) is not.
+"""
+import fnmatch
+import os
+import re
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Iterator, Optional, Union
+
+from google.api_core.exceptions import BadRequest, Conflict, NotFound
+from google.cloud import bigquery
+from google.cloud.bigquery import ArrayQueryParameter, Dataset, DatasetReference, ScalarQueryParameter, TableReference
+
+from benchmarks.offline.calls import ApiCalls
+from benchmarks.offline.gcs import local_path
+
+try:
+    import duckdb
+except ImportError as e:
+    raise ImportError(
+        "The offline benchmarks need duckdb, which is not a project dependency: pip install duckdb"
+    ) from e
+
+# BigQuery names the files of an export or extract by replacing the * in the URI with a 12 digit shard number
+_FIRST_SHARD = "000000000000"
+
+_BQ_TO_DUCKDB_TYPES = {
+    "STRING": "VARCHAR",
+    "TIMESTAMP": "TIMESTAMP",
+    "INTEGER": "BIGINT",
+    "INT64": "BIGINT",
+    "FLOAT": "DOUBLE",
+    "FLOAT64": "DOUBLE",
+    "BOOLEAN": "BOOLEAN",
+    "BOOL": "BOOLEAN",
+}
+
+# single- or double-quoted strings, backticked identifiers, or a run of anything else
+_TOKENS = re.compile(r"""'(?:\\.|[^'\\])*'|"(?:\\.|[^"\\])*"|`[^`]*`|[^'"`]+""", re.DOTALL)
+
+_FUNCTION_REWRITES = [
+    (re.compile(r"\bCOUNTIF\s*\(", re.IGNORECASE), "count_if("),
+    (re.compile(r"\bLOGICAL_OR\s*\(", re.IGNORECASE), "bool_or("),
+    (re.compile(r"\bJSON_EXTRACT_SCALAR\s*\(", re.IGNORECASE), "json_extract_string("),
+    (re.compile(r"\bARRAY\s*<\s*STRING\s*>", re.IGNORECASE), "VARCHAR[]"),
+    (re.compile(r"\bEXCEPT\s+DISTINCT\b", re.IGNORECASE), "EXCEPT"),
+    (re.compile(r"\bIN\s+UNNEST\s*\(\s*@(\w+)\s*\)", re.IGNORECASE), r"IN (SELECT UNNEST($\1))"),
+    (re.compile(r"@(\w+)"), r"$\1"),
+]
+
+_CLUSTER_BY = re.compile(r"\bCLUSTER\s+BY\b.*?\bAS\b", re.IGNORECASE | re.DOTALL)
+_ARRAY_AGG = re.compile(r"\bARRAY_AGG\s*\(", re.IGNORECASE)
+_IGNORE_NULLS_LIMIT = re.compile(r"^(.*?)\s+IGNORE\s+NULLS(?:\s+LIMIT\s+(\d+))?\s*$", re.IGNORECASE | re.DOTALL)
+_EXPORT_DATA = re.compile(r"^\s*EXPORT\s+DATA\s+OPTIONS\s*\((.*?)\)\s*AS\s+(.*)$", re.IGNORECASE | re.DOTALL)
+_EXTERNAL_TABLE = re.compile(
+    r"^\s*CREATE\s+OR\s+REPLACE\s+EXTERNAL\s+TABLE\s+(`[^`]+`)\s+OPTIONS\s*\((.*)\)\s*$", re.IGNORECASE | re.DOTALL
+)
+_OPTION = re.compile(r"(\w+)\s*=\s*('(?:[^']*)'|\[[^\]]*\]|\w+)")
+
+
+def _quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _quote_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _split_statements(sql: str) -> list[str]:
+    """
+    Splits a script on the semicolons outside of quotes, dropping empty statements
+    """
+    statements = []
+    current = []
+    for token in _TOKENS.findall(sql):
+        if token[0] in "'\"`":
+            current.append(token)
+            continue
+        parts = token.split(";")
+        current.append(parts[0])
+        for part in parts[1:]:
+            statements.append("".join(current))
+            current = [part]
+    statements.append("".join(current))
+    return [statement for statement in statements if statement.strip()]
+
+
+def _table_reference(reference: str) -> str:
+    """
+    Translates a backticked BigQuery table reference (project.dataset.table or dataset.table) to DuckDB
+    """
+    parts = reference.split(".")
+    if len(parts) >= 3 and parts[-2].upper() == "INFORMATION_SCHEMA":
+        dataset = parts[-3]
+        view = parts[-1].upper()
+        if view == "TABLES":
+            return (f"(SELECT table_name, table_type FROM information_schema.tables "
+                    f"WHERE table_schema = {_quote_string(dataset)})")
+        if view == "COLUMNS":
+            return (f"(SELECT table_name, column_name, data_type FROM information_schema.columns "
+                    f"WHERE table_schema = {_quote_string(dataset)})")
+        raise BadRequest(f"Unsupported INFORMATION_SCHEMA view {reference}")
+    if parts[-1] == "__TABLES__":
+        dataset = _quote_string(parts[-2])
+        return (f"(SELECT table_name AS table_id, estimated_size AS row_count, 1 AS type FROM duckdb_tables() "
+                f"WHERE schema_name = {dataset} UNION ALL SELECT view_name, 0, 2 FROM duckdb_views() "
+                f"WHERE schema_name = {dataset})")
+    return ".".join(_quote_ident(part) for part in parts[-2:])
+
+
+def _find_closing_paren(sql: str, open_index: int) -> int:
+    depth = 0
+    index = open_index
+    while index < len(sql):
+        char = sql[index]
+        if char in "'\"":
+            index = sql.index(char, index + 1)
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return index
+        index += 1
+    raise BadRequest(f"Unbalanced parentheses in {sql}")
+
+
+def _rewrite_array_aggs(sql: str) -> str:
+    """
+    Rewrites ARRAY_AGG(x IGNORE NULLS [LIMIT n]) to a filtered, sliced DuckDB list aggregate
+    """
+    search_from = 0
+    while True:
+        match = _ARRAY_AGG.search(sql, search_from)
+        if not match:
+            return sql
+        close = _find_closing_paren(sql, match.end() - 1)
+        inner = sql[match.end():close]
+        ignore_nulls = _IGNORE_NULLS_LIMIT.match(inner)
+        if ignore_nulls:
+            expression, limit = ignore_nulls.groups()
+            replacement = f"list({expression}) FILTER (WHERE ({expression}) IS NOT NULL)"
+            if limit:
+                replacement = f"list_slice({replacement}, 1, {limit})"
+        else:
+            replacement = f"list({inner})"
+        sql = sql[:match.start()] + replacement + sql[close + 1:]
+        search_from = match.start() + len(replacement)
+
+
+def translate_sql(sql: str) -> str:
+    """
+    Translates a single BigQuery standard SQL statement to DuckDB SQL
+    """
+    translated = []
+    for token in _TOKENS.findall(sql):
+        if token.startswith("`"):
+            translated.append(_table_reference(token[1:-1]))
+        elif token.startswith('"'):
+            translated.append(_quote_string(token[1:-1].replace('\\"', '"')))
+        elif token.startswith("'"):
+            translated.append(token)
+        else:
+            for pattern, replacement in _FUNCTION_REWRITES:
+                token = pattern.sub(replacement, token)
+            translated.append(token)
+    return _rewrite_array_aggs(_CLUSTER_BY.sub("AS", "".join(translated)))
+
+
+def _parse_options(options: str) -> dict[str, Any]:
+    parsed: dict[str, Any] = {}
+    for key, value in _OPTION.findall(options):
+        if value.startswith("["):
+            parsed[key.lower()] = re.findall(r"'([^']*)'", value)
+        else:
+            parsed[key.lower()] = value.strip("'")
+    return parsed
+
+
+class _Rows(list):  # type: ignore
+    """
+    Materialized query results, standing in for a bigquery RowIterator
+    """
+
+    @property
+    def total_rows(self) -> int:
+        return len(self)
+
+
+def _to_bigquery_value(value: Any) -> Any:
+    # TIMESTAMP columns come back naive in the session time zone (UTC); BigQuery returns them tz-aware
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+class DuckDbJob:
+    """
+    A query or extract running on the client's thread pool; mirrors the parts of bigquery.QueryJob the code uses
+    """
+
+    def __init__(self, future: "Future[_Rows]", created: datetime):
+        self.job_id = f"duckdb_{uuid.uuid4().hex}"
+        self.created = created
+        self.ended: Optional[datetime] = None
+        self.total_bytes_processed: Optional[int] = None
+        self.slot_millis: Optional[int] = None
+        self._future = future
+        future.add_done_callback(self._finish)
+
+    def _finish(self, future: "Future[_Rows]") -> None:
+        self.ended = datetime.now(timezone.utc)
+        self.slot_millis = int((self.ended - self.created).total_seconds() * 1000)
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def exception(self) -> Optional[BaseException]:
+        return self._future.exception() if self._future.done() else None
+
+    def result(self, timeout: Optional[float] = None) -> _Rows:
+        return self._future.result(timeout)
+
+    def __iter__(self) -> Iterator[bigquery.Row]:
+        return iter(self.result())
+
+
+class DuckDbTable:
+    def __init__(self, reference: TableReference, table_type: str, num_rows: int):
+        self.reference = reference
+        self.project = reference.project
+        self.dataset_id = reference.dataset_id
+        self.table_id = reference.table_id
+        self.table_type = table_type
+        self.num_rows = num_rows
+
+
+class DuckDbBigQueryClient:
+    """
+    Runs BigQuery client calls against a DuckDB database, reading and writing gs:// paths under gcs_root
+    """
+
+    def __init__(self, connection: "duckdb.DuckDBPyConnection", gcs_root: str, calls: ApiCalls,
+                 project: str = "benchmark-project", max_concurrent_jobs: int = 8):
+        self.connection = connection
+        self.gcs_root = gcs_root
+        self.calls = calls
+        self.project = project
+        self.location = "US"
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrent_jobs, thread_name_prefix="duckdb-bigquery")
+        self._cursors = threading.local()
+        self._cursor_lock = threading.Lock()
+        self.connection.execute("SET TimeZone = 'UTC'")
+
+    def _cursor(self) -> "duckdb.DuckDBPyConnection":
+        cursor = getattr(self._cursors, "cursor", None)
+        if cursor is None:
+            # cursors are cheap, but creating them concurrently from several threads is not safe
+            with self._cursor_lock:
+                cursor = self._cursors.cursor = self.connection.cursor()
+            cursor.execute("SET TimeZone = 'UTC'")
+        return cursor
+
+    def _submit(self, work: Any, *args: Any) -> DuckDbJob:
+        created = datetime.now(timezone.utc)
+
+        def _run() -> _Rows:
+            try:
+                return work(self._cursor(), *args)
+            except duckdb.Error as e:
+                raise BadRequest(f"{type(e).__name__}: {e}")
+
+        return DuckDbJob(self._pool.submit(_run), created)
+
+    # bigquery.Client API
+
+    def query(self, query: str, job_config: Optional[bigquery.QueryJobConfig] = None,
+              location: Optional[str] = None, project: Optional[str] = None, **kwargs: Any) -> DuckDbJob:
+        self.calls.record("bigquery.query")
+        return self._submit(self._run_query, query, job_config)
+
+    def extract_table(self, source: Union[str, TableReference], destination_uris: Union[str, list[str]],
+                      job_config: Optional[bigquery.ExtractJobConfig] = None, project: Optional[str] = None,
+                      **kwargs: Any) -> DuckDbJob:
+        self.calls.record("bigquery.extract_table")
+        reference = TableReference.from_string(source, default_project=project or self.project) \
+            if isinstance(source, str) else source
+        uris = [destination_uris] if isinstance(destination_uris, str) else destination_uris
+        destination_format = job_config.destination_format if job_config else None
+        return self._submit(self._run_extract, reference, uris[0], destination_format)
+
+    def get_table(self, table: Union[str, TableReference]) -> DuckDbTable:
+        self.calls.record("bigquery.get_table")
+        reference = TableReference.from_string(table, default_project=self.project) \
+            if isinstance(table, str) else table
+        cursor = self._cursor()
+        found = cursor.execute(
+            "SELECT table_type FROM information_schema.tables WHERE table_schema = $dataset AND table_name = $table",
+            {"dataset": reference.dataset_id, "table": reference.table_id}
+        ).fetchone()
+        if not found:
+            raise NotFound(f"Not found: Table {reference}")
+        if found[0] == "VIEW":
+            return DuckDbTable(reference, "VIEW", 0)
+        num_rows = cursor.execute(
+            f"SELECT COUNT(*) FROM {_quote_ident(reference.dataset_id)}.{_quote_ident(reference.table_id)}"
+        ).fetchone()[0]
+        return DuckDbTable(reference, "TABLE", num_rows)
+
+    def create_dataset(self, dataset: Union[str, Dataset, DatasetReference], exists_ok: bool = False,
+                       **kwargs: Any) -> Dataset:
+        self.calls.record("bigquery.create_dataset")
+        if isinstance(dataset, str):
+            dataset = Dataset(dataset if "." in dataset else f"{self.project}.{dataset}")
+        elif isinstance(dataset, DatasetReference):
+            dataset = Dataset(dataset)
+        cursor = self._cursor()
+        exists = cursor.execute(
+            "SELECT 1 FROM information_schema.schemata WHERE schema_name = $dataset", {"dataset": dataset.dataset_id}
+        ).fetchone()
+        if exists and not exists_ok:
+            raise Conflict(f"Already Exists: Dataset {dataset.project}:{dataset.dataset_id}")
+        cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {_quote_ident(dataset.dataset_id)}")
+        return dataset
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+    # job bodies, run on the pool
+
+    def _run_query(self, cursor: "duckdb.DuckDBPyConnection", query: str,
+                   job_config: Optional[bigquery.QueryJobConfig]) -> _Rows:
+        params: dict[str, Any] = {}
+        temp_views = []
+        if job_config:
+            for parameter in job_config.query_parameters or []:
+                if isinstance(parameter, ArrayQueryParameter):
+                    params[parameter.name] = list(parameter.values)
+                elif isinstance(parameter, ScalarQueryParameter):
+                    params[parameter.name] = parameter.value
+            for name, external_config in (job_config.table_definitions or {}).items():
+                self._create_external_view(cursor, _quote_ident(name), external_config.source_uris,
+                                           external_config.schema, temporary=True)
+                temp_views.append(name)
+
+        try:
+            statements = _split_statements(query)
+            destination = job_config.destination if job_config else None
+            if destination is not None:
+                if len(statements) != 1:
+                    raise BadRequest("Queries with a destination table must be a single statement")
+                table = f"{_quote_ident(destination.dataset_id)}.{_quote_ident(destination.table_id)}"
+                cursor.execute(f"CREATE OR REPLACE TABLE {table} AS {translate_sql(statements[0])}", params or None)
+                return self._fetch(cursor.execute(f"SELECT * FROM {table}"))
+
+            rows = _Rows()
+            for statement in statements:
+                rows = self._run_statement(cursor, statement, params)
+            return rows
+        finally:
+            for name in temp_views:
+                cursor.execute(f"DROP VIEW IF EXISTS temp.{_quote_ident(name)}")
+
+    def _run_statement(self, cursor: "duckdb.DuckDBPyConnection", statement: str, params: dict[str, Any]) -> _Rows:
+        export = _EXPORT_DATA.match(statement)
+        if export:
+            options = _parse_options(export.group(1))
+            export_format = "csv" if options.get("format", "CSV").upper() == "CSV" else "json"
+            self._copy_to_gcs(cursor, translate_sql(export.group(2)), options["uri"], export_format,
+                              params, overwrite=options.get("overwrite", "false").lower() == "true")
+            return _Rows()
+
+        external = _EXTERNAL_TABLE.match(statement)
+        if external:
+            options = _parse_options(external.group(2))
+            self._create_external_view(cursor, _table_reference(external.group(1)[1:-1]), options["uris"], None)
+            return _Rows()
+
+        translated = translate_sql(statement)
+        # DuckDB rejects parameters a statement does not use, and a script's statements share one set
+        used_params = {name: value for name, value in params.items() if f"${name}" in translated}
+        result = cursor.execute(translated, used_params or None)
+        if re.match(r"^\s*(\(|SELECT\b|WITH\b)", statement, re.IGNORECASE):
+            return self._fetch(result)
+        return _Rows()
+
+    def _run_extract(self, cursor: "duckdb.DuckDBPyConnection", reference: TableReference, uri: str,
+                     destination_format: Optional[str]) -> _Rows:
+        export_format = "csv" if destination_format == bigquery.DestinationFormat.CSV else "json"
+        query = f"SELECT * FROM {_quote_ident(reference.dataset_id)}.{_quote_ident(reference.table_id)}"
+        self._copy_to_gcs(cursor, query, uri, export_format, {}, overwrite=False)
+        return _Rows()
+
+    # helpers
+
+    def _copy_to_gcs(self, cursor: "duckdb.DuckDBPyConnection", query: str, uri: str, export_format: str,
+                     params: dict[str, Any], overwrite: bool) -> None:
+        if overwrite:
+            for path in self._resolve_uri(uri, must_exist=False):
+                os.remove(path)
+        path = local_path(self.gcs_root, uri.replace("*", _FIRST_SHARD))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        copy_options = "FORMAT csv, HEADER false" if export_format == "csv" else "FORMAT json"
+        cursor.execute(f"COPY ({query}) TO {_quote_string(path)} ({copy_options})", params or None)
+
+    def _create_external_view(self, cursor: "duckdb.DuckDBPyConnection", view: str, uris: list[str],
+                              schema: Optional[list[bigquery.SchemaField]], temporary: bool = False) -> None:
+        files = sorted(path for uri in uris for path in self._resolve_uri(uri, must_exist=True))
+        file_list = "[" + ", ".join(_quote_string(path) for path in files) + "]"
+        if schema:
+            columns = ", ".join(
+                f"{_quote_string(field.name)}: {_quote_string(_BQ_TO_DUCKDB_TYPES[field.field_type.upper()])}"
+                for field in schema
+            )
+            source = f"read_json({file_list}, format = 'newline_delimited', columns = {{{columns}}})"
+        else:
+            # schema auto-detection; BigQuery has no UUID type, so ids detected as UUIDs stay strings
+            source = f"read_json_auto({file_list}, format = 'newline_delimited')"
+            detected = cursor.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()
+            projection = ", ".join(
+                f"CAST({_quote_ident(name)} AS VARCHAR) AS {_quote_ident(name)}" if column_type == "UUID"
+                else _quote_ident(name)
+                for name, column_type, *_ in detected
+            )
+            source = f"(SELECT {projection} FROM {source})"
+        temp = "TEMP " if temporary else ""
+        cursor.execute(f"CREATE OR REPLACE {temp}VIEW {view} AS SELECT * FROM {source}")
+
+    def _resolve_uri(self, uri: str, must_exist: bool) -> list[str]:
+        """
+        Lists the local files matching a gs:// URI, in which a * matches any characters including /
+        """
+        if "*" not in uri:
+            path = local_path(self.gcs_root, uri)
+            matches = [path] if os.path.isfile(path) else []
+        else:
+            pattern = local_path(self.gcs_root, uri)
+            base = os.path.dirname(pattern.split("*", 1)[0])
+            regex = re.compile(fnmatch.translate(pattern))
+            matches = [
+                os.path.join(directory, name)
+                for directory, _, names in os.walk(base)
+                for name in names
+                if regex.match(os.path.join(directory, name)) and not name.endswith(".uploading")
+            ]
+        if must_exist and not matches:
+            raise BadRequest(f"Not found: URI {uri}")
+        return matches
+
+    @staticmethod
+    def _fetch(result: "duckdb.DuckDBPyConnection") -> _Rows:
+        if not result.description:
+            return _Rows()
+        field_to_index = {column[0]: index for index, column in enumerate(result.description)}
+        rows = _Rows()
+        while True:
+            batch = result.fetchmany(10_000)
+            if not batch:
+                return rows
+            rows.extend(
+                bigquery.Row(tuple(_to_bigquery_value(value) for value in values), field_to_index)
+                for values in batch
+            )
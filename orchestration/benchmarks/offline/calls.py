@@ -0,0 +1,26 @@
+import threading
+from collections import Counter
+
+
+class ApiCalls:
+    """
+    Thread-safe tally of the calls made against each stand-in service, keyed "<service>.<operation>"
+    """
+
+    def __init__(self) -> None:
+        self._counts: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, call: str, count: int = 1) -> None:
+        with self._lock:
+            self._counts[call] += count
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def totals_by_service(self) -> dict[str, int]:
+        totals: Counter[str] = Counter()
+        for call, count in self.snapshot().items():
+            totals[call.split(".", 1)[0]] += count
+        return dict(totals)
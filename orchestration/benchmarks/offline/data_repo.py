@@ -0,0 +1,347 @@
+"""
+Stand-in for the TDR RepositoryApi, backed by the same DuckDB database as the BigQuery stand-in. A dataset is laid
+out the way TDR exposes it in BigQuery: each table's rows live in tdr_<name>.<table>, soft deleted row ids in
+tdr_<name>.<table>_soft_deletes, and datarepo_<name> holds a view per table excluding soft deleted rows plus the
+datarepo_load_history table. Ingests, bulk file loads and soft deletes do their work on a background pool, and a
+job reports itself complete no sooner than job_latency_seconds (plus, for bulk loads, the time to load its files
+at files_per_second) after it was submitted, so the pipeline's polling and concurrency behave as against TDR.
+
+Bulk file loads do not copy any bytes: a file loads if its source exists and its target path has not already been
+loaded, and its crc32c is taken from its target path (/v1/<file id>/<crc32c>/<file name>).
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from data_repo_client import ApiException, DatasetModel, JobModel, StorageResourceModel
+
+from benchmarks.offline.bigquery import duckdb
+from benchmarks.offline.calls import ApiCalls
+from benchmarks.offline.gcs import local_path
+
+_TDR_TO_DUCKDB_TYPES = {
+    "string": "VARCHAR",
+    "text": "VARCHAR",
+    "fileref": "VARCHAR",
+    "dirref": "VARCHAR",
+    "timestamp": "TIMESTAMP",
+    "datetime": "TIMESTAMP",
+    "date": "DATE",
+    "integer": "BIGINT",
+    "int64": "BIGINT",
+    "boolean": "BOOLEAN",
+    "float": "DOUBLE",
+    "float64": "DOUBLE",
+    "numeric": "DOUBLE",
+}
+
+LOAD_HISTORY_COLUMNS = {
+    "load_tag": "VARCHAR",
+    "load_time": "TIMESTAMP",
+    "source_name": "VARCHAR",
+    "target_path": "VARCHAR",
+    "state": "VARCHAR",
+    "file_id": "VARCHAR",
+    "checksum_crc32c": "VARCHAR",
+    "checksum_md5": "VARCHAR",
+    "error": "VARCHAR",
+}
+
+
+def _column_type(column: dict[str, Any]) -> str:
+    column_type = _TDR_TO_DUCKDB_TYPES[column["datatype"]]
+    return f"{column_type}[]" if column.get("array_of") else column_type
+
+
+@dataclass
+class FakeTdrDataset:
+    name: str
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    data_project: str = "benchmark-project"
+    default_profile_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    bq_location: str = "US"
+    # table name -> column name -> DuckDB type, excluding datarepo_row_id
+    tables: dict[str, dict[str, str]] = field(default_factory=dict)
+
+    @property
+    def raw_schema(self) -> str:
+        return f"tdr_{self.name}"
+
+    @property
+    def view_schema(self) -> str:
+        return f"datarepo_{self.name}"
+
+    def to_model(self) -> DatasetModel:
+        return DatasetModel(
+            id=self.id,
+            name=self.name,
+            data_project=self.data_project,
+            default_profile_id=self.default_profile_id,
+            storage=[StorageResourceModel(region=self.bq_location, cloud_resource="bigquery")]
+        )
+
+
+def create_tdr_dataset(connection: "duckdb.DuckDBPyConnection", dataset: FakeTdrDataset, schema_path: str) -> None:
+    """
+    Creates the tables of a TDR dataset schema (in the format of schema.json) and its BigQuery views
+    """
+    with open(schema_path) as f:
+        schema = json.load(f)
+
+    connection.execute(f'CREATE SCHEMA IF NOT EXISTS "{dataset.raw_schema}"')
+    connection.execute(f'CREATE SCHEMA IF NOT EXISTS "{dataset.view_schema}"')
+    for table in schema["tables"]:
+        columns = {column["name"]: _column_type(column) for column in table["columns"]}
+        dataset.tables[table["name"]] = columns
+        column_defs = ", ".join(f'"{name}" {column_type}' for name, column_type in columns.items())
+        raw = f'"{dataset.raw_schema}"."{table["name"]}"'
+        soft_deletes = f'"{dataset.raw_schema}"."{table["name"]}_soft_deletes"'
+        connection.execute(f"CREATE TABLE IF NOT EXISTS {raw} (datarepo_row_id VARCHAR, {column_defs})")
+        connection.execute(f"CREATE TABLE IF NOT EXISTS {soft_deletes} (datarepo_row_id VARCHAR)")
+        connection.execute(f"""
+            CREATE OR REPLACE VIEW "{dataset.view_schema}"."{table["name"]}" AS
+            SELECT * FROM {raw} row
+            WHERE NOT EXISTS (SELECT 1 FROM {soft_deletes} d WHERE d.datarepo_row_id = row.datarepo_row_id)
+        """)
+
+    history_defs = ", ".join(f"{name} {column_type}" for name, column_type in LOAD_HISTORY_COLUMNS.items())
+    connection.execute(f'CREATE TABLE IF NOT EXISTS "{dataset.view_schema}".datarepo_load_history ({history_defs})')
+
+
+@dataclass
+class _FakeJob:
+    future: "Future[Any]"
+    submitted: float
+    # earliest time (monotonic) at which the job may report itself complete
+    ready_at: float
+    description: str
+
+
+class FakeRepositoryApi:
+    """
+    Implements the RepositoryApi methods the load pipeline and hca_manage checks call, against one dataset
+    """
+
+    def __init__(self, connection: "duckdb.DuckDBPyConnection", gcs_root: str, calls: ApiCalls,
+                 dataset: FakeTdrDataset, job_latency_seconds: float = 0.0, files_per_second: float = 0.0,
+                 max_workers: int = 4):
+        self.connection = connection
+        self.gcs_root = gcs_root
+        self.calls = calls
+        self.dataset = dataset
+        self.job_latency_seconds = job_latency_seconds
+        self.files_per_second = files_per_second
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fake-tdr")
+        self._jobs: dict[str, _FakeJob] = {}
+        self._jobs_lock = threading.Lock()
+        # writes to the dataset are serialized, as concurrent DuckDB transactions on one table may conflict
+        self._write_lock = threading.Lock()
+        self._cursors = threading.local()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+    # RepositoryApi
+
+    def retrieve_dataset(self, id: str, **kwargs: Any) -> DatasetModel:
+        self.calls.record("tdr.retrieve_dataset")
+        self._check_dataset(id)
+        return self.dataset.to_model()
+
+    def ingest_dataset(self, id: str, ingest: dict[str, Any], **kwargs: Any) -> JobModel:
+        self.calls.record("tdr.ingest_dataset")
+        self._check_dataset(id)
+        return self._submit(f"Ingest to {ingest['table']}", lambda: self._ingest(ingest["table"], ingest["path"]))
+
+    def bulk_file_load(self, id: str, bulk_file_load: dict[str, Any], **kwargs: Any) -> JobModel:
+        self.calls.record("tdr.bulk_file_load")
+        self._check_dataset(id)
+        return self._submit(
+            f"Bulk file load of {bulk_file_load['loadControlFile']}",
+            lambda: self._bulk_file_load(bulk_file_load["loadControlFile"], bulk_file_load["loadTag"]),
+            bulk=True
+        )
+
+    def apply_dataset_data_deletion(self, id: str, data_deletion_request: dict[str, Any],
+                                    **kwargs: Any) -> JobModel:
+        self.calls.record("tdr.apply_dataset_data_deletion")
+        self._check_dataset(id)
+        tables = data_deletion_request["tables"]
+        return self._submit("Soft delete", lambda: self._soft_delete(tables))
+
+    def retrieve_job(self, id: str, **kwargs: Any) -> JobModel:
+        self.calls.record("tdr.retrieve_job")
+        job = self._job(id)
+        completed = job.future.done() and time.monotonic() >= job.ready_at
+        status = "running"
+        if completed:
+            status = "failed" if job.future.exception() else "succeeded"
+        return JobModel(
+            id=id,
+            description=job.description,
+            job_status=status,
+            status_code=200 if status != "failed" else 500,
+            submitted=datetime.now(timezone.utc).isoformat(),
+            completed=datetime.now(timezone.utc).isoformat() if completed else None
+        )
+
+    def retrieve_job_result(self, id: str, **kwargs: Any) -> Any:
+        self.calls.record("tdr.retrieve_job_result")
+        job = self._job(id)
+        if not job.future.done() or time.monotonic() < job.ready_at:
+            raise ApiException(status=400, reason=f"Job {id} has not completed")
+        error = job.future.exception()
+        if error:
+            raise ApiException(status=500, reason=str(error))
+        return job.future.result()
+
+    # jobs
+
+    def _check_dataset(self, dataset_id: str) -> None:
+        if dataset_id != self.dataset.id:
+            raise ApiException(status=404, reason=f"Dataset not found: {dataset_id}")
+
+    def _job(self, job_id: str) -> _FakeJob:
+        with self._jobs_lock:
+            job = self._jobs.get(job_id)
+        if not job:
+            raise ApiException(status=404, reason=f"Job not found: {job_id}")
+        return job
+
+    def _submit(self, description: str, work: Callable[[], Any], bulk: bool = False) -> JobModel:
+        job_id = str(uuid.uuid4())
+        submitted = time.monotonic()
+        job = _FakeJob(self._pool.submit(self._run, work), submitted, submitted + self.job_latency_seconds,
+                       description)
+        if bulk and self.files_per_second:
+            def _add_transfer_time(future: "Future[Any]") -> None:
+                if not future.exception():
+                    job.ready_at += future.result()["totalFiles"] / self.files_per_second
+            job.future.add_done_callback(_add_transfer_time)
+        with self._jobs_lock:
+            self._jobs[job_id] = job
+        return JobModel(id=job_id, description=description, job_status="running", status_code=202)
+
+    def _run(self, work: Callable[[], Any]) -> Any:
+        with self._write_lock:
+            return work()
+
+    def _cursor(self) -> "duckdb.DuckDBPyConnection":
+        cursor = getattr(self._cursors, "cursor", None)
+        if cursor is None:
+            cursor = self._cursors.cursor = self.connection.cursor()
+            cursor.execute("SET TimeZone = 'UTC'")
+        return cursor
+
+    def _resolve(self, gs_path: str) -> list[str]:
+        """
+        Lists the local files matching a gs:// path, which may end in a * wildcard
+        """
+        if not gs_path.endswith("*"):
+            return [local_path(self.gcs_root, gs_path)]
+        directory = local_path(self.gcs_root, gs_path[:-1])
+        prefix = ""
+        if not directory.endswith("/"):
+            directory, prefix = os.path.split(directory)
+        return sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(directory)
+            for name in names
+            if os.path.join(root, name)[len(directory):].lstrip("/").startswith(prefix)
+            and not name.endswith(".uploading")
+        )
+
+    @staticmethod
+    def _file_list(paths: list[str]) -> str:
+        return "[" + ", ".join("'" + path.replace("'", "''") + "'" for path in paths) + "]"
+
+    def _ingest(self, table: str, path: str) -> dict[str, Any]:
+        columns = self.dataset.tables[table]
+        files = [path for path in self._resolve(path) if os.path.getsize(path)]
+        if not files:
+            raise ValueError(f"No data found at {path}")
+
+        column_types = ", ".join(f"'{name}': '{column_type}'" for name, column_type in columns.items())
+        column_names = ", ".join(f'"{name}"' for name in columns)
+        cursor = self._cursor()
+        row_count = cursor.execute(f"""
+            INSERT INTO "{self.dataset.raw_schema}"."{table}" (datarepo_row_id, {column_names})
+            SELECT CAST(uuid() AS VARCHAR), {column_names}
+            FROM read_json({self._file_list(files)}, format = 'newline_delimited', columns = {{{column_types}}})
+        """).fetchone()[0]
+        return {"dataset_id": self.dataset.id, "table": table, "path": path, "row_count": row_count,
+                "bad_row_count": 0}
+
+    def _soft_delete(self, tables: list[dict[str, Any]]) -> dict[str, Any]:
+        cursor = self._cursor()
+        for table in tables:
+            files = [path for path in self._resolve(table["gcsFileSpec"]["path"]) if os.path.getsize(path)]
+            if not files:
+                continue
+            cursor.execute(f"""
+                INSERT INTO "{self.dataset.raw_schema}"."{table['tableName']}_soft_deletes"
+                SELECT DISTINCT column0 FROM read_csv({self._file_list(files)}, header = false,
+                                                      columns = {{'column0': 'VARCHAR'}})
+            """)
+        return {"objectState": "deleted"}
+
+    def _bulk_file_load(self, control_file: str, load_tag: str) -> dict[str, Any]:
+        cursor = self._cursor()
+        history = f'"{self.dataset.view_schema}".datarepo_load_history'
+        loaded = {
+            row[0] for row in cursor.execute(f"SELECT target_path FROM {history} WHERE state = 'succeeded'").fetchall()
+        }
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+        entries = []
+        with open(local_path(self.gcs_root, control_file)) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                target_path = request["targetPath"]
+                error = None
+                if target_path in loaded:
+                    error = f"File already exists at {target_path}"
+                elif not os.path.isfile(local_path(self.gcs_root, request["sourcePath"])):
+                    error = f"Source file not found: {request['sourcePath']}"
+                entries.append({
+                    "load_tag": load_tag,
+                    "load_time": now,
+                    "source_name": request["sourcePath"],
+                    "target_path": target_path,
+                    "state": "failed" if error else "succeeded",
+                    "file_id": None if error else str(uuid.uuid4()),
+                    "checksum_crc32c": target_path.split("/")[3] if target_path.startswith("/v1/") else None,
+                    "checksum_md5": None,
+                    "error": error,
+                })
+                loaded.add(target_path)
+
+        failed = sum(1 for entry in entries if entry["state"] == "failed")
+        if entries:
+            with tempfile.NamedTemporaryFile("w", suffix=".json") as staged:
+                staged.writelines(json.dumps(entry) + "\n" for entry in entries)
+                staged.flush()
+                column_types = ", ".join(f"'{name}': '{column_type}'"
+                                         for name, column_type in LOAD_HISTORY_COLUMNS.items())
+                cursor.execute(f"""
+                    INSERT INTO {history}
+                    SELECT * FROM read_json(['{staged.name}'], format = 'newline_delimited',
+                                            columns = {{{column_types}}})
+                """)
+
+        return {
+            "loadTag": load_tag,
+            "totalFiles": len(entries),
+            "succeededFiles": len(entries) - failed,
+            "failedFiles": failed,
+            "notTriedFiles": 0,
+        }
@@ -0,0 +1,388 @@
+"""
+Filesystem-backed stand-in for GCS. Rather than faking the storage client's Python API, a real
+google.cloud.storage.Client is given a transport adapter that serves the GCS JSON API out of a local directory
+(<root>/<bucket>/<object name>), so listings, metadata/media requests, multipart and resumable uploads,
+generation preconditions and batch requests all go through the same library code paths as they do against GCS.
+An object's generation is its file's mtime in nanoseconds.
+"""
+import base64
+import hashlib
+import io
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from email.parser import Parser
+from typing import Any, Iterator, Optional
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+import google_crc32c
+import requests
+from google.auth.credentials import AnonymousCredentials
+from google.cloud import storage
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3 import HTTPResponse
+
+from benchmarks.offline.calls import ApiCalls
+
+GCS_HOST = "https://storage.googleapis.com"
+
+# GCS returns at most this many objects per listing page
+_MAX_PAGE_SIZE = 1000
+
+_STATUS_REASONS = {200: "OK", 204: "No Content", 308: "Resume Incomplete", 400: "Bad Request", 404: "Not Found",
+                   412: "Precondition Failed"}
+
+# (status, headers, body)
+_Reply = tuple[int, dict[str, str], bytes]
+
+
+def _error(status: int, message: str) -> _Reply:
+    body = json.dumps({"error": {"code": status, "message": message, "errors": [{"message": message}]}})
+    return status, {"Content-Type": "application/json"}, body.encode()
+
+
+def _json(status: int, payload: Any) -> _Reply:
+    return status, {"Content-Type": "application/json"}, json.dumps(payload).encode()
+
+
+def _sort_key(entry: os.DirEntry) -> str:  # type: ignore
+    # objects sort by full name, so a directory's contents sort as if its name ended in "/"
+    return entry.name + "/" if entry.is_dir() else entry.name
+
+
+class LocalGcs:
+    """
+    The object store behind the adapter: one directory per bucket, one file per object
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._write_lock = threading.Lock()
+        self._crc32c_cache: dict[tuple[str, int, int], str] = {}
+
+    def path(self, bucket: str, name: str) -> str:
+        return os.path.join(self.root, bucket, name)
+
+    def generation(self, bucket: str, name: str) -> Optional[int]:
+        try:
+            return os.stat(self.path(bucket, name)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def resource(self, bucket: str, name: str, with_crc32c: bool = True) -> Optional[dict[str, Any]]:
+        path = self.path(bucket, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        updated = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        resource = {
+            "kind": "storage#object",
+            "id": f"{bucket}/{name}/{stat.st_mtime_ns}",
+            "name": name,
+            "bucket": bucket,
+            "generation": str(stat.st_mtime_ns),
+            "metageneration": "1",
+            "size": str(stat.st_size),
+            "contentType": "application/json" if name.endswith(".json") else "application/octet-stream",
+            "timeCreated": updated,
+            "updated": updated,
+        }
+        if with_crc32c:
+            resource["crc32c"] = self._crc32c(path, stat.st_mtime_ns, stat.st_size)
+        return resource
+
+    def _crc32c(self, path: str, generation: int, size: int) -> str:
+        key = (path, generation, size)
+        crc32c = self._crc32c_cache.get(key)
+        if crc32c is None:
+            with open(path, "rb") as f:
+                digest = google_crc32c.Checksum(f.read()).digest()
+            crc32c = self._crc32c_cache[key] = base64.b64encode(digest).decode()
+        return crc32c
+
+    def check_generation(self, bucket: str, name: str, if_generation_match: Optional[str]) -> bool:
+        if if_generation_match is None:
+            return True
+        current = self.generation(bucket, name)
+        return (current or 0) == int(if_generation_match)
+
+    def write(self, bucket: str, name: str, data: bytes, if_generation_match: Optional[str]) -> Optional[dict]:
+        path = self.path(bucket, name)
+        with self._write_lock:
+            if not self.check_generation(bucket, name, if_generation_match):
+                return None
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            staged = f"{path}.{uuid.uuid4().hex}.uploading"
+            with open(staged, "wb") as f:
+                f.write(data)
+            os.replace(staged, path)
+        return self.resource(bucket, name)
+
+    def delete(self, bucket: str, name: str, if_generation_match: Optional[str]) -> int:
+        with self._write_lock:
+            if self.generation(bucket, name) is None:
+                return 404
+            if not self.check_generation(bucket, name, if_generation_match):
+                return 412
+            os.remove(self.path(bucket, name))
+        return 204
+
+    def iter_names(self, bucket: str, prefix: str, start_after: Optional[str]) -> Iterator[str]:
+        """
+        Yields the names of the objects under prefix in GCS listing order, starting after start_after
+        """
+        directory = prefix.rsplit("/", 1)[0] + "/" if "/" in prefix else ""
+        yield from self._walk(os.path.join(self.root, bucket, directory), directory, prefix, start_after)
+
+    def _walk(self, path: str, name_prefix: str, prefix: str, start_after: Optional[str]) -> Iterator[str]:
+        try:
+            entries = sorted(os.scandir(path), key=_sort_key)
+        except (FileNotFoundError, NotADirectoryError):
+            return
+
+        for entry in entries:
+            name = name_prefix + entry.name
+            if entry.is_dir():
+                subtree = name + "/"
+                if not (subtree.startswith(prefix) or prefix.startswith(subtree)):
+                    continue
+                # every name in the subtree sorts before the last one already returned
+                if start_after and subtree < start_after and not start_after.startswith(subtree):
+                    continue
+                yield from self._walk(entry.path, subtree, prefix, start_after)
+            elif name.startswith(prefix) and not name.endswith(".uploading"):
+                if start_after and name <= start_after:
+                    continue
+                yield name
+
+
+class LocalGcsAdapter(BaseAdapter):
+    """
+    Serves the GCS JSON API requests made by google.cloud.storage from a LocalGcs store
+    """
+
+    def __init__(self, store: LocalGcs, calls: ApiCalls):
+        super().__init__()
+        self.store = store
+        self.calls = calls
+        self._uploads: dict[str, dict[str, Any]] = {}
+        self._uploads_lock = threading.Lock()
+
+    def send(self, request: requests.PreparedRequest, stream: bool = False, timeout: Any = None,
+             verify: Any = True, cert: Any = None, proxies: Any = None) -> requests.Response:
+        body = request.body or b""
+        if isinstance(body, str):
+            body = body.encode()
+        elif not isinstance(body, bytes):
+            body = body.read()
+        request_headers = {
+            key.decode() if isinstance(key, bytes) else key: value.decode() if isinstance(value, bytes) else value
+            for key, value in request.headers.items()
+        }
+        status, headers, content = self.dispatch(request.method or "GET", request.url or "", request_headers, body)
+
+        raw = HTTPResponse(body=io.BytesIO(content), headers=headers, status=status,
+                           reason=_STATUS_REASONS.get(status, ""), preload_content=False)
+        return HTTPAdapter().build_response(request, raw)
+
+    def close(self) -> None:
+        pass
+
+    def dispatch(self, method: str, url: str, headers: dict[str, str], body: bytes) -> _Reply:
+        parsed = urlsplit(url)
+        params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        parts = parsed.path.split("/")
+
+        if parsed.path.startswith("/batch/storage/v1"):
+            return self._batch(headers, body)
+        if parsed.path.startswith("/upload/storage/v1/b/"):
+            return self._upload(method, parts[5], headers, params, body)
+        if parsed.path.startswith("/download/storage/v1/b/"):
+            return self._download(parts[5], unquote("/".join(parts[7:])), params, headers)
+        if parsed.path.startswith("/storage/v1/b/"):
+            bucket = parts[4]
+            if len(parts) <= 5:
+                self.calls.record("gcs.get_bucket")
+                return _json(200, {"kind": "storage#bucket", "name": bucket, "id": bucket})
+            if len(parts) == 6:
+                return self._list(bucket, params)
+            name = unquote("/".join(parts[6:]))
+            if method == "DELETE":
+                self.calls.record("gcs.delete")
+                status = self.store.delete(bucket, name, params.get("ifGenerationMatch"))
+                return _error(status, name) if status != 204 else (204, {}, b"")
+            if params.get("alt") == "media":
+                return self._download(bucket, name, params, headers)
+            return self._metadata(bucket, name, params)
+
+        return _error(400, f"Unsupported request {method} {url}")
+
+    def _metadata(self, bucket: str, name: str, params: dict[str, str]) -> _Reply:
+        self.calls.record("gcs.get")
+        resource = self.store.resource(bucket, name, with_crc32c="crc32c" in params.get("fields", "crc32c"))
+        if resource is None:
+            return _error(404, f"No such object: {bucket}/{name}")
+        if not self.store.check_generation(bucket, name, params.get("ifGenerationMatch")):
+            return _error(412, f"Generation mismatch for {bucket}/{name}")
+        return _json(200, resource)
+
+    def _list(self, bucket: str, params: dict[str, str]) -> _Reply:
+        self.calls.record("gcs.list")
+        prefix = params.get("prefix", "")
+        delimiter = params.get("delimiter")
+        page_size = min(int(params.get("maxResults", _MAX_PAGE_SIZE)), _MAX_PAGE_SIZE)
+        with_crc32c = "crc32c" in params.get("fields", "crc32c")
+
+        items = []
+        prefixes: set[str] = set()
+        last_name = None
+        names = self.store.iter_names(bucket, prefix, params.get("pageToken"))
+        for name in names:
+            last_name = name
+            if delimiter and delimiter in name[len(prefix):]:
+                prefixes.add(name[:name.index(delimiter, len(prefix)) + len(delimiter)])
+            else:
+                resource = self.store.resource(bucket, name, with_crc32c)
+                if resource:
+                    items.append(resource)
+            if len(items) + len(prefixes) >= page_size:
+                break
+
+        payload: dict[str, Any] = {"kind": "storage#objects", "items": items}
+        if prefixes:
+            payload["prefixes"] = sorted(prefixes)
+        if last_name is not None and next(names, None) is not None:
+            payload["nextPageToken"] = last_name
+        return _json(200, payload)
+
+    def _download(self, bucket: str, name: str, params: dict[str, str], headers: dict[str, str]) -> _Reply:
+        self.calls.record("gcs.download")
+        if not self.store.check_generation(bucket, name, params.get("ifGenerationMatch")):
+            return _error(412, f"Generation mismatch for {bucket}/{name}")
+        try:
+            with open(self.store.path(bucket, name), "rb") as f:
+                content = f.read()
+        except (FileNotFoundError, IsADirectoryError):
+            return _error(404, f"No such object: {bucket}/{name}")
+
+        requested_range = headers.get("Range") or headers.get("range")
+        if requested_range and requested_range.startswith("bytes="):
+            start, _, end = requested_range[len("bytes="):].partition("-")
+            content = content[int(start):int(end) + 1 if end else None]
+            return 206, {"Content-Length": str(len(content))}, content
+
+        md5 = base64.b64encode(hashlib.md5(content).digest()).decode()
+        return 200, {
+            "Content-Length": str(len(content)),
+            "x-goog-hash": f"md5={md5}",
+            "x-goog-generation": str(self.store.generation(bucket, name)),
+        }, content
+
+    def _upload(self, method: str, bucket: str, headers: dict[str, str], params: dict[str, str],
+                body: bytes) -> _Reply:
+        upload_type = params.get("uploadType")
+        if upload_type == "multipart":
+            self.calls.record("gcs.upload")
+            metadata, content = self._parse_multipart(headers, body)
+            return self._finish_upload(bucket, metadata.get("name") or params["name"], content,
+                                       params.get("ifGenerationMatch"))
+        if upload_type == "media":
+            self.calls.record("gcs.upload")
+            return self._finish_upload(bucket, params["name"], body, params.get("ifGenerationMatch"))
+        if upload_type == "resumable" and method == "POST":
+            self.calls.record("gcs.upload")
+            metadata = json.loads(body) if body else {}
+            upload_id = uuid.uuid4().hex
+            with self._uploads_lock:
+                self._uploads[upload_id] = {
+                    "name": metadata.get("name") or params.get("name"),
+                    "if_generation_match": params.get("ifGenerationMatch"),
+                    "data": bytearray(),
+                }
+            location = f"{GCS_HOST}/upload/storage/v1/b/{bucket}/o?uploadType=resumable&upload_id={upload_id}"
+            return 200, {"Location": location}, b""
+        if upload_type == "resumable":
+            self.calls.record("gcs.upload_chunk")
+            return self._resumable_chunk(bucket, params["upload_id"], headers, body)
+        return _error(400, f"Unsupported upload type {upload_type}")
+
+    def _resumable_chunk(self, bucket: str, upload_id: str, headers: dict[str, str], body: bytes) -> _Reply:
+        with self._uploads_lock:
+            upload = self._uploads[upload_id]
+        upload["data"].extend(body)
+
+        # Content-Range: bytes <start>-<end>/<total or *>, or bytes */<total> for an empty final chunk
+        content_range = headers.get("Content-Range") or headers.get("content-range") or ""
+        total = content_range.rsplit("/", 1)[-1]
+        if total == "*":
+            return 308, {"Range": f"bytes=0-{len(upload['data']) - 1}"}, b""
+
+        with self._uploads_lock:
+            self._uploads.pop(upload_id)
+        return self._finish_upload(bucket, upload["name"], bytes(upload["data"]), upload["if_generation_match"])
+
+    def _finish_upload(self, bucket: str, name: str, content: bytes, if_generation_match: Optional[str]) -> _Reply:
+        resource = self.store.write(bucket, name, content, if_generation_match)
+        if resource is None:
+            return _error(412, f"Generation mismatch for {bucket}/{name}")
+        return _json(200, resource)
+
+    @staticmethod
+    def _parse_multipart(headers: dict[str, str], body: bytes) -> tuple[dict[str, Any], bytes]:
+        content_type = headers.get("Content-Type") or headers.get("content-type") or ""
+        boundary = content_type.split("boundary=", 1)[1].strip('"').encode()
+        # parts are separated by --boundary; the first holds the JSON metadata, the second the media
+        parts = body.split(b"--" + boundary)
+        metadata_part, media_part = parts[1], parts[2]
+        metadata = json.loads(metadata_part.split(b"\r\n\r\n", 1)[1].strip())
+        media = media_part.split(b"\r\n\r\n", 1)[1]
+        return metadata, media[:-2] if media.endswith(b"\r\n") else media
+
+    def _batch(self, headers: dict[str, str], body: bytes) -> _Reply:
+        self.calls.record("gcs.batch")
+        content_type = headers.get("Content-Type") or headers.get("content-type") or ""
+        message = Parser().parsestr(f"Content-Type: {content_type}\nMIME-Version: 1.0\n\n{body.decode()}")
+
+        boundary = f"batch_{uuid.uuid4().hex}"
+        response_parts = []
+        for index, part in enumerate(message.get_payload()):
+            request_line, rest = part.get_payload().replace("\r\n", "\n").split("\n", 1)
+            method, url, _ = request_line.split(" ", 2)
+            sub_headers_raw, _, sub_body = rest.partition("\n\n")
+            sub_headers = dict(line.split(": ", 1) for line in sub_headers_raw.split("\n") if ": " in line)
+            status, reply_headers, reply_body = self.dispatch(method, url, sub_headers, sub_body.encode())
+            reply_header_lines = "".join(f"{key}: {value}\r\n" for key, value in reply_headers.items())
+            response_parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{index}>\r\n\r\n"
+                f"HTTP/1.1 {status} {_STATUS_REASONS.get(status, '')}\r\n{reply_header_lines}\r\n"
+                f"{reply_body.decode()}\r\n"
+            )
+        payload = "".join(response_parts) + f"--{boundary}--\r\n"
+        return 200, {"Content-Type": f"multipart/mixed; boundary={boundary}"}, payload.encode()
+
+
+def local_storage_client(root: str, calls: ApiCalls, project: str = "benchmark-project") -> storage.Client:
+    """
+    Returns a storage client whose requests are served from the given directory instead of GCS
+    """
+    client = storage.Client(project=project, credentials=AnonymousCredentials())
+    client._http.mount(f"{GCS_HOST}/", LocalGcsAdapter(LocalGcs(root), calls))
+    return client
+
+
+def local_path(root: str, gs_path: str) -> str:
+    """
+    Maps a gs://bucket/name path to its location under the given root
+    """
+    parsed = urlsplit(gs_path)
+    return os.path.join(root, parsed.netloc, unquote(parsed.path.lstrip("/")))
+
+
+def quote_name(name: str) -> str:
+    return quote(name, safe="")
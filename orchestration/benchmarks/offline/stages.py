@@ -0,0 +1,242 @@
+"""
+The pipeline stages the offline benchmark times, and the environment they run in. A benchmark's work dir holds
+benchmark.json (the settings and ids shared by all stages), bench.duckdb (BigQuery and TDR state) and gcs/ (the
+local GCS root). Each stage runs in its own process so its peak RSS is measured on its own.
+"""
+import json
+import logging
+import os
+import resource
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Iterator
+
+from dagster import ResourceDefinition, in_process_executor
+from dagster_utils.resources.slack import console_slack_client
+
+from benchmarks.offline.bigquery import DuckDbBigQueryClient, duckdb
+from benchmarks.offline.calls import ApiCalls
+from benchmarks.offline.data_repo import FakeRepositoryApi, FakeTdrDataset, create_tdr_dataset
+from benchmarks.offline.gcs import local_storage_client
+from benchmarks.offline.staging_area import pre_process_staging_area
+from hca_manage import verify_release_manifest
+from hca_manage.check import CheckManager
+from hca_manage.verify_subgraphs import verify_single_project
+from hca_orchestration.config import preconfigure_resource_for_mode
+from hca_orchestration.contrib.bigquery_clients import clear_bigquery_clients, register_bigquery_client
+from hca_orchestration.pipelines.load_hca import load_hca
+from hca_orchestration.resources import bigquery_service, load_tag
+from hca_orchestration.resources.config.dagit import dagit_config
+from hca_orchestration.resources.config.datasets import passthrough_hca_dataset
+from hca_orchestration.resources.config.scratch import scratch_config
+from hca_orchestration.resources.data_repo_service import data_repo_service
+from hca_orchestration.resources.load_checkpoints import in_memory_load_checkpoints
+from hca_orchestration.resources.load_scheduler import load_scheduler
+from hca_orchestration.resources.tdr_job_watcher import tdr_job_watcher
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "schema.json")
+
+BQ_PROJECT = "benchmark-project"
+STAGING_BUCKET = "benchmark-staging"
+SCRATCH_BUCKET = "benchmark-scratch"
+
+
+@dataclass
+class BenchmarkSettings:
+    files: int
+    projects: int
+    dataset_name: str = "hca_benchmark"
+    dataset_id: str = ""
+    staging_area: str = f"gs://{STAGING_BUCKET}/staging-area"
+    # simulated TDR behaviour
+    job_latency_seconds: float = 0.0
+    files_per_second: float = 0.0
+    # pipeline tuning, passed to the load_hca resources and solids
+    max_workers: int = 4
+    bigquery_concurrency: int = 4
+    tdr_ingest_concurrency: int = 4
+    max_concurrent_bulk_loads: int = 4
+    control_file_max_files: int = 10_000
+    pool_size: int = 8
+    project_ids: list[str] = field(default_factory=list)
+
+    @staticmethod
+    def path(work_dir: str) -> str:
+        return os.path.join(work_dir, "benchmark.json")
+
+    def save(self, work_dir: str) -> None:
+        with open(self.path(work_dir), "w") as f:
+            json.dump(asdict(self), f, indent=2)
+
+    @classmethod
+    def load(cls, work_dir: str) -> "BenchmarkSettings":
+        with open(cls.path(work_dir)) as f:
+            return cls(**json.load(f))
+
+
+class BenchmarkEnvironment:
+    """
+    The stand-in clients for one stage process, all sharing one DuckDB database and one local GCS root
+    """
+
+    def __init__(self, work_dir: str, settings: BenchmarkSettings):
+        self.work_dir = work_dir
+        self.settings = settings
+        self.gcs_root = os.path.join(work_dir, "gcs")
+        self.calls = ApiCalls()
+        self.connection = duckdb.connect(os.path.join(work_dir, "bench.duckdb"))
+        self.dataset = FakeTdrDataset(settings.dataset_name, id=settings.dataset_id, data_project=BQ_PROJECT)
+        create_tdr_dataset(self.connection, self.dataset, SCHEMA_PATH)
+        self.storage_client = local_storage_client(self.gcs_root, self.calls, project=BQ_PROJECT)
+        self.bigquery_client = DuckDbBigQueryClient(self.connection, self.gcs_root, self.calls, project=BQ_PROJECT)
+        self.data_repo_client = FakeRepositoryApi(
+            self.connection, self.gcs_root, self.calls, self.dataset,
+            job_latency_seconds=settings.job_latency_seconds,
+            files_per_second=settings.files_per_second
+        )
+        # the hca_manage checks look their BigQuery client up by project
+        register_bigquery_client(self.bigquery_client, BQ_PROJECT)
+
+    def close(self) -> None:
+        self.data_repo_client.close()
+        self.bigquery_client.close()
+        clear_bigquery_clients()
+        self.connection.close()
+
+
+def run_load_hca(env: BenchmarkEnvironment) -> None:
+    settings = env.settings
+
+    class _PreProcessRunner:
+        def run(self, run_arg_dict: dict[str, str], **kwargs: Any) -> None:
+            pre_process_staging_area(env.gcs_root, run_arg_dict["inputPrefix"], run_arg_dict["outputPrefix"])
+
+    job = load_hca.to_job(
+        name="load_hca_benchmark",
+        resource_defs={
+            "beam_runner": ResourceDefinition.hardcoded_resource(_PreProcessRunner()),
+            "bigquery_client": ResourceDefinition.hardcoded_resource(env.bigquery_client),
+            "data_repo_client": ResourceDefinition.hardcoded_resource(env.data_repo_client),
+            "gcs": ResourceDefinition.hardcoded_resource(env.storage_client),
+            "load_tag": load_tag,
+            "load_scheduler": load_scheduler,
+            "load_checkpoints": in_memory_load_checkpoints,
+            "scratch_config": scratch_config,
+            "target_hca_dataset": passthrough_hca_dataset,
+            "bigquery_service": bigquery_service,
+            "data_repo_service": data_repo_service,
+            "tdr_job_watcher": tdr_job_watcher,
+            "slack": console_slack_client,
+            "dagit_config": preconfigure_resource_for_mode(dagit_config, "test"),
+        },
+        executor_def=in_process_executor
+    )
+    result = job.execute_in_process(run_config={
+        "resources": {
+            "load_tag": {"config": {"load_tag_prefix": "benchmark", "append_run_id": True}},
+            "load_scheduler": {"config": {
+                "max_workers": settings.max_workers,
+                "bigquery_concurrency": settings.bigquery_concurrency,
+                "tdr_ingest_concurrency": settings.tdr_ingest_concurrency,
+            }},
+            "scratch_config": {"config": {
+                "scratch_bucket_name": SCRATCH_BUCKET,
+                "scratch_bq_project": BQ_PROJECT,
+                "scratch_dataset_prefix": "benchmark_scratch",
+                "scratch_table_expiration_ms": 86400000,
+            }},
+            "target_hca_dataset": {"config": {"dataset_id": settings.dataset_id}},
+            "tdr_job_watcher": {"config": {"initial_poll_interval_seconds": 0.05, "max_poll_interval_seconds": 1.0}},
+        },
+        "solids": {
+            "pre_process_metadata": {"config": {"input_prefix": settings.staging_area}},
+            "import_data_files": {"solids": {
+                "diff_file_loads": {"config": {"control_file_max_files": settings.control_file_max_files}},
+                "bulk_ingest_control_files": {"config": {
+                    "max_concurrent_bulk_loads": settings.max_concurrent_bulk_loads
+                }},
+            }},
+        },
+    })
+    if not result.success:
+        raise RuntimeError("load_hca failed")
+
+
+def run_check_manager(env: BenchmarkEnvironment) -> None:
+    problems = CheckManager(
+        environment="dev",
+        project=BQ_PROJECT,
+        dataset=env.settings.dataset_name,
+        data_repo_client=env.data_repo_client,
+        snapshot=False
+    ).check_for_all()
+    if problems.has_problems():
+        raise RuntimeError(f"Dataset has problems: {problems}")
+
+
+def run_verify_subgraphs(env: BenchmarkEnvironment) -> None:
+    for project_id in env.settings.project_ids:
+        verify_single_project(BQ_PROJECT, env.settings.dataset_name, snapshot=False, project_id=project_id,
+                              project_only=len(env.settings.project_ids) == 1)
+
+
+def run_verify_release_manifest(env: BenchmarkEnvironment) -> None:
+    manifest = os.path.join(env.work_dir, "manifest.csv")
+    with open(manifest, "w") as f:
+        f.write(env.settings.staging_area + "\n")
+    exit_code = verify_release_manifest.verify(
+        manifest, BQ_PROJECT, BQ_PROJECT, env.settings.dataset_name, env.settings.pool_size,
+        release_cutoff="2030-01-01T00:00:00", storage_client=env.storage_client
+    )
+    if exit_code:
+        raise RuntimeError("Release manifest verification failed")
+
+
+STAGES: dict[str, Callable[[BenchmarkEnvironment], None]] = {
+    "load_hca": run_load_hca,
+    "check_manager": run_check_manager,
+    "verify_subgraphs": run_verify_subgraphs,
+    "verify_release_manifest": run_verify_release_manifest,
+}
+
+
+@dataclass
+class StageResult:
+    stage: str
+    seconds: float
+    peak_rss_mib: float
+    calls: dict[str, int]
+
+
+def run_stage(work_dir: str, stage: str) -> StageResult:
+    """
+    Runs one stage against the benchmark in the given work dir. Meant to be the only thing its process does,
+    so that the reported peak RSS belongs to the stage.
+    """
+    logging.basicConfig(level=logging.WARNING)
+    env = BenchmarkEnvironment(work_dir, BenchmarkSettings.load(work_dir))
+    try:
+        start = time.monotonic()
+        STAGES[stage](env)
+        seconds = time.monotonic() - start
+    finally:
+        env.close()
+    # ru_maxrss is in KiB on Linux
+    peak_rss_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return StageResult(stage, seconds, peak_rss_mib, env.calls.snapshot())
+
+
+def format_results(results: list[StageResult]) -> Iterator[str]:
+    services = sorted({call.split(".", 1)[0] for result in results for call in result.calls})
+    header = f"{'stage':<26}{'seconds':>10}{'peak MiB':>10}"
+    header += "".join(f"{service + ' calls':>16}" for service in services)
+    yield header
+    yield "-" * len(header)
+    for result in results:
+        totals = ApiCalls()
+        for call, count in result.calls.items():
+            totals.record(call, count)
+        by_service = totals.totals_by_service()
+        yield f"{result.stage:<26}{result.seconds:>10.2f}{result.peak_rss_mib:>10.1f}" + "".join(
+            f"{by_service.get(service, 0):>16}" for service in services
+        )
@@ -0,0 +1,275 @@
+"""
+Synthetic HCA staging areas, and a Python stand-in for the Beam pre-processing pipeline (HcaPipelineBuilder)
+that turns a staging area into the scratch files load_hca reads.
+
+A generated staging area has the layout of a real one (metadata/<type>, descriptors/<file type>, data and links,
+with metadata files named <id>_<version>.json and links files <links id>_<version>_<project id>.json). Each group
+of files is described by a donor, specimen, cell suspension and process and tied together by a links file, so
+row counts across tables scale with the number of files the way they do in real projects. Data files are a few
+bytes each; the load pipeline only ever looks at their names and sizes.
+"""
+import json
+import os
+import uuid
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from random import Random
+from typing import Any, Iterator, Optional, TextIO
+
+from benchmarks.offline.gcs import local_path
+from hca_orchestration.solids.load_hca.data_files.load_data_metadata_files import FileMetadataTypes
+from hca_orchestration.solids.load_hca.non_file_metadata.load_non_file_metadata import NonFileMetadataTypes
+from hca_orchestration.support.dates import HCA_VERSION_FORMAT
+
+SCHEMA_BASE_URL = "https://schema.humancellatlas.org"
+STAGED_AT = datetime(2021, 6, 1)
+
+# files described by each process (and linked by each links file), and the share of each file type
+FILES_PER_PROCESS = 4
+FILE_TYPE_WEIGHTS = [
+    ("sequence_file", 7),
+    ("analysis_file", 2),
+    ("supplementary_file", 1),
+]
+
+# rows per part file written by the pre-processing stand-in
+ROWS_PER_SHARD = 10_000
+
+
+@dataclass
+class StagingAreaSize:
+    project_ids: list[str]
+    files: int = 0
+    metadata_entities: int = 0
+    links: int = 0
+
+
+def _version(rng: Random) -> str:
+    return (STAGED_AT + timedelta(seconds=rng.randrange(86400 * 30))).strftime(HCA_VERSION_FORMAT)
+
+
+def _entity_id(rng: Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+class _StagingAreaWriter:
+    def __init__(self, root: str):
+        self.root = root
+        self._made_dirs: set[str] = set()
+
+    def write(self, path: str, content: str) -> None:
+        full_path = os.path.join(self.root, path)
+        directory = os.path.dirname(full_path)
+        if directory not in self._made_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._made_dirs.add(directory)
+        with open(full_path, "w") as f:
+            f.write(content)
+
+
+def generate_staging_area(gcs_root: str, staging_area: str, files: int, projects: int = 1,
+                          seed: int = 0) -> StagingAreaSize:
+    """
+    Writes a staging area holding the given number of data files, spread evenly over the given number of
+    projects, to gs://<bucket>/<prefix> under the local GCS root
+    """
+    rng = Random(seed)
+    writer = _StagingAreaWriter(local_path(gcs_root, staging_area))
+    size = StagingAreaSize(project_ids=[])
+
+    def _entity(entity_type: str, **content: Any) -> str:
+        entity_id = _entity_id(rng)
+        version = _version(rng)
+        writer.write(f"metadata/{entity_type}/{entity_id}_{version}.json", json.dumps({
+            "describedBy": f"{SCHEMA_BASE_URL}/type/{entity_type}",
+            "schema_type": entity_type,
+            "provenance": {"document_id": entity_id, "submission_date": version, "update_date": version},
+            **content
+        }))
+        size.metadata_entities += 1
+        return entity_id
+
+    file_types = [file_type for file_type, weight in FILE_TYPE_WEIGHTS for _ in range(weight)]
+    for project_index in range(projects):
+        project_files = files // projects + (1 if project_index < files % projects else 0)
+        project_id = _entity(
+            "project", project_core={"project_short_name": f"benchmark_{project_index}"}
+        )
+        size.project_ids.append(project_id)
+        protocol_ids = [
+            _entity(protocol_type, protocol_core={"protocol_id": f"{protocol_type}_{project_index}"})
+            for protocol_type in ["library_preparation_protocol", "sequencing_protocol", "dissociation_protocol"]
+        ]
+
+        for group_start in range(0, project_files, FILES_PER_PROCESS):
+            donor_id = _entity("donor_organism", biomaterial_core={"biomaterial_id": f"donor_{group_start}"})
+            specimen_id = _entity("specimen_from_organism",
+                                  biomaterial_core={"biomaterial_id": f"specimen_{group_start}"})
+            suspension_id = _entity("cell_suspension",
+                                    biomaterial_core={"biomaterial_id": f"suspension_{group_start}"})
+            process_id = _entity("process", process_core={"process_id": f"process_{group_start}"})
+
+            outputs = []
+            for file_index in range(group_start, min(group_start + FILES_PER_PROCESS, project_files)):
+                file_type = file_types[(size.files + file_index) % len(file_types)]
+                file_name = f"p{project_index}_{file_index}.fastq.gz"
+                data = f"{project_id}/{file_name}\n".encode()
+                writer.write(f"data/{file_name}", data.decode())
+
+                file_entity_id = _entity_id(rng)
+                version = _version(rng)
+                metadata_name = f"{file_entity_id}_{version}.json"
+                writer.write(f"metadata/{file_type}/{metadata_name}", json.dumps({
+                    "describedBy": f"{SCHEMA_BASE_URL}/type/file/{file_type}",
+                    "schema_type": "file",
+                    "file_core": {"file_name": file_name, "format": "fastq.gz"},
+                    "provenance": {"document_id": file_entity_id, "submission_date": version},
+                }))
+                writer.write(f"descriptors/{file_type}/{metadata_name}", json.dumps({
+                    "describedBy": f"{SCHEMA_BASE_URL}/system/file_descriptor",
+                    "schema_type": "file_descriptor",
+                    "content_type": "application/gzip",
+                    "size": len(data),
+                    "crc32c": f"{zlib.crc32(data):08x}",
+                    "file_id": _entity_id(rng),
+                    "file_version": version,
+                    "file_name": file_name,
+                }))
+                size.metadata_entities += 1
+                outputs.append({"output_type": file_type, "output_id": file_entity_id})
+
+            links_id = _entity_id(rng)
+            writer.write(f"links/{links_id}_{_version(rng)}_{project_id}.json", json.dumps({
+                "describedBy": f"{SCHEMA_BASE_URL}/system/links",
+                "schema_type": "link_bundle",
+                "links": [
+                    {
+                        "link_type": "process_link",
+                        "process_type": "process",
+                        "process_id": process_id,
+                        "inputs": [
+                            {"input_type": "donor_organism", "input_id": donor_id},
+                            {"input_type": "specimen_from_organism", "input_id": specimen_id},
+                            {"input_type": "cell_suspension", "input_id": suspension_id},
+                        ],
+                        "outputs": outputs,
+                        "protocols": [
+                            {"protocol_type": protocol_type, "protocol_id": protocol_id}
+                            for protocol_type, protocol_id in zip(
+                                ["library_preparation_protocol", "sequencing_protocol", "dissociation_protocol"],
+                                protocol_ids
+                            )
+                        ]
+                    }
+                ]
+            }))
+            size.links += 1
+        size.files += project_files
+
+    return size
+
+
+class _ShardedJsonWriter:
+    """
+    Writes rows as newline delimited JSON to part files of at most ROWS_PER_SHARD rows. Like Beam's text sink,
+    an empty output still gets one (empty) part file.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._file: Optional[TextIO] = None
+        self._shard = 0
+        self._rows = 0
+
+    def write(self, row: dict[str, Any]) -> None:
+        if self._file is None or self._rows == ROWS_PER_SHARD:
+            self._next_shard()
+        assert self._file
+        self._file.write(json.dumps(row, separators=(",", ":")) + "\n")
+        self._rows += 1
+
+    def _next_shard(self) -> None:
+        if self._file:
+            self._file.close()
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = open(os.path.join(self.directory, f"part-{self._shard:05d}.json"), "w")
+        self._shard += 1
+        self._rows = 0
+
+    def close(self) -> None:
+        if self._file is None:
+            self._next_shard()
+        assert self._file
+        self._file.close()
+
+
+def _read_json_files(directory: str) -> Iterator[tuple[str, dict[str, Any]]]:
+    if not os.path.isdir(directory):
+        return
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".json"):
+            with open(os.path.join(directory, name)) as f:
+                yield name, json.load(f)
+
+
+def _encode(content: dict[str, Any]) -> str:
+    return json.dumps(content, separators=(",", ":"))
+
+
+def pre_process_staging_area(gcs_root: str, input_prefix: str, output_prefix: str) -> None:
+    """
+    Produces the same outputs as the Beam pre-processing pipeline for the given staging area: a metadata row per
+    entity (with the descriptor, crc32c and target path for file entities), a data transfer request per distinct
+    file, and a row per links file. JSON schema validation of the entities is skipped.
+    """
+    input_root = local_path(gcs_root, input_prefix)
+    output_root = local_path(gcs_root, output_prefix)
+
+    for metadata_type in NonFileMetadataTypes:
+        entity_type = metadata_type.value
+        if entity_type == "links":
+            continue
+        writer = _ShardedJsonWriter(os.path.join(output_root, "metadata", entity_type))
+        for name, content in _read_json_files(os.path.join(input_root, "metadata", entity_type)):
+            entity_id, version = name[:-len(".json")].split("_")
+            writer.write({f"{entity_type}_id": entity_id, "version": version, "content": _encode(content)})
+        writer.close()
+
+    for file_metadata_type in FileMetadataTypes:
+        entity_type = file_metadata_type.value
+        writer = _ShardedJsonWriter(os.path.join(output_root, "metadata", entity_type))
+        requests = _ShardedJsonWriter(os.path.join(output_root, "data-transfer-requests", entity_type))
+        requested_file_ids: set[str] = set()
+        descriptors_dir = os.path.join(input_root, "descriptors", entity_type)
+        for name, content in _read_json_files(os.path.join(input_root, "metadata", entity_type)):
+            descriptor_path = os.path.join(descriptors_dir, name)
+            if not os.path.exists(descriptor_path):
+                continue
+            with open(descriptor_path) as f:
+                descriptor = json.load(f)
+            entity_id, version = name[:-len(".json")].split("_")
+            target_path = f"/v1/{descriptor['file_id']}/{descriptor['crc32c']}/{descriptor['file_name']}"
+            writer.write({
+                f"{entity_type}_id": entity_id,
+                "version": version,
+                "content": _encode(content),
+                "crc32c": descriptor["crc32c"],
+                "target_path": target_path,
+                "descriptor": _encode(descriptor),
+            })
+            if "drs_uri" not in descriptor and descriptor["file_id"] not in requested_file_ids:
+                requested_file_ids.add(descriptor["file_id"])
+                requests.write({
+                    "source_path": f"{input_prefix}/data/{descriptor['file_name']}",
+                    "target_path": target_path,
+                })
+        writer.close()
+        requests.close()
+
+    writer = _ShardedJsonWriter(os.path.join(output_root, "metadata", "links"))
+    for name, content in _read_json_files(os.path.join(input_root, "links")):
+        links_id, version, project_id = name[:-len(".json")].split("_")
+        writer.write({"content": _encode(content), "links_id": links_id, "version": version,
+                      "project_id": project_id})
+    writer.close()
@@ -0,0 +1,71 @@
+"""
+Benchmarks building the expected node set for subgraph verification from a synthetic links table.
+
+"legacy" parses every links row into a Subgraph and builds per-type MetadataEntity lists (build_subgraph_nodes);
+"index" streams the rows into a SubgraphNodeIndex (index_subgraph_nodes). The synthetic subgraphs share their
+protocols and draw inputs from a common pool, the way sequencing runs of an atlas-scale project do. Each mode runs
+in a fresh interpreter so the reported peak RSS is its own.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from typing import Iterator
+
+from hca_orchestration.models.entities import build_subgraph_from_links_row
+from hca_orchestration.support.subgraphs import build_subgraph_nodes, index_subgraph_nodes
+
+MODES = ["legacy", "index"]
+
+
+def synthetic_links_rows(num_links: int, num_inputs: int = 50_000, num_protocols: int = 20) -> Iterator[dict]:
+    """
+    Yields links table rows, each a process link with two shared inputs, two unique outputs and three
+    shared protocols
+    """
+    for link_index in range(num_links):
+        links = [{
+            "link_type": "process_link",
+            "process_id": f"{link_index:08d}-process",
+            "process_type": "analysis_process",
+            "inputs": [{"input_id": f"{(link_index + offset) % num_inputs:08d}-input", "input_type": "sequence_file"}
+                       for offset in range(2)],
+            "outputs": [{"output_id": f"{link_index:08d}-output-{offset}", "output_type": "analysis_file"}
+                        for offset in range(2)],
+            "protocols": [{"protocol_id": f"{(link_index + offset) % num_protocols:08d}-protocol",
+                           "protocol_type": "analysis_protocol"}
+                          for offset in range(3)],
+        }]
+        yield {"links_id": f"{link_index:08d}-links", "content": json.dumps({"links": links})}
+
+
+def run(mode: str, num_links: int) -> tuple[float, int]:
+    started = time.perf_counter()
+    if mode == "legacy":
+        nodes = build_subgraph_nodes([build_subgraph_from_links_row(row) for row in synthetic_links_rows(num_links)])
+        node_count = sum(len(entities) for entities in nodes.values())
+    else:
+        node_count = len(index_subgraph_nodes(synthetic_links_rows(num_links)))
+    return time.perf_counter() - started, node_count
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("-n", "--num-links", type=int, default=500_000)
+    argparser.add_argument("--mode", choices=MODES, help="Run a single mode in this process")
+    args = argparser.parse_args()
+
+    if args.mode:
+        elapsed, node_count = run(args.mode, args.num_links)
+        # ru_maxrss is reported in KiB on linux
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(f"{args.mode:>8} {node_count:>12} {elapsed:>10.2f} {peak_rss / 1024:>14.2f}")
+    else:
+        print(f"{'mode':>8} {'nodes':>12} {'seconds':>10} {'peak RSS MiB':>14}")
+        for mode in MODES:
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.subgraph_nodes", "--mode", mode, "-n", str(args.num_links)],
+                check=True
+            )
@@ -1,13 +1,90 @@
 import logging
-import os
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Callable
+from typing import Callable, Iterable, Iterator
 
 from google.cloud import bigquery
 
-from hca_manage.common import populate_row_id_csv
 from hca_manage.soft_delete import SoftDeleteManager
+from hca_orchestration.contrib.bigquery_clients import get_bigquery_client
+from hca_orchestration.contrib.row_counts import TableRowCounts
+
+
+def duplicate_row_ids_query(project: str, dataset: str, target_table: str) -> str:
+    """
+    Builds a query selecting the row ids (as rid) of every non-latest version of entities in the target table
+    """
+    sql_table = f"`{project}.{dataset}.{target_table}`"
+
+    # rid -> row_id, fid -> file_id, v -> version
+
+    # allRows:          the row ids, file ids, and versions of all rows in the target table
+    # latestFids:       For all file ids that occur more than once, get the file id and the largest (latest)
+    #                   version
+    # ridsOfAllFids:    The row ids, file ids, and versions of all file ids present in latestFids; in other words,
+    #                   the (row id, file id, version) for every file id that has duplicates
+    # ridsOfLatestFids: The row ids, file ids, and versions of all file ids present in latestFids but ONLY the
+    #                   latest version rows (so a subset of ridsOfAllFids).
+    # Final query:      Get the row ids from ridsOfAllFids but exclude the row ids from ridsOfLatestFids, leaving
+    #                   us with the row ids of all non-latest version file ids. These are the rows to soft delete.
+
+    # Note: The EXCEPT DISTINCT SELECT at the end grabs all row ids of rows that AREN'T the latest version.
+    # The final subquery here is in case there are multiple rows with the same version.
+    return f"""
+    WITH allRows AS (
+        SELECT datarepo_row_id AS rid, {target_table}_id AS fid, version AS v
+        FROM {sql_table}),
+    latestFids AS (
+        SELECT DISTINCT fid, MAX(v) AS maxv
+        FROM allRows
+        GROUP BY fid
+        HAVING COUNT(1) > 1),
+    ridsOfAllFids AS (
+        SELECT t.rid AS rid, f.fid, t.v
+        FROM latestFids f
+        JOIN allRows t
+          ON t.fid = f.fid),
+    ridsOfLatestFids AS (
+        SELECT t.rid AS rid, f.fid, f.maxv
+        FROM latestFids f
+        JOIN ridsOfAllFids t
+          ON t.fid = f.fid AND t.v = f.maxv)
+    SELECT rid
+    FROM ridsOfAllFids
+    EXCEPT DISTINCT SELECT rid
+                    FROM (
+                        SELECT MAX(rid) AS rid, fid
+                        FROM ridsOfLatestFids
+                        GROUP BY fid)
+    """
+
+
+def null_file_ref_row_ids_query(project: str, dataset: str, target_table: str) -> str:
+    """
+    Builds a query selecting the row ids of rows in the target table with a null file_id
+    """
+    # TODO we are allowing null file_ids if there is a `drs_uri` field in the descriptor (these are
+    # "bring your own" DRS file references that are hosted outside of TDR). We should be smarter about parsing
+    # the descriptor and ensuring a sane value rather than the fuzzy matching we're doing here
+    return f"""
+    SELECT datarepo_row_id
+    FROM `{project}.{dataset}.{target_table}` WHERE file_id IS NULL AND descriptor NOT LIKE '%"drs_uri":%'
+    """
+
+
+def dangling_project_ref_ids_query(project: str, dataset: str, target_table: str) -> str:
+    """
+    Builds a query selecting the ids of links rows whose project_id has no corresponding row in the project table
+    """
+    return f"""
+    SELECT links.links_id
+    FROM `{project}.{dataset}.{target_table}` links
+             LEFT JOIN
+         `{project}.{dataset}.project` projects
+         ON
+             {target_table}.project_id = projects.project_id
+    WHERE projects.project_id IS NULL
+    """
 
 
 # this hacky nonsense is because mypy currently can't reckon with abstract dataclasses
@@ -22,10 +99,10 @@ class _BQRowDataclass:
 class BQRowManager(_BQRowDataclass, ABC):
     @property
     def bigquery_client(self) -> bigquery.client.Client:
-        return bigquery.Client(project=self.project)
+        return get_bigquery_client(self.project)
 
     @abstractmethod
-    def get_rows(self, target_table: str) -> set[str]:
+    def get_rows(self, target_table: str) -> tuple[int, Iterable[str]]:
         pass
 
     @abstractmethod
@@ -41,38 +118,44 @@ class BQRowManager(_BQRowDataclass, ABC):
         query_job = self.bigquery_client.query(query)
         return {row[0] for row in query_job}
 
+    def _stream_bigquery(self, query: str) -> tuple[int, Iterator[str]]:
+        """
+        Runs a single column query without materializing its results.
+        :param query: The SQL query to run.
+        :return: The number of result rows, and a lazy iterator over their first column that pages through the
+        results as it is consumed.
+        """
+        rows = self.bigquery_client.query(query).result()
+        return rows.total_rows, (row[0] for row in rows)
+
     def _check_or_delete_rows(
         self,
         get_table_names: Callable[[], set[str]],
-        get_rids: Callable[[str], set[str]],
+        get_rids: Callable[[str], tuple[int, Iterable[str]]],
         soft_delete: bool,
         issue: str
     ) -> int:
         """
         Perform a check or soft deletion for duplicates or null file references.
         :param get_table_names: A function that returns a set of table names.
-        :param get_rids: A function that returns a set of row ids to soft delete.
+        :param get_rids: A function that returns the number of row ids to soft delete in a table, and the row ids.
         :param soft_delete: A flag to indicate whether to just check and print, or to soft delete as well.
         :return: The number of rows to soft delete
         """
         problem_count = 0
+        rids_by_table = {}
         table_names = get_table_names()
         for table_name in table_names:
-            rids_to_process = get_rids(table_name)
-            if len(rids_to_process) > 0:
-                logging.info(f"{table_name} has {len(rids_to_process)} failing rows due to {issue}")
-                if soft_delete:
-                    local_filename = f"{os.getcwd()}/{table_name}.csv"
-                    try:
-                        # create and populate file
-                        with open(local_filename, mode="w") as wf:
-                            populate_row_id_csv(rids_to_process, wf)
-                        # do processing
-                        self.soft_delete_manager.soft_delete_rows(local_filename, table_name)
-                    finally:
-                        # delete file
-                        os.remove(local_filename)
-                problem_count += len(rids_to_process)
+            rid_count, rids_to_process = get_rids(table_name)
+            if rid_count > 0:
+                logging.info(f"{table_name} has {rid_count} failing rows due to {issue}")
+                rids_by_table[table_name] = rids_to_process
+                problem_count += rid_count
+
+        if soft_delete and rids_by_table:
+            # row ids are streamed from each query's results straight to GCS, never held in memory, and all
+            # tables are soft deleted by a single TDR job
+            self.soft_delete_manager.soft_delete_tables(rids_by_table)
         return problem_count
 
 
@@ -80,15 +163,12 @@ class BQRowManager(_BQRowDataclass, ABC):
 class CountsManager(BQRowManager):
     entity_type: str
 
-    def get_rows(self, target_table: str) -> set[str]:
-        query = f"""
-        SELECT COUNT(*) FROM `{self.project}.{self.dataset}.{self.entity_type}`
-        """
-        cnt = int(self._hit_bigquery(query).pop())
+    def get_rows(self, target_table: str) -> tuple[int, Iterable[str]]:
+        cnt = TableRowCounts(self.bigquery_client).num_rows(self.project, self.dataset, self.entity_type)
         if not cnt:
-            return {"no rows"}
+            return 1, ["no rows"]
 
-        return set()
+        return 0, []
 
     def check_or_delete_rows(self, soft_delete: bool = False) -> int:
         if soft_delete:
@@ -102,17 +182,8 @@ class CountsManager(BQRowManager):
 
 
 class DanglingFileRefManager(BQRowManager):
-    def get_rows(self, target_table: str) -> set[str]:
-        query = f"""
-        SELECT links.links_id
-        FROM `{self.project}.{self.dataset}.{target_table}` links
-                 LEFT JOIN
-             `{self.project}.{self.dataset}.project` projects
-             ON
-                 {target_table}.project_id = projects.project_id
-        WHERE projects.project_id IS NULL;
-        """
-        return self._hit_bigquery(query)
+    def get_rows(self, target_table: str) -> tuple[int, Iterable[str]]:
+        return self._stream_bigquery(dangling_project_ref_ids_query(self.project, self.dataset, target_table))
 
     def check_or_delete_rows(self, soft_delete: bool = False) -> int:
         """
@@ -131,58 +202,15 @@ class DanglingFileRefManager(BQRowManager):
 
 
 class DuplicatesManager(BQRowManager):
-    def get_rows(self, target_table: str) -> set[str]:
+    def get_rows(self, target_table: str) -> tuple[int, Iterable[str]]:
         """
         Determines what rows are undesired duplicates. We want to soft delete everything but the latest version for a
         given entity_id.
         :param target_table: The particular table to operate on.
-        :return: A set of row ids to soft delete.
+        :return: The number of row ids to soft delete, and a lazy iterator over them.
         """
-        sql_table = f"`{self.project}.{self.dataset}.{target_table}`"
-
-        # rid -> row_id, fid -> file_id, v -> version
-
-        # allRows:          the row ids, file ids, and versions of all rows in the target table
-        # latestFids:       For all file ids that occur more than once, get the file id and the largest (latest)
-        #                   version
-        # ridsOfAllFids:    The row ids, file ids, and versions of all file ids present in latestFids; in other words,
-        #                   the (row id, file id, version) for every file id that has duplicates
-        # ridsOfLatestFids: The row ids, file ids, and versions of all file ids present in latestFids but ONLY the
-        #                   latest version rows (so a subset of ridsOfAllFids).
-        # Final query:      Get the row ids from ridsOfAllFids but exclude the row ids from ridsOfLatestFids, leaving
-        #                   us with the row ids of all non-latest version file ids. These are the rows to soft delete.
-
-        # Note: The EXCEPT DISTINCT SELECT at the end grabs all row ids of rows that AREN'T the latest version.
-        # The final subquery here is in case there are multiple rows with the same version.
-        query = f"""
-        WITH allRows AS (
-            SELECT datarepo_row_id AS rid, {target_table}_id AS fid, version AS v
-            FROM {sql_table}),
-        latestFids AS (
-            SELECT DISTINCT fid, MAX(v) AS maxv
-            FROM allRows
-            GROUP BY fid
-            HAVING COUNT(1) > 1),
-        ridsOfAllFids AS (
-            SELECT t.rid AS rid, f.fid, t.v
-            FROM latestFids f
-            JOIN allRows t
-              ON t.fid = f.fid),
-        ridsOfLatestFids AS (
-            SELECT t.rid AS rid, f.fid, f.maxv
-            FROM latestFids f
-            JOIN ridsOfAllFids t
-              ON t.fid = f.fid AND t.v = f.maxv)
-        SELECT rid
-        FROM ridsOfAllFids
-        EXCEPT DISTINCT SELECT rid
-                        FROM (
-                            SELECT MAX(rid) AS rid, fid
-                            FROM ridsOfLatestFids
-                            GROUP BY fid)
-        """
-
-        return self._hit_bigquery(query)
+        query = duplicate_row_ids_query(self.project, self.dataset, target_table)
+        return self._stream_bigquery(query)
 
     def check_or_delete_rows(self, soft_delete: bool = False) -> int:
         """
@@ -208,22 +236,14 @@ class DuplicatesManager(BQRowManager):
 
 
 class NullFileRefManager(BQRowManager):
-    def get_rows(self, target_table: str) -> set[str]:
+    def get_rows(self, target_table: str) -> tuple[int, Iterable[str]]:
         """
         Determines what rows have null values in the file_id column. We want to soft delete those.
         :param target_table: The particular table to operate on.
-        :return: A set of row ids to soft delete.
+        :return: The number of row ids to soft delete, and a lazy iterator over them.
         """
 
-        # TODO we are allowing null file_ids if there is a `drs_uri` field in the descriptor (these are
-        # "bring your own" DRS file references that are hosted outside of TDR). We should be smarter about parsing
-        # the descriptor and ensuring a sane value rather than the fuzzy matching we're doing here
-        query = f"""
-        SELECT datarepo_row_id
-        FROM `{self.project}.{self.dataset}.{target_table}` WHERE file_id IS NULL AND descriptor NOT LIKE '%"drs_uri":%'
-        """
-
-        return self._hit_bigquery(query)
+        return self._stream_bigquery(null_file_ref_row_ids_query(self.project, self.dataset, target_table))
 
     def check_or_delete_rows(self, soft_delete: bool = False) -> int:
         """
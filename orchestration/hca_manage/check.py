@@ -9,6 +9,7 @@ from hca_manage import __version__ as hca_manage_version
 from hca_manage.bq_managers import DanglingFileRefManager, DuplicatesManager, NullFileRefManager, CountsManager
 from hca_manage.common import DefaultHelpParser, ProblemCount, data_repo_host, get_api_client, query_yes_no, \
     setup_cli_logging_format
+from hca_manage.health_scan import DatasetHealthScan
 from hca_manage.soft_delete import SoftDeleteManager
 
 
@@ -64,6 +65,7 @@ class CheckManager:
     dataset: str
     data_repo_client: RepositoryApi
     snapshot: bool
+    sample_size: int = 10
 
     def __post_init__(self) -> None:
         if not self.snapshot:
@@ -108,26 +110,20 @@ class CheckManager:
                              soft_delete_manager=self.soft_delete_manager,
                              entity_type="project")
 
+    @property
+    def health_scan(self) -> DatasetHealthScan:
+        return DatasetHealthScan(project=self.project, dataset=self.dataset, sample_size=self.sample_size)
+
     def check_for_all(self) -> ProblemCount:
         """
-        Check and print the number of duplicates and null file references in all tables in the dataset.
-        :return: A named tuple with the counts of rows to soft delete
+        Check and print the number of duplicates, null file references, dangling project references and empty
+        tables across all tables in the dataset, in a single scan.
+        :return: A named tuple with the counts of rows to soft delete, and a sample of their row ids
         """
         logging.info(f"Processing dataset {self.dataset}...")
-
-        empty_links_count = self.links_count_manager.check_or_delete_rows()
-        empty_projects_count = self.projects_count_manager.check_or_delete_rows()
-        duplicate_count = self.duplicate_manager.check_or_delete_rows()
-        null_file_ref_count = self.null_file_ref_manager.check_or_delete_rows()
-        dangling_proj_refs_count = self.dangling_file_ref_manager.check_or_delete_rows()
+        problem_count = self.health_scan.scan()
         logging.info(f"Finished processing dataset {self.dataset}.")
-        return ProblemCount(
-            duplicates=duplicate_count,
-            null_file_refs=null_file_ref_count,
-            dangling_project_refs=dangling_proj_refs_count,
-            empty_links_count=empty_links_count,
-            empty_projects_count=empty_projects_count
-        )
+        return problem_count
 
     def remove_all(self) -> ProblemCount:
         """
@@ -3,7 +3,7 @@ import csv
 import functools
 import logging
 import sys
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Callable, NoReturn, TextIO, TypeVar, cast
 
 from dagster import make_python_type_usable_as_dagster_type
@@ -45,6 +45,8 @@ class ProblemCount:
     dangling_project_refs: int
     empty_links_count: int
     empty_projects_count: int
+    # problem -> table name -> a sample of offending row ids
+    samples: dict[str, dict[str, list[str]]] = field(default_factory=dict)
 
     def has_problems(self) -> bool:
         return self.duplicates > 0 or \
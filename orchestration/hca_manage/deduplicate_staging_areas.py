@@ -8,12 +8,13 @@ import argparse
 import os
 import re
 import sys
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
 # Library stubs not installed so ignoring linting failures
-import pandas as pd  # type: ignore[import]
 from google.cloud import storage  # type: ignore[import]
 
+from hca_orchestration.contrib.gcs import delete_blobs
+
 STAGING_AREA_BUCKETS = {
     "prod": {
         "EBI": "gs://broad-dsp-monster-hca-prod-ebi-storage/prod",
@@ -28,74 +29,94 @@ STAGING_AREA_BUCKETS = {
 }
 
 
+# Function to stream the objects in a staging area bucket as records, one listing page at a time
+def iter_staging_area_objects(bucket_name: str, prefix: str, delimiter: Optional[str] = None) -> Iterator[list[str]]:
+    storage_client = storage.Client()
+    blobs = storage_client.list_blobs(bucket_name, prefix=prefix, delimiter=delimiter)
+
+    # Parse blobs and yield a record per metadata/descriptor object
+    data_prefix = prefix + "data/"
+    for blob in blobs:
+        if data_prefix not in blob.name:
+            obj = blob.name
+            path, file_name = os.path.split(blob.name)
+            entity = file_name.split("_")[0]
+            version = file_name.split("_")[1]
+            yield [obj, path, entity, version]
+
+
 # Function to return the objects in a staging area bucket
 def get_staging_area_objects(bucket_name: str, prefix: str, delimiter: Optional[str] = None) -> list[list[str]]:
-    record_list = []
+    record_list: list[list[str]] = []
     try:
-        # List blobs in specified bucket/prefix
-        storage_client = storage.Client()
-        blobs = storage_client.list_blobs(bucket_name, prefix=prefix, delimiter=delimiter)
-
-        # Parse blobs and return a list of records
-        for blob in blobs:
-            if prefix + "data/" not in blob.name:
-                obj = blob.name
-                path = os.path.split(blob.name)[0]
-                entity = os.path.split(blob.name)[1].split("_")[0]
-                version = os.path.split(blob.name)[1].split("_")[1]
-                record = [obj, path, entity, version]
-                record_list.append(record)
+        record_list.extend(iter_staging_area_objects(bucket_name, prefix, delimiter))
         return record_list
     except Exception as e:
         print(f"Error retrieving objects from staging area: {str(e)}")
         return record_list
 
 
-# Function to identify outdated entity files
-def identify_outdated_files(record_list: Optional[list[list[str]]]) -> list[storage.blob]:
-    delete_list = []
-    if record_list:
-        # Load records into dataframe, group by path and entity, and order by version descending
-        df = pd.DataFrame(record_list, columns=["blob", "path", "entity", "version"])
-        df["rn"] = df.groupby(["path", "entity"])["version"].rank(method="first", ascending=False)
+class OutdatedFileTracker:
+    """
+    Streaming outdated-file detection. Only the latest version (and its object name) seen so far for each
+    (path, entity) pair is kept; every other object is emitted as outdated as soon as it is known to be.
+    As with ranking by version, if the same version of an entity appears more than once, the first one
+    seen is kept.
+    """
+
+    def __init__(self) -> None:
+        self.latest: dict[tuple[str, str], tuple[str, str]] = {}
+        self.records_seen = 0
+
+    def add(self, record: list[str]) -> Optional[str]:
+        """
+        Tracks a single [blob, path, entity, version] record.
+        :return: The name of the blob made outdated by this record, if any
+        """
+        blob_name, path, entity, version = record
+        self.records_seen += 1
+        # many entities share a handful of paths, intern them so only one copy of each is held
+        key = (sys.intern(path), entity)
+
+        current = self.latest.get(key)
+        if current is None:
+            self.latest[key] = (version, blob_name)
+            return None
 
-        # Identify outdated records and return as a list
-        df_outdated = df[df["rn"] != 1]
-        for index, row in df_outdated.iterrows():
-            delete_list.append(row["blob"])
-    return delete_list
+        current_version, current_blob_name = current
+        if version > current_version:
+            self.latest[key] = (version, blob_name)
+            return current_blob_name
+
+        return blob_name
+
+
+# Function to stream outdated entity files out of a stream of records
+def iter_outdated_files(records: Iterable[list[str]], tracker: Optional[OutdatedFileTracker] = None) -> Iterator[str]:
+    tracker = tracker or OutdatedFileTracker()
+    for record in records:
+        outdated = tracker.add(record)
+        if outdated:
+            yield outdated
+
+
+# Function to identify outdated entity files
+def identify_outdated_files(record_list: Optional[list[list[str]]]) -> list[str]:
+    if not record_list:
+        return []
+    return list(iter_outdated_files(record_list))
 
 
 # Function to batch delete files
-def batch_delete_files(
-        delete_list: list[storage.blob],
-        bucket_name: str,
-        prefix: str,
-        delimiter: Optional[str] = None
-) -> None:
+def batch_delete_files(delete_list: list[str], bucket_name: str) -> None:
     if delete_list:
         try:
-            # Loop through and submit batch deletion requests (max 1000)
-            deleted_list = []
-            while True:
-
-                # List blobs in specified bucket/prefix
-                storage_client = storage.Client()
-                blobs = storage_client.list_blobs(bucket_name, prefix=prefix, delimiter=delimiter)
-
-                # Loop through blobs and delete those found on the delete list
-                iterator = 0
-                with storage_client.batch():
-                    for blob in blobs:
-                        if blob.name in delete_list and blob.name not in deleted_list and iterator < 1000:
-                            iterator += 1
-                            deleted_list.append(blob.name)
-                            blob.delete()
-
-                # If all objects deleted, exit loop
-                if len(deleted_list) == len(delete_list):
-                    break
-            print("Objects deleted successfully.")
+            # Submit concurrent batch deletion requests (max 100 per batch), retrying only failed deletes
+            result = delete_blobs(storage.Client(), bucket_name, delete_list)
+            if result.failed:
+                print(f"Error deleting objects: {len(result.failed)} objects could not be deleted.")
+                return
+            print(f"Objects deleted successfully ({result.deleted} objects, {result.deletions_per_second:.1f}/s).")
         except Exception as e:
             print(f"Error deleting objects: {str(e)}")
 
@@ -173,11 +194,15 @@ if __name__ == "__main__":
 
     # Call functions to identify and remove outdated entity files
     print(f"Evaluating outdated files in staging area: {staging_area}")
-    objects_list = get_staging_area_objects(bucket_name, prefix)
-    print(f"\t- Total objects found: {len(objects_list)}")
-    delete_list = identify_outdated_files(objects_list)
+    tracker = OutdatedFileTracker()
+    try:
+        delete_list = list(iter_outdated_files(iter_staging_area_objects(bucket_name, prefix), tracker))
+    except Exception as e:
+        print(f"Error retrieving objects from staging area: {str(e)}")
+        delete_list = []
+    print(f"\t- Total objects found: {tracker.records_seen}")
     print(f"\t- Outdated objects found: {len(delete_list)}")
     if args.print_files:
         print("\t- Outdated object list: \n\t\t- " + "\n\t\t- ".join(delete_list))
     if not args.skip_deletion:
-        batch_delete_files(delete_list, bucket_name, prefix)
+        batch_delete_files(delete_list, bucket_name)
@@ -5,10 +5,9 @@ HCA project in the source
 
 import argparse
 
-from google.cloud.bigquery import Client
-
 from hca_manage.common import data_repo_host, get_api_client
 from hca_orchestration.contrib.bigquery import BigQueryService
+from hca_orchestration.contrib.bigquery_clients import get_bigquery_client
 
 CATALOGS = {
     "dcp1": {
@@ -33,7 +32,7 @@ def run(catalog: str) -> None:
     bq_project = catalog_info['bq_project']
     dataset_name = catalog_info['dataset_name']
 
-    bq_service = BigQueryService(Client())
+    bq_service = BigQueryService(get_bigquery_client())
     query = f"""
     SELECT project_id FROM `{bq_project}.{dataset_name}.project` ORDER BY project_id ASC
     """
@@ -15,10 +15,9 @@ import argparse
 import logging
 from typing import Optional
 
-from google.cloud.bigquery import Client
-
 from hca_manage.common import setup_cli_logging_format, DefaultHelpParser
 from hca_orchestration.contrib.bigquery import BigQueryService
+from hca_orchestration.contrib.bigquery_clients import get_bigquery_client
 
 
 def run(arguments: Optional[list[str]] = None) -> None:
@@ -41,7 +40,7 @@ def _query_for_project(args: argparse.Namespace) -> None:
     bq_project_id = args.bq_project_id
     bq_region = args.bq_region
 
-    bq_service = BigQueryService(Client())
+    bq_service = BigQueryService(get_bigquery_client())
     query = f"""
     SELECT * FROM `{dataset_name}.project`
     WHERE project_id = '{hca_project_id}'
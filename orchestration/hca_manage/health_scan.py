@@ -0,0 +1,145 @@
+"""
+Single-pass health scan of a TDR dataset. Instead of one query per table per problem kind, the checks for all
+tables are combined into a handful of UNION ALL queries that are submitted together and run concurrently in
+BigQuery, so a full check costs a few round trips and is bounded by the slowest table rather than the sum of all
+tables. Each check reports its count of problem rows along with a small sample of the offending row ids.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from google.cloud import bigquery
+
+from hca_manage.bq_managers import (
+    dangling_project_ref_ids_query,
+    duplicate_row_ids_query,
+    null_file_ref_row_ids_query,
+)
+from hca_manage.common import ProblemCount
+from hca_orchestration.contrib.bigquery_clients import get_bigquery_client
+
+DUPLICATES = "duplicates"
+NULL_FILE_REFS = "null_file_refs"
+DANGLING_PROJECT_REFS = "dangling_project_refs"
+EMPTY_LINKS = "empty_links_count"
+EMPTY_PROJECTS = "empty_projects_count"
+
+
+@dataclass
+class DatasetTable:
+    name: str
+    has_file_id: bool
+
+
+@dataclass
+class DatasetHealthScan:
+    project: str
+    dataset: str
+    sample_size: int = 10
+    # tables checked per query; queries are submitted together, so this trades job count against job size
+    tables_per_job: int = 8
+    bigquery_client: Optional[bigquery.Client] = None
+
+    def __post_init__(self) -> None:
+        if self.bigquery_client is None:
+            self.bigquery_client = get_bigquery_client(self.project)
+
+    def list_tables(self) -> list[DatasetTable]:
+        """
+        Lists the dataset's views, noting which have a file_id column, in one query
+        """
+        query = f"""
+        SELECT tables.table_name, LOGICAL_OR(columns.column_name = "file_id") AS has_file_id
+        FROM `{self.project}.{self.dataset}.INFORMATION_SCHEMA.TABLES` tables
+        JOIN `{self.project}.{self.dataset}.INFORMATION_SCHEMA.COLUMNS` columns
+          ON tables.table_name = columns.table_name
+        WHERE tables.table_type = "VIEW"
+        GROUP BY tables.table_name
+        """
+        assert self.bigquery_client
+        return [
+            DatasetTable(row["table_name"], row["has_file_id"])
+            for row in self.bigquery_client.query(query).result()
+        ]
+
+    def build_checks(self, table: DatasetTable) -> list[str]:
+        """
+        Builds the SELECTs checking the given table, each yielding a single
+        (table_name, problem, problem_count, sample_ids) row
+        """
+        checks = [
+            self._problem_rows(table.name, DUPLICATES,
+                               duplicate_row_ids_query(self.project, self.dataset, table.name), "rid")
+        ]
+        if table.has_file_id:
+            checks.append(self._problem_rows(
+                table.name, NULL_FILE_REFS,
+                null_file_ref_row_ids_query(self.project, self.dataset, table.name), "datarepo_row_id"))
+        if table.name == "links":
+            checks.append(self._problem_rows(
+                table.name, DANGLING_PROJECT_REFS,
+                dangling_project_ref_ids_query(self.project, self.dataset, table.name), "links_id"))
+            checks.append(self._empty_table(table.name, EMPTY_LINKS))
+        if table.name == "project":
+            checks.append(self._empty_table(table.name, EMPTY_PROJECTS))
+        return checks
+
+    def build_queries(self, tables: list[DatasetTable]) -> list[str]:
+        queries = []
+        for start in range(0, len(tables), self.tables_per_job):
+            checks = [check for table in tables[start:start + self.tables_per_job]
+                      for check in self.build_checks(table)]
+            queries.append("\nUNION ALL\n".join(checks))
+        return queries
+
+    def scan(self) -> ProblemCount:
+        """
+        Runs every check over every table in the dataset, returning the problem counts with up to
+        sample_size offending row ids per table and problem
+        """
+        assert self.bigquery_client
+        tables = self.list_tables()
+        counts = {DUPLICATES: 0, NULL_FILE_REFS: 0, DANGLING_PROJECT_REFS: 0, EMPTY_LINKS: 0, EMPTY_PROJECTS: 0}
+        # the emptiness checks are driven by the listing, so a missing table counts as an empty one
+        table_names = {table.name for table in tables}
+        for required, problem in [("links", EMPTY_LINKS), ("project", EMPTY_PROJECTS)]:
+            if required not in table_names:
+                logging.info(f"Dataset {self.dataset} has no {required} table")
+                counts[problem] = 1
+
+        # all jobs are submitted before any results are awaited, so they run concurrently
+        jobs = [self.bigquery_client.query(query) for query in self.build_queries(tables)]
+        logging.info(f"Submitted {len(jobs)} health scan jobs covering {len(tables)} tables")
+
+        samples: dict[str, dict[str, list[str]]] = {}
+        for job in jobs:
+            for row in job.result():
+                if not row["problem_count"]:
+                    continue
+                logging.info(f"{row['table_name']} has {row['problem_count']} failing rows due to {row['problem']}")
+                counts[row["problem"]] += row["problem_count"]
+                if row["sample_ids"]:
+                    samples.setdefault(row["problem"], {})[row["table_name"]] = list(row["sample_ids"])
+
+        return ProblemCount(
+            duplicates=counts[DUPLICATES],
+            null_file_refs=counts[NULL_FILE_REFS],
+            dangling_project_refs=counts[DANGLING_PROJECT_REFS],
+            empty_links_count=counts[EMPTY_LINKS],
+            empty_projects_count=counts[EMPTY_PROJECTS],
+            samples=samples
+        )
+
+    def _problem_rows(self, table_name: str, problem: str, ids_query: str, id_column: str) -> str:
+        return f"""
+        SELECT "{table_name}" AS table_name, "{problem}" AS problem, COUNT(DISTINCT {id_column}) AS problem_count,
+               ARRAY_AGG(CAST({id_column} AS STRING) IGNORE NULLS LIMIT {self.sample_size}) AS sample_ids
+        FROM ({ids_query})
+        """
+
+    def _empty_table(self, table_name: str, problem: str) -> str:
+        return f"""
+        SELECT "{table_name}" AS table_name, "{problem}" AS problem, IF(COUNT(*) = 0, 1, 0) AS problem_count,
+               CAST([] AS ARRAY<STRING>) AS sample_ids
+        FROM `{self.project}.{self.dataset}.{table_name}`
+        """
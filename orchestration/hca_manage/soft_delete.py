@@ -1,12 +1,12 @@
 import argparse
+import csv
 import logging
 import uuid
 from dataclasses import dataclass, field
-from typing import BinaryIO, Optional
+from typing import BinaryIO, Iterable, Mapping, Optional
 
 import google.auth.credentials
 from dagster_utils.contrib import google as hca_google
-from dagster_utils.contrib.data_repo.jobs import poll_job
 from dagster_utils.contrib.data_repo.typing import JobId
 from data_repo_client import DataDeletionRequest, RepositoryApi
 from google.cloud import storage
@@ -22,6 +22,7 @@ from hca_manage.common import (
     query_yes_no,
     setup_cli_logging_format,
 )
+from hca_orchestration.contrib.data_repo.job_watcher import TdrJobWatcher, default_job_watcher
 
 
 def run(arguments: Optional[list[str]] = None) -> None:
@@ -52,15 +53,24 @@ def soft_delete(args: argparse.Namespace, host: str) -> None:
     hca.soft_delete_rows(args.path, args.target_table)
 
 
+@dataclass
+class SoftDeleteResult:
+    # None if there were no rows to delete, so no job was submitted
+    job_id: Optional[JobId]
+    row_counts: dict[str, int]
+
+
 @dataclass
 class SoftDeleteManager:
     environment: str
     data_repo_client: RepositoryApi
     project: str
     dataset: str
+    job_watcher: Optional[TdrJobWatcher] = None
 
     bucket_project: str = field(init=False)
     bucket: str = field(init=False)
+    _watcher: TdrJobWatcher = field(init=False, repr=False)
 
     def __post_init__(self) -> None:
         self.filename_template = f"sd-{self.project}-{self.dataset}-{uuid.uuid4()}-{{table}}.csv"
@@ -68,6 +78,7 @@ class SoftDeleteManager:
                                "real_prod": "mystical-slate-284720",
                                "dev": "broad-dsp-monster-hca-dev"}[self.environment]
         self.bucket = "broad-dsp-monster-hca-prod-staging-storage-us"
+        self._watcher = self.job_watcher or default_job_watcher(self.data_repo_client)
 
     @property
     def gcp_creds(self) -> google.auth.credentials.Credentials:
@@ -78,9 +89,64 @@ class SoftDeleteManager:
             remote_file_path = self.put_soft_delete_csv_in_bucket(local_file=rf, target_table=target_table)
             job_id = self._submit_soft_delete(target_table=target_table, target_path=remote_file_path)
             logging.info(f"Soft delete job for table {target_table} running, job id of: {job_id}")
-            poll_job(job_id, 600, 2, self.data_repo_client)
+            self._watcher.wait(job_id, 600)
             return job_id
 
+    def soft_delete_tables(self, row_ids_by_table: Mapping[str, Iterable[str]]) -> SoftDeleteResult:
+        """
+        Soft deletes rows from several tables with a single TDR deletion job. Each table's row ids are streamed
+        straight into a csv in GCS, so they may be a lazy iterable (e.g., over a query result) and never touch
+        local disk. Tables with no row ids are left out of the request.
+        :param row_ids_by_table: The row ids to soft delete, keyed by table name.
+        :return: The deletion job id and the number of row ids submitted per table.
+        """
+        storage_client = storage.Client(project=self.bucket_project, credentials=self.gcp_creds)
+        table_paths = {}
+        row_counts = {}
+        for target_table, row_ids in row_ids_by_table.items():
+            remote_file_path, row_count = self.stream_row_ids_to_bucket(row_ids, target_table, storage_client)
+            row_counts[target_table] = row_count
+            if remote_file_path:
+                table_paths[target_table] = remote_file_path
+
+        if not table_paths:
+            return SoftDeleteResult(None, row_counts)
+
+        job_id = self._submit_soft_delete_tables(table_paths)
+        logging.info(f"Soft delete job for tables {sorted(table_paths)} running, job id of: {job_id}")
+        # one job now covers all tables, so it gets the time budget they would have had as separate jobs
+        self._watcher.wait(job_id, 600 * len(table_paths))
+        return SoftDeleteResult(job_id, row_counts)
+
+    def stream_row_ids_to_bucket(
+            self,
+            row_ids: Iterable[str],
+            target_table: str,
+            storage_client: storage.Client
+    ) -> tuple[Optional[str], int]:
+        """
+        Writes the given row ids to a single column csv in GCS as they are produced.
+        :return: The gs-path of the csv, or None if there were no row ids (nothing is written), and the row count.
+        """
+        row_id_iter = iter(row_ids)
+        first_row_id = next(row_id_iter, None)
+        if first_row_id is None:
+            return None, 0
+
+        target_filename = self._format_filename(table=target_table)
+        blob = storage_client.bucket(self.bucket).blob(target_filename)
+        row_count = 1
+        with blob.open("w", newline="") as remote_file:
+            sd_writer = csv.writer(remote_file, delimiter=",", quotechar='"', quoting=csv.QUOTE_MINIMAL)
+            sd_writer.writerow([first_row_id])
+            for row_id in row_id_iter:
+                sd_writer.writerow([row_id])
+                row_count += 1
+
+        filepath = f"gs://{self.bucket}/{target_filename}"
+        logging.info(f"Streamed {row_count} row ids to soft-delete file {filepath}")
+        return filepath, row_count
+
     def put_soft_delete_csv_in_bucket(self, local_file: BinaryIO, target_table: str) -> str:
         """
         Puts a local file into a GCS bucket accessible by Jade so that a soft delete operation can be performed.
@@ -109,6 +175,14 @@ class SoftDeleteManager:
         :param target_path: The gs-path of the csv that contains the row ids to soft delete.
         :return: The job id of the soft delete job.
         """
+        return self._submit_soft_delete_tables({target_table: target_path})
+
+    def _submit_soft_delete_tables(self, table_paths: Mapping[str, str]) -> JobId:
+        """
+        Submit a single soft delete request covering several tables.
+        :param table_paths: The gs-path of the csv of row ids to soft delete, keyed by table name.
+        :return: The job id of the soft delete job.
+        """
         dataset_id = get_dataset_id(dataset=self.dataset, data_repo_client=self.data_repo_client)
 
         response = self.data_repo_client.apply_dataset_data_deletion(
@@ -124,6 +198,7 @@ class SoftDeleteManager:
                         },
                         "tableName": target_table
                     }
+                    for target_table, target_path in table_paths.items()
                 ]
             )
         )
@@ -1,9 +1,8 @@
 import csv
 from io import StringIO
 import unittest
-from unittest.mock import MagicMock, call, patch
+from unittest.mock import MagicMock, patch
 
-from dagster_utils.testing.matchers import StringContaining
 from data_repo_client import RepositoryApi
 
 from hca_manage.check import CheckManager
@@ -29,6 +28,18 @@ class CheckManagerTestCase(unittest.TestCase):
         with patch('google.cloud.bigquery.Client.query', return_value=results_list):
             self.assertEqual(self.manager.duplicate_manager._hit_bigquery("querying querulously"), {'a', 'c', 'e'})
 
+    def test__stream_bigquery_counts_and_yields_first_column(self):
+        rows = MagicMock()
+        rows.total_rows = 2
+        rows.__iter__.return_value = iter([['a', 'b'], ['c', 'd']])
+        bigquery_client = MagicMock()
+        bigquery_client.query.return_value.result.return_value = rows
+        with patch('hca_manage.bq_managers.get_bigquery_client', return_value=bigquery_client):
+            count, rids = self.manager.duplicate_manager._stream_bigquery("querying querulously")
+
+        self.assertEqual(count, 2)
+        self.assertEqual(list(rids), ['a', 'c'])
+
     def test_populate_row_id_csv_writes_to_csv(self):
         string_io = StringIO()
         strings = {'abc', 'def', 'ghi'}
@@ -43,36 +54,33 @@ class CheckManagerTestCase(unittest.TestCase):
     def test_process_rows_returns_zero_if_no_bad_rids(self):
         result = self.manager.duplicate_manager._check_or_delete_rows(
             lambda: {'table_a', 'table_b'},
-            lambda table: set(),
+            lambda table: (0, iter([])),
             soft_delete=True,
             issue="oh dear")
 
         self.assertEqual(result, 0)
 
     def test_process_rows_does_no_soft_delete_if_soft_delete_false(self):
-        with patch('hca_manage.soft_delete.SoftDeleteManager.soft_delete_rows') as mock_soft_delete:
+        with patch('hca_manage.soft_delete.SoftDeleteManager.soft_delete_tables') as mock_soft_delete:
             result = self.manager.duplicate_manager._check_or_delete_rows(
                 lambda: {'table_a', 'table_b'},
-                lambda table: {'abc'},
+                lambda table: (1, iter(['abc'])),
                 soft_delete=False,
                 issue="oh dear")
 
             mock_soft_delete.assert_not_called()
         self.assertEqual(result, 2)  # one error per table
 
-    def test_process_rows_does_soft_delete_if_soft_delete_true(self):
-        with patch('hca_manage.soft_delete.SoftDeleteManager.soft_delete_rows') as mock_soft_delete:
+    def test_process_rows_soft_deletes_all_tables_at_once_if_soft_delete_true(self):
+        with patch('hca_manage.soft_delete.SoftDeleteManager.soft_delete_tables') as mock_soft_delete:
             result = self.manager.duplicate_manager._check_or_delete_rows(
-                lambda: {'table_a', 'table_b'},
-                lambda table: {'abc'},
+                lambda: {'table_a', 'table_b', 'table_c'},
+                lambda table: (0, iter([])) if table == 'table_c' else (1, iter([f'{table}_rid'])),
                 soft_delete=True,
                 issue="oh dear")
 
-            mock_soft_delete.assert_has_calls(
-                [
-                    call(StringContaining('table_a.csv'), 'table_a'),
-                    call(StringContaining('table_b.csv'), 'table_b'),
-                ],
-                any_order=True  # iteration order is not guaranteed for sets
-            )
+            mock_soft_delete.assert_called_once()
+            rids_by_table = mock_soft_delete.call_args.args[0]
+            self.assertEqual({table: list(rids) for table, rids in rids_by_table.items()},
+                             {'table_a': ['table_a_rid'], 'table_b': ['table_b_rid']})
         self.assertEqual(result, 2)  # one error per table
@@ -0,0 +1,32 @@
+import unittest
+
+from hca_manage.deduplicate_staging_areas import identify_outdated_files
+
+
+class DeduplicateStagingAreasTestCase(unittest.TestCase):
+    def test_identify_outdated_files_keeps_latest_version_per_path_and_entity(self):
+        records = [
+            ["metadata/project/a_2021-01-01.json", "metadata/project", "a", "2021-01-01.json"],
+            ["metadata/project/a_2021-03-01.json", "metadata/project", "a", "2021-03-01.json"],
+            ["metadata/project/a_2021-02-01.json", "metadata/project", "a", "2021-02-01.json"],
+            ["descriptors/sequence_file/a_2021-01-01.json", "descriptors/sequence_file", "a", "2021-01-01.json"],
+            ["metadata/project/b_2021-01-01.json", "metadata/project", "b", "2021-01-01.json"],
+        ]
+
+        outdated = identify_outdated_files(records)
+
+        self.assertCountEqual(
+            outdated,
+            ["metadata/project/a_2021-01-01.json", "metadata/project/a_2021-02-01.json"]
+        )
+
+    def test_identify_outdated_files_keeps_first_of_duplicate_versions(self):
+        records = [
+            ["first/a_2021-01-01.json", "metadata/project", "a", "2021-01-01.json"],
+            ["second/a_2021-01-01.json", "metadata/project", "a", "2021-01-01.json"],
+        ]
+
+        self.assertEqual(identify_outdated_files(records), ["second/a_2021-01-01.json"])
+
+    def test_identify_outdated_files_handles_no_records(self):
+        self.assertEqual(identify_outdated_files(None), [])
@@ -0,0 +1,78 @@
+import unittest
+from unittest.mock import MagicMock
+
+from google.cloud import bigquery
+
+from hca_manage.health_scan import DatasetHealthScan, DatasetTable
+
+
+def _job(rows):
+    job = MagicMock(spec=bigquery.QueryJob)
+    job.result.return_value = rows
+    return job
+
+
+class DatasetHealthScanTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = MagicMock(spec=bigquery.Client)
+        self.scan = DatasetHealthScan(project="project-id", dataset="datarepo_datasetname", sample_size=2,
+                                      tables_per_job=2, bigquery_client=self.client)
+
+    def test_build_checks_covers_table_specific_problems(self):
+        links_checks = self.scan.build_checks(DatasetTable("links", False))
+        file_checks = self.scan.build_checks(DatasetTable("sequence_file", True))
+        project_checks = self.scan.build_checks(DatasetTable("project", False))
+
+        self.assertEqual(len(links_checks), 3)
+        self.assertIn('"dangling_project_refs"', links_checks[1])
+        self.assertIn('"empty_links_count"', links_checks[2])
+        self.assertEqual(len(file_checks), 2)
+        self.assertIn('"null_file_refs"', file_checks[1])
+        self.assertEqual(len(project_checks), 2)
+        self.assertIn("LIMIT 2", file_checks[0])
+
+    def test_build_queries_batches_tables(self):
+        tables = [DatasetTable(name, False) for name in ["a", "b", "c"]]
+
+        queries = self.scan.build_queries(tables)
+
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(queries[0].count("UNION ALL"), 1)
+        self.assertIn("`project-id.datarepo_datasetname.c`", queries[1])
+
+    def test_scan_submits_all_jobs_before_collecting_results(self):
+        tables = [{"table_name": name, "has_file_id": name == "sequence_file"}
+                  for name in ["links", "project", "sequence_file"]]
+        first_batch = _job([
+            {"table_name": "links", "problem": "duplicates", "problem_count": 0, "sample_ids": None},
+            {"table_name": "links", "problem": "dangling_project_refs", "problem_count": 0, "sample_ids": None},
+            {"table_name": "links", "problem": "empty_links_count", "problem_count": 0, "sample_ids": []},
+            {"table_name": "project", "problem": "duplicates", "problem_count": 3, "sample_ids": ["r1", "r2"]},
+            {"table_name": "project", "problem": "empty_projects_count", "problem_count": 0, "sample_ids": []},
+        ])
+        second_batch = _job([
+            {"table_name": "sequence_file", "problem": "duplicates", "problem_count": 1, "sample_ids": ["r3"]},
+            {"table_name": "sequence_file", "problem": "null_file_refs", "problem_count": 2, "sample_ids": ["r4"]},
+        ])
+        self.client.query.side_effect = [_job(tables), first_batch, second_batch]
+
+        result = self.scan.scan()
+
+        self.assertEqual(self.client.query.call_count, 3)
+        self.assertEqual(result.duplicates, 4)
+        self.assertEqual(result.null_file_refs, 2)
+        self.assertEqual(result.dangling_project_refs, 0)
+        self.assertEqual(result.empty_links_count, 0)
+        self.assertEqual(result.samples, {
+            "duplicates": {"project": ["r1", "r2"], "sequence_file": ["r3"]},
+            "null_file_refs": {"sequence_file": ["r4"]}
+        })
+        self.assertTrue(result.has_problems())
+
+    def test_scan_counts_missing_required_tables_as_empty(self):
+        self.client.query.side_effect = [_job([{"table_name": "links", "has_file_id": False}]), _job([])]
+
+        result = self.scan.scan()
+
+        self.assertEqual(result.empty_projects_count, 1)
+        self.assertEqual(result.empty_links_count, 0)
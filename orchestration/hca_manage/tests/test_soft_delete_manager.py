@@ -1,7 +1,7 @@
-from io import BufferedIOBase, BytesIO
+from io import BufferedIOBase, BytesIO, StringIO
 from tempfile import NamedTemporaryFile
 import unittest
-from unittest.mock import MagicMock, Mock, patch
+from unittest.mock import MagicMock, Mock, PropertyMock, patch
 
 from dagster_utils.testing.matchers import ObjectOfType
 from data_repo_client import RepositoryApi, DataDeletionRequest
@@ -88,3 +88,76 @@ class SoftDeleteManagerTestCase(unittest.TestCase):
                 ]
             )
         )
+
+    def test_stream_row_ids_to_bucket_writes_csv_without_local_file(self):
+        written = StringIO()
+        storage_client = MagicMock()
+        blob = storage_client.bucket.return_value.blob.return_value
+        blob.open.return_value = written
+
+        # keep the contents readable after the blob's file is closed
+        with patch.object(written, 'close'):
+            path, row_count = self.manager.stream_row_ids_to_bucket(iter(['a', 'b', 'c']), 'table_a', storage_client)
+
+        storage_client.bucket.assert_called_once_with(self.manager.bucket)
+        assert path is not None
+        self.assertTrue(path.startswith(f"gs://{self.manager.bucket}/"))
+        self.assertIn('table_a', path)
+        self.assertEqual(row_count, 3)
+        self.assertEqual(written.getvalue().split(), ['a', 'b', 'c'])
+
+    def test_stream_row_ids_to_bucket_skips_empty_tables(self):
+        storage_client = MagicMock()
+
+        path, row_count = self.manager.stream_row_ids_to_bucket(iter([]), 'table_a', storage_client)
+
+        self.assertIsNone(path)
+        self.assertEqual(row_count, 0)
+        storage_client.bucket.assert_not_called()
+
+    def test_soft_delete_tables_submits_and_waits_on_a_single_job(self):
+        def _stream(row_ids, target_table, storage_client):
+            row_ids = list(row_ids)
+            return (f"gs://bucket/{target_table}.csv" if row_ids else None), len(row_ids)
+
+        self.manager._watcher = MagicMock()
+        patched_stream = patch('hca_manage.soft_delete.SoftDeleteManager.stream_row_ids_to_bucket',
+                               side_effect=_stream)
+        patched_submit = patch('hca_manage.soft_delete.SoftDeleteManager._submit_soft_delete_tables',
+                               return_value='jorb_id')
+        patched_creds = patch('hca_manage.soft_delete.SoftDeleteManager.gcp_creds', new_callable=PropertyMock)
+        with patch('google.cloud.storage.Client'), patched_creds, patched_stream, patched_submit as mock_submit:
+            result = self.manager.soft_delete_tables({'table_a': ['a1', 'a2'], 'table_b': [], 'table_c': ['c1']})
+
+        mock_submit.assert_called_once_with({
+            'table_a': 'gs://bucket/table_a.csv',
+            'table_c': 'gs://bucket/table_c.csv'
+        })
+        self.manager._watcher.wait.assert_called_once_with('jorb_id', 1200)
+        self.assertEqual(result.job_id, 'jorb_id')
+        self.assertEqual(result.row_counts, {'table_a': 2, 'table_b': 0, 'table_c': 1})
+
+    def test_soft_delete_tables_skips_submission_when_no_rows(self):
+        self.manager._watcher = MagicMock()
+        patched_creds = patch('hca_manage.soft_delete.SoftDeleteManager.gcp_creds', new_callable=PropertyMock)
+        patched_submit = patch('hca_manage.soft_delete.SoftDeleteManager._submit_soft_delete_tables')
+        with patch('google.cloud.storage.Client'), patched_creds, patched_submit as mock_submit:
+            result = self.manager.soft_delete_tables({'table_a': []})
+
+        mock_submit.assert_not_called()
+        self.assertIsNone(result.job_id)
+
+    def test_submit_soft_delete_tables_sends_every_table_in_one_request(self):
+        enumerate_datasets_response = Mock()
+        single_dataset = Mock()
+        single_dataset.id = 'abc'
+        enumerate_datasets_response.items = [single_dataset]
+        self.manager.data_repo_client.enumerate_datasets.return_value = enumerate_datasets_response
+
+        self.manager._submit_soft_delete_tables({'table_a': 'bad_rows_a.csv', 'table_b': 'bad_rows_b.csv'})
+
+        request = self.manager.data_repo_client.apply_dataset_data_deletion.call_args.kwargs['data_deletion_request']
+        self.assertEqual(
+            [(table['tableName'], table['gcsFileSpec']['path']) for table in request.tables],
+            [('table_a', 'bad_rows_a.csv'), ('table_b', 'bad_rows_b.csv')]
+        )
@@ -0,0 +1,85 @@
+import json
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from dateutil import parser
+from google.cloud import bigquery
+from google.cloud.storage import Client
+
+from hca_manage.verify_release_manifest import (
+    PathWithCrc,
+    stage_areas,
+    verify_staged_areas,
+)
+
+DESCRIPTOR = {"file_id": "file-id", "crc32c": "abcd1234", "file_name": "file.fastq.gz"}
+PROJECT_CONTENT = {"project_core": {"project_short_name": "fake"}}
+
+
+def _blob(name: str, content: str) -> MagicMock:
+    blob = MagicMock()
+    blob.name = name
+    blob.download_as_text.return_value = content
+    return blob
+
+
+def _list_blobs(bucket: str, prefix: str) -> list[MagicMock]:
+    if prefix == "area/descriptors/sequence_file":
+        return [_blob(f"{prefix}/file-id_2021-01-01T00:00:00.000000Z.json", json.dumps(DESCRIPTOR))]
+    if prefix == "area/metadata/project":
+        return [
+            _blob(f"{prefix}/project-id_2021-01-01T00:00:00.000000Z.json", "{}"),
+            _blob(f"{prefix}/project-id_2021-02-01T00:00:00.000000Z.json", json.dumps(PROJECT_CONTENT)),
+            _blob(f"{prefix}/project-id_2030-01-01T00:00:00.000000Z.json", "{}"),
+        ]
+    return []
+
+
+class VerifyReleaseManifestTestCase(unittest.TestCase):
+    def setUp(self):
+        self.storage_client = MagicMock(spec=Client)
+        self.storage_client.list_blobs.side_effect = _list_blobs
+        self.cutoff = datetime(2022, 1, 1)
+
+    def test_stage_areas_keeps_latest_version_before_cutoff(self):
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            staged = stage_areas(self.storage_client, pool, ["gs://bucket/area"], self.cutoff)
+
+        self.assertEqual(
+            staged[0].file_paths,
+            {PathWithCrc("/v1/file-id/abcd1234/file.fastq.gz", "abcd1234")}
+        )
+        self.assertEqual(
+            staged[0].metadata_entities["project"],
+            {"project-id": ("2021-02-01T00:00:00.000000Z", json.dumps(PROJECT_CONTENT))}
+        )
+
+    def test_verify_staged_areas_batches_queries(self):
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            staged = stage_areas(self.storage_client, pool, ["gs://bucket/area"], self.cutoff)
+
+        bq_client = MagicMock(spec=bigquery.Client)
+
+        def _query(query, job_config):
+            job = MagicMock()
+            if "datarepo_load_history" in query:
+                job.result.return_value = [
+                    {"target_path": "/v1/file-id/abcd1234/file.fastq.gz", "checksum_crc32c": "abcd1234"}
+                ]
+            else:
+                job.result.return_value = [{
+                    "project_id": "project-id",
+                    "version": parser.parse("2021-02-01T00:00:00.000000Z"),
+                    "content": json.dumps(PROJECT_CONTENT)
+                }]
+            return job
+
+        bq_client.query.side_effect = _query
+
+        results = verify_staged_areas(bq_client, "bq-project", "dataset", staged)
+
+        self.assertFalse(results[0].has_errors())
+        # one load history query and one query for the only entity type with staged data
+        self.assertEqual(bq_client.query.call_count, 2)
@@ -0,0 +1,54 @@
+import unittest
+from unittest.mock import MagicMock
+
+from hca_manage.verify_subgraphs import (
+    MissingSubgraphNodes,
+    build_missing_subgraph_nodes_script,
+    find_missing_subgraph_nodes,
+    verify_all_subgraphs_server_side,
+)
+from hca_orchestration.contrib.bigquery import BigQueryService
+
+
+class VerifySubgraphsServerSideTestCase(unittest.TestCase):
+    def setUp(self):
+        self.bigquery_service = MagicMock(spec=BigQueryService)
+
+    def test_script_anti_joins_links_nodes_against_entity_tables(self):
+        script = build_missing_subgraph_nodes_script('bq-project', 'datarepo_dataset', sample_size=5)
+
+        self.assertIn("FROM `bq-project.datarepo_dataset.links`", script)
+        self.assertIn("FROM `bq-project.datarepo_dataset.INFORMATION_SCHEMA.TABLES`", script)
+        self.assertIn("WHERE loaded.entity_id IS NULL", script)
+        self.assertIn("LIMIT 5", script)
+        for array_path in ["inputs", "outputs", "protocols", "files"]:
+            self.assertIn(f"'$.{array_path}'", script)
+        self.assertNotIn("project_id =", script)
+
+    def test_script_filters_links_by_project(self):
+        script = build_missing_subgraph_nodes_script('bq-project', 'datarepo_dataset', project_id='abc')
+
+        self.assertIn("WHERE project_id = 'abc'", script)
+
+    def test_find_missing_subgraph_nodes_runs_a_single_job(self):
+        self.bigquery_service.run_query.return_value = [
+            {"entity_type": "sequence_file", "missing_count": 3, "sample_ids": ["a", "b"]}
+        ]
+
+        missing = find_missing_subgraph_nodes('bq-project', 'datarepo_dataset', self.bigquery_service)
+
+        self.assertEqual(missing, [MissingSubgraphNodes("sequence_file", 3, ["a", "b"])])
+        self.bigquery_service.run_query.assert_called_once()
+
+    def test_verify_all_subgraphs_server_side_fails_on_missing_nodes(self):
+        self.bigquery_service.run_query.return_value = [
+            {"entity_type": "sequence_file", "missing_count": 1, "sample_ids": ["a"]}
+        ]
+
+        with self.assertRaises(AssertionError):
+            verify_all_subgraphs_server_side('bq-project', 'datarepo_dataset', self.bigquery_service)
+
+    def test_verify_all_subgraphs_server_side_passes_when_nothing_missing(self):
+        self.bigquery_service.run_query.return_value = []
+
+        verify_all_subgraphs_server_side('bq-project', 'datarepo_dataset', self.bigquery_service)
@@ -12,32 +12,50 @@ Additionally, this will check that metadata was loaded properly (including links
 content from the files in GS and checking that the expected row is present in the given dataset. If a newer version
 is present in the repo than is staged, we consider that valid.
 
+Staging areas are verified in batches. Within a batch, blobs are listed and downloaded on a shared thread pool,
+and all of the batch's target paths and entity ids are checked with one (chunked) parameterized query per table.
+The next batch is downloaded while the current one is being checked in BigQuery. Downloaded blobs are kept in a
+local, size-bounded cache (keyed by object generation), so reruns against the same release only fetch blobs that
+have changed since the previous run.
+
 Example invocation:
 python verify_release_manifest.py -f testing.csv -g fake-gs-project -b fake-bq-project -d fake-dataset
 """
 import argparse
 import json
 import logging
+import os
 import sys
-from dataclasses import dataclass
-from datetime import datetime
 from collections import defaultdict
-from functools import partial
-from multiprocessing import Pool
-from typing import Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import chain
+from typing import Iterable, Iterator, Optional, Tuple, TypeVar
 from urllib.parse import urlparse
-from dateutil import parser
 
+import requests
+from dagster_utils.contrib.google import get_credentials
+from dateutil import parser
 from google.cloud import bigquery, storage
 from google.cloud.storage.client import Client
-from dagster_utils.contrib.google import get_credentials
 
+from hca_orchestration.contrib.bigquery_clients import get_bigquery_client
+from hca_orchestration.contrib.blob_cache import BlobCache
 from hca_orchestration.solids.load_hca.data_files.load_data_metadata_files import FileMetadataTypes
 from hca_orchestration.solids.load_hca.non_file_metadata.load_non_file_metadata import NonFileMetadataTypes
 from hca_orchestration.support.dates import parse_version_to_datetime
 
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 
+# max # of values bound to a single array query parameter, keeps requests well under BQ's size limits
+QUERY_CHUNK_SIZE = 20000
+
+DEFAULT_CACHE_DIR = os.path.expanduser("~/.cache/hca-manage/blobs")
+DEFAULT_CACHE_MAX_BYTES = 4 * 1024 ** 3
+
+T = TypeVar("T")
+
 
 @dataclass(frozen=True)
 class PathWithCrc:
@@ -54,110 +72,45 @@ class StagingAreaVerificationResult:
         return self.has_metadata_errors or self.has_file_errors
 
 
-def get_staging_area_file_descriptors(storage_client: Client, staging_areas: set[str]) -> dict[str, set[PathWithCrc]]:
+@dataclass
+class StagedArea:
     """
-    Given a set of GS staging areas, return the downloaded descriptors present in each area
+    The expected contents of a staging area, as downloaded from GS
     """
+    area: str
+    file_paths: set[PathWithCrc] = field(default_factory=set)
+    # entity type -> entity id -> (version, content)
+    metadata_entities: dict[str, dict[str, Tuple[str, str]]] = field(default_factory=dict)
 
-    expected: dict[str, set[PathWithCrc]] = defaultdict(set[PathWithCrc])
-    for staging_area in staging_areas:
-        url = urlparse(staging_area)
-
-        for file_type in FileMetadataTypes:
-            prefix = f"{url.path.lstrip('/')}/descriptors/{file_type.value}"
-            blobs = list(storage_client.list_blobs(url.netloc, prefix=prefix))
-            for blob in blobs:
-                parsed = json.loads(blob.download_as_text())
-                path_with_crc = PathWithCrc(target_path_from_descriptor(parsed), parsed["crc32c"])
-                expected[staging_area].add(path_with_crc)
 
-    return expected
+def _chunks(items: list[T], size: int) -> Iterator[list[T]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
 
 
 def target_path_from_descriptor(descriptor: dict[str, str]) -> str:
     return f"/v1/{descriptor['file_id']}/{descriptor['crc32c']}/{descriptor['file_name']}"
 
 
-def find_files_in_load_history(bq_project: str, dataset: str,
-                               areas: dict[str, set[PathWithCrc]]) -> dict[str, set[PathWithCrc]]:
-    client = bigquery.Client(project=bq_project)
-    loaded_paths = {}
-
-    for area, paths_with_crc in areas.items():
-        logging.debug(f"\tPulling loaded files for area {area}...")
-        target_paths = [path_with_crc.path for path_with_crc in paths_with_crc]
-        query = f"""
-            SELECT target_path, checksum_crc32c
-            FROM `datarepo_{dataset}.datarepo_load_history` dlh
-            WHERE  state = 'succeeded'
-            AND target_path IN UNNEST(@paths)
-        """
-
-        job_config = bigquery.QueryJobConfig(
-            query_parameters=[
-                bigquery.ArrayQueryParameter("paths", "STRING", target_paths),
-            ]
-        )
-        query_job = client.query(query, job_config=job_config)
-        loaded_paths[area] = {PathWithCrc(row["target_path"], row["checksum_crc32c"]) for row in
-                              query_job}
-
-    return loaded_paths
-
-
-def parse_manifest_file(manifest_file: str) -> list[str]:
-    with open(manifest_file) as manifest:
-        # some of the staging areas submitted via the form need slight cleanup
-        return [area.rstrip('\n/').strip() for area in manifest]
-
-
-def process_staging_area(area: str, gs_project: str, bq_project: str, dataset: str,
-                         release_cutoff: datetime) -> StagingAreaVerificationResult:
-    logging.info(f"Processing staging area = {area}")
-
-    creds = get_credentials()
-    storage_client = storage.Client(project=gs_project, credentials=creds)
-    expected_loaded_paths = get_staging_area_file_descriptors(storage_client, {area})
-    loaded_paths_by_staging_area = find_files_in_load_history(bq_project, dataset, expected_loaded_paths)
-
-    has_file_error = False
-    for area, paths_with_crc in expected_loaded_paths.items():
-        load_paths_for_staging_area = loaded_paths_by_staging_area[area]
-        diff = paths_with_crc - load_paths_for_staging_area
-        loaded = len(load_paths_for_staging_area)
-        staged = len(paths_with_crc)
-
-        if diff:
-            logging.warning(
-                f"❌ area = {area} - (data files) Mismatched loaded paths; expected files loaded = {staged}, actual loaded = {loaded}"
-            )
-            logging.debug(diff)
-            has_file_error = True
-        else:
-            logging.info(
-                f"✅ area = {area} - (data files) expected files loaded = {staged}, actual loaded = {loaded}"
-            )
-
-    has_metadata_error = verify_metadata(area, bq_project, dataset, release_cutoff)
-    return StagingAreaVerificationResult(has_metadata_error, has_file_error)
+def metadata_prefixes(staging_area: str) -> dict[str, str]:
+    """
+    Returns the GS prefix holding each entity type's metadata in the given staging area
+    """
+    base = urlparse(staging_area).path.lstrip('/')
+    prefixes = {"links": f"{base}/links"}
+    for metadata_type in chain(NonFileMetadataTypes, FileMetadataTypes):
+        prefixes[metadata_type.value] = f"{base}/metadata/{metadata_type.value}"
+    return prefixes
 
 
-def inspect_entities_at_path(storage_client: Client, bq_client: bigquery.Client, bq_project: str,
-                             bq_dataset: str, staging_area: str, prefix: str, entity_type: str,
-                             release_cutoff: datetime) -> bool:
+def latest_staged_entities(blobs: Iterable[Tuple[str, str]], release_cutoff: datetime) -> dict[str, Tuple[str, str]]:
+    """
+    Given (blob name, content) pairs for one entity type, returns the latest staged version of each entity
+    that was staged before the release cutoff
+    """
     metadata_entities: dict[str, Tuple[str, str]] = {}
-
-    url = urlparse(staging_area)
-    if prefix:
-        prefix = f"{url.path.lstrip('/')}/{prefix}/{entity_type}"
-    else:
-        prefix = f"{url.path.lstrip('/')}/{entity_type}"
-
-    blobs = list(storage_client.list_blobs(url.netloc, prefix=prefix))
-
-    for blob in blobs:
-        content = blob.download_as_text()
-        file_name = blob.name.split('/')[-1]
+    for blob_name, content in blobs:
+        file_name = blob_name.split('/')[-1]
         entity_id = file_name.split('_')[0]
         version = file_name.split('_')[1].replace('.json', '')
 
@@ -175,6 +128,137 @@ def inspect_entities_at_path(storage_client: Client, bq_client: bigquery.Client,
 
         metadata_entities[entity_id] = (version, content)
 
+    return metadata_entities
+
+
+def stage_areas(storage_client: Client, pool: ThreadPoolExecutor, staging_areas: list[str],
+                release_cutoff: datetime, blob_cache: Optional[BlobCache] = None) -> list[StagedArea]:
+    """
+    Lists and downloads the descriptors and metadata of the given staging areas, fanning
+    both the listing and the downloads out over the thread pool. Blob contents are served from
+    the blob cache, if one is supplied.
+    """
+    listings: list[Tuple[StagedArea, str, str, str]] = []
+    staged_areas = []
+    for staging_area in staging_areas:
+        staged = StagedArea(staging_area)
+        staged_areas.append(staged)
+        bucket = urlparse(staging_area).netloc
+        base = urlparse(staging_area).path.lstrip('/')
+        for file_type in FileMetadataTypes:
+            listings.append((staged, "descriptors", bucket, f"{base}/descriptors/{file_type.value}"))
+        for entity_type, prefix in metadata_prefixes(staging_area).items():
+            listings.append((staged, entity_type, bucket, prefix))
+
+    blob_lists = pool.map(
+        lambda listing: list(storage_client.list_blobs(listing[2], prefix=listing[3])),
+        listings
+    )
+    to_download = [
+        (staged, kind, blob)
+        for (staged, kind, _, _), blobs in zip(listings, blob_lists)
+        for blob in blobs
+    ]
+    if blob_cache:
+        contents = pool.map(lambda item: blob_cache.read_blob_text(item[2]), to_download)  # type: ignore
+    else:
+        contents = pool.map(lambda item: item[2].download_as_text(), to_download)
+
+    staged_metadata: dict[Tuple[str, str], list[Tuple[str, str]]] = defaultdict(list)
+    for (staged, kind, blob), content in zip(to_download, contents):
+        if kind == "descriptors":
+            parsed = json.loads(content)
+            staged.file_paths.add(PathWithCrc(target_path_from_descriptor(parsed), parsed["crc32c"]))
+        else:
+            staged_metadata[(staged.area, kind)].append((blob.name, content))
+
+    for staged in staged_areas:
+        for entity_type in metadata_prefixes(staged.area):
+            staged.metadata_entities[entity_type] = latest_staged_entities(
+                staged_metadata[(staged.area, entity_type)],
+                release_cutoff
+            )
+
+    return staged_areas
+
+
+def find_files_in_load_history(bq_client: bigquery.Client, dataset: str,
+                               target_paths: set[str]) -> dict[str, set[str]]:
+    """
+    Returns the crc32c of each successfully loaded file out of the given target paths
+    """
+    query = f"""
+        SELECT target_path, checksum_crc32c
+        FROM `datarepo_{dataset}.datarepo_load_history` dlh
+        WHERE  state = 'succeeded'
+        AND target_path IN UNNEST(@paths)
+    """
+    jobs = [
+        bq_client.query(query, job_config=bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ArrayQueryParameter("paths", "STRING", chunk)]
+        ))
+        for chunk in _chunks(sorted(target_paths), QUERY_CHUNK_SIZE)
+    ]
+
+    loaded: dict[str, set[str]] = defaultdict(set)
+    for job in jobs:
+        for row in job.result():
+            loaded[row["target_path"]].add(row["checksum_crc32c"])
+    return loaded
+
+
+def find_entities_in_dataset(bq_client: bigquery.Client, bq_project: str, bq_dataset: str,
+                             entity_ids_by_type: dict[str, set[str]]) -> dict[str, dict[str, Tuple[datetime, str]]]:
+    """
+    Returns the (version, content) of every given entity present in the dataset, keyed by entity type and id.
+    All queries are submitted up front and run concurrently in BigQuery.
+    """
+    jobs = []
+    for entity_type, entity_ids in entity_ids_by_type.items():
+        query = f"""
+        SELECT {entity_type}_id, content, version FROM `{bq_project}.datarepo_{bq_dataset}.{entity_type}`
+        WHERE {entity_type}_id IN UNNEST(@entity_ids)
+        """
+        for chunk in _chunks(sorted(entity_ids), QUERY_CHUNK_SIZE):
+            job_config = bigquery.QueryJobConfig(
+                query_parameters=[
+                    bigquery.ArrayQueryParameter("entity_ids", "STRING", chunk),
+                ]
+            )
+            jobs.append((entity_type, bq_client.query(query, job_config=job_config)))
+
+    rows: dict[str, dict[str, Tuple[datetime, str]]] = defaultdict(dict)
+    for entity_type, job in jobs:
+        for row in job.result():
+            rows[entity_type][row[f'{entity_type}_id']] = (row['version'], row['content'])
+    return rows
+
+
+def verify_files(staged: StagedArea, loaded_paths: dict[str, set[str]]) -> bool:
+    load_paths_for_staging_area = {
+        PathWithCrc(path_with_crc.path, crc32c)
+        for path_with_crc in staged.file_paths
+        for crc32c in loaded_paths.get(path_with_crc.path, set())
+    }
+    diff = staged.file_paths - load_paths_for_staging_area
+    loaded = len(load_paths_for_staging_area)
+    staged_count = len(staged.file_paths)
+
+    if diff:
+        logging.warning(
+            f"❌ area = {staged.area} - (data files) Mismatched loaded paths; expected files loaded = {staged_count}, actual loaded = {loaded}"
+        )
+        logging.debug(diff)
+        return True
+
+    logging.info(
+        f"✅ area = {staged.area} - (data files) expected files loaded = {staged_count}, actual loaded = {loaded}"
+    )
+    return False
+
+
+def verify_entities(staging_area: str, entity_type: str, metadata_entities: dict[str, Tuple[str, str]],
+                    rows: dict[str, Tuple[datetime, str]]) -> bool:
     if len(metadata_entities) == 0:
         if entity_type == 'links':
             logging.debug(f"area = {staging_area} no links data found")
@@ -183,20 +267,6 @@ def inspect_entities_at_path(storage_client: Client, bq_client: bigquery.Client,
         logging.debug(f"️area = {staging_area} No metadata for {entity_type} expected, skipping")
         return False
 
-    logging.debug(f"Querying for metadata entities of type {entity_type} [area={staging_area}]")
-    entity_ids = metadata_entities.keys()
-    query = f"""
-    SELECT {entity_type}_id, content, version FROM `{bq_project}.datarepo_{bq_dataset}.{entity_type}`
-    WHERE {entity_type}_id IN UNNEST(@entity_ids)
-    """
-    job_config = bigquery.QueryJobConfig(
-        query_parameters=[
-            bigquery.ArrayQueryParameter("entity_ids", "STRING", entity_ids),
-        ]
-    )
-    query_job = bq_client.query(query, job_config=job_config)
-    rows = {row[f'{entity_type}_id']: (row['version'], row['content']) for row in query_job.result()}
-
     has_error = False
     for key, (version, content) in metadata_entities.items():
         if key not in rows.keys():
@@ -212,7 +282,7 @@ def inspect_entities_at_path(storage_client: Client, bq_client: bigquery.Client,
             )
             continue
 
-        if not parser.parse(version) == row[0]:
+        if not parsed_version == row[0]:
             has_error = True
             logging.info(f"❌ area = {staging_area} {entity_type} ID {key} version is incorrect")
         if not json.loads(content) == json.loads(row[1]):
@@ -224,73 +294,89 @@ def inspect_entities_at_path(storage_client: Client, bq_client: bigquery.Client,
     return has_error
 
 
-def verify_metadata(staging_area: str, bq_project: str, bq_dataset: str, release_cutoff: datetime) -> bool:
-    creds = get_credentials()
-    storage_client = storage.Client(project="broad-dsp-monster-hca-prod", credentials=creds)
-    client = bigquery.Client(project=bq_project)
-
-    logging.debug(f"Verifying metadata for {staging_area}")
+def verify_staged_areas(bq_client: bigquery.Client, bq_project: str, dataset: str,
+                        staged_areas: list[StagedArea]) -> list[StagingAreaVerificationResult]:
+    """
+    Checks a batch of downloaded staging areas against the dataset using one set of queries for the whole batch
+    """
+    loaded_paths = find_files_in_load_history(
+        bq_client,
+        dataset,
+        {path_with_crc.path for staged in staged_areas for path_with_crc in staged.file_paths}
+    )
 
-    links_errors = inspect_entities_at_path(
-        storage_client,
-        client,
+    entity_ids_by_type: dict[str, set[str]] = defaultdict(set)
+    for staged in staged_areas:
+        for entity_type, entities in staged.metadata_entities.items():
+            entity_ids_by_type[entity_type].update(entities.keys())
+    entity_rows = find_entities_in_dataset(
+        bq_client,
         bq_project,
-        bq_dataset,
-        staging_area,
-        "",
-        "links",
-        release_cutoff
+        dataset,
+        {entity_type: ids for entity_type, ids in entity_ids_by_type.items() if ids}
     )
 
-    non_file_metadata_errors = [
-        inspect_entities_at_path(
-            storage_client,
-            client,
-            bq_project,
-            bq_dataset,
-            staging_area,
-            "metadata",
-            non_file_metadata_type.value,
-            release_cutoff
-        ) for non_file_metadata_type in
-        NonFileMetadataTypes]
-    file_metadata_errors = [
-        inspect_entities_at_path(
-            storage_client,
-            client, bq_project,
-            bq_dataset,
-            staging_area,
-            "metadata",
-            file_metadata_type.value,
-            release_cutoff
-        ) for file_metadata_type in FileMetadataTypes]
-
-    return any(file_metadata_errors) or any(non_file_metadata_errors) or links_errors
+    results = []
+    for staged in staged_areas:
+        has_file_error = verify_files(staged, loaded_paths)
+        metadata_errors = [
+            verify_entities(staged.area, entity_type, entities, entity_rows.get(entity_type, {}))
+            for entity_type, entities in staged.metadata_entities.items()
+        ]
+        results.append(StagingAreaVerificationResult(any(metadata_errors), has_file_error))
+    return results
+
+
+def parse_manifest_file(manifest_file: str) -> list[str]:
+    with open(manifest_file) as manifest:
+        # some of the staging areas submitted via the form need slight cleanup
+        return [area.rstrip('\n/').strip() for area in manifest]
+
+
+def _build_storage_client(gs_project: str, pool_size: int) -> Client:
+    """
+    Builds a storage client whose HTTP connection pool is large enough to be shared by all download threads
+    """
+    storage_client = storage.Client(project=gs_project, credentials=get_credentials())
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    storage_client._http.mount("https://", adapter)
+    return storage_client
 
 
 def verify(manifest_file: str, gs_project: str, bq_project: str,
-           dataset: str, pool_size: int, release_cutoff: str) -> int:
+           dataset: str, pool_size: int, release_cutoff: str, batch_size: int = 20,
+           blob_cache: Optional[BlobCache] = None, storage_client: Optional[Client] = None) -> int:
     staging_areas = parse_manifest_file(manifest_file)
     parsed_cutoff = datetime.fromisoformat(release_cutoff)
 
     logging.info("Parsing manifest...")
     logging.info(f"Release cutoff = {release_cutoff}")
     logging.info(f"{len(staging_areas)} staging areas in manifest.")
-    logging.info(f"Inspecting staging areas (pool_size = {pool_size})...")
-
-    # we multiprocess because this takes quite awhile for > 10 projects, which is common for our releases
-    frozen = partial(
-        process_staging_area,
-        gs_project=gs_project,
-        bq_project=bq_project,
-        dataset=dataset,
-        release_cutoff=parsed_cutoff)
-
-    if pool_size > 0:
-        with Pool(pool_size) as p:
-            results = p.map(frozen, staging_areas)
-    else:
-        results = [frozen(area) for area in staging_areas]
+    logging.info(f"Inspecting staging areas (pool_size = {pool_size}, batch_size = {batch_size})...")
+
+    pool_size = max(pool_size, 1)
+    storage_client = storage_client or _build_storage_client(gs_project, pool_size)
+    bq_client = get_bigquery_client(bq_project, pool_size=pool_size)
+
+    batches = list(_chunks(staging_areas, batch_size))
+    results: list[StagingAreaVerificationResult] = []
+    with ThreadPoolExecutor(max_workers=pool_size) as pool, ThreadPoolExecutor(max_workers=1) as prefetcher:
+        def _stage(batch: list[str]) -> list[StagedArea]:
+            return stage_areas(storage_client, pool, batch, parsed_cutoff, blob_cache)
+
+        # download the next batch from GS while the current one is checked in BigQuery
+        next_batch: Optional[Future[list[StagedArea]]] = prefetcher.submit(_stage, batches[0]) if batches else None
+        for index in range(len(batches)):
+            assert next_batch
+            staged_areas = next_batch.result()
+            next_batch = prefetcher.submit(_stage, batches[index + 1]) if index + 1 < len(batches) else None
+
+            for staged in staged_areas:
+                logging.info(f"Processing staging area = {staged.area}")
+            results.extend(verify_staged_areas(bq_client, bq_project, dataset, staged_areas))
+
+    if blob_cache:
+        logging.info(f"Blob cache hits = {blob_cache.hits}, misses = {blob_cache.misses}")
 
     logging.info('-' * 80)
     if any(map(lambda x: x.has_errors(), results)):
@@ -308,8 +394,12 @@ if __name__ == '__main__':
     argparser.add_argument("-g", "--gs-project", required=True)
     argparser.add_argument("-b", "--bq-project", required=True)
     argparser.add_argument("-d", "--dataset", required=True)
-    argparser.add_argument("-p", "--pool-size", type=int, default=4)
+    argparser.add_argument("-p", "--pool-size", type=int, default=16)
+    argparser.add_argument("-s", "--batch-size", type=int, default=20)
     argparser.add_argument("-r", "--release-cutoff", required=True)
+    argparser.add_argument("-c", "--cache-dir", default=DEFAULT_CACHE_DIR)
+    argparser.add_argument("--cache-max-bytes", type=int, default=DEFAULT_CACHE_MAX_BYTES)
+    argparser.add_argument("--no-cache", action="store_true", default=False)
     args = argparser.parse_args()
 
     exit_code = verify(
@@ -318,6 +408,8 @@ if __name__ == '__main__':
         args.bq_project,
         args.dataset,
         args.pool_size,
-        args.release_cutoff)
+        args.release_cutoff,
+        args.batch_size,
+        None if args.no_cache else BlobCache(args.cache_dir, args.cache_max_bytes))
 
     sys.exit(exit_code)
@@ -4,18 +4,17 @@ Verifies that all nodes in the subgraphs of a dataset or snapshot are loaded
 import argparse
 import csv
 import logging
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional
 
 from data_repo_client import SnapshotModel
-from google.cloud.bigquery import ArrayQueryParameter, Client
-from google.cloud.bigquery.table import RowIterator
+from google.cloud.bigquery import ArrayQueryParameter
+from google.cloud.bigquery import Row
 from hca_manage.common import data_repo_host, get_api_client, setup_cli_logging_format
 from hca_orchestration.contrib.bigquery import BigQueryService
+from hca_orchestration.contrib.bigquery_clients import get_bigquery_client
 from hca_orchestration.contrib.data_repo.data_repo_service import DataRepoService
-from hca_orchestration.models.entities import (
-    MetadataEntity,
-    build_subgraph_from_links_row,
-)
-from hca_orchestration.support.subgraphs import build_subgraph_nodes
+from hca_orchestration.support.subgraphs import index_subgraph_nodes
 from hca_orchestration.support.typing import MetadataType
 from more_itertools import chunked
 
@@ -24,22 +23,113 @@ class SubgraphValidationException(Exception):
     pass
 
 
-def verify_all_subgraphs_in_dataset(links_rows: RowIterator, bq_project: str,
-                                    dataset: str, bigquery_service: BigQueryService) -> None:
-    links = [
-        build_subgraph_from_links_row(row) for row in links_rows
+@dataclass
+class MissingSubgraphNodes:
+    entity_type: str
+    missing_count: int
+    sample_ids: list[str]
+
+
+def _json_nodes(array_path: str, type_field: str, id_field: str) -> str:
+    return f"""
+        SELECT JSON_EXTRACT_SCALAR(child, '$.{type_field}') AS entity_type,
+               JSON_EXTRACT_SCALAR(child, '$.{id_field}') AS entity_id
+        FROM link, UNNEST(JSON_EXTRACT_ARRAY(link_json, '$.{array_path}')) AS child
+    """
+
+
+def build_missing_subgraph_nodes_script(bq_project: str, dataset: str, project_id: Optional[str] = None,
+                                        sample_size: int = 10) -> str:
+    """
+    Builds a BigQuery script that unnests every links document into its distinct (entity_type, entity_id) nodes,
+    anti-joins them against the <entity_type>_id column of each entity table and returns one
+    (entity_type, missing_count, sample_ids) row per type with missing nodes. Node types with no table in the
+    dataset are missing in their entirety.
+    """
+    project_filter = f"WHERE project_id = '{project_id}'" if project_id else ""
+    return f"""
+    CREATE TEMP TABLE link AS
+    SELECT link_json, JSON_EXTRACT_SCALAR(link_json, '$.link_type') AS link_type
+    FROM `{bq_project}.{dataset}.links`, UNNEST(JSON_EXTRACT_ARRAY(content, '$.links')) AS link_json
+    {project_filter};
+
+    ASSERT NOT EXISTS(
+        SELECT 1 FROM link WHERE link_type IS NULL OR link_type NOT IN ('process_link', 'supplementary_file_link')
+    ) AS 'Unknown link type encountered';
+
+    CREATE TEMP TABLE node AS
+    SELECT DISTINCT entity_type, entity_id FROM (
+        SELECT JSON_EXTRACT_SCALAR(link_json, '$.process_type') AS entity_type,
+               JSON_EXTRACT_SCALAR(link_json, '$.process_id') AS entity_id
+        FROM link WHERE link_type = 'process_link'
+        UNION ALL
+        SELECT JSON_EXTRACT_SCALAR(link_json, '$.entity.entity_type') AS entity_type,
+               JSON_EXTRACT_SCALAR(link_json, '$.entity.entity_id') AS entity_id
+        FROM link WHERE link_type = 'supplementary_file_link'
+        UNION ALL {_json_nodes("inputs", "input_type", "input_id")}
+        UNION ALL {_json_nodes("outputs", "output_type", "output_id")}
+        UNION ALL {_json_nodes("protocols", "protocol_type", "protocol_id")}
+        UNION ALL {_json_nodes("files", "file_type", "file_id")}
+    );
+
+    -- only node types with a matching table can be looked up; the rest are reported as missing
+    EXECUTE IMMEDIATE CONCAT(
+        "SELECT node.entity_type, COUNT(*) AS missing_count, ",
+        "ARRAY_AGG(node.entity_id ORDER BY node.entity_id LIMIT {sample_size}) AS sample_ids ",
+        "FROM node LEFT JOIN (",
+        IFNULL(
+            (
+                SELECT STRING_AGG(
+                    FORMAT("SELECT '%s' AS entity_type, %s_id AS entity_id FROM `{bq_project}.{dataset}.%s`",
+                           table_name, table_name, table_name),
+                    " UNION ALL "
+                )
+                FROM `{bq_project}.{dataset}.INFORMATION_SCHEMA.TABLES`
+                WHERE table_name IN (SELECT DISTINCT entity_type FROM node)
+            ),
+            "SELECT CAST(NULL AS STRING) AS entity_type, CAST(NULL AS STRING) AS entity_id"
+        ),
+        ") loaded ON node.entity_type = loaded.entity_type AND node.entity_id = loaded.entity_id ",
+        "WHERE loaded.entity_id IS NULL GROUP BY node.entity_type ORDER BY node.entity_type"
+    );
+    """
+
+
+def find_missing_subgraph_nodes(bq_project: str, dataset: str, bigquery_service: BigQueryService,
+                                location: str = 'US', project_id: Optional[str] = None,
+                                sample_size: int = 10) -> list[MissingSubgraphNodes]:
+    """
+    Finds subgraph nodes that are referenced by the links table but not loaded, entirely within BigQuery:
+    one scripted job regardless of dataset size, returning only the types that have missing nodes.
+    """
+    script = build_missing_subgraph_nodes_script(bq_project, dataset, project_id, sample_size)
+    return [
+        MissingSubgraphNodes(row["entity_type"], row["missing_count"], list(row["sample_ids"]))
+        for row in bigquery_service.run_query(script, bq_project, location)
     ]
-    nodes = build_subgraph_nodes(links)
 
-    for metadata_type, expected_entities in nodes.items():
+
+def verify_all_subgraphs_server_side(bq_project: str, dataset: str, bigquery_service: BigQueryService,
+                                     location: str = 'US', project_id: Optional[str] = None) -> None:
+    missing = find_missing_subgraph_nodes(bq_project, dataset, bigquery_service, location, project_id)
+    for missing_nodes in missing:
+        logging.error(f"Missing {missing_nodes.missing_count} {missing_nodes.entity_type} nodes "
+                      f"[sample = {missing_nodes.sample_ids}]")
+    assert len(missing) == 0, f"Not all expected IDs found [diff = {[m.entity_type for m in missing]}]"
+
+
+def verify_all_subgraphs_in_dataset(links_rows: Iterable[Row], bq_project: str,
+                                    dataset: str, bigquery_service: BigQueryService) -> None:
+    nodes = index_subgraph_nodes(links_rows)
+
+    for metadata_type, expected_ids in nodes.items():
         logging.debug(f"Getting loaded IDs [entity_type={metadata_type}]")
-        verify_entities_loaded(metadata_type, expected_entities, bq_project, dataset, bigquery_service)
+        verify_entities_loaded(metadata_type, expected_ids, bq_project, dataset, bigquery_service)
 
 
-def verify_entities_loaded(entity_type: MetadataType, expected_entities: list[MetadataEntity], bq_project: str,
+def verify_entities_loaded(entity_type: MetadataType, expected_ids: set[str], bq_project: str,
                            dataset: str, bigquery_service: BigQueryService) -> None:
 
-    expected_ids = {entity.entity_id for entity in expected_entities}
     chunked_ids = chunked(expected_ids, 20000)
     for cnt, entity_ids in enumerate(chunked_ids):
         fetch_entities_query = f"""
@@ -61,15 +151,20 @@ def verify_entities_loaded(entity_type: MetadataType, expected_entities: list[Me
 
 
 def run_verify_single_project(args: argparse.Namespace) -> None:
-    verify_single_project(args.bq_project, args.dataset, args.snapshot, args.project_id)
+    verify_single_project(args.bq_project, args.dataset, args.snapshot, args.project_id,
+                          server_side=args.server_side)
 
 
 def verify_single_project(bq_project: str, dataset: str, snapshot: bool,
-                          project_id: str, project_only: bool = True) -> None:
-    bigquery_service = BigQueryService(Client(project=bq_project))
+                          project_id: str, project_only: bool = True, server_side: bool = False) -> None:
+    bigquery_service = BigQueryService(get_bigquery_client(bq_project))
     if not snapshot:
         dataset = f"datarepo_{dataset}"
 
+    if server_side:
+        _verify_single_project_server_side(bq_project, dataset, project_id, project_only, bigquery_service)
+        return
+
     logging.debug(f"Querying bq... [project={bq_project}, dataset={dataset}, hca_project_id={project_id}]")
     query = f"""
     SELECT * FROM `{bq_project}.{dataset}.links`
@@ -78,21 +173,55 @@ def verify_single_project(bq_project: str, dataset: str, snapshot: bool,
     if project_id and not project_only:
         query = query + f"""  WHERE project_id = '{project_id}'"""
 
-    links_rows = [row for row in bigquery_service.run_query(query, bq_project, 'US')]
-    assert len(links_rows) > 0, f"Should have links rows for project_id {project_id}"
+    num_links = 0
+
+    def _checked_links_rows() -> Iterator[Row]:
+        # rows are checked as they stream into the node index, so none are held after being indexed
+        nonlocal num_links
+        for row in bigquery_service.run_query(query, bq_project, 'US'):
+            if project_only:
+                assert row[
+                    "project_id"] == project_id, (f"Dataset should only contain links rows "
+                                                  f"for single project [project_id={project_id}]")
+            num_links += 1
+            yield row
+
+    if project_only:
+        logging.debug(f"Verifying dataset contains data for single project only [project_id={project_id}]")
+    nodes = index_subgraph_nodes(_checked_links_rows())
+    assert num_links > 0, f"Should have links rows for project_id {project_id}"
+
+    for metadata_type, expected_ids in nodes.items():
+        logging.debug(f"Getting loaded IDs [entity_type={metadata_type}]")
+        verify_entities_loaded(metadata_type, expected_ids, bq_project, dataset, bigquery_service)
+
+    logging.info(
+        f"✅ Subgraphs verified [project_id = {project_id}, dataset = {dataset}, "
+        f"bq_project = {bq_project}, num_links = {num_links}]")
+
+
+def _verify_single_project_server_side(bq_project: str, dataset: str, project_id: str, project_only: bool,
+                                       bigquery_service: BigQueryService) -> None:
+    query = f"""
+    SELECT COUNT(*) AS num_links, COUNTIF(project_id != '{project_id}') AS num_other_project_links
+    FROM `{bq_project}.{dataset}.links`
+    """
+    if project_id and not project_only:
+        query = query + f"""  WHERE project_id = '{project_id}'"""
+    counts = next(iter(bigquery_service.run_query(query, bq_project, 'US')))
+    assert counts["num_links"] > 0, f"Should have links rows for project_id {project_id}"
 
     if project_only:
         logging.debug(f"Verifying dataset contains data for single project only [project_id={project_id}]")
-        for row in links_rows:
-            assert row[
-                "project_id"] == project_id, (f"Dataset should only contain links rows "
-                                              f"for single project [project_id={project_id}]")
+        assert counts["num_other_project_links"] == 0, (f"Dataset should only contain links rows "
+                                                        f"for single project [project_id={project_id}]")
 
-    verify_all_subgraphs_in_dataset(links_rows, bq_project, dataset, bigquery_service)  # type: ignore
+    verify_all_subgraphs_server_side(bq_project, dataset, bigquery_service,
+                                     project_id=None if project_only else project_id)
 
     logging.info(
         f"✅ Subgraphs verified [project_id = {project_id}, dataset = {dataset}, "
-        f"bq_project = {bq_project}, num_links = {len(links_rows)}]")
+        f"bq_project = {bq_project}, num_links = {counts['num_links']}]")
 
 
 def verify_snapshot_for_project(source_hca_project_id: str, dataset_qualifier: str) -> SnapshotModel:
@@ -163,6 +292,8 @@ if __name__ == '__main__':
     single_project_verify.add_argument("-d", "--dataset", required=True)
     single_project_verify.add_argument("-s", "--snapshot", action="store_true")
     single_project_verify.add_argument("-p", "--project_id")
+    single_project_verify.add_argument("--server-side", action="store_true",
+                                       help="Verify within BigQuery instead of loading the links table locally")
     single_project_verify.set_defaults(func=run_verify_single_project)
 
     args = argparser.parse_args()
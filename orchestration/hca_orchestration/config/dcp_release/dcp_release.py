@@ -23,6 +23,7 @@ def run_config_for_dcp_release_partition(partition: Partition) -> DagsterObjectC
     load_prefix = f"dcp_release_{creation_date}"
     run_config["resources"]["scratch_config"]["config"]["scratch_dataset_prefix"] = "staging"
     run_config["resources"]["load_tag"]["config"]["load_tag_prefix"] = load_prefix
+    run_config["resources"]["load_checkpoints"] = {"config": {"staging_area": partition.value}}
     return run_config
     # jscpd:ignore-end
 
@@ -41,6 +42,7 @@ def run_config_for_dcp_release_per_project_partition(partition: Partition) -> Da
     load_prefix = f"dcp_release_{creation_date}"
     run_config["resources"]["scratch_config"]["config"]["scratch_dataset_prefix"] = "staging"
     run_config["resources"]["load_tag"]["config"]["load_tag_prefix"] = load_prefix
+    run_config["resources"]["load_checkpoints"] = {"config": {"staging_area": partition.value}}
 
     # TODO this is kind of a hack; we're looking for a UUID in the source path and assuming it's a project ID
     project_id = find_project_id_in_str(partition.value)
@@ -65,6 +67,7 @@ def dev_run_config_for_dcp_release_per_project_partition(partition: Partition) -
     load_prefix = f"dcp_release_{creation_date}"
     run_config["resources"]["scratch_config"]["config"]["scratch_dataset_prefix"] = "staging"
     run_config["resources"]["load_tag"]["config"]["load_tag_prefix"] = load_prefix
+    run_config["resources"]["load_checkpoints"] = {"config": {"staging_area": partition.value}}
 
     # TODO this is kind of a hack; we're looking for a UUID in the source path and assuming it's a project ID
     project_id = find_project_id_in_str(partition.value)
@@ -1,9 +1,13 @@
 """
-Abstraction over the raw bigquery client. All operations automatically return the materialized results of a query.
+Abstraction over the raw bigquery client. The run_* and build_* operations automatically return the materialized
+results of a query; the submit_* variants return a BigQueryJobHandle immediately so that callers can keep many jobs
+in flight and await them together via wait_for_jobs.
 """
-
-from dataclasses import dataclass
-from typing import Optional, cast
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, Union, cast
 
 from dagster_utils.contrib.google import GsBucketWithPrefix
 from google.cloud import bigquery
@@ -14,13 +18,150 @@ from google.cloud.bigquery import (
     WriteDisposition,
 )
 from google.cloud.bigquery.table import RowIterator
+from hca_orchestration.contrib.row_counts import TableRowCounts
+from hca_orchestration.contrib.telemetry import record_call
 from hca_orchestration.models.hca_dataset import TdrDataset
 
+BigQueryJob = Union[bigquery.QueryJob, bigquery.ExtractJob]
+
+
+class BigQueryJobTimeoutException(Exception):
+    pass
+
+
+@dataclass
+class BigQueryJobStats:
+    job_id: str
+    total_bytes_processed: Optional[int]
+    slot_millis: Optional[int]
+    wall_time_seconds: Optional[float]
+
+
+@dataclass
+class BigQueryJobHandle:
+    """
+    A submitted, possibly still running, BigQuery job
+    """
+    job: BigQueryJob
+
+    _recorded: bool = field(default=False, init=False, repr=False)
+
+    def done(self) -> bool:
+        """
+        Refreshes the job state from BigQuery, returning True once the job has finished (successfully or not)
+        """
+        done = cast(bool, self.job.done())
+        if done:
+            self._record_completion(error=self.job.exception() is not None)
+        return done
+
+    def raise_for_error(self) -> None:
+        error = self.job.exception()
+        if error:
+            raise error
+
+    def result(self) -> RowIterator:
+        """
+        Blocks until the job finishes, returning its materialized results
+        """
+        try:
+            result = self.job.result()
+        except Exception:
+            self._record_completion(error=True)
+            raise
+        self._record_completion(error=False)
+        return result
+
+    def _record_completion(self, error: bool) -> None:
+        # reported to telemetry once per job, by whichever of done() or result() first sees it finish
+        if self._recorded:
+            return
+        self._recorded = True
+
+        measurements = {}
+        for name, attribute in [
+            ("bytes_processed", "total_bytes_processed"),
+            ("bytes_billed", "total_bytes_billed"),
+            ("slot_milliseconds", "slot_millis"),
+        ]:
+            value = getattr(self.job, attribute, None)
+            if isinstance(value, (int, float)):
+                measurements[name] = value
+        created, started, ended = (getattr(self.job, attribute, None) for attribute in ["created", "started", "ended"])
+        if isinstance(created, datetime) and isinstance(started, datetime):
+            measurements["queue_seconds"] = (started - created).total_seconds()
+        file_counts = getattr(self.job, "destination_uri_file_counts", None)
+        if isinstance(file_counts, list):
+            measurements["extract_shards"] = sum(file_counts)
+
+        seconds = 0.0
+        if isinstance(created, datetime) and isinstance(ended, datetime):
+            seconds = (ended - created).total_seconds()
+        job_type = getattr(self.job, "job_type", None)
+        record_call("bigquery", job_type if isinstance(job_type, str) else "job", seconds, error=error,
+                    **measurements)
+
+    @property
+    def stats(self) -> BigQueryJobStats:
+        wall_time_seconds = None
+        if self.job.created and self.job.ended:
+            wall_time_seconds = (self.job.ended - self.job.created).total_seconds()
+
+        return BigQueryJobStats(
+            job_id=self.job.job_id,
+            total_bytes_processed=getattr(self.job, "total_bytes_processed", None),
+            slot_millis=getattr(self.job, "slot_millis", None),
+            wall_time_seconds=wall_time_seconds
+        )
+
 
 @dataclass
 class BigQueryService:
     bigquery_client: bigquery.client.Client
 
+    _row_counts: TableRowCounts = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._row_counts = TableRowCounts(self.bigquery_client)
+
+    def wait_for_jobs(
+            self,
+            handles: list[BigQueryJobHandle],
+            poll_interval_seconds: float = 1.0,
+            max_wait_time_seconds: Optional[float] = None
+    ) -> list[BigQueryJobStats]:
+        """
+        Awaits all of the given jobs using a single polling loop, returning per-job stats in input order.
+        The first job found to have failed has its error re-raised; jobs still running at that point
+        are left to finish on their own.
+        """
+        deadline = time.monotonic() + max_wait_time_seconds if max_wait_time_seconds is not None else None
+        pending = list(handles)
+        while pending:
+            still_pending = []
+            for handle in pending:
+                if handle.done():
+                    handle.raise_for_error()
+                    stats = handle.stats
+                    logging.info(
+                        f"BigQuery job {stats.job_id} complete "
+                        f"[bytes_processed = {stats.total_bytes_processed}, slot_ms = {stats.slot_millis}, "
+                        f"wall_time_s = {stats.wall_time_seconds}]"
+                    )
+                else:
+                    still_pending.append(handle)
+
+            pending = still_pending
+            if not pending:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                raise BigQueryJobTimeoutException(
+                    f"Timed out waiting for {len(pending)} BigQuery jobs [job_ids = {[h.job.job_id for h in pending]}]"
+                )
+            time.sleep(poll_interval_seconds)
+
+        return [handle.stats for handle in handles]
+
     def run_query_with_destination(
             self,
             query: str,
@@ -32,8 +173,22 @@ class BigQueryService:
         Performs a bigquery query, with no external table definitions.
         Results are deposited in the destination table provided.
         """
+        return self.submit_query_with_destination(query, destination_table, bigquery_project, location).result()
+
+    def submit_query_with_destination(
+            self,
+            query: str,
+            destination_table: str,
+            bigquery_project: str,
+            location: str
+    ) -> BigQueryJobHandle:
+        """
+        Submits a bigquery query, with no external table definitions, without waiting for it to finish.
+        Results are deposited in the destination table provided.
+        """
         job_config = bigquery.QueryJobConfig()
 
+        self._invalidate_destination(destination_table)
         job_config.destination = destination_table
         job_config.use_legacy_sql = False
         job_config.write_disposition = WriteDisposition.WRITE_TRUNCATE
@@ -44,7 +199,7 @@ class BigQueryService:
             project=bigquery_project
         )
 
-        return query_job.result()
+        return BigQueryJobHandle(query_job)
 
     def run_query(
             self,
@@ -56,6 +211,18 @@ class BigQueryService:
         """
         Performs a bigquery query, with no external destination (table or otherwise)
         """
+        return self.submit_query(query, bigquery_project, location, query_params).result()
+
+    def submit_query(
+            self,
+            query: str,
+            bigquery_project: str,
+            location: str,
+            query_params: list[ArrayQueryParameter] = []
+    ) -> BigQueryJobHandle:
+        """
+        Submits a bigquery query, with no external destination (table or otherwise), without waiting for it to finish
+        """
         job_config = QueryJobConfig()
         if query_params:
             job_config.query_parameters = query_params
@@ -66,7 +233,7 @@ class BigQueryService:
             location=location,
             project=bigquery_project
         )
-        return query_job.result()
+        return BigQueryJobHandle(query_job)
 
     def run_query_using_external_schema(
             self,
@@ -85,6 +252,30 @@ class BigQueryService:
         If no schema is provided, we leverage BigQuery's schema autodetection mechanism
         to infer datatypes (https://cloud.google.com/bigquery/docs/schema-detect)
         """
+        return self.submit_query_using_external_schema(
+            query,
+            source_paths,
+            schema,
+            table_name,
+            destination,
+            bigquery_project,
+            location
+        ).result()
+
+    def submit_query_using_external_schema(
+            self,
+            query: str,
+            source_paths: list[str],
+            schema: Optional[list[dict[str, str]]],
+            table_name: str,
+            destination: str,
+            bigquery_project: str,
+            location: str
+    ) -> BigQueryJobHandle:
+        """
+        Submits a bigquery query using an external table definition without waiting for it to finish.
+        See run_query_using_external_schema.
+        """
         job_config = bigquery.QueryJobConfig()
 
         raw_external_config: dict[str, object] = {
@@ -102,6 +293,7 @@ class BigQueryService:
             table_name: external_config
         }
 
+        self._invalidate_destination(destination)
         job_config.destination = destination
         job_config.use_legacy_sql = False
         job_config.write_disposition = WriteDisposition.WRITE_TRUNCATE
@@ -113,7 +305,7 @@ class BigQueryService:
             project=bigquery_project
         )
 
-        return query_job.result()
+        return BigQueryJobHandle(query_job)
 
     def build_extract_job(
             self,
@@ -127,6 +319,26 @@ class BigQueryService:
         """
         Extracts the contents of a BQ table to the supplied out path
         """
+        return self.submit_extract_job(  # type: ignore
+            source_table,
+            out_path,
+            bigquery_dataset,
+            bigquery_project,
+            output_format
+        ).result()
+
+    def submit_extract_job(
+            self,
+            source_table: str,
+            out_path: str,
+            bigquery_dataset: str,
+            bigquery_project: str,
+            output_format:
+            bigquery.DestinationFormat = bigquery.DestinationFormat.NEWLINE_DELIMITED_JSON  # type: ignore
+    ) -> BigQueryJobHandle:
+        """
+        Starts extracting the contents of a BQ table to the supplied out path without waiting for it to finish
+        """
         job_config = bigquery.job.ExtractJobConfig()
         job_config.destination_format = output_format
         job_config.print_header = False
@@ -139,7 +351,7 @@ class BigQueryService:
             project=bigquery_project
         )
 
-        return cast(bigquery.ExtractJob, extract_job).result()  # type: ignore
+        return BigQueryJobHandle(cast(bigquery.ExtractJob, extract_job))
 
     def get_num_rows_in_table(
             self,
@@ -147,17 +359,37 @@ class BigQueryService:
             bigquery_dataset: str
     ) -> int:
         """
-        Returns the # of rows present in the given table
-        table_name should be bare, without dataset or project.
+        Returns the # of rows present in the given table, read from the table's metadata where possible.
+        table_name should be bare, without dataset or project; bigquery_dataset may be qualified with its project.
         """
-        query = f"""
-        SELECT COUNT(1) FROM {bigquery_dataset}.{table_name}
+        project, dataset = self._qualify_dataset(bigquery_dataset)
+        return self._row_counts.num_rows(project, dataset, table_name)
+
+    def get_num_rows_in_dataset(self, bigquery_dataset: str) -> dict[str, int]:
         """
-        result = self.bigquery_client.query(query, None).result()
-        cnt = -1
-        for row in result:
-            cnt = row[0]
-        return cnt
+        Returns the # of rows in every native table of the given dataset, read in one pass,
+        and caches them for later get_num_rows_in_table calls
+        """
+        project, dataset = self._qualify_dataset(bigquery_dataset)
+        return self._row_counts.prefetch(project, dataset)
+
+    def invalidate_row_counts(self, bigquery_dataset: str, table_name: Optional[str] = None) -> None:
+        """
+        Drops cached row counts for a table, or a whole dataset, that has been written by a query
+        whose destination this service could not see (e.g., a script)
+        """
+        project, dataset = self._qualify_dataset(bigquery_dataset)
+        self._row_counts.invalidate(project, dataset, table_name)
+
+    def _invalidate_destination(self, destination_table: str) -> None:
+        dataset, table = destination_table.rsplit(".", 1)
+        self.invalidate_row_counts(dataset, table)
+
+    def _qualify_dataset(self, bigquery_dataset: str) -> tuple[str, str]:
+        if "." in bigquery_dataset:
+            project, dataset = bigquery_dataset.split(".", 1)
+            return project, dataset
+        return self.bigquery_client.project, bigquery_dataset
 
     def build_extract_duplicates_job(
             self,
@@ -209,6 +441,33 @@ class BigQueryService:
             target_hca_dataset.project_id,
             location=location)
 
+    def build_file_id_lookup_table(
+            self,
+            destination_table: str,
+            target_hca_dataset: TdrDataset,
+            bigquery_project: str,
+            location: str
+    ) -> RowIterator:
+        """
+        Materializes the succeeded entries of the target dataset's load history as a
+        (target_path, checksum_crc32c) -> file_id lookup table, clustered on its join keys.
+        destination_table should be fully qualified (project.dataset.table).
+        """
+        query = f"""
+        CREATE OR REPLACE TABLE `{destination_table}`
+        CLUSTER BY target_path, checksum_crc32c
+        AS
+        SELECT DISTINCT target_path, checksum_crc32c, file_id
+        FROM `{target_hca_dataset.project_id}.datarepo_{target_hca_dataset.dataset_name}.datarepo_load_history`
+        WHERE state = 'succeeded'
+        """
+
+        return self.run_query(
+            query,
+            bigquery_project,
+            location=location
+        )
+
     def run_extract_file_ids_job(self,
                                  destination_gcs_path: GsBucketWithPrefix,
                                  table_name: str,
@@ -241,8 +500,10 @@ class BigQueryService:
             bigquery_project: str,
             bigquery_location: str
     ) -> set[str]:
-        links_rows = self.get_links_in_dataset(bigquery_dataset, bigquery_project, bigquery_location)
-        return {row["project_id"] for row in links_rows}
+        query = f"""
+            SELECT DISTINCT project_id FROM `{bigquery_project}.datarepo_{bigquery_dataset}.links`
+        """
+        return {row["project_id"] for row in self.run_query(query, bigquery_project, bigquery_location)}
 
     def get_links_in_dataset(
         self,
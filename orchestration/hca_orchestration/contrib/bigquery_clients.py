@@ -0,0 +1,61 @@
+"""
+Process-wide registry of BigQuery clients. Building a bigquery.Client runs credential discovery and sets up a new
+HTTP session, which costs far more than the small metadata queries the hca_manage tools issue; sharing one client
+per (project, credentials) lets every manager and CLI in a process reuse the same authorized, pooled session.
+"""
+import threading
+from typing import Any, Optional
+
+import requests
+from google.auth.credentials import Credentials
+from google.cloud import bigquery
+
+# matches the largest thread pool used by the hca_manage tools, so concurrent queries don't queue on connections
+DEFAULT_HTTP_POOL_SIZE = 16
+
+_clients: dict[tuple[Optional[str], Any], bigquery.Client] = {}
+_lock = threading.Lock()
+
+
+def get_bigquery_client(
+        project: Optional[str] = None,
+        credentials: Optional[Credentials] = None,
+        pool_size: int = DEFAULT_HTTP_POOL_SIZE
+) -> bigquery.Client:
+    """
+    Returns the shared client for the given project and credentials, creating it on first use. Credentials are
+    matched by identity; None uses application default credentials. pool_size only applies when the client is
+    first created.
+    """
+    key = (project, credentials)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = bigquery.Client(project=project, credentials=credentials)
+            adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            client._http.mount("https://", adapter)
+            _clients[key] = client
+        return client
+
+
+def register_bigquery_client(
+        client: bigquery.Client,
+        project: Optional[str] = None,
+        credentials: Optional[Credentials] = None
+) -> None:
+    """
+    Makes get_bigquery_client return the given client for the given project and credentials, e.g. to point the
+    hca_manage tools at a stand-in service
+    """
+    with _lock:
+        _clients[(project, credentials)] = client
+
+
+def clear_bigquery_clients() -> None:
+    """
+    Closes and forgets all shared clients
+    """
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
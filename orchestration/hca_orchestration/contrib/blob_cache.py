@@ -0,0 +1,130 @@
+"""
+Local, content-addressed on-disk cache of GCS blob contents. Blobs are keyed by bucket, object name,
+generation and crc32c, so a cached copy is only ever reused for the exact object version it was downloaded
+from; a blob that has been overwritten in GCS gets a new generation and is fetched again.
+
+The cache is bounded in size and evicts least-recently-used entries.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+# once over its size bound, the cache evicts down to this fraction of it, so that a run of inserts into a full
+# cache does not evict on every one
+EVICTION_LOW_WATERMARK = 0.9
+
+
+@dataclass(frozen=True)
+class BlobKey:
+    bucket: str
+    name: str
+    generation: Optional[int]
+    crc32c: Optional[str]
+
+    def digest(self) -> str:
+        return hashlib.sha256(f"{self.bucket}/{self.name}#{self.generation}#{self.crc32c}".encode()).hexdigest()
+
+    @staticmethod
+    def from_blob(blob: Any) -> "BlobKey":
+        return BlobKey(blob.bucket.name, blob.name, blob.generation, blob.crc32c)
+
+
+class BlobCache:
+    def __init__(self, cache_dir: str, max_size_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._blob_dir = os.path.join(cache_dir, "blobs")
+        os.makedirs(self._blob_dir, exist_ok=True)
+
+        # entry path -> size, least recently used first; entries left by earlier runs are ordered by write time
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        existing = []
+        for root, _, files in os.walk(self._blob_dir):
+            for file_name in files:
+                path = os.path.join(root, file_name)
+                stat = os.stat(path)
+                existing.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(existing):
+            self._entries[path] = size
+        self._total_size = sum(self._entries.values())
+
+    def read_blob_text(self, blob: Any) -> str:
+        """
+        Returns the contents of an already-listed storage Blob, downloading it only if it is not cached
+        """
+        key = BlobKey.from_blob(blob)
+        cached = self._get(key)
+        if cached is not None:
+            return cached.decode("utf-8")
+
+        return self._put(key, blob.download_as_bytes()).decode("utf-8")
+
+    def _entry_path(self, key: BlobKey) -> str:
+        digest = key.digest()
+        return os.path.join(self._blob_dir, digest[:2], digest)
+
+    def _get(self, key: BlobKey) -> Optional[bytes]:
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as entry:
+                content = entry.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            if path in self._entries:
+                self._entries.move_to_end(path)
+        return content
+
+    def _put(self, key: BlobKey, content: bytes) -> bytes:
+        if len(content) > self.max_size_bytes:
+            return content
+
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write_atomically(path, content)
+
+        with self._lock:
+            self._total_size += len(content) - self._entries.get(path, 0)
+            self._entries[path] = len(content)
+            self._entries.move_to_end(path)
+            if self._total_size > self.max_size_bytes:
+                self._evict()
+        return content
+
+    def _evict(self) -> None:
+        """
+        Removes least recently used entries until the cache is back under its low watermark. Caller must hold
+        the lock.
+        """
+        low_watermark = self.max_size_bytes * EVICTION_LOW_WATERMARK
+        evicted = 0
+        while self._entries and self._total_size > low_watermark:
+            path, size = self._entries.popitem(last=False)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._total_size -= size
+            evicted += 1
+
+        logging.debug(f"Evicted {evicted} entries from blob cache at {self.cache_dir}")
+
+    @staticmethod
+    def _write_atomically(path: str, content: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(content)
+        os.replace(tmp_path, path)
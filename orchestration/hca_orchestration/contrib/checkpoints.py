@@ -0,0 +1,117 @@
+"""
+Durable checkpoints for load_hca runs. A run records the stages it has finished, and the TDR jobs it has
+submitted, keyed by load tag and staging area. A rerun of the same load in resume mode, given the earlier run's
+load tag (load tags usually carry a run id, so a rerun would otherwise get a new one), then skips finished stages
+and reattaches to submitted jobs instead of starting over at the scratch purge. Checkpoints live in a
+single small JSON object in GCS, outside the scratch prefix so that clearing scratch does not drop them.
+"""
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Optional
+
+from dagster_utils.contrib.data_repo.typing import JobId
+from google.cloud.storage.client import Client
+
+CHECKPOINT_PREFIX = "_checkpoints"
+
+
+class LoadCheckpointStore:
+    """
+    In-memory checkpoints for a single load; subclasses persist them
+    """
+
+    def __init__(self, load_tag: str, staging_area: str, resume: bool = False):
+        self.load_tag = load_tag
+        self.staging_area = staging_area
+        self.resume = resume
+        self._stages: dict[str, Any] = {}
+        self._jobs: dict[str, JobId] = {}
+        self._lock = threading.Lock()
+
+    def is_complete(self, stage: str) -> bool:
+        with self._lock:
+            return stage in self._stages
+
+    def stage_result(self, stage: str) -> Any:
+        """
+        Returns the JSON-serializable result recorded when the given stage completed
+        """
+        with self._lock:
+            return self._stages[stage]
+
+    def complete(self, stage: str, result: Any = None) -> None:
+        with self._lock:
+            self._stages[stage] = result
+            self._save()
+
+    def job_id(self, key: str) -> Optional[JobId]:
+        with self._lock:
+            return self._jobs.get(key)
+
+    def record_job(self, key: str, job_id: JobId) -> None:
+        with self._lock:
+            self._jobs[key] = job_id
+            self._save()
+
+    def forget_job(self, key: str) -> None:
+        """
+        Drops a recorded job, e.g. one that failed, so a resumed run submits the work again
+        """
+        with self._lock:
+            if self._jobs.pop(key, None) is not None:
+                self._save()
+
+    def _to_json(self) -> str:
+        return json.dumps({
+            "load_tag": self.load_tag,
+            "staging_area": self.staging_area,
+            "stages": self._stages,
+            "jobs": self._jobs
+        })
+
+    def _from_json(self, raw: str) -> None:
+        state = json.loads(raw)
+        self._stages = state["stages"]
+        self._jobs = {key: JobId(job_id) for key, job_id in state["jobs"].items()}
+
+    def _save(self) -> None:
+        # caller holds the lock
+        pass
+
+
+class GcsLoadCheckpointStore(LoadCheckpointStore):
+    """
+    Checkpoints persisted to gs://<bucket>/_checkpoints/<load tag>/<staging area digest>.json. Every write is
+    conditional on the generation last seen, so two runs sharing a checkpoint fail rather than overwrite
+    each other's progress.
+    """
+
+    def __init__(self, gcs: Client, bucket: str, load_tag: str, staging_area: str, resume: bool = False):
+        super().__init__(load_tag, staging_area, resume)
+        staging_area_digest = hashlib.sha256(staging_area.encode()).hexdigest()[:16]
+        self.blob = gcs.bucket(bucket).blob(f"{CHECKPOINT_PREFIX}/{load_tag}/{staging_area_digest}.json")
+        # None on a fresh run, so its first write replaces any checkpoint left by an earlier one
+        self._generation: Optional[int] = None
+
+        if not resume:
+            logging.info(f"Recording checkpoints for load {load_tag} at gs://{bucket}/{self.blob.name}")
+            return
+
+        if self.blob.exists():
+            self.blob.reload()
+            self._from_json(self.blob.download_as_text(if_generation_match=self.blob.generation))
+            self._generation = self.blob.generation
+            logging.info(f"Resuming load {load_tag} from gs://{bucket}/{self.blob.name} "
+                         f"[stages = {sorted(self._stages)}, jobs = {len(self._jobs)}]")
+        else:
+            # nothing to resume; the first write must create the checkpoint
+            self._generation = 0
+            logging.warning(f"No checkpoint found for load {load_tag} at gs://{bucket}/{self.blob.name}, starting "
+                            f"from scratch; resuming needs the earlier run's tag as load_tag.resume_load_tag")
+
+    def _save(self) -> None:
+        self.blob.upload_from_string(self._to_json(), content_type="application/json",
+                                     if_generation_match=self._generation)
+        self._generation = self.blob.generation
@@ -0,0 +1,103 @@
+"""
+Bounded scheduling for BigQuery and TDR work. Callers hand a list of independent work items to a shared
+worker pool, while BigQuery jobs (per billing project) and TDR ingests are gated by separate concurrency limits.
+"""
+import functools
+import logging
+import threading
+from concurrent.futures import FIRST_EXCEPTION, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, ContextManager, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class BoundedJobScheduler:
+    """
+    Runs work items on a bounded thread pool. Work items acquire a BigQuery or TDR slot around each
+    blocking call so that the number of outstanding jobs never exceeds the configured limits,
+    regardless of the pool size.
+    """
+    max_workers: int
+    bigquery_concurrency: int
+    tdr_ingest_concurrency: int
+
+    _bigquery_slots: dict[str, threading.BoundedSemaphore] = field(init=False, repr=False)
+    _tdr_ingest_slots: threading.BoundedSemaphore = field(init=False, repr=False)
+    _lock: threading.Lock = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.max_workers < 1 or self.bigquery_concurrency < 1 or self.tdr_ingest_concurrency < 1:
+            raise ValueError("Concurrency limits must be >= 1")
+
+        self._bigquery_slots = {}
+        self._tdr_ingest_slots = threading.BoundedSemaphore(self.tdr_ingest_concurrency)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def bigquery_slot(self, bigquery_project: str) -> Iterator[None]:
+        """
+        Holds one of the BigQuery job slots for the given billing project for the duration of the block
+        """
+        with self._lock:
+            if bigquery_project not in self._bigquery_slots:
+                self._bigquery_slots[bigquery_project] = threading.BoundedSemaphore(self.bigquery_concurrency)
+            slots = self._bigquery_slots[bigquery_project]
+
+        with slots:
+            yield
+
+    @contextmanager
+    def tdr_ingest_slot(self) -> Iterator[None]:
+        """
+        Holds one of the TDR ingest slots for the duration of the block
+        """
+        with self._tdr_ingest_slots:
+            yield
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T]) -> list[R]:
+        """
+        Applies fn to every item on the worker pool, returning results in input order.
+        The first failure cancels any work that has not yet started and is re-raised.
+        """
+        work = list(items)
+        if self.max_workers == 1 or len(work) <= 1:
+            return [fn(item) for item in work]
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(work)),
+                                thread_name_prefix="hca-scheduler") as pool:
+            futures: list[Future[R]] = [pool.submit(fn, item) for item in work]
+            done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+            failed = [future for future in done if future.exception()]
+            if failed:
+                cancelled = sum(1 for future in not_done if future.cancel())
+                logging.warning(f"Scheduled work failed, cancelled {cancelled} pending items")
+                raise failed[0].exception()  # type: ignore
+
+            return [future.result() for future in futures]
+
+
+class SlotBoundService:
+    """
+    Proxies a service object such that every public method call runs while holding a slot
+    obtained from the given slot factory.
+    """
+
+    def __init__(self, service: Any, slot: Callable[[], ContextManager[None]]):
+        self._service = service
+        self._slot = slot
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._service, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def _call_with_slot(*args: Any, **kwargs: Any) -> Any:
+            with self._slot():
+                return attr(*args, **kwargs)
+
+        return _call_with_slot
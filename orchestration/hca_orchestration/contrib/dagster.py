@@ -1,12 +1,33 @@
+import functools
+import inspect
 import logging
 import os
+import time
 import uuid
-from typing import Any, Callable, Optional, TypeVar
-
-from dagster import Partition, PartitionSetDefinition
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+from dagster import (
+    AssetKey,
+    AssetMaterialization,
+    DagsterEventType,
+    DagsterInstance,
+    EventRecordsFilter,
+    MetadataValue,
+    Partition,
+    PartitionSetDefinition,
+)
+from dagster.core.execution.context.compute import SolidExecutionContext
+from dagster.core.execution.context.invocation import BoundSolidExecutionContext
 from google.cloud.storage import Client
 
+from hca_orchestration.contrib.metrics import MetricsRegistry
+from hca_orchestration.contrib.telemetry import telemetry_scope
+
 T = TypeVar("T")
+F = TypeVar("F", bound=Callable[..., Any])
+
+TELEMETRY_ASSET_PREFIX = "hca_telemetry"
 
 
 def configure_partitions_for_pipeline(pipeline_name: str, config_fn: Callable[[
@@ -88,3 +109,120 @@ def short_run_id(run_id: Optional[str]) -> str:
         run_id = uuid.uuid4().hex
     tag = f"{run_id[0:8]}"
     return tag
+
+
+def _telemetry_metadata_value(name: str, value: float) -> MetadataValue:
+    if name.endswith("seconds"):
+        return MetadataValue.float(value)
+    return MetadataValue.int(int(round(value)))
+
+
+@contextmanager
+def _solid_telemetry(context: SolidExecutionContext, attach_output_metadata: bool) -> Iterator[None]:
+    if isinstance(context, BoundSolidExecutionContext):
+        # invoked directly (e.g., in a unit test) rather than as part of a run, so there is no step to report on
+        yield
+        return
+
+    job_name = context.pipeline_name
+    solid_name = str(context.solid_handle)
+    status = "failure"
+    start = time.monotonic()
+    try:
+        with telemetry_scope(job=job_name, solid=solid_name) as scope:
+            yield
+        status = "success"
+    finally:
+        # logged for failed steps too, so the calls that led up to a failure are counted
+        metadata: dict[str, MetadataValue] = {
+            "status": MetadataValue.text(status),
+            "duration_seconds": MetadataValue.float(time.monotonic() - start)
+        }
+        metadata.update({name: _telemetry_metadata_value(name, value) for name, value in scope.flatten().items()})
+        context.log_event(AssetMaterialization(
+            asset_key=AssetKey([TELEMETRY_ASSET_PREFIX, solid_name]),
+            description=f"Performance of {solid_name} in {job_name}",
+            metadata=metadata
+        ))
+
+    if attach_output_metadata:
+        context.add_output_metadata(metadata)
+
+
+def instrumented(fn: F) -> F:
+    """
+    Wraps a solid's compute function to record its duration and the BigQuery, TDR and GCS calls it makes
+    (see contrib.telemetry). When the solid finishes, successfully or not, the totals are logged as a
+    materialization of its hca_telemetry/<solid> asset, so Dagit charts them across runs and
+    export_telemetry can turn them into metrics. A solid that succeeds and returns a single value also gets
+    them as metadata on its output. Apply beneath @solid.
+    """
+    if inspect.isgeneratorfunction(fn):
+        @functools.wraps(fn)
+        def _instrumented_generator(context: SolidExecutionContext, *args: Any, **kwargs: Any) -> Any:
+            with _solid_telemetry(context, attach_output_metadata=False):
+                yield from fn(context, *args, **kwargs)
+
+        return _instrumented_generator  # type: ignore
+
+    @functools.wraps(fn)
+    def _instrumented(context: SolidExecutionContext, *args: Any, **kwargs: Any) -> Any:
+        output_defs = context.solid_def.output_defs
+        single_output = len(output_defs) == 1 and not output_defs[0].is_dynamic
+        with _solid_telemetry(context, attach_output_metadata=single_output):
+            return fn(context, *args, **kwargs)
+
+    return _instrumented  # type: ignore
+
+
+def _export_service_call_totals(registry: MetricsRegistry, labels: dict[str, str], name: str, value: float) -> None:
+    service, operation, measure = name.split(".", 2)
+    labels = {**labels, "service": service, "operation": operation}
+    if measure == "calls":
+        registry.inc("hca_service_calls_total", "Calls to external services", labels, value)
+    elif measure == "errors":
+        registry.inc("hca_service_call_errors_total", "Calls to external services that raised", labels, value)
+    elif measure == "seconds":
+        registry.inc("hca_service_call_seconds_total", "Wall time of calls to external services", labels, value)
+    else:
+        registry.inc(f"hca_{service}_{measure}_total", f"Total {measure.replace('_', ' ')} reported by {service} calls",
+                     labels, value)
+
+
+def export_telemetry(
+        instance: DagsterInstance,
+        registry: MetricsRegistry,
+        after_storage_id: Optional[int] = None,
+        page_size: int = 1000
+) -> Optional[int]:
+    """
+    Adds the hca_telemetry materializations logged to the instance's event log since the given cursor to the
+    registry, as solid durations and per-service call totals labelled by job and solid. Returns the cursor to
+    pass next time.
+    """
+    while True:
+        records = instance.get_event_records(
+            EventRecordsFilter(event_type=DagsterEventType.ASSET_MATERIALIZATION, after_cursor=after_storage_id),
+            limit=page_size,
+            ascending=True
+        )
+        for record in records:
+            after_storage_id = record.storage_id
+            entry = record.event_log_entry
+            materialization = entry.dagster_event.step_materialization_data.materialization
+            path = materialization.asset_key.path
+            if len(path) != 2 or path[0] != TELEMETRY_ASSET_PREFIX:
+                continue
+
+            metadata = {metadata_entry.label: metadata_entry.value.value
+                        for metadata_entry in materialization.metadata_entries}
+            labels = {"job": entry.pipeline_name, "solid": path[1]}
+            registry.observe("hca_solid_duration_seconds", "Wall time of solid executions",
+                             {**labels, "status": metadata.pop("status", "success")},
+                             metadata.pop("duration_seconds", 0.0))
+            for name, value in metadata.items():
+                if name.count(".") >= 2:
+                    _export_service_call_totals(registry, labels, name, value)
+
+        if len(records) < page_size:
+            return after_storage_id
@@ -0,0 +1,197 @@
+"""
+Runs TDR bulk file loads with a bounded number in flight. Rather than submitting one control file and waiting
+hours for its job before starting the next, up to max_in_flight jobs run at once and a new one is submitted as
+soon as any finishes, so a long load no longer blocks the rest. When TDR pushes back on submissions with a 429
+or 5xx, submission backs off and the in-flight limit is halved, recovering by one slot per successful load.
+Given a checkpoint store, submitted jobs are recorded per control file so that a resumed run reattaches to
+them rather than loading the same control file again.
+"""
+import logging
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+
+from dagster_utils.contrib.data_repo.jobs import JobPollException
+from dagster_utils.contrib.data_repo.typing import JobId
+from data_repo_client import ApiException, JobModel, RepositoryApi
+
+from hca_orchestration.contrib.checkpoints import LoadCheckpointStore
+from hca_orchestration.contrib.data_repo.job_watcher import TdrJobWatcher
+from hca_orchestration.contrib.retry import RetryException, RetryPolicy, is_truthy
+
+
+class BulkIngestSubmissionException(Exception):
+    pass
+
+
+@dataclass
+class BulkIngestResult:
+    control_file_path: str
+    # None if the load could not be submitted
+    job_id: Optional[JobId]
+    succeeded_files: int = 0
+    failed_files: int = 0
+    # set if the load could not be submitted, or its job failed, timed out or its results could not be fetched
+    error: Optional[str] = None
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None or self.failed_files > 0
+
+
+@dataclass
+class BulkIngestSummary:
+    results: list[BulkIngestResult] = field(default_factory=list)
+    # control files left unsubmitted because an earlier load failed
+    not_submitted: list[str] = field(default_factory=list)
+    throttled_submissions: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def succeeded_files(self) -> int:
+        return sum(result.succeeded_files for result in self.results)
+
+    @property
+    def failures(self) -> list[BulkIngestResult]:
+        return [result for result in self.results if result.failed]
+
+    @property
+    def files_per_second(self) -> float:
+        return self.succeeded_files / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+def _default_submit_retry_policy() -> RetryPolicy:
+    return RetryPolicy(initial_delay_seconds=5, max_delay_seconds=300, max_wait_time_seconds=3600)
+
+
+class BulkIngestScheduler:
+    def __init__(
+            self,
+            data_repo_client: RepositoryApi,
+            job_watcher: TdrJobWatcher,
+            dataset_id: str,
+            profile_id: str,
+            load_tag: str,
+            max_in_flight: int = 4,
+            max_wait_time_seconds: float = 28800,
+            submit_retry_policy: Optional[RetryPolicy] = None,
+            checkpoints: Optional[LoadCheckpointStore] = None
+    ):
+        self.data_repo_client = data_repo_client
+        self.job_watcher = job_watcher
+        self.dataset_id = dataset_id
+        self.profile_id = profile_id
+        self.load_tag = load_tag
+        self.max_in_flight = max_in_flight
+        self.max_wait_time_seconds = max_wait_time_seconds
+        self.submit_retry_policy = submit_retry_policy or _default_submit_retry_policy()
+        self.checkpoints = checkpoints
+        # current in-flight limit, lowered while TDR is throttling submissions
+        self.in_flight_limit = max_in_flight
+
+    def run(self, control_file_paths: Iterable[str]) -> BulkIngestSummary:
+        """
+        Loads every given control file (gs:// paths), returning once all submitted loads have finished. After
+        the first failed load (including one that could not be submitted) no further control files are submitted,
+        but loads already running are waited on.
+        """
+        started = time.monotonic()
+        summary = BulkIngestSummary()
+        pending = deque(control_file_paths)
+        in_flight: dict[Future[JobId], tuple[str, JobId]] = {}
+
+        while (pending and not summary.failures) or in_flight:
+            while pending and not summary.failures and len(in_flight) < self.in_flight_limit:
+                control_file_path = pending.popleft()
+                try:
+                    job_id = self._submit_or_reattach(control_file_path, summary)
+                except (ApiException, BulkIngestSubmissionException) as e:
+                    logging.error(f"Failed to submit bulk file load of {control_file_path}: {e}")
+                    summary.results.append(BulkIngestResult(control_file_path, None, error=str(e)))
+                    break
+                in_flight[self.job_watcher.watch(job_id, self.max_wait_time_seconds)] = (control_file_path, job_id)
+
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                control_file_path, job_id = in_flight.pop(future)
+                result = self._collect(control_file_path, job_id, future)
+                summary.results.append(result)
+                if not result.failed:
+                    self.in_flight_limit = min(self.in_flight_limit + 1, self.max_in_flight)
+                elif self.checkpoints:
+                    # don't reattach to a failed load on resume, load the control file again
+                    self.checkpoints.forget_job(self._checkpoint_key(control_file_path))
+
+                summary.elapsed_seconds = time.monotonic() - started
+                logging.info(
+                    f"Bulk file load job_id = {job_id} finished [succeeded_files={result.succeeded_files}, "
+                    f"failed_files={result.failed_files}, error={result.error}]; {len(summary.results)} done, "
+                    f"{len(in_flight)} in flight, {len(pending)} pending, "
+                    f"{summary.files_per_second:.1f} files/s overall"
+                )
+
+        summary.not_submitted = list(pending)
+        summary.elapsed_seconds = time.monotonic() - started
+        return summary
+
+    @staticmethod
+    def _checkpoint_key(control_file_path: str) -> str:
+        return f"bulk_file_load:{control_file_path}"
+
+    def _submit_or_reattach(self, control_file_path: str, summary: BulkIngestSummary) -> JobId:
+        if self.checkpoints:
+            job_id = self.checkpoints.job_id(self._checkpoint_key(control_file_path))
+            if job_id:
+                logging.info(f"Reattaching to bulk file load of {control_file_path}, job id = {job_id}")
+                return job_id
+
+        job_id = self._submit(control_file_path, summary)
+        if self.checkpoints:
+            self.checkpoints.record_job(self._checkpoint_key(control_file_path), job_id)
+        return job_id
+
+    def _submit(self, control_file_path: str, summary: BulkIngestSummary) -> JobId:
+        payload = {
+            "profileId": self.profile_id,
+            "loadControlFile": control_file_path,
+            "loadTag": self.load_tag,
+            "maxFailedFileLoads": 0
+        }
+
+        def _try_submit() -> Optional[JobModel]:
+            try:
+                return self.data_repo_client.bulk_file_load(self.dataset_id, bulk_file_load=payload)
+            except ApiException as ae:
+                if ae.status != 429 and not 500 <= ae.status <= 599:
+                    raise
+                summary.throttled_submissions += 1
+                self.in_flight_limit = max(self.in_flight_limit // 2, 1)
+                logging.info(f"Data repo returned {ae.status} submitting {control_file_path}, backing off "
+                             f"[in_flight_limit={self.in_flight_limit}]")
+                return None
+
+        try:
+            job_response = self.submit_retry_policy.run(_try_submit, is_truthy)
+        except RetryException as e:
+            raise BulkIngestSubmissionException(f"Could not submit bulk file load of {control_file_path}: {e}")
+        # the policy only returns a result that passed is_truthy
+        assert job_response is not None
+
+        logging.info(f"Submitted bulk file load of {control_file_path}, job id = {job_response.id}")
+        return JobId(job_response.id)
+
+    def _collect(self, control_file_path: str, job_id: JobId, future: Future[JobId]) -> BulkIngestResult:
+        try:
+            future.result()
+            job_results: Any = self.job_watcher.wait_for_result(job_id, self.max_wait_time_seconds)
+        except JobPollException as e:
+            return BulkIngestResult(control_file_path, job_id, error=e.message)
+
+        return BulkIngestResult(
+            control_file_path,
+            job_id,
+            succeeded_files=job_results['succeededFiles'],
+            failed_files=job_results['failedFiles']
+        )
@@ -1,16 +1,17 @@
 """
-Abstraction over the raw TDR data repo client. All async job operations automatically poll on the returned job
-to completion.
+Abstraction over the raw TDR data repo client. All async job operations automatically wait on the returned job
+to completion via the job watcher.
 """
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional
 
-from dagster_utils.contrib.data_repo.jobs import poll_job
 from dagster_utils.contrib.data_repo.typing import JobId
 from data_repo_client import RepositoryApi, JobModel, EnumerateDatasetModel, DatasetSummaryModel, DatasetModel
 
 from hca_manage.dataset import DatasetManager
+from hca_orchestration.contrib.data_repo.job_watcher import TdrJobWatcher, default_job_watcher
+from hca_orchestration.contrib.telemetry import timed_call
 from hca_orchestration.models.hca_dataset import TdrDataset
 
 
@@ -21,6 +22,12 @@ class MultipleDatasetException(Exception):
 @dataclass
 class DataRepoService:
     data_repo_client: RepositoryApi
+    job_watcher: Optional[TdrJobWatcher] = None
+
+    _watcher: TdrJobWatcher = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._watcher = self.job_watcher or default_job_watcher(self.data_repo_client)
 
     def delete_data(self, dataset_id: str, control_file_path: str, table_name: str) -> JobId:
         payload = {
@@ -37,14 +44,15 @@ class DataRepoService:
             ]
         }
 
-        job_response: JobModel = self.data_repo_client.apply_dataset_data_deletion(
-            id=dataset_id,
-            data_deletion_request=payload
-        )
+        with timed_call("tdr", "apply_dataset_data_deletion"):
+            job_response: JobModel = self.data_repo_client.apply_dataset_data_deletion(
+                id=dataset_id,
+                data_deletion_request=payload
+            )
 
         job_id = JobId(job_response.id)
         logging.info(f"Polling on job_id = {job_id}")
-        poll_job(job_id, 600, 2, self.data_repo_client)
+        self._watcher.wait(job_id, 600)
         return job_id
 
     def ingest_data(self, dataset_id: str, control_file_path: str, table_name: str) -> JobId:
@@ -55,18 +63,20 @@ class DataRepoService:
             "path": control_file_path,
             "table": table_name
         }
-        job_response: JobModel = self.data_repo_client.ingest_dataset(
-            id=dataset_id,
-            ingest=payload
-        )
+        with timed_call("tdr", "ingest_dataset"):
+            job_response: JobModel = self.data_repo_client.ingest_dataset(
+                id=dataset_id,
+                ingest=payload
+            )
 
         job_id = JobId(job_response.id)
         logging.info(f"Polling on job_id = {job_id}")
-        poll_job(job_id, 600, 2, self.data_repo_client)
+        self._watcher.wait(job_id, 600)
         return job_id
 
     def find_dataset(self, dataset_name: str, qualifier: Optional[str] = None) -> Optional[TdrDataset]:
-        result: EnumerateDatasetModel = self.data_repo_client.enumerate_datasets(filter=dataset_name)
+        with timed_call("tdr", "enumerate_datasets"):
+            result: EnumerateDatasetModel = self.data_repo_client.enumerate_datasets(filter=dataset_name)
 
         if result.filtered_total == 0:
             return None
@@ -92,11 +102,13 @@ class DataRepoService:
         return self.get_dataset(dataset_summary.id)
 
     def list_datasets(self, dataset_name: str) -> EnumerateDatasetModel:
-        result: EnumerateDatasetModel = self.data_repo_client.enumerate_datasets(filter=dataset_name)
+        with timed_call("tdr", "enumerate_datasets"):
+            result: EnumerateDatasetModel = self.data_repo_client.enumerate_datasets(filter=dataset_name)
         return result
 
     def get_dataset(self, dataset_id: str) -> TdrDataset:
-        dataset_model: DatasetModel = self.data_repo_client.retrieve_dataset(id=dataset_id)
+        with timed_call("tdr", "retrieve_dataset"):
+            dataset_model: DatasetModel = self.data_repo_client.retrieve_dataset(id=dataset_id)
         bq_location = self._get_dataset_bq_location(dataset_model)
 
         if not bq_location:
@@ -121,15 +133,16 @@ class DataRepoService:
             region: str,
             description: str) -> TdrDataset:
         dataset_manager = DatasetManager(tdr_env, self.data_repo_client)
-        dataset_info = dataset_manager.create_dataset_with_policy_members(
-            dataset_name,
-            billing_profile_id,
-            policy_members,
-            dataset_manager.generate_schema(),
-            region,
-            tdr_env,
-            description
-        )
+        with timed_call("tdr", "create_dataset"):
+            dataset_info = dataset_manager.create_dataset_with_policy_members(
+                dataset_name,
+                billing_profile_id,
+                policy_members,
+                dataset_manager.generate_schema(),
+                region,
+                tdr_env,
+                description
+            )
         bq_location = self._get_dataset_bq_location(dataset_info)
         if not bq_location:
             raise ValueError(f"No bigquery location found for dataset {dataset_info.id}")
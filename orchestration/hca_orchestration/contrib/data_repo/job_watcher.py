@@ -0,0 +1,307 @@
+"""
+Shared poller for outstanding TDR jobs. Rather than each caller running its own fixed-interval sleep loop,
+every submitted job id is registered with a single watcher that polls all of them from one background thread.
+Jobs are polled quickly at first and back off geometrically while they keep running, so short soft deletes and
+table ingests complete with little added latency while multi-hour bulk file loads cost few API calls.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional
+
+from dagster_utils.contrib.data_repo.jobs import JobFailureException, JobTimeoutException
+from dagster_utils.contrib.data_repo.typing import JobId
+from data_repo_client import ApiException, RepositoryApi
+
+from hca_orchestration.contrib.retry import LatencyHistogram, RetryException, RetryPolicy, is_truthy
+from hca_orchestration.contrib.telemetry import record_call, timed_call
+
+# how many finished jobs a watcher remembers, so watching a job again soon after it finishes returns its outcome
+MAX_FINISHED_JOBS = 1000
+
+
+@dataclass
+class _WatchedJob:
+    job_id: JobId
+    max_wait_time_seconds: float
+    deadline: float
+    interval: float
+    max_interval: float
+    next_poll: float
+    watched_at: float = field(default_factory=time.monotonic)
+    polls: int = 0
+    # a job may be polled this early, so that jobs coming due around the same time share a polling pass
+    slack: float = 0.0
+    future: Future[JobId] = field(default_factory=Future)
+
+
+def _parse_tdr_timestamp(value: Any) -> Optional[datetime]:
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _job_run_seconds(job_info: Any) -> Optional[float]:
+    submitted = _parse_tdr_timestamp(getattr(job_info, "submitted", None))
+    completed = _parse_tdr_timestamp(getattr(job_info, "completed", None))
+    if submitted is None or completed is None or (submitted.tzinfo is None) != (completed.tzinfo is None):
+        return None
+    return (completed - submitted).total_seconds()
+
+
+class TdrJobWatcher:
+    """
+    Tracks outstanding TDR jobs and polls them together on one schedule. Each job's poll interval starts at
+    initial_poll_interval_seconds and grows by backoff_factor after every poll that finds the job still
+    running, up to max_poll_interval_seconds. A job is polled up to a quarter of its current interval early
+    when another job's poll is due, so jobs submitted around the same time are polled in the same pass.
+    """
+
+    def __init__(
+            self,
+            data_repo_client: RepositoryApi,
+            initial_poll_interval_seconds: float = 1.0,
+            max_poll_interval_seconds: float = 60.0,
+            backoff_factor: float = 1.5
+    ):
+        self.data_repo_client = data_repo_client
+        self.initial_poll_interval_seconds = initial_poll_interval_seconds
+        self.max_poll_interval_seconds = max_poll_interval_seconds
+        self.backoff_factor = backoff_factor
+        self.polls = 0
+
+        self._jobs: dict[JobId, _WatchedJob] = {}
+        self._finished: OrderedDict[JobId, Future[JobId]] = OrderedDict()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def watch(
+            self,
+            job_id: JobId,
+            max_wait_time_seconds: float,
+            max_poll_interval_seconds: Optional[float] = None,
+            initial_poll_interval_seconds: Optional[float] = None
+    ) -> Future[JobId]:
+        """
+        Registers the given job with the watcher, returning a future that resolves to the job id once the
+        job succeeds, or fails with JobFailureException/JobTimeoutException. Watching a job that is already
+        being watched or has recently finished returns the existing future. The poll interval bounds default
+        to the watcher's.
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("TDR job watcher is closed")
+            if job_id in self._finished:
+                return self._finished[job_id]
+            if job_id in self._jobs:
+                return self._jobs[job_id].future
+
+            max_interval = self.max_poll_interval_seconds
+            if max_poll_interval_seconds is not None:
+                max_interval = min(max_interval, max_poll_interval_seconds)
+            if initial_poll_interval_seconds is None:
+                initial_poll_interval_seconds = self.initial_poll_interval_seconds
+            now = time.monotonic()
+            job = _WatchedJob(
+                job_id=job_id,
+                max_wait_time_seconds=max_wait_time_seconds,
+                deadline=now + max_wait_time_seconds,
+                interval=min(initial_poll_interval_seconds, max_interval),
+                max_interval=max_interval,
+                next_poll=now
+            )
+            self._jobs[job_id] = job
+            self._ensure_started()
+            self._condition.notify()
+            return job.future
+
+    def wait(
+            self,
+            job_id: JobId,
+            max_wait_time_seconds: float,
+            max_poll_interval_seconds: Optional[float] = None,
+            initial_poll_interval_seconds: Optional[float] = None
+    ) -> JobId:
+        """
+        Blocks until the given job completes, raising a JobPollException subclass if it fails or times out
+        """
+        logging.info(f"Waiting on data repo job_id = {job_id}")
+        return self.watch(
+            job_id, max_wait_time_seconds, max_poll_interval_seconds, initial_poll_interval_seconds
+        ).result()
+
+    def wait_for_result(
+            self,
+            job_id: JobId,
+            max_wait_time_seconds: float,
+            max_poll_interval_seconds: Optional[float] = None,
+            initial_poll_interval_seconds: Optional[float] = None,
+            result_initial_delay_seconds: Optional[float] = None,
+            result_max_delay_seconds: Optional[float] = None,
+            result_latencies: Optional[LatencyHistogram] = None
+    ) -> Any:
+        """
+        Waits for the given job to complete, then fetches its result. TDR can briefly return 5xx errors or an
+        empty result for a job that has just completed (DR-1791), so fetching is retried with backoff between the
+        given delays (by default the watcher's polling intervals) until the job's deadline; waiting and fetching
+        share the one max_wait_time_seconds budget. Fetch latencies are recorded in result_latencies if given.
+        """
+        deadline = time.monotonic() + max_wait_time_seconds
+        self.wait(job_id, max_wait_time_seconds, max_poll_interval_seconds, initial_poll_interval_seconds)
+
+        max_interval = self.max_poll_interval_seconds
+        if max_poll_interval_seconds is not None:
+            max_interval = min(max_interval, max_poll_interval_seconds)
+        if result_max_delay_seconds is not None:
+            max_interval = result_max_delay_seconds
+        initial_delay = min(self.initial_poll_interval_seconds, max_interval)
+        if result_initial_delay_seconds is not None:
+            initial_delay = result_initial_delay_seconds
+        retry_policy = RetryPolicy(
+            initial_delay_seconds=initial_delay,
+            max_delay_seconds=max_interval,
+            multiplier=self.backoff_factor,
+            max_wait_time_seconds=max(deadline - time.monotonic(), 0),
+            latencies=result_latencies or LatencyHistogram()
+        )
+
+        def _fetch_job_result() -> Any:
+            try:
+                logging.info(f"Fetching job results for job_id = {job_id}")
+                with timed_call("tdr", "retrieve_job_result"):
+                    return self.data_repo_client.retrieve_job_result(job_id)
+            except ApiException as ae:
+                if 500 <= ae.status <= 599:
+                    logging.info(f"Data repo returned error when fetching results for job_id = {job_id}, "
+                                 f"scheduling retry")
+                    return None
+                raise
+
+        try:
+            return retry_policy.run(_fetch_job_result, is_truthy)
+        except RetryException:
+            raise JobTimeoutException(
+                message=f"Exceeded max wait time of {max_wait_time_seconds} fetching results of job {job_id}."
+            )
+
+    def close(self) -> None:
+        """
+        Stops the polling thread. Jobs still being watched fail with a RuntimeError.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+            thread = self._thread
+
+        if thread:
+            thread.join()
+
+        for job in self._jobs.values():
+            job.future.set_exception(RuntimeError(f"TDR job watcher closed while waiting on job {job.job_id}"))
+        self._jobs.clear()
+
+    def _ensure_started(self) -> None:
+        # caller holds the condition's lock
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="tdr-job-watcher", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed:
+                    now = time.monotonic()
+                    if any(job.next_poll <= now for job in self._jobs.values()):
+                        # piggyback any jobs that are nearly due onto this pass
+                        due = [job for job in self._jobs.values() if job.next_poll - job.slack <= now]
+                        break
+                    next_poll = min((job.next_poll for job in self._jobs.values()), default=None)
+                    self._condition.wait(timeout=None if next_poll is None else max(next_poll - now, 0))
+
+                if self._closed:
+                    return
+
+            for job in due:
+                self._poll(job)
+
+    def _poll(self, job: _WatchedJob) -> None:
+        self.polls += 1
+        job.polls += 1
+        try:
+            job_info = self.data_repo_client.retrieve_job(job.job_id)
+        except ApiException as ae:
+            if not 500 <= ae.status <= 599:
+                self._finish(job, exception=ae)
+                return
+            logging.info(f"Data repo returned error when polling job_id = {job.job_id}, scheduling retry")
+            job_info = None
+        except Exception as e:
+            self._finish(job, exception=e)
+            return
+
+        if job_info is not None and job_info.completed:
+            logging.info(f"Data repo job_id = {job.job_id} completed")
+            if job_info.job_status == "failed":
+                self._finish(job, exception=JobFailureException(
+                    message=f"job_id {job.job_id} did not complete successfully."
+                ), job_info=job_info)
+            else:
+                self._finish(job, job_info=job_info)
+            return
+
+        now = time.monotonic()
+        if now >= job.deadline:
+            self._finish(job, exception=JobTimeoutException(
+                message=f"Exceeded max wait time of {job.max_wait_time_seconds} polling for status of job {job.job_id}."
+            ))
+            return
+
+        logging.info(f"Data repo job_id = {job.job_id} not complete, next poll in {job.interval:.1f}s")
+        with self._condition:
+            job.next_poll = min(now + job.interval, job.deadline)
+            job.slack = job.interval / 4
+            job.interval = min(job.interval * self.backoff_factor, job.max_interval)
+
+    def _finish(self, job: _WatchedJob, exception: Optional[BaseException] = None, job_info: Any = None) -> None:
+        with self._condition:
+            self._jobs.pop(job.job_id, None)
+            self._finished[job.job_id] = job.future
+            if len(self._finished) > MAX_FINISHED_JOBS:
+                self._finished.popitem(last=False)
+
+        # TDR reports when a job was submitted and completed but not when it started running, so the time it
+        # spent queued is part of run_seconds
+        measurements = {"polls": float(job.polls)}
+        run_seconds = _job_run_seconds(job_info)
+        if run_seconds is not None:
+            measurements["run_seconds"] = run_seconds
+        record_call("tdr", "job", time.monotonic() - job.watched_at, error=exception is not None, **measurements)
+
+        if exception:
+            job.future.set_exception(exception)
+        else:
+            job.future.set_result(job.job_id)
+
+
+_default_watchers: dict[RepositoryApi, TdrJobWatcher] = {}
+_default_watchers_lock = threading.Lock()
+
+
+def default_job_watcher(data_repo_client: RepositoryApi) -> TdrJobWatcher:
+    """
+    Returns the process's shared watcher for the given client, creating it on first use, so that services built
+    without an injected watcher poll from one thread between them rather than one each
+    """
+    with _default_watchers_lock:
+        watcher = _default_watchers.get(data_repo_client)
+        if watcher is None:
+            watcher = _default_watchers[data_repo_client] = TdrJobWatcher(data_repo_client)
+        return watcher
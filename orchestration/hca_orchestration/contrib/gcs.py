@@ -1,25 +1,75 @@
 from urllib.parse import urlparse
 import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Iterable, Iterator, Optional
 
-from dataclasses import dataclass
+from google.cloud.storage.batch import Batch
 from google.cloud.storage.client import Client
 
+from hca_orchestration.contrib.retry import RetryPolicy
+from hca_orchestration.contrib.telemetry import record_call, timed_call
+
+# GCS accepts at most 100 calls per batch request
+MAX_DELETE_BATCH_SIZE = 100
+
+# backoff between rounds of retrying failed deletes, jittered so concurrent purges don't retry in lockstep
+_DELETE_RETRY_POLICY = RetryPolicy(initial_delay_seconds=2, max_delay_seconds=30)
+
+
+# only fetch the fields we need when listing, rather than each blob's full resource representation
+_NAME_AND_SIZE_FIELDS = "items(name,size),nextPageToken"
+
+
+@dataclass
+class PrefixSummary:
+    """Result of a single listing of a GCS prefix"""
+    total_bytes: int = 0
+    shard_count: int = 0
+    empty_blobs: list[str] = field(default_factory=list)
+
+    @property
+    def has_data(self) -> bool:
+        return self.total_bytes > 0
+
+
+def inspect_prefix(bucket: str, prefix: str, gcs: Client, stop_at_first_data: bool = False) -> PrefixSummary:
+    """
+    Summarizes the blobs under the given prefix with one name/size-only listing. If only existence of data
+    matters, stop_at_first_data ends the listing at the first non-empty blob, in which case the summary only
+    covers the blobs seen up to that point.
+    """
+    summary = PrefixSummary()
+    with timed_call("gcs", "list") as measurements:
+        for blob in gcs.list_blobs(bucket, prefix=prefix, fields=_NAME_AND_SIZE_FIELDS):
+            size = int(blob.size or 0)
+            summary.shard_count += 1
+            summary.total_bytes += size
+            if size == 0:
+                summary.empty_blobs.append(blob.name)
+            elif stop_at_first_data:
+                break
+        measurements.update(blobs_listed=summary.shard_count, bytes_listed=summary.total_bytes)
+    return summary
+
 
 def path_has_any_data(bucket: str, prefix: str, gcs: Client) -> bool:
     """Checks the given path for any blobs of non-zero size"""
-    blobs = [blob for blob in
-             gcs.list_blobs(bucket, prefix=prefix)]
-    return any([blob.size > 0 for blob in blobs])
+    return inspect_prefix(bucket, prefix, gcs, stop_at_first_data=True).has_data
 
 
-def remove_empty_blobs(bucket: str, prefix: str, gcs: Client) -> None:
-    """Checks the given path for any blobs of non-zero size"""
-    blobs = [blob for blob in
-             gcs.list_blobs(bucket, prefix=prefix)]
-    for blob in blobs:
-        if blob.size == 0:
-            logging.info(f"Removing zero byte blob at {blob.name}")
-            blob.delete()
+def remove_empty_blobs(bucket: str, prefix: str, gcs: Client, summary: Optional[PrefixSummary] = None) -> None:
+    """Removes any zero byte blobs at the given path. Pass a full (non short-circuited) summary
+    of the path from inspect_prefix to avoid listing it again."""
+    if summary is None:
+        summary = inspect_prefix(bucket, prefix, gcs)
+
+    gcs_bucket = gcs.bucket(bucket)
+    for blob_name in summary.empty_blobs:
+        logging.info(f"Removing zero byte blob at {blob_name}")
+        gcs_bucket.blob(blob_name).delete()
 
 
 @dataclass
@@ -31,3 +81,146 @@ class GsBucketWithPrefix:
 def parse_gs_path(raw_gs_path: str) -> GsBucketWithPrefix:
     url_result = urlparse(raw_gs_path)
     return GsBucketWithPrefix(url_result.netloc, url_result.path[1:])
+
+
+def get_blob_sizes(gs_paths: Iterable[str], gcs: Client) -> dict[str, int]:
+    """
+    Looks up the sizes of the given gs:// paths with one name/size-only listing per directory they live in,
+    rather than a metadata request per blob. Paths that do not exist are left out of the result.
+    """
+    wanted: dict[tuple[str, str], set[str]] = {}
+    for gs_path in gs_paths:
+        parsed = parse_gs_path(gs_path)
+        directory = parsed.prefix.rsplit("/", 1)[0] + "/" if "/" in parsed.prefix else ""
+        wanted.setdefault((parsed.bucket, directory), set()).add(parsed.prefix)
+
+    sizes = {}
+    for (bucket, directory), names in wanted.items():
+        with timed_call("gcs", "list") as measurements:
+            listed = 0
+            for blob in gcs.list_blobs(bucket, prefix=directory, fields=_NAME_AND_SIZE_FIELDS):
+                listed += 1
+                if blob.name in names:
+                    sizes[f"gs://{bucket}/{blob.name}"] = int(blob.size or 0)
+            measurements["blobs_listed"] = listed
+    return sizes
+
+
+@dataclass
+class BlobDeletionResult:
+    deleted: int = 0
+    failed: list[str] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    @property
+    def deletions_per_second(self) -> float:
+        return self.deleted / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+class _PerRequestStatusBatch(Batch):  # type: ignore
+    """
+    A batch that records the status of each deferred request instead of raising
+    on the first failure, so that only the failed requests need to be retried
+    """
+
+    def _finish_futures(self, responses: list[Any]) -> None:
+        self.status_codes = [response.status_code for response in responses]
+
+
+@dataclass
+class _BatchOutcome:
+    deleted: int
+    retryable: list[str]
+    failed: list[str]
+
+
+def _chunked(names: Iterable[str], size: int) -> Iterator[list[str]]:
+    iterator = iter(names)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _delete_batch(gcs: Client, bucket_name: str, blob_names: list[str]) -> _BatchOutcome:
+    bucket = gcs.bucket(bucket_name)
+    with _PerRequestStatusBatch(gcs) as batch:
+        for blob_name in blob_names:
+            bucket.blob(blob_name).delete()
+
+    outcome = _BatchOutcome(0, [], [])
+    for blob_name, status_code in zip(blob_names, batch.status_codes):
+        # a 404 means the blob is already gone (e.g., deleted by an earlier attempt), which is what we want
+        if 200 <= status_code < 300 or status_code == 404:
+            outcome.deleted += 1
+        elif status_code == 429 or status_code >= 500:
+            outcome.retryable.append(blob_name)
+        else:
+            logging.warning(f"Failed to delete gs://{bucket_name}/{blob_name} [status = {status_code}]")
+            outcome.failed.append(blob_name)
+    return outcome
+
+
+def delete_blobs(
+        gcs: Client,
+        bucket_name: str,
+        blob_names: Iterable[str],
+        batch_size: int = MAX_DELETE_BATCH_SIZE,
+        max_workers: int = 8,
+        max_attempts: int = 3
+) -> BlobDeletionResult:
+    """
+    Deletes the named blobs using GCS batch requests, several of which are kept in flight at once.
+    blob_names is consumed lazily, so a listing can be streamed straight in. Deletes that fail with a
+    retryable status (429/5xx) are retried in later rounds, up to max_attempts in total; everything else
+    is reported back in the result's failed list.
+    """
+    assert 0 < batch_size <= MAX_DELETE_BATCH_SIZE, f"batch_size must be between 1 and {MAX_DELETE_BATCH_SIZE}"
+
+    result = BlobDeletionResult()
+    started = time.monotonic()
+    pending: Iterable[list[str]] = _chunked(blob_names, batch_size)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gcs-delete") as pool:
+        for attempt in range(1, max_attempts + 1):
+            retryable: list[str] = []
+            in_flight: dict[Future[_BatchOutcome], list[str]] = {}
+
+            def _collect(done: Iterable[Future[_BatchOutcome]]) -> None:
+                for future in done:
+                    chunk = in_flight.pop(future)
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        # the batch request as a whole failed, so none of its deletes are known to have happened
+                        logging.warning(f"Batch delete request failed, will retry {len(chunk)} blobs: {e}")
+                        retryable.extend(chunk)
+                        continue
+                    result.deleted += outcome.deleted
+                    retryable.extend(outcome.retryable)
+                    result.failed.extend(outcome.failed)
+
+            for chunk in pending:
+                # bound the number of outstanding batches so a streamed listing is not buffered in full
+                if len(in_flight) >= max_workers * 2:
+                    done, _ = wait(in_flight.keys(), return_when=FIRST_COMPLETED)
+                    _collect(done)
+                in_flight[pool.submit(_delete_batch, gcs, bucket_name, chunk)] = chunk
+            _collect(list(in_flight.keys()))
+
+            if not retryable:
+                break
+            if attempt == max_attempts:
+                result.failed.extend(retryable)
+                break
+
+            logging.info(f"Retrying {len(retryable)} failed deletes [attempt = {attempt + 1}]")
+            time.sleep(_DELETE_RETRY_POLICY.delay(attempt))
+            pending = _chunked(retryable, batch_size)
+
+    result.elapsed_seconds = time.monotonic() - started
+    record_call("gcs", "delete", result.elapsed_seconds, blobs_deleted=result.deleted,
+                blobs_failed=len(result.failed))
+    logging.info(
+        f"Deleted {result.deleted} blobs from gs://{bucket_name} in {result.elapsed_seconds:.1f}s "
+        f"({result.deletions_per_second:.1f}/s), {len(result.failed)} failed"
+    )
+    return result
@@ -0,0 +1,134 @@
+"""
+Metrics registry with a Prometheus endpoint. Counters and summaries are kept in memory and rendered on demand in
+either the Prometheus text format (0.0.4) or OpenMetrics (1.0.0), chosen by the scraper's Accept header. The
+telemetry exporter (hca_orchestration.telemetry_exporter) fills a registry from the event log and serves it.
+"""
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+COUNTER = "counter"
+SUMMARY = "summary"
+
+LabelValues = tuple[tuple[str, str], ...]
+
+
+@dataclass
+class _MetricFamily:
+    name: str
+    kind: str
+    help: str
+    # labels -> value for counters, or [count, sum] for summaries
+    samples: dict[LabelValues, list[float]] = field(default_factory=dict)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: LabelValues) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """
+    Thread-safe set of counter and summary families. A family's type and help text are fixed by its first use.
+    Counter names must end in _total.
+    """
+
+    def __init__(self) -> None:
+        self._families: dict[str, _MetricFamily] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, help: str, labels: dict[str, str], value: float = 1.0) -> None:
+        assert name.endswith("_total"), f"Counter names must end in _total [name = {name}]"
+        with self._lock:
+            sample = self._sample(name, COUNTER, help, labels, [0.0])
+            sample[0] += value
+
+    def observe(self, name: str, help: str, labels: dict[str, str], value: float) -> None:
+        with self._lock:
+            sample = self._sample(name, SUMMARY, help, labels, [0.0, 0.0])
+            sample[0] += 1
+            sample[1] += value
+
+    def value(self, name: str, labels: dict[str, str]) -> Optional[list[float]]:
+        with self._lock:
+            family = self._families.get(name)
+            sample = family.samples.get(tuple(sorted(labels.items()))) if family else None
+            return list(sample) if sample else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._families.clear()
+
+    def render(self, openmetrics: bool = False) -> str:
+        lines = []
+        with self._lock:
+            for family in sorted(self._families.values(), key=lambda f: f.name):
+                # OpenMetrics names a counter family without the _total suffix its samples carry
+                family_name = family.name[:-len("_total")] if openmetrics and family.kind == COUNTER else family.name
+                lines.append(f"# HELP {family_name} {_escape(family.help)}")
+                lines.append(f"# TYPE {family_name} {family.kind}")
+                for labels, sample in sorted(family.samples.items()):
+                    if family.kind == COUNTER:
+                        lines.append(f"{family.name}{_format_labels(labels)} {_format_value(sample[0])}")
+                    else:
+                        lines.append(f"{family.name}_count{_format_labels(labels)} {_format_value(sample[0])}")
+                        lines.append(f"{family.name}_sum{_format_labels(labels)} {_format_value(sample[1])}")
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def _sample(self, name: str, kind: str, help: str, labels: dict[str, str], initial: list[float]) -> list[float]:
+        # caller holds the lock
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = _MetricFamily(name, kind, help)
+        assert family.kind == kind, f"Metric {name} is a {family.kind}, not a {kind}"
+        key = tuple(sorted(labels.items()))
+        sample = family.samples.get(key)
+        if sample is None:
+            sample = family.samples[key] = initial
+        return sample
+
+
+def _handler_for(registry: MetricsRegistry) -> type[BaseHTTPRequestHandler]:
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+            body = registry.render(openmetrics).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:
+            # scrapes every few seconds would otherwise flood the logs
+            pass
+
+    return _MetricsHandler
+
+
+def start_metrics_server(registry: MetricsRegistry, port: int, addr: str = "") -> ThreadingHTTPServer:
+    """
+    Serves the registry's metrics at http://<addr>:<port>/metrics from a daemon thread
+    """
+    server = ThreadingHTTPServer((addr, port), _handler_for(registry))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
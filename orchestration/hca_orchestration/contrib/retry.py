@@ -1,5 +1,10 @@
+import bisect
+import logging
+import random
+import threading
 import time
-from typing import Any, Callable, TypeVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, TypeVar
 
 
 class RetryException(RuntimeError):
@@ -18,6 +23,104 @@ def is_truthy(result: object) -> bool:
 
 T = TypeVar('T')
 
+# upper bounds, in seconds, of the latency histogram buckets; the last bucket catches everything slower
+DEFAULT_LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class LatencyHistogram:
+    """
+    Thread safe, fixed bucket histogram of call latencies
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+            self.total_seconds += seconds
+
+    def snapshot(self) -> dict[str, int]:
+        """
+        Returns the per-bucket counts keyed by each bucket's upper bound
+        """
+        with self._lock:
+            labels = [f"le_{bound:g}" for bound in self.buckets] + ["le_inf"]
+            return dict(zip(labels, self.counts))
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Retries a call with exponential backoff and full jitter: the nth retry sleeps a random duration between 0 and
+    min(max_delay_seconds, initial_delay_seconds * multiplier ** n). Retrying stops once max_attempts calls have
+    been made or max_wait_time_seconds of wall time (including time spent in the call itself) has passed,
+    whichever comes first. Every attempt's latency is recorded in the policy's histogram.
+    """
+    initial_delay_seconds: float = 1.0
+    max_delay_seconds: float = 60.0
+    multiplier: float = 2.0
+    jitter: bool = True
+    max_wait_time_seconds: Optional[float] = None
+    max_attempts: Optional[int] = None
+    # exception types that count as a failed attempt rather than being raised immediately
+    retry_on: tuple[type[BaseException], ...] = ()
+    latencies: LatencyHistogram = field(default_factory=LatencyHistogram, repr=False)
+
+    def delay(self, attempt: int) -> float:
+        """
+        Returns the sleep before the given retry, where attempt 1 is the first retry
+        """
+        ceiling = min(self.max_delay_seconds, self.initial_delay_seconds * self.multiplier ** (attempt - 1))
+        return random.uniform(0, ceiling) if self.jitter else ceiling
+
+    def run(
+            self,
+            target_fn: Callable[..., T],
+            success_predicate: Callable[[T], bool],
+            *args: Any,
+            **kwargs: Any
+    ) -> T:
+        """
+        Calls target_fn until success_predicate accepts its result, returning that result. Raises
+        RetryException if the attempt or time budget runs out first.
+        """
+        deadline = None
+        if self.max_wait_time_seconds is not None:
+            deadline = time.monotonic() + self.max_wait_time_seconds
+
+        attempt = 0
+        while True:
+            attempt += 1
+            started = time.monotonic()
+            try:
+                result = target_fn(*args, **kwargs)
+                succeeded = success_predicate(result)
+            except self.retry_on as e:
+                logging.info(f"Attempt {attempt} raised retryable error: {e}")
+                succeeded = False
+            finally:
+                self.latencies.observe(time.monotonic() - started)
+
+            if succeeded:
+                return result
+
+            if self.max_attempts is not None and attempt >= self.max_attempts:
+                raise RetryException(f"gave up after {attempt} attempts")
+
+            sleep_seconds = self.delay(attempt)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RetryException("timed out")
+                sleep_seconds = min(sleep_seconds, remaining)
+            time.sleep(sleep_seconds)
+
 
 def retry(
         target_fn: Callable[..., T],
@@ -37,13 +140,11 @@ def retry(
     :param args: args to be provided to the target function
     :return: result of the retry function
     """
-    time_waited = 0
-    while time_waited < max_wait_time_seconds:
-        result = target_fn(*args, **kwargs)
-        if success_predicate(result):
-            return result
-
-        time.sleep(poll_interval_seconds)
-        time_waited += poll_interval_seconds
-
-    raise RetryException("timed out")
+    policy = RetryPolicy(
+        initial_delay_seconds=poll_interval_seconds,
+        max_delay_seconds=poll_interval_seconds,
+        multiplier=1,
+        jitter=False,
+        max_wait_time_seconds=max_wait_time_seconds
+    )
+    return policy.run(target_fn, success_predicate, *args, **kwargs)
@@ -0,0 +1,68 @@
+"""
+Row counts for BigQuery tables read from table metadata rather than COUNT queries. Native tables report their row
+count in their metadata, which is free to read and has no job startup latency; only views and external tables,
+whose metadata carries no row count, fall back to a COUNT query. Counts are cached per instance, and writers
+invalidate the tables they replace.
+"""
+import logging
+import threading
+from typing import Optional
+
+from google.cloud import bigquery
+
+# table types as reported by the legacy __TABLES__ meta-table
+_NATIVE_TABLE_TYPE = 1
+
+
+class TableRowCounts:
+    def __init__(self, bigquery_client: bigquery.Client):
+        self.bigquery_client = bigquery_client
+        self._counts: dict[tuple[str, str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def num_rows(self, project: str, dataset: str, table: str) -> int:
+        """
+        Returns the number of rows in the given table, from the cache, the table's metadata or, for views and
+        external tables, a COUNT query
+        """
+        key = (project, dataset, table)
+        with self._lock:
+            if key in self._counts:
+                return self._counts[key]
+
+        metadata = self.bigquery_client.get_table(f"{project}.{dataset}.{table}")
+        if metadata.table_type == "TABLE" and metadata.num_rows is not None:
+            count = int(metadata.num_rows)
+        else:
+            logging.info(f"No row count in metadata for {metadata.table_type} {project}.{dataset}.{table}, counting")
+            result = self.bigquery_client.query(f"SELECT COUNT(1) FROM `{project}.{dataset}.{table}`").result()
+            count = next(iter(result))[0]
+
+        with self._lock:
+            self._counts[key] = count
+        return count
+
+    def prefetch(self, project: str, dataset: str) -> dict[str, int]:
+        """
+        Caches the row counts of every native table in the dataset with a single __TABLES__ query,
+        returning them keyed by table name
+        """
+        query = f"SELECT table_id, row_count, type FROM `{project}.{dataset}.__TABLES__`"
+        counts = {
+            row["table_id"]: int(row["row_count"])
+            for row in self.bigquery_client.query(query).result()
+            if row["type"] == _NATIVE_TABLE_TYPE
+        }
+        with self._lock:
+            for table, count in counts.items():
+                self._counts[(project, dataset, table)] = count
+        return counts
+
+    def invalidate(self, project: str, dataset: str, table: Optional[str] = None) -> None:
+        """
+        Drops cached counts for the given table, or for the whole dataset if no table is given
+        """
+        with self._lock:
+            for key in [key for key in self._counts if key[:2] == (project, dataset)]:
+                if table is None or key[2] == table:
+                    del self._counts[key]
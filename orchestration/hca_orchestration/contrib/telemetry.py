@@ -0,0 +1,103 @@
+"""
+Per-call performance telemetry for the services the pipelines depend on (BigQuery, TDR and GCS). The service
+layers record each call, with its wall time and any measurements it reports (bytes scanned, slot time, extract
+shards, listing sizes, ...), into every open TelemetryScope.
+
+Scopes are process-wide rather than per-thread, so calls made from worker threads and the TDR job watcher's
+polling thread are attributed to the scope that is open when they happen. Solids open one scope for their
+duration and log its totals to the event log (see contrib.dagster.instrumented); the jobs run their steps one at
+a time, so that scope sees exactly the calls its step made.
+"""
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+
+@dataclass
+class CallTotals:
+    calls: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    measurements: dict[str, float] = field(default_factory=lambda: defaultdict(float))
+
+
+@dataclass
+class TelemetryScope:
+    """
+    Totals of the calls recorded while the scope was open, keyed by (service, operation)
+    """
+    labels: dict[str, str]
+    totals: dict[tuple[str, str], CallTotals] = field(default_factory=lambda: defaultdict(CallTotals))
+
+    def add(self, service: str, operation: str, seconds: float, error: bool, measurements: dict[str, float]) -> None:
+        totals = self.totals[(service, operation)]
+        totals.calls += 1
+        totals.errors += int(error)
+        totals.seconds += seconds
+        for name, value in measurements.items():
+            totals.measurements[name] += value
+
+    def flatten(self) -> dict[str, float]:
+        """
+        Returns the totals as {"<service>.<operation>.<measure>": value} pairs, measures being calls, errors,
+        seconds and each reported measurement
+        """
+        flat: dict[str, float] = {}
+        for (service, operation), totals in sorted(self.totals.items()):
+            prefix = f"{service}.{operation}"
+            flat[f"{prefix}.calls"] = totals.calls
+            if totals.errors:
+                flat[f"{prefix}.errors"] = totals.errors
+            flat[f"{prefix}.seconds"] = totals.seconds
+            for name, value in sorted(totals.measurements.items()):
+                flat[f"{prefix}.{name}"] = value
+        return flat
+
+
+_scopes: list[TelemetryScope] = []
+_lock = threading.Lock()
+
+
+def record_call(service: str, operation: str, seconds: float, error: bool = False, **measurements: float) -> None:
+    """
+    Records one call to a service, along with any measurements (summed across calls) it reported
+    """
+    with _lock:
+        for scope in _scopes:
+            scope.add(service, operation, seconds, error, measurements)
+
+
+@contextmanager
+def timed_call(service: str, operation: str) -> Iterator[dict[str, float]]:
+    """
+    Times the enclosed call and records it on exit, including if it raises. Measurements added to the yielded
+    dict are recorded with it.
+    """
+    measurements: dict[str, float] = {}
+    start = time.monotonic()
+    error = False
+    try:
+        yield measurements
+    except BaseException:
+        error = True
+        raise
+    finally:
+        record_call(service, operation, time.monotonic() - start, error=error, **measurements)
+
+
+@contextmanager
+def telemetry_scope(**labels: str) -> Iterator[TelemetryScope]:
+    """
+    Collects the calls recorded until the block exits
+    """
+    scope = TelemetryScope(labels)
+    with _lock:
+        _scopes.append(scope)
+    try:
+        yield scope
+    finally:
+        with _lock:
+            _scopes.remove(scope)
@@ -25,7 +25,7 @@ class DataFileEntity:
     target_path: str
 
 
-@dataclass
+@dataclass(eq=True, frozen=True)
 class MetadataEntity:
     """Represents an HCA metadata entity"""
     entity_type: MetadataType
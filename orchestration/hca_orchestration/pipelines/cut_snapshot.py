@@ -27,6 +27,7 @@ from hca_orchestration.resources.config.data_repo import (
     snapshot_creation_config,
 )
 from hca_orchestration.resources.data_repo_service import data_repo_service
+from hca_orchestration.resources.tdr_job_watcher import tdr_job_watcher
 from hca_orchestration.resources.utils import run_start_time
 from hca_orchestration.solids.create_snapshot import (
     add_steward,
@@ -54,6 +55,7 @@ def cut_project_snapshot_job(hca_env: str, jade_env: str, steward: str) -> Pipel
         resource_defs={
             "data_repo_client": preconfigure_resource_for_mode(jade_data_repo_client, jade_env),
             "data_repo_service": data_repo_service,
+            "tdr_job_watcher": tdr_job_watcher,
             "gcs": google_storage_client,
             "hca_manage_config": preconfigure_resource_for_mode(hca_manage_config, hca_env),
             "io_manager": preconfigure_resource_for_mode(gcs_pickle_io_manager, hca_env),
@@ -94,6 +96,7 @@ def legacy_cut_snapshot_job(hca_env: str, steward: str) -> PipelineDefinition:
         resource_defs={
             "data_repo_client": preconfigure_resource_for_mode(jade_data_repo_client, hca_env),
             "data_repo_service": data_repo_service,
+            "tdr_job_watcher": tdr_job_watcher,
             "gcs": google_storage_client,
             "hca_manage_config": preconfigure_resource_for_mode(hca_manage_config, hca_env),
             "io_manager": preconfigure_resource_for_mode(gcs_pickle_io_manager, hca_env),
@@ -48,9 +48,9 @@ def load_hca() -> None:
         )
     )
 
-    result = import_data_files(staging_dataset).collect()
+    result = import_data_files(staging_dataset)
 
-    file_metadata_results = file_metadata_fanout(result, staging_dataset).collect()
-    non_file_metadata_results = non_file_metadata_fanout(result, staging_dataset).collect()
+    file_metadata_results = file_metadata_fanout(result, staging_dataset)
+    non_file_metadata_results = non_file_metadata_fanout(result, staging_dataset)
 
     validate_and_send_finish_notification(file_metadata_results, non_file_metadata_results)
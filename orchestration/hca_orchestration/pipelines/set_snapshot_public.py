@@ -25,6 +25,7 @@ from hca_orchestration.resources.config.data_repo import (
     project_snapshot_creation_config,
 )
 from hca_orchestration.resources.data_repo_service import data_repo_service
+from hca_orchestration.resources.tdr_job_watcher import tdr_job_watcher
 from hca_orchestration.solids.create_snapshot import (
     get_snapshot_from_project,
     make_snapshot_public,
@@ -48,6 +49,7 @@ def make_snapshot_public_job(hca_env: str, jade_env: str) -> PipelineDefinition:
         resource_defs={
             "data_repo_client": preconfigure_resource_for_mode(jade_data_repo_client, jade_env),
             "data_repo_service": data_repo_service,
+            "tdr_job_watcher": tdr_job_watcher,
             "gcs": google_storage_client,
             "hca_manage_config": preconfigure_resource_for_mode(hca_manage_config, hca_env),
             "io_manager": preconfigure_resource_for_mode(gcs_pickle_io_manager, hca_env),
@@ -41,6 +41,9 @@ from hca_orchestration.resources.config.datasets import (
 from hca_orchestration.resources.config.scratch import scratch_config
 from hca_orchestration.resources.data_repo_service import data_repo_service
 from hca_orchestration.resources.hca_project_config import hca_project_id
+from hca_orchestration.resources.load_checkpoints import load_checkpoints
+from hca_orchestration.resources.load_scheduler import load_scheduler
+from hca_orchestration.resources.tdr_job_watcher import tdr_job_watcher
 from hca_orchestration.resources.utils import run_start_time
 
 
@@ -65,10 +68,13 @@ def load_hca_job() -> PipelineDefinition:
             "gcs": google_storage_client,
             "io_manager": preconfigure_resource_for_mode(gcs_pickle_io_manager, "dev"),
             "load_tag": load_tag,
+            "load_scheduler": preconfigure_resource_for_mode(load_scheduler, "dev"),
+            "load_checkpoints": load_checkpoints,
             "scratch_config": scratch_config,
             "target_hca_dataset": passthrough_hca_dataset,
             "bigquery_service": bigquery_service,
             "data_repo_service": data_repo_service,
+            "tdr_job_watcher": tdr_job_watcher,
             "slack": preconfigure_resource_for_mode(live_slack_client, "dev"),
             "dagit_config": preconfigure_resource_for_mode(dagit_config, "dev")
         },
@@ -85,9 +91,12 @@ def project_load_hca_job() -> PipelineDefinition:
             "dagit_config": preconfigure_resource_for_mode(dagit_config, "dev"),
             "data_repo_client": preconfigure_resource_for_mode(jade_data_repo_client, "dev"),
             "data_repo_service": data_repo_service,
+            "tdr_job_watcher": tdr_job_watcher,
             "gcs": google_storage_client,
             "io_manager": preconfigure_resource_for_mode(gcs_pickle_io_manager, "dev"),
             "load_tag": load_tag,
+            "load_scheduler": preconfigure_resource_for_mode(load_scheduler, "dev"),
+            "load_checkpoints": load_checkpoints,
             "run_start_time": run_start_time,
             "scratch_config": scratch_config,
             "slack": preconfigure_resource_for_mode(live_slack_client, "dev"),
@@ -107,10 +116,13 @@ def per_project_load_hca() -> PipelineDefinition:
             "gcs": google_storage_client,
             "io_manager": preconfigure_resource_for_mode(gcs_pickle_io_manager, "dev"),
             "load_tag": load_tag,
+            "load_scheduler": preconfigure_resource_for_mode(load_scheduler, "dev"),
+            "load_checkpoints": load_checkpoints,
             "scratch_config": scratch_config,
             "target_hca_dataset": find_or_create_project_dataset,
             "bigquery_service": bigquery_service,
             "data_repo_service": data_repo_service,
+            "tdr_job_watcher": tdr_job_watcher,
             "run_start_time": run_start_time,
             "hca_project_id": hca_project_id,
             "slack": preconfigure_resource_for_mode(live_slack_client, "dev"),
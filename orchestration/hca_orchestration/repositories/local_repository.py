@@ -32,6 +32,9 @@ from hca_orchestration.resources.config.dagit import dagit_config
 from hca_orchestration.resources.config.datasets import passthrough_hca_dataset
 from hca_orchestration.resources.config.scratch import scratch_config
 from hca_orchestration.resources.data_repo_service import data_repo_service
+from hca_orchestration.resources.load_checkpoints import load_checkpoints
+from hca_orchestration.resources.load_scheduler import load_scheduler
+from hca_orchestration.resources.tdr_job_watcher import tdr_job_watcher
 
 
 def validate_ingress_job() -> PipelineDefinition:
@@ -54,10 +57,13 @@ def load_hca_job() -> PipelineDefinition:
             "gcs": google_storage_client,
             "io_manager": preconfigure_resource_for_mode(gcs_pickle_io_manager, "dev"),
             "load_tag": load_tag,
+            "load_scheduler": preconfigure_resource_for_mode(load_scheduler, "dev"),
+            "load_checkpoints": load_checkpoints,
             "scratch_config": scratch_config,
             "target_hca_dataset": passthrough_hca_dataset,
             "bigquery_service": bigquery_service,
             "data_repo_service": data_repo_service,
+            "tdr_job_watcher": tdr_job_watcher,
             "slack": console_slack_client,
             "dagit_config": preconfigure_resource_for_mode(dagit_config, "local")
         },
@@ -47,6 +47,9 @@ from hca_orchestration.resources.config.datasets import (
 from hca_orchestration.resources.config.scratch import scratch_config
 from hca_orchestration.resources.data_repo_service import data_repo_service
 from hca_orchestration.resources.hca_project_config import hca_project_id
+from hca_orchestration.resources.load_checkpoints import load_checkpoints
+from hca_orchestration.resources.load_scheduler import load_scheduler
+from hca_orchestration.resources.tdr_job_watcher import tdr_job_watcher
 from hca_orchestration.resources.utils import run_start_time
 
 
@@ -72,10 +75,13 @@ def load_hca_job() -> PipelineDefinition:
             "gcs": google_storage_client,
             "io_manager": preconfigure_resource_for_mode(gcs_pickle_io_manager, "prod"),
             "load_tag": load_tag,
+            "load_scheduler": preconfigure_resource_for_mode(load_scheduler, "prod"),
+            "load_checkpoints": load_checkpoints,
             "scratch_config": scratch_config,
             "target_hca_dataset": passthrough_hca_dataset,
             "bigquery_service": bigquery_service,
             "data_repo_service": data_repo_service,
+            "tdr_job_watcher": tdr_job_watcher,
             "slack": preconfigure_resource_for_mode(live_slack_client, "prod"),
             "dagit_config": preconfigure_resource_for_mode(dagit_config, "prod")
         },
@@ -93,10 +99,13 @@ def per_project_load_hca() -> PipelineDefinition:
             "gcs": google_storage_client,
             "io_manager": preconfigure_resource_for_mode(gcs_pickle_io_manager, "prod"),
             "load_tag": load_tag,
+            "load_scheduler": preconfigure_resource_for_mode(load_scheduler, "prod"),
+            "load_checkpoints": load_checkpoints,
             "scratch_config": scratch_config,
             "target_hca_dataset": find_or_create_project_dataset,
             "bigquery_service": bigquery_service,
             "data_repo_service": data_repo_service,
+            "tdr_job_watcher": tdr_job_watcher,
             "run_start_time": run_start_time,
             "hca_project_id": hca_project_id,
             "slack": preconfigure_resource_for_mode(live_slack_client, "prod"),
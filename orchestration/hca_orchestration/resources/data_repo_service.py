@@ -6,10 +6,10 @@ from hca_orchestration.models.hca_dataset import TdrDataset
 
 
 @resource(
-    required_resource_keys={"data_repo_client"}
+    required_resource_keys={"data_repo_client", "tdr_job_watcher"}
 )
 def data_repo_service(init_context: InitResourceContext) -> DataRepoService:
-    return DataRepoService(init_context.resources.data_repo_client)
+    return DataRepoService(init_context.resources.data_repo_client, init_context.resources.tdr_job_watcher)
 
 
 @resource
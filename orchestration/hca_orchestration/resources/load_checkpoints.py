@@ -0,0 +1,34 @@
+from dagster import Field, InitResourceContext, String, resource
+
+from hca_orchestration.contrib.checkpoints import GcsLoadCheckpointStore, LoadCheckpointStore
+
+
+@resource(
+    config_schema={
+        "resume": Field(bool, default_value=False, is_required=False,
+                        description="Skip stages and reattach to TDR jobs recorded by an earlier run of this load. "
+                                    "Set load_tag.resume_load_tag to that run's load tag as well."),
+        "staging_area": Field(String, default_value="", is_required=False,
+                              description="Staging area being loaded; checkpoints are kept per load tag "
+                                          "and staging area"),
+    },
+    required_resource_keys={"gcs", "load_tag", "scratch_config"}
+)
+def load_checkpoints(init_context: InitResourceContext) -> LoadCheckpointStore:
+    """
+    Durable record of the stages and TDR jobs a load has completed, stored in the scratch bucket
+    """
+    return GcsLoadCheckpointStore(
+        init_context.resources.gcs,
+        init_context.resources.scratch_config.scratch_bucket_name,
+        init_context.resources.load_tag,
+        **init_context.resource_config
+    )
+
+
+@resource
+def in_memory_load_checkpoints(init_context: InitResourceContext) -> LoadCheckpointStore:
+    """
+    Checkpoints that last only as long as the run, for tests
+    """
+    return LoadCheckpointStore(load_tag="", staging_area="")
@@ -0,0 +1,19 @@
+from dagster import Field, InitResourceContext, Int, resource
+
+from hca_orchestration.contrib.concurrency import BoundedJobScheduler
+
+
+@resource({
+    "max_workers": Field(Int, default_value=1, is_required=False,
+                         description="Number of metadata tables loaded concurrently"),
+    "bigquery_concurrency": Field(Int, default_value=1, is_required=False,
+                                  description="Max outstanding BigQuery jobs per BigQuery project"),
+    "tdr_ingest_concurrency": Field(Int, default_value=1, is_required=False,
+                                    description="Max outstanding TDR ingest/soft delete jobs"),
+})
+def load_scheduler(init_context: InitResourceContext) -> BoundedJobScheduler:
+    """
+    Bounded worker pool shared by the metadata table loads of a single run. The defaults
+    load one table at a time; raise max_workers to overlap per-table load chains.
+    """
+    return BoundedJobScheduler(**init_context.resource_config)
@@ -8,11 +8,15 @@ from hca_orchestration.contrib.dagster import short_run_id
 @resource({
     "load_tag_prefix": Field(String),
     "append_run_id": Field(Bool),
+    "resume_load_tag": Field(String, is_required=False,
+                             description="Load tag of an earlier run to resume; used as-is in place of the generated "
+                                         "tag, so the rerun finds that run's checkpoints and scratch data"),
 })
 def load_tag(init_context: InitResourceContext) -> str:
     """
     Generates a load tag for the pipeline, optionally suffixing
-    with a run ID.
+    with a run ID. A rerun resuming an earlier load passes that load's
+    tag as resume_load_tag instead, since a generated tag would differ.
 
     NOTE: We can only use pipeline-level, static items when generating the load tag
     (i.e., run_id) as this will be regenerated every time we cross
@@ -21,6 +25,9 @@ def load_tag(init_context: InitResourceContext) -> str:
     Hence, we cannot use a timestamp or other such dynamically generated data
     :return: The generated load tag
     """
+    if init_context.resource_config.get('resume_load_tag'):
+        return str(init_context.resource_config['resume_load_tag'])
+
     tag = f"{init_context.resource_config['load_tag_prefix']}"
     if init_context.resource_config['append_run_id']:
         tag = f"{tag}_{short_run_id(init_context.run_id)}"
@@ -0,0 +1,27 @@
+from typing import Iterator
+
+from dagster import Field, Float, InitResourceContext, resource
+
+from hca_orchestration.contrib.data_repo.job_watcher import TdrJobWatcher
+
+
+@resource(
+    config_schema={
+        "initial_poll_interval_seconds": Field(Float, default_value=1.0, is_required=False,
+                                               description="Poll interval for newly submitted jobs"),
+        "max_poll_interval_seconds": Field(Float, default_value=60.0, is_required=False,
+                                           description="Upper bound on the poll interval of long running jobs"),
+        "backoff_factor": Field(Float, default_value=1.5, is_required=False,
+                                description="Growth of a job's poll interval after each incomplete poll"),
+    },
+    required_resource_keys={"data_repo_client"}
+)
+def tdr_job_watcher(init_context: InitResourceContext) -> Iterator[TdrJobWatcher]:
+    """
+    Polls all TDR jobs submitted during a run from a single thread with adaptive intervals
+    """
+    watcher = TdrJobWatcher(init_context.resources.data_repo_client, **init_context.resource_config)
+    try:
+        yield watcher
+    finally:
+        watcher.close()
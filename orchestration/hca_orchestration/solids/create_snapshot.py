@@ -22,12 +22,14 @@ from data_repo_client import PolicyMemberRequest, PolicyResponse, RepositoryApi
 from hca_manage.common import JobId
 from hca_manage.snapshot import SnapshotManager
 from hca_orchestration.contrib.data_repo.data_repo_service import DataRepoService
+from hca_orchestration.contrib.dagster import instrumented
 
 
 @solid(
     config_schema=Field(Permissive({"validate_snapshot_name": Field(bool, default_value=True, is_required=False)})),
     required_resource_keys={'data_repo_client', 'snapshot_config', 'hca_manage_config', 'data_repo_service'},
 )
+@instrumented
 def submit_snapshot_job(context: AbstractComputeExecutionContext) -> JobId:
     data_repo_service: DataRepoService = context.resources.data_repo_service
     dataset_name = context.resources.snapshot_config.dataset_name
@@ -54,6 +56,7 @@ def submit_snapshot_job(context: AbstractComputeExecutionContext) -> JobId:
         OutputDefinition(name='result', dagster_type=str)
     ],
 )
+@instrumented
 def get_completed_snapshot_info(context: AbstractComputeExecutionContext, job_id: JobId) -> Iterator[Output]:
     # retrieve_job_result returns a raw dict (since it can return many kinds of data), so we need to make
     # a second call to the snapshot endpoint to get the actual SnapshotModel from it
@@ -80,6 +83,7 @@ def get_completed_snapshot_info(context: AbstractComputeExecutionContext, job_id
     config_schema=Field(Permissive({"validate_snapshot_name": Field(bool, default_value=True, is_required=False)})),
     required_resource_keys={'data_repo_client', 'snapshot_config', 'hca_manage_config', 'data_repo_service'},
 )
+@instrumented
 def get_snapshot_from_project(context: AbstractComputeExecutionContext) -> Any:
     """
     Use the snapshot_name to get the associated snapshot_id from TDR,
@@ -115,6 +119,7 @@ def get_snapshot_from_project(context: AbstractComputeExecutionContext) -> Any:
 @solid(
     required_resource_keys={'sam_client'},
 )
+@instrumented
 def make_snapshot_public(context: AbstractComputeExecutionContext, snapshot_id: str) -> str:
     context.resources.sam_client.set_public_flag(snapshot_id, True)
     return snapshot_id
@@ -124,6 +129,7 @@ def make_snapshot_public(context: AbstractComputeExecutionContext, snapshot_id:
     config_schema={"snapshot_steward": str},
     required_resource_keys={'data_repo_client'}
 )
+@instrumented
 def add_steward(context: AbstractComputeExecutionContext, snapshot_id: str) -> str:
     data_repo_client: RepositoryApi = context.resources.data_repo_client
     policy_member = context.solid_config["snapshot_steward"]
@@ -4,22 +4,26 @@ from dagster_utils.contrib.data_repo import jobs
 from dagster_utils.typing import DagsterConfigDict
 
 from hca_manage.common import JobId
+from hca_orchestration.contrib.dagster import instrumented
+from hca_orchestration.contrib.data_repo.job_watcher import TdrJobWatcher
 
 
 @solid(
-    required_resource_keys={'data_repo_client'},
+    required_resource_keys={'tdr_job_watcher'},
     config_schema={
         'max_wait_time_seconds': Int,
         'poll_interval_seconds': Int,
     }
 )
+@instrumented
 def base_wait_for_job_completion(context: AbstractComputeExecutionContext, job_id: JobId) -> JobId:
     max_wait_time_seconds = context.solid_config['max_wait_time_seconds']
     poll_interval_seconds = context.solid_config['poll_interval_seconds']
-    client = context.resources.data_repo_client
+    # the watcher backs off from this interval while the job runs, up to its own max_poll_interval_seconds
+    job_watcher: TdrJobWatcher = context.resources.tdr_job_watcher
 
     try:
-        return jobs.poll_job(job_id, max_wait_time_seconds, poll_interval_seconds, client)
+        return job_watcher.wait(job_id, max_wait_time_seconds, initial_poll_interval_seconds=poll_interval_seconds)
     except jobs.JobPollException as e:
         raise Failure(
             description=e.message,
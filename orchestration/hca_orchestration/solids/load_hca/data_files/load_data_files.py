@@ -1,24 +1,33 @@
+import logging
 from typing import Iterator
 
-from dagster import composite_solid, solid
+from dagster import Field, composite_solid, solid
 from dagster.core.execution.context.compute import AbstractComputeExecutionContext
 
 # FYI, if you have to update:
 # dagster.experimental has been removed. DynamicOutput and DynamicOutputDefinition are now in dagster top level
 from dagster.experimental import DynamicOutput, DynamicOutputDefinition
 from data_repo_client import JobModel
-from google.cloud import bigquery
 from google.cloud.bigquery.client import RowIterator
+from google.cloud.storage import Client
 
 # isort: split
 
 from hca_manage.common import JobId
 from hca_orchestration.contrib.bigquery import BigQueryService
+from hca_orchestration.contrib.checkpoints import LoadCheckpointStore
+from hca_orchestration.contrib.dagster import instrumented
+from hca_orchestration.contrib.data_repo.bulk_ingest_scheduler import BulkIngestScheduler
+from hca_orchestration.contrib.gcs import get_blob_sizes
 from hca_orchestration.models.hca_dataset import TdrDataset
 from hca_orchestration.models.scratch import ScratchConfig
-from hca_orchestration.solids.data_repo import wait_for_job_completion
 from hca_orchestration.solids.load_hca.poll_ingest_job import (
-    check_data_ingest_job_result,
+    DataFileIngestionFailure,
+)
+from hca_orchestration.support.control_files import (
+    ControlFile,
+    FileLoadRequest,
+    plan_control_files,
 )
 from hca_orchestration.support.typing import HcaScratchDatasetName
 
@@ -37,16 +46,34 @@ FILE_LOAD_TABLE_BQ_SCHEMA = [
 
 FILE_LOAD_TABLE_NAME = 'file_load_requests'
 
+DIFF_FILE_LOADS_STAGE = "diff_file_loads"
+
 
 @solid(
-    required_resource_keys={"bigquery_service", "scratch_config", "gcs", "target_hca_dataset"},
-    output_defs=[DynamicOutputDefinition(name="control_file_path", dagster_type=str)]
+    required_resource_keys={"bigquery_service", "scratch_config", "gcs", "target_hca_dataset", "load_checkpoints"},
+    output_defs=[DynamicOutputDefinition(name="control_file_path", dagster_type=str)],
+    config_schema={
+        "control_file_max_files": Field(
+            int,
+            default_value=10_000,
+            is_required=False,
+            description="Maximum number of files loaded by a single bulk file ingest job"
+        ),
+        "control_file_max_bytes": Field(
+            int,
+            default_value=2 ** 40,
+            is_required=False,
+            description="Target total size of the files loaded by a single bulk file ingest job; "
+                        "a file larger than this is loaded on its own"
+        ),
+    }
 )
+@instrumented
 def diff_file_loads(context: AbstractComputeExecutionContext,
-                    scratch_dataset_name: HcaScratchDatasetName) -> Iterator[str]:
+                    scratch_dataset_name: HcaScratchDatasetName) -> Iterator[DynamicOutput[str]]:
     """
-    Determine files to load by joining against the target HCA dataset, then drop the result in our scratch bucket as a
-     "control file" that Jade will use for bulk file ingest
+    Determine files to load by joining against the target HCA dataset, then drop the result in our scratch bucket as
+    "control files" that Jade will use for bulk file ingest, balanced by file count and size
     :param context: Dagster solid context
     :param scratch_dataset_name: Name of the "scratch" dataset we are using for this pipeline run
     :return: Yields a list of control file blob names
@@ -54,30 +81,51 @@ def diff_file_loads(context: AbstractComputeExecutionContext,
     target_hca_dataset = context.resources.target_hca_dataset
     bigquery_service = context.resources.bigquery_service
     scratch = context.resources.scratch_config
+    storage_client = context.resources.gcs
+    checkpoints: LoadCheckpointStore = context.resources.load_checkpoints
+
+    if checkpoints.is_complete(DIFF_FILE_LOADS_STAGE):
+        control_file_names = checkpoints.stage_result(DIFF_FILE_LOADS_STAGE)
+        context.log.info(f"Resuming load, reusing {len(control_file_names)} planned control files")
+        for index, blob_name in enumerate(control_file_names):
+            yield _control_file_output(index, blob_name)
+        return
 
-    _determine_files_to_load(
+    rows = _determine_files_to_load(
         bigquery_service,
         target_hca_dataset,
         scratch_dataset_name,
         FILE_LOAD_TABLE_NAME,
         scratch
     )
+    requests = _size_file_load_requests([(row["sourcePath"], row["targetPath"]) for row in rows], storage_client)
 
-    _extract_files_to_load_to_control_files(
-        bigquery_service,
-        context.resources.scratch_config,
-        scratch_dataset_name,
-        FILE_LOAD_TABLE_NAME
+    control_files = plan_control_files(
+        requests,
+        context.solid_config["control_file_max_files"],
+        context.solid_config["control_file_max_bytes"]
     )
+    context.log.info(f"Planned {len(control_files)} control files for {len(requests)} files")
 
     prefix = f'{scratch.scratch_prefix_name}/data-transfer-requests-deduped'
-    storage_client = context.resources.gcs
-    for blob in storage_client.list_blobs(scratch.scratch_bucket_name, prefix=prefix):
-        yield DynamicOutput(
-            output_name='control_file_path',
-            value=blob.name,
-            mapping_key=blob.name.replace('/', '_').replace('-', '_')  # filter out bad chars for dagster dynamic output
-        )
+    control_file_names = []
+    for index, control_file in enumerate(control_files):
+        blob_name = _write_control_file(control_file, index, scratch.scratch_bucket_name, prefix, storage_client)
+        context.log.info(f"Control file {blob_name}: {len(control_file.requests)} files, "
+                         f"{control_file.total_bytes} bytes")
+        control_file_names.append(blob_name)
+    checkpoints.complete(DIFF_FILE_LOADS_STAGE, control_file_names)
+
+    for index, blob_name in enumerate(control_file_names):
+        yield _control_file_output(index, blob_name)
+
+
+def _control_file_output(index: int, blob_name: str) -> DynamicOutput[str]:
+    return DynamicOutput(
+        output_name='control_file_path',
+        value=blob_name,
+        mapping_key=f"control_file_{index:05d}"
+    )
 
 
 def _determine_files_to_load(
@@ -119,28 +167,34 @@ def _determine_files_to_load(
     return rows
 
 
-def _extract_files_to_load_to_control_files(
-        bigquery_service: BigQueryService,
-        scratch_config: ScratchConfig,
-        scratch_dataset_name: HcaScratchDatasetName,
-        file_load_table_name: str
-) -> bigquery.ExtractJob:
-    # dump the contents of our file load requests table to a file in GCS suitable for use as a
-    # control file for jade bulk data ingest
-    out_path = f"{scratch_config.scratch_area()}/data-transfer-requests-deduped/*"
-
-    extract_job = bigquery_service.build_extract_job(
-        file_load_table_name,
-        out_path,
-        scratch_dataset_name,
-        scratch_config.scratch_bq_project,
-    )
-    return extract_job
+def _size_file_load_requests(paths: list[tuple[str, str]], storage_client: Client) -> list[FileLoadRequest]:
+    """
+    Attaches the staged size of each source file to its load request. Files whose size can't be found are
+    assumed to be of average size, so they still count towards their control file's share of the load.
+    """
+    sizes = get_blob_sizes((source_path for source_path, _ in paths), storage_client)
+    average_size = sum(sizes.values()) // len(sizes) if sizes else 0
+    if len(sizes) < len(paths):
+        logging.warning(f"No staged size found for {len(paths) - len(sizes)} of {len(paths)} files, "
+                        f"assuming {average_size} bytes each")
+
+    return [
+        FileLoadRequest(source_path, target_path, sizes.get(source_path, average_size))
+        for source_path, target_path in paths
+    ]
+
+
+def _write_control_file(control_file: ControlFile, index: int, bucket_name: str, prefix: str,
+                        storage_client: Client) -> str:
+    blob_name = f"{prefix}/control-file-{index:05d}.json"
+    storage_client.bucket(bucket_name).blob(blob_name).upload_from_string(control_file.to_jsonl())
+    return blob_name
 
 
 @solid(
     required_resource_keys={"data_repo_client", "scratch_config", "load_tag", "target_hca_dataset"},
 )
+@instrumented
 def run_bulk_file_ingest(context: AbstractComputeExecutionContext, control_file_path: str) -> JobId:
     """
     Submits the given control for ingestion to TDR
@@ -169,24 +223,66 @@ def run_bulk_file_ingest(context: AbstractComputeExecutionContext, control_file_
     return JobId(job_response.id)
 
 
-@composite_solid
-def bulk_ingest(control_file_path: str) -> JobId:
+@solid(
+    required_resource_keys={
+        "data_repo_client",
+        "tdr_job_watcher",
+        "scratch_config",
+        "load_tag",
+        "target_hca_dataset",
+        "load_checkpoints"
+    },
+    config_schema={
+        "max_concurrent_bulk_loads": Field(
+            int,
+            default_value=4,
+            is_required=False,
+            description="Maximum number of TDR bulk file loads running at once"
+        ),
+        "max_wait_time_seconds": Field(int, default_value=28800, is_required=False),  # 8 hours
+    }
+)
+@instrumented
+def bulk_ingest_control_files(context: AbstractComputeExecutionContext, control_file_paths: list[str]) -> list[JobId]:
     """
-    Composite solid that submits the given control file for ingest to TDR, then polls on the resulting job
-    to completion.
-    :param control_file_path: GS path to the ingest control file
+    Submits the given control files for ingestion to TDR, keeping a bounded number of bulk file loads in flight
+    and submitting the next as soon as one finishes. Any failed files fail the pipeline.
+    :param context: Dagster solid context
+    :param control_file_paths: Paths to the control files for ingest, relative to the scratch bucket
+    :return: Jade Job IDs
     """
-    # control_file_path is a dynamic output from diff_file_loads
-    # pylint: disable-next=no-value-for-parameter
-    job_id: JobId = run_bulk_file_ingest(control_file_path)
-    wait_for_job_completion(job_id)
-    check_data_ingest_job_result(job_id)
-    return job_id
+    scratch_bucket_name = context.resources.scratch_config.scratch_bucket_name
+    scheduler = BulkIngestScheduler(
+        context.resources.data_repo_client,
+        context.resources.tdr_job_watcher,
+        dataset_id=context.resources.target_hca_dataset.dataset_id,
+        profile_id=context.resources.target_hca_dataset.billing_profile_id,
+        load_tag=context.resources.load_tag,
+        max_in_flight=context.solid_config["max_concurrent_bulk_loads"],
+        max_wait_time_seconds=context.solid_config["max_wait_time_seconds"],
+        checkpoints=context.resources.load_checkpoints
+    )
+    summary = scheduler.run(f"gs://{scratch_bucket_name}/{path}" for path in control_file_paths)
+    context.log.info(
+        f"Bulk file ingest finished [jobs={len(summary.results)}, succeeded_files={summary.succeeded_files}, "
+        f"elapsed_seconds={summary.elapsed_seconds:.0f}, files_per_second={summary.files_per_second:.1f}, "
+        f"throttled_submissions={summary.throttled_submissions}]"
+    )
+
+    if summary.failures:
+        failures = ", ".join(
+            f"{result.control_file_path} [job_id = {result.job_id}] "
+            f"({result.error or f'failedFiles = {result.failed_files}'})"
+            for result in summary.failures
+        )
+        raise DataFileIngestionFailure(
+            f"Bulk file load failed: {failures}; {len(summary.not_submitted)} control files not submitted")
 
+    # only a load that could not be submitted has no job id, and that would have failed the solid above
+    return [result.job_id for result in summary.results if result.job_id is not None]
 
-@composite_solid(
-    output_defs=[DynamicOutputDefinition(name="result", dagster_type=JobId)]
-)
+
+@composite_solid
 # scratch_dataset_name is a dynamic output from diff_file_loads
 # pylint: disable-next=no-value-for-parameter
 def import_data_files(scratch_dataset_name: HcaScratchDatasetName) -> list[JobId]:
@@ -196,7 +292,6 @@ def import_data_files(scratch_dataset_name: HcaScratchDatasetName) -> list[JobId
     """
     # pylint: disable-next=no-value-for-parameter
     generated_file_loads = diff_file_loads(scratch_dataset_name)
-    # map is a Dagster utility function
-    # pylint: disable-next=no-member
-    bulk_ingest_jobs: list[JobId] = generated_file_loads.map(bulk_ingest)
+    # pylint: disable-next=no-value-for-parameter
+    bulk_ingest_jobs: list[JobId] = bulk_ingest_control_files(generated_file_loads.collect())
     return bulk_ingest_jobs
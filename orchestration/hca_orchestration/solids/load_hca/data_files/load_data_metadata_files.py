@@ -1,8 +1,8 @@
 from enum import Enum
 
 from dagster import (
-    DynamicOutputDefinition,
     Failure,
+    Field,
     Optional,
     composite_solid,
     configured,
@@ -15,6 +15,7 @@ from google.cloud.bigquery.client import RowIterator
 
 from hca_manage.common import JobId
 from hca_orchestration.contrib.bigquery import BigQueryService
+from hca_orchestration.contrib.dagster import instrumented
 from hca_orchestration.models.hca_dataset import TdrDataset
 from hca_orchestration.resources.config.scratch import ScratchConfig
 from hca_orchestration.solids.load_hca.ingest_metadata_type import (
@@ -22,7 +23,7 @@ from hca_orchestration.solids.load_hca.ingest_metadata_type import (
 )
 from hca_orchestration.solids.load_hca.load_table import (
     export_data,
-    load_table_solid,
+    load_tables_solid,
 )
 from hca_orchestration.support.typing import (
     HcaScratchDatasetName,
@@ -46,10 +47,39 @@ ingest_file_metadata_type = configured(ingest_metadata_type, name="ingest_file_m
     {"metadata_types": FileMetadataTypes, "prefix": "file-metadata-with-ids"})
 
 
+FILE_ID_LOOKUP_TABLE_NAME = "file_id_lookup"
+
+
 class NullFileIdException(Failure):
     pass
 
 
+@solid(
+    required_resource_keys={"bigquery_service", "target_hca_dataset", "scratch_config"}
+)
+@instrumented
+def build_file_id_lookup_solid(
+        context: AbstractComputeExecutionContext,
+        result: list[JobId],
+        scratch_dataset_name: HcaScratchDatasetName
+) -> list[JobId]:
+    """
+    Builds the scratch file ID lookup table shared by all file metadata types. Must run after
+    data file ingestion has finished, so that the load history includes this run's files.
+    The incoming job IDs are passed through untouched.
+    """
+    scratch_config: ScratchConfig = context.resources.scratch_config
+    target_hca_dataset: TdrDataset = context.resources.target_hca_dataset
+
+    context.resources.bigquery_service.build_file_id_lookup_table(
+        destination_table=f"{scratch_dataset_name}.{FILE_ID_LOOKUP_TABLE_NAME}",
+        target_hca_dataset=target_hca_dataset,
+        bigquery_project=scratch_config.scratch_bq_project,
+        location=target_hca_dataset.bq_location
+    )
+    return result
+
+
 def _inject_file_ids(
         target_hca_dataset: TdrDataset,
         scratch_config: ScratchConfig,
@@ -57,20 +87,20 @@ def _inject_file_ids(
         scratch_dataset_name: HcaScratchDatasetName,
         bigquery_service: BigQueryService
 ) -> RowIterator:
-    fq_dataset_id = target_hca_dataset.fully_qualified_jade_dataset_name()
-
+    """
+    Resolves file IDs for the staged file metadata of the given type into a {file_metadata_type}_with_ids
+    scratch table
+    """
     query = f"""
     SELECT S.{file_metadata_type}_id, S.version, J.file_id, S.content, S.descriptor
-    FROM {file_metadata_type} S LEFT JOIN `{target_hca_dataset.project_id}.{fq_dataset_id}.datarepo_load_history` J
-    ON J.state = 'succeeded'
-    AND JSON_EXTRACT_SCALAR(S.descriptor, '$.crc32c') = J.checksum_crc32c
-    AND '/v1/' || JSON_EXTRACT_SCALAR(S.descriptor, '$.file_id') || '/' || JSON_EXTRACT_SCALAR(S.descriptor, '$.crc32c') || '/' || JSON_EXTRACT_SCALAR(S.descriptor, '$.file_name') = J.target_path
+    FROM {file_metadata_type} S LEFT JOIN `{scratch_dataset_name}.{FILE_ID_LOOKUP_TABLE_NAME}` J
+    ON S.target_path = J.target_path AND S.crc32c = J.checksum_crc32c
     """
 
     destination_table_name = f"{file_metadata_type}_with_ids"
     source_path = f"{scratch_config.scratch_area()}/metadata/{file_metadata_type}/*"
 
-    rows = bigquery_service.run_query_using_external_schema(
+    return bigquery_service.run_query_using_external_schema(
         query,
         source_paths=[source_path],
         schema=[
@@ -94,6 +124,11 @@ def _inject_file_ids(
                 "name": "crc32c",
                 "type": "STRING"
             },
+            {
+                "mode": "NULLABLE",
+                "name": "target_path",
+                "type": "STRING"
+            },
             {
                 "mode": "REQUIRED",
                 "name": "descriptor",
@@ -106,19 +141,56 @@ def _inject_file_ids(
         location=target_hca_dataset.bq_location
     )
 
+
+def _check_for_null_file_ids(
+        target_hca_dataset: TdrDataset,
+        scratch_config: ScratchConfig,
+        file_metadata_type: str,
+        scratch_dataset_name: HcaScratchDatasetName,
+        bigquery_service: BigQueryService,
+        sample_size: int
+) -> None:
+    """
+    Fails if any file metadata row was left without a file ID. The check runs as a single aggregate
+    query, so only the count and a capped sample of offending entity IDs leave BigQuery.
+
+    We allow null file_ids in the case where there is a `drs_uri` in the file descriptor (i.e., the file is
+    hosted in a repo external to TDR but we still want to expose the file metadata)
+    """
+    query = f"""
+    SELECT
+        COUNTIF(IFNULL(file_id, '') = '' AND STRPOS(descriptor, 'drs_uri') = 0) AS null_file_id_count,
+        ARRAY_AGG(
+            IF(IFNULL(file_id, '') = '' AND STRPOS(descriptor, 'drs_uri') = 0, {file_metadata_type}_id, NULL)
+            IGNORE NULLS LIMIT {sample_size}
+        ) AS sample_ids
+    FROM `{scratch_dataset_name}.{file_metadata_type}_with_ids`
+    """
+
+    rows = bigquery_service.run_query(
+        query,
+        bigquery_project=scratch_config.scratch_bq_project,
+        location=target_hca_dataset.bq_location
+    )
     for row in rows:
-        # check for rows with no file_id
-        # we allow null file_ids in the case where there is a `drs_uri` in the file descriptor (i.e., the file is
-        # hosted in a repo external to TDR but we still want to expose the file metadata)
-        if not row["file_id"] and "drs_uri" not in row["descriptor"]:
+        if row["null_file_id_count"]:
             raise NullFileIdException(
-                f"File metadata with null file ID detected, will not ingest. Check crc32c and target_path [table={file_metadata_type}]")
-    return rows
+                f"{row['null_file_id_count']} file metadata rows with null file ID detected, will not ingest. "
+                f"Check crc32c and target_path [table={file_metadata_type}, sample_ids={row['sample_ids']}]")
 
 
 @solid(
-    required_resource_keys={"bigquery_service", "target_hca_dataset", "scratch_config", "data_repo_client"}
+    required_resource_keys={"bigquery_service", "target_hca_dataset", "scratch_config", "data_repo_client"},
+    config_schema={
+        "null_file_id_sample_size": Field(
+            int,
+            default_value=10,
+            is_required=False,
+            description="Max number of entity IDs with null file IDs to report on failure"
+        )
+    }
 )
+@instrumented
 def inject_file_ids_solid(
         context: AbstractComputeExecutionContext,
         file_metadata_fanout_result: MetadataTypeFanoutResult
@@ -136,6 +208,14 @@ def inject_file_ids_solid(
         scratch_dataset_name=file_metadata_fanout_result.scratch_dataset_name,
         bigquery_service=bigquery_service
     )
+    _check_for_null_file_ids(
+        target_hca_dataset=target_hca_dataset,
+        scratch_config=scratch_config,
+        file_metadata_type=file_metadata_type,
+        scratch_dataset_name=scratch_dataset_name,
+        bigquery_service=bigquery_service,
+        sample_size=context.solid_config["null_file_id_sample_size"]
+    )
     export_data(
         "file-metadata-with-ids",
         table_name_extension="_with_ids",
@@ -148,9 +228,11 @@ def inject_file_ids_solid(
     return file_metadata_fanout_result
 
 
-@composite_solid(
-    output_defs=[DynamicOutputDefinition(dagster_type=Optional[JobId])]
-)
-def file_metadata_fanout(result: list[JobId], scratch_dataset_name: HcaScratchDatasetName) -> Optional[JobId]:
-    results = ingest_file_metadata_type(result, scratch_dataset_name).map(inject_file_ids_solid)
-    return results.map(load_table_solid)
+@composite_solid
+def file_metadata_fanout(
+        result: list[JobId],
+        scratch_dataset_name: HcaScratchDatasetName
+) -> list[Optional[JobId]]:
+    lookup_result = build_file_id_lookup_solid(result, scratch_dataset_name)
+    results = ingest_file_metadata_type(lookup_result, scratch_dataset_name).map(inject_file_ids_solid)
+    return load_tables_solid(results.collect())
@@ -10,6 +10,7 @@ from dagster.experimental import DynamicOutput, DynamicOutputDefinition
 # isort: split
 
 from hca_manage.common import JobId
+from hca_orchestration.contrib.dagster import instrumented
 from hca_orchestration.support.typing import (
     HcaScratchDatasetName,
     MetadataTypeFanoutResult,
@@ -25,6 +26,7 @@ from hca_orchestration.support.typing import (
         DynamicOutputDefinition(name="table_fanout_result", dagster_type=MetadataTypeFanoutResult)
     ]
 )
+@instrumented
 def ingest_metadata_type(context: AbstractComputeExecutionContext,
                          result: list[JobId],
                          scratch_dataset_name: HcaScratchDatasetName) -> Iterator[MetadataTypeFanoutResult]:
@@ -1,20 +1,35 @@
 import logging
-from typing import Optional
+import re
+from collections import defaultdict
+from typing import Optional, cast
 
-from dagster import solid
+from dagster import Field, solid
 from dagster.core.execution.context.compute import AbstractComputeExecutionContext
 from dagster_utils.contrib.data_repo.typing import JobId
 from dagster_utils.contrib.google import parse_gs_path
-from google.cloud.bigquery.client import RowIterator
 from google.cloud.storage import Client
 
 from hca_orchestration.contrib.bigquery import BigQueryService
+from hca_orchestration.contrib.checkpoints import LoadCheckpointStore
+from hca_orchestration.contrib.concurrency import BoundedJobScheduler, SlotBoundService
+from hca_orchestration.contrib.dagster import instrumented
 from hca_orchestration.contrib.data_repo.data_repo_service import DataRepoService
-from hca_orchestration.contrib.gcs import path_has_any_data, remove_empty_blobs
+from hca_orchestration.contrib.gcs import inspect_prefix, path_has_any_data, remove_empty_blobs
 from hca_orchestration.models.hca_dataset import TdrDataset
 from hca_orchestration.models.scratch import ScratchConfig
 from hca_orchestration.support.typing import HcaScratchDatasetName, MetadataType, MetadataTypeFanoutResult
 
+# shared by the per-type and batched load solids
+LOAD_TABLE_CONFIG_SCHEMA = {
+    "incremental_outdated_ids": Field(
+        bool,
+        default_value=True,
+        is_required=False,
+        description="Only look for outdated versions of entities that received new rows in this load. "
+                    "Disable to rescan the whole target table (e.g., to repair an earlier interrupted load)."
+    )
+}
+
 
 @solid(
     required_resource_keys={
@@ -24,7 +39,9 @@ from hca_orchestration.support.typing import HcaScratchDatasetName, MetadataType
         "data_repo_service",
         "gcs"
     },
+    config_schema=LOAD_TABLE_CONFIG_SCHEMA,
 )
+@instrumented
 def load_table_solid(
     context: AbstractComputeExecutionContext,
         metadata_fanout_result: MetadataTypeFanoutResult
@@ -39,8 +56,112 @@ def load_table_solid(
         context.resources.target_hca_dataset,
         context.resources.gcs,
         context.resources.data_repo_service,
-        context.resources.bigquery_service
+        context.resources.bigquery_service,
+        incremental_outdated_ids=context.solid_config["incremental_outdated_ids"]
+    )
+
+
+@solid(
+    required_resource_keys={
+        "bigquery_service",
+        "target_hca_dataset",
+        "scratch_config",
+        "data_repo_service",
+        "gcs",
+        "load_scheduler",
+        "load_checkpoints"
+    },
+    config_schema=LOAD_TABLE_CONFIG_SCHEMA,
+)
+@instrumented
+def load_tables_solid(
+        context: AbstractComputeExecutionContext,
+        metadata_fanout_results: list[MetadataTypeFanoutResult]
+) -> list[Optional[JobId]]:
+    """Loads all of the given metadata types on the shared load scheduler. New rows for every type
+    are computed by one batched diff job, after which each table's export/ingest/clear chain runs
+    on the worker pool, with BigQuery jobs and TDR jobs gated by their own concurrency limits."""
+    scheduler: BoundedJobScheduler = context.resources.load_scheduler
+    scratch_config: ScratchConfig = context.resources.scratch_config
+    bigquery_service = cast(BigQueryService, SlotBoundService(
+        context.resources.bigquery_service,
+        lambda: scheduler.bigquery_slot(scratch_config.scratch_bq_project)
+    ))
+    data_repo_service = cast(DataRepoService, SlotBoundService(
+        context.resources.data_repo_service,
+        scheduler.tdr_ingest_slot
+    ))
+
+    gcs_client = context.resources.gcs
+    target_hca_dataset = context.resources.target_hca_dataset
+    incremental_outdated_ids = context.solid_config["incremental_outdated_ids"]
+    checkpoints: LoadCheckpointStore = context.resources.load_checkpoints
+
+    # types finished by an earlier run of this load are not diffed or loaded again
+    load_results: dict[MetadataType, Optional[JobId]] = {}
+    remaining = []
+    for result in metadata_fanout_results:
+        stage = _load_table_stage(result.metadata_type)
+        if checkpoints.is_complete(stage):
+            load_results[result.metadata_type] = checkpoints.stage_result(stage)
+        else:
+            remaining.append(result)
+    if load_results:
+        context.log.info(f"Resuming load, skipping already loaded metadata types {sorted(load_results)}")
+
+    context.log.info(f"Loading {len(remaining)} metadata types [max_workers = {scheduler.max_workers}]")
+    has_data = scheduler.map(
+        lambda result: _prepare_staged_data(scratch_config, result.metadata_type, result.path, gcs_client),
+        remaining
     )
+    to_load = [result for result, present in zip(remaining, has_data) if present]
+
+    # one diff job per scratch dataset/metadata path, covering every metadata type staged under it
+    batches: dict[tuple[HcaScratchDatasetName, str], list[MetadataTypeFanoutResult]] = defaultdict(list)
+    for result in to_load:
+        batches[(result.scratch_dataset_name, result.path)].append(result)
+
+    num_new_rows: dict[MetadataType, int] = {}
+    for batch in scheduler.map(
+        lambda batch: _diff_hca_tables(batch, scratch_config, target_hca_dataset, bigquery_service),
+        batches.values()
+    ):
+        num_new_rows.update(batch)
+
+    def _load(metadata_fanout_result: MetadataTypeFanoutResult) -> Optional[JobId]:
+        metadata_type = metadata_fanout_result.metadata_type
+        loaded_rows = start_load(
+            scratch_config,
+            metadata_fanout_result.scratch_dataset_name,
+            target_hca_dataset,
+            metadata_type,
+            metadata_fanout_result.path,
+            data_repo_service,
+            bigquery_service,
+            num_new_rows=num_new_rows[metadata_type]
+        )
+        job_id = _finish_load(
+            scratch_config,
+            target_hca_dataset,
+            metadata_type,
+            loaded_rows,
+            gcs_client,
+            data_repo_service,
+            bigquery_service,
+            metadata_fanout_result.scratch_dataset_name if incremental_outdated_ids else None
+        )
+        checkpoints.complete(_load_table_stage(metadata_type), job_id)
+        return job_id
+
+    load_results.update({
+        result.metadata_type: job_id
+        for result, job_id in zip(to_load, scheduler.map(_load, to_load))
+    })
+    return [load_results.get(result.metadata_type) for result in metadata_fanout_results]
+
+
+def _load_table_stage(metadata_type: MetadataType) -> str:
+    return f"load_table:{metadata_type}"
 
 
 def load_table(
@@ -51,15 +172,12 @@ def load_table(
         target_hca_dataset: TdrDataset,
         gcs_client: Client,
         data_repo_service: DataRepoService,
-        bigquery_service: BigQueryService
+        bigquery_service: BigQueryService,
+        incremental_outdated_ids: bool = False
 ) -> Optional[JobId]:
-    source_path = f"{scratch_config.scratch_prefix_name}/{metadata_path}/{metadata_type}/"
-    if not path_has_any_data(scratch_config.scratch_bucket_name, source_path, gcs_client):
-        logging.info(f"No data for metadata type {metadata_type}")
+    if not _prepare_staged_data(scratch_config, metadata_type, metadata_path, gcs_client):
         return None
 
-    remove_empty_blobs(scratch_config.scratch_bucket_name, source_path, gcs_client)
-
     num_new_rows = start_load(
         scratch_config,
         scratch_dataset_name,
@@ -70,6 +188,51 @@ def load_table(
         bigquery_service
     )
 
+    return _finish_load(
+        scratch_config,
+        target_hca_dataset,
+        metadata_type,
+        num_new_rows,
+        gcs_client,
+        data_repo_service,
+        bigquery_service,
+        scratch_dataset_name if incremental_outdated_ids else None
+    )
+
+
+def _prepare_staged_data(
+        scratch_config: ScratchConfig,
+        metadata_type: MetadataType,
+        metadata_path: str,
+        gcs_client: Client
+) -> bool:
+    """
+    Strips empty blobs from the staged data for this metadata type.
+    :return: False if there is no staged data at all for the type
+    """
+    source_path = f"{scratch_config.scratch_prefix_name}/{metadata_path}/{metadata_type}/"
+    summary = inspect_prefix(scratch_config.scratch_bucket_name, source_path, gcs_client)
+    if not summary.has_data:
+        logging.info(f"No data for metadata type {metadata_type}")
+        return False
+
+    logging.info(
+        f"Staged data for metadata type {metadata_type}: {summary.shard_count} shards, {summary.total_bytes} bytes"
+    )
+    remove_empty_blobs(scratch_config.scratch_bucket_name, source_path, gcs_client, summary)
+    return True
+
+
+def _finish_load(
+        scratch_config: ScratchConfig,
+        target_hca_dataset: TdrDataset,
+        metadata_type: MetadataType,
+        num_new_rows: int,
+        gcs_client: Client,
+        data_repo_service: DataRepoService,
+        bigquery_service: BigQueryService,
+        scratch_dataset_name: Optional[HcaScratchDatasetName]
+) -> Optional[JobId]:
     if num_new_rows == 0:
         logging.info(f"No new rows for metadata type {metadata_type}")
         return None
@@ -81,69 +244,87 @@ def load_table(
         metadata_type,
         bigquery_service,
         data_repo_service,
-        gcs_client
+        gcs_client,
+        scratch_dataset_name=scratch_dataset_name
     )
     return maybe_outdated_job_id
 
 
-def _diff_hca_table(
-        metadata_type: MetadataType,
-        metadata_path: str,
-        primary_key: str,
-        joined_table_name: str,
+def _row_counts_table_name(metadata_path: str) -> str:
+    return f"{re.sub(r'[^A-Za-z0-9_]', '_', metadata_path)}_row_counts"
+
+
+def _diff_hca_tables(
+        metadata_fanout_results: list[MetadataTypeFanoutResult],
         scratch_config: ScratchConfig,
         target_hca_dataset: TdrDataset,
-        scratch_dataset_name: HcaScratchDatasetName,
         bigquery_service: BigQueryService
+) -> dict[MetadataType, int]:
+    """
+    Diffs the staged data for every given metadata type against the target TDR dataset in a single
+    scripted BigQuery job. Rows not yet present in TDR (keyed on primary key + version) are written
+    to a {metadata_type}_values table in the scratch dataset, and the number of such rows per type
+    is written to a row-count summary table in the same pass.
 
-) -> None:
-    datarepo_key = f"{primary_key} as datarepo_{primary_key}, version as datarepo_version"
-    fq_dataset_id = target_hca_dataset.fully_qualified_jade_dataset_name()
+    All fanout results must share a scratch dataset and metadata path.
 
-    query = f"""
-    SELECT existing.datarepo_row_id, staged.*, {datarepo_key}
-    FROM {metadata_type} staged FULL JOIN `{target_hca_dataset.project_id}.{fq_dataset_id}.{metadata_type}` existing
-    USING ({primary_key}, version)
+    :return: The number of new rows per metadata type
     """
-    destination = f"{scratch_dataset_name}.{joined_table_name}"
+    if not metadata_fanout_results:
+        return {}
 
-    source_paths = [
-        f"{scratch_config.scratch_area()}/{metadata_path}/{metadata_type}/*"
-    ]
+    scratch_dataset_name = metadata_fanout_results[0].scratch_dataset_name
+    metadata_path = metadata_fanout_results[0].path
+    assert all(
+        result.scratch_dataset_name == scratch_dataset_name and result.path == metadata_path
+        for result in metadata_fanout_results
+    ), "Batched diffs must share a scratch dataset and metadata path"
 
-    bigquery_service.run_query_using_external_schema(
-        query,
-        schema=None,
-        source_paths=source_paths,
-        table_name=metadata_type,
-        destination=destination,
+    fq_dataset_id = target_hca_dataset.fully_qualified_jade_dataset_name()
+    statements = []
+    counts = []
+    for result in metadata_fanout_results:
+        metadata_type = result.metadata_type
+        primary_key = f"{metadata_type}_id"
+        staged_table = f"`{scratch_dataset_name}.{metadata_type}_staged`"
+        values_table = f"`{scratch_dataset_name}.{metadata_type}_values`"
+        statements.append(f"""
+        CREATE OR REPLACE EXTERNAL TABLE {staged_table}
+        OPTIONS (
+            format = 'NEWLINE_DELIMITED_JSON',
+            uris = ['{scratch_config.scratch_area()}/{metadata_path}/{metadata_type}/*']
+        );
+        CREATE OR REPLACE TABLE {values_table} AS
+        SELECT staged.*
+        FROM {staged_table} staged LEFT JOIN (
+            SELECT datarepo_row_id, {primary_key}, version
+            FROM `{target_hca_dataset.project_id}.{fq_dataset_id}.{metadata_type}`
+        ) existing
+        USING ({primary_key}, version)
+        WHERE existing.datarepo_row_id IS NULL AND {primary_key} IS NOT NULL AND version IS NOT NULL;
+        """)
+        counts.append(f"SELECT '{metadata_type}' AS metadata_type, COUNT(1) AS num_rows FROM {values_table}")
+
+    row_counts_table = f"`{scratch_dataset_name}.{_row_counts_table_name(metadata_path)}`"
+    union_of_counts = "\n        UNION ALL ".join(counts)
+    statements.append(f"""
+        CREATE OR REPLACE TABLE {row_counts_table} AS
+        {union_of_counts};
+        SELECT metadata_type, num_rows FROM {row_counts_table};
+    """)
+
+    rows = bigquery_service.run_query(
+        "".join(statements),
         bigquery_project=scratch_config.scratch_bq_project,
         location=target_hca_dataset.bq_location
     )
+    # the script replaced the values tables behind the service's back
+    bigquery_service.invalidate_row_counts(scratch_dataset_name)
 
-
-def _query_rows_to_append(
-        metadata_type: str,
-        primary_key: str,
-        scratch_config: ScratchConfig,
-        scratch_dataset_name: HcaScratchDatasetName,
-        joined_table_name: str,
-        target_hca_dataset: TdrDataset,
-        bigquery_service: BigQueryService
-) -> RowIterator:
-    query = f"""
-    SELECT * EXCEPT (datarepo_{primary_key}, datarepo_row_id, datarepo_version)
-    FROM {scratch_dataset_name}.{joined_table_name}
-    WHERE datarepo_row_id IS NULL AND {primary_key} IS NOT NULL AND version IS NOT NULL
-    """
-
-    target_table = f"{scratch_dataset_name}.{metadata_type}_values"
-    return bigquery_service.run_query_with_destination(
-        query,
-        target_table,
-        scratch_config.scratch_bq_project,
-        location=target_hca_dataset.bq_location
-    )
+    num_rows_by_type = {result.metadata_type: 0 for result in metadata_fanout_results}
+    for row in rows:
+        num_rows_by_type[MetadataType(row["metadata_type"])] = row["num_rows"]
+    return num_rows_by_type
 
 
 def export_data(
@@ -152,18 +333,24 @@ def export_data(
         metadata_type: MetadataType,
         scratch_config: ScratchConfig,
         scratch_dataset_name: HcaScratchDatasetName,
-        bigquery_service: BigQueryService
+        bigquery_service: BigQueryService,
+        num_rows: Optional[int] = None
 ) -> int:
+    """
+    Exports the given scratch table to GCS. Callers that already know the table's row count
+    (e.g., from a diff summary) may pass it to skip the COUNT query.
+    """
     assert table_name_extension.startswith("_"), "Export data extension must start with _"
 
     source_table_name = f"{metadata_type}{table_name_extension}"
     out_path = f"{scratch_config.scratch_area()}/{operation_name}/{metadata_type}/*"
 
     logging.info(f"Exporting data to {out_path}")
-    num_rows = bigquery_service.get_num_rows_in_table(
-        source_table_name,
-        scratch_dataset_name
-    )
+    if num_rows is None:
+        num_rows = bigquery_service.get_num_rows_in_table(
+            source_table_name,
+            scratch_dataset_name
+        )
     if num_rows == 0:
         return num_rows
 
@@ -198,30 +385,20 @@ def start_load(
         metadata_type: MetadataType,
         metadata_path: str,
         data_repo_service: DataRepoService,
-        bigquery_service: BigQueryService
+        bigquery_service: BigQueryService,
+        num_new_rows: Optional[int] = None
 ) -> int:
-    pk = f"{metadata_type}_id"
-    joined_table_name = f"{metadata_type}_joined"
-    _diff_hca_table(
-        metadata_type=metadata_type,
-        metadata_path=metadata_path,
-        primary_key=pk,
-        joined_table_name=joined_table_name,
-        scratch_config=scratch_config,
-        target_hca_dataset=target_hca_dataset,
-        scratch_dataset_name=scratch_dataset_name,
-        bigquery_service=bigquery_service,
-
-    )
-    _query_rows_to_append(
-        metadata_type=metadata_type,
-        primary_key=pk,
-        scratch_config=scratch_config,
-        scratch_dataset_name=scratch_dataset_name,
-        joined_table_name=joined_table_name,
-        target_hca_dataset=target_hca_dataset,
-        bigquery_service=bigquery_service
-    )
+    """
+    Diffs, exports and ingests new rows for the given metadata type. If the diff has already been
+    computed as part of a batch, pass its row count as num_new_rows to skip straight to the export.
+    """
+    if num_new_rows is None:
+        num_new_rows = _diff_hca_tables(
+            [MetadataTypeFanoutResult(scratch_dataset_name, metadata_type, metadata_path)],
+            scratch_config=scratch_config,
+            target_hca_dataset=target_hca_dataset,
+            bigquery_service=bigquery_service
+        )[metadata_type]
 
     num_new_rows = export_data(
         operation_name="new-rows",
@@ -229,7 +406,8 @@ def start_load(
         metadata_type=metadata_type,
         scratch_config=scratch_config,
         scratch_dataset_name=scratch_dataset_name,
-        bigquery_service=bigquery_service
+        bigquery_service=bigquery_service,
+        num_rows=num_new_rows
     )
 
     if num_new_rows > 0:
@@ -247,26 +425,51 @@ def _get_outdated_ids(
         table_name: str,
         target_hca_dataset: TdrDataset,
         scratch_config: ScratchConfig,
-        bigquery_service: BigQueryService
+        bigquery_service: BigQueryService,
+        scratch_dataset_name: Optional[HcaScratchDatasetName] = None
 ) -> str:
+    """
+    Exports the datarepo_row_ids of all rows that have been superseded by a newer version of the same entity.
+
+    If a scratch dataset is supplied, only entities with rows in its {table_name}_values table (i.e., those
+    appended by the current load) are considered, so the version comparison scales with the size of the load
+    rather than the size of the target table.
+    """
     fq_dataset_id = target_hca_dataset.fully_qualified_jade_dataset_name()
     jade_table = f"{target_hca_dataset.project_id}.{fq_dataset_id}.{table_name}"
     out_path = f"{scratch_config.scratch_area()}/outdated-ids/{table_name}"
 
+    if scratch_dataset_name:
+        candidates = f"""
+        updated_ids AS (
+            SELECT DISTINCT {table_name}_id FROM `{scratch_dataset_name}.{table_name}_values`
+        ),
+        candidates AS (
+            SELECT J.datarepo_row_id, J.{table_name}_id, J.version
+            FROM `{jade_table}` J JOIN updated_ids U
+            ON J.{table_name}_id = U.{table_name}_id
+        )"""
+    else:
+        candidates = f"""
+        candidates AS (
+            SELECT datarepo_row_id, {table_name}_id, version FROM `{jade_table}`
+        )"""
+
     query = f"""
     EXPORT DATA OPTIONS(
         uri='{out_path}/*',
         format='CSV',
         overwrite=true
     ) AS
-    WITH latest_versions AS (
+    WITH {candidates},
+    latest_versions AS (
         SELECT {table_name}_id, MAX(version) AS latest_version
-        FROM `{jade_table}` GROUP BY {table_name}_id
+        FROM candidates GROUP BY {table_name}_id
     )
-    SELECT J.datarepo_row_id FROM
-        `{jade_table}` J JOIN latest_versions L
-        ON J.{table_name}_id = L.{table_name}_id
-    WHERE J.version < L.latest_version
+    SELECT C.datarepo_row_id FROM
+        candidates C JOIN latest_versions L
+        ON C.{table_name}_id = L.{table_name}_id
+    WHERE C.version < L.latest_version
     """
 
     bigquery_service.run_query(
@@ -284,10 +487,12 @@ def clear_outdated(
         metadata_type: MetadataType,
         bigquery_service: BigQueryService,
         data_repo_service: DataRepoService,
-        gcs_client: Client
+        gcs_client: Client,
+        scratch_dataset_name: Optional[HcaScratchDatasetName] = None
 ) -> Optional[JobId]:
     """
-    Looks for any outdated IDs and submits a soft delete job to remove them from the target dataset
+    Looks for any outdated IDs and submits a soft delete job to remove them from the target dataset.
+    Passing the load's scratch dataset restricts the search to entities appended by that load.
 
     :return: The JobID if any rows were found for deletion, or None if none were found
     """
@@ -295,7 +500,8 @@ def clear_outdated(
         table_name=metadata_type,
         target_hca_dataset=target_hca_dataset,
         scratch_config=scratch_config,
-        bigquery_service=bigquery_service
+        bigquery_service=bigquery_service,
+        scratch_dataset_name=scratch_dataset_name
     )
 
     gs_path = parse_gs_path(out_path)
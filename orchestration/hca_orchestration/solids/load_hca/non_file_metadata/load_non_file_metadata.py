@@ -1,17 +1,12 @@
 from enum import Enum
 
-from dagster import (
-    DynamicOutputDefinition,
-    Optional,
-    composite_solid,
-    configured,
-)
+from dagster import Optional, composite_solid, configured
 
 from hca_manage.common import JobId
 from hca_orchestration.solids.load_hca.ingest_metadata_type import (
     ingest_metadata_type,
 )
-from hca_orchestration.solids.load_hca.load_table import load_table_solid
+from hca_orchestration.solids.load_hca.load_table import load_tables_solid
 from hca_orchestration.support.typing import (
     HcaScratchDatasetName,
     MetadataType,
@@ -50,9 +45,10 @@ ingest_non_file_metadata_type = configured(ingest_metadata_type, name="ingest_no
     {"metadata_types": NonFileMetadataTypes, "prefix": "metadata"})
 
 
-@composite_solid(
-    output_defs=[DynamicOutputDefinition(dagster_type=Optional[JobId])]
-)
-def non_file_metadata_fanout(result: list[JobId], scratch_dataset_name: HcaScratchDatasetName) -> Optional[JobId]:
+@composite_solid
+def non_file_metadata_fanout(
+        result: list[JobId],
+        scratch_dataset_name: HcaScratchDatasetName
+) -> list[Optional[JobId]]:
     results = ingest_non_file_metadata_type(result, scratch_dataset_name)
-    return results.map(load_table_solid)
+    return load_tables_solid(results.collect())
@@ -1,12 +1,14 @@
-from typing import Optional
+from typing import Any
 
-from dagster import solid, Int, Failure, Nothing, configured, String, DagsterLogManager
+from dagster import solid, Int, Failure, configured, DagsterLogManager
 from dagster.core.execution.context.compute import AbstractComputeExecutionContext
+from dagster_utils.contrib.data_repo.jobs import JobPollException
 from dagster_utils.typing import DagsterConfigDict
-from data_repo_client import JobModel, ApiException, RepositoryApi
 
 from hca_manage.common import JobId
-from hca_orchestration.contrib.retry import is_truthy, retry
+from hca_orchestration.contrib.dagster import instrumented
+from hca_orchestration.contrib.data_repo.job_watcher import TdrJobWatcher
+from hca_orchestration.contrib.retry import LatencyHistogram
 
 
 class DataFileIngestionFailure(Failure):
@@ -14,18 +16,19 @@ class DataFileIngestionFailure(Failure):
 
 
 @solid(
-    required_resource_keys={"data_repo_client"},
+    required_resource_keys={"tdr_job_watcher"},
     config_schema={
         'max_wait_time_seconds': Int,
         'poll_interval_seconds': Int,
     }
 )
+@instrumented
 def base_check_data_ingest_job_result(context: AbstractComputeExecutionContext, job_id: JobId) -> JobId:
     job_results = _base_check_jade_job_result(
         context.solid_config['max_wait_time_seconds'],
         context.solid_config['poll_interval_seconds'],
         job_id,
-        context.resources.data_repo_client,
+        context.resources.tdr_job_watcher,
         context.log
     )
     if job_results['failedFiles'] > 0:
@@ -48,18 +51,19 @@ def check_data_ingest_job_result(config: DagsterConfigDict) -> DagsterConfigDict
 
 
 @solid(
-    required_resource_keys={"data_repo_client"},
+    required_resource_keys={"tdr_job_watcher"},
     config_schema={
         'max_wait_time_seconds': Int,
         'poll_interval_seconds': Int,
     }
 )
+@instrumented
 def check_table_ingest_result(context: AbstractComputeExecutionContext, job_id: JobId) -> JobId:
     job_results = _base_check_jade_job_result(
         context.solid_config['max_wait_time_seconds'],
         context.solid_config['poll_interval_seconds'],
         job_id,
-        context.resources.data_repo_client,
+        context.resources.tdr_job_watcher,
         context.log
     )
     if job_results['bad_row_count'] == '0':
@@ -84,28 +88,21 @@ def _base_check_jade_job_result(
         max_wait_time_seconds: int,
         poll_interval_seconds: int,
         job_id: JobId,
-        data_repo_client: RepositoryApi,
+        job_watcher: TdrJobWatcher,
         logger: DagsterLogManager
-) -> Nothing:
-    # we need to poll on the endpoint as a workaround for a race condition in TDR (DR-1791)
-    def __fetch_job_results(jid: JobId) -> Optional[JobModel]:
-        try:
-            logger.info(f"Fetching job results for job_id = {jid}")
-            return data_repo_client.retrieve_job_result(jid)
-        except ApiException as ae:
-            if 500 <= ae.status <= 599:
-                logger.info(f"Data repo returned error when fetching results for job_id = {jid}, scheduling retry")
-                return None
-            raise
-
-    job_results = retry(
-        __fetch_job_results,
-        max_wait_time_seconds,
-        poll_interval_seconds,
-        is_truthy,
-        job_id
-    )
-    if not job_results:
-        raise Failure(f"No job results after polling bulk ingest, job_id = {job_id}")
-
-    return job_results
+) -> Any:
+    # the results endpoint can briefly error for a just-completed job, a race condition in TDR (DR-1791)
+    result_latencies = LatencyHistogram()
+    try:
+        return job_watcher.wait_for_result(
+            job_id,
+            max_wait_time_seconds,
+            initial_poll_interval_seconds=poll_interval_seconds,
+            result_initial_delay_seconds=min(1, poll_interval_seconds),
+            result_max_delay_seconds=poll_interval_seconds,
+            result_latencies=result_latencies
+        )
+    except JobPollException as e:
+        raise Failure(f"No job results after polling bulk ingest, job_id = {job_id}: {e.message}")
+    finally:
+        logger.info(f"Job result fetch latencies for job_id = {job_id}: {result_latencies.snapshot()}")
@@ -3,15 +3,21 @@ from dagster.core.execution.context.compute import AbstractComputeExecutionConte
 from dagster_utils.resources.beam.beam_runner import BeamRunner
 from google.cloud.bigquery import Dataset
 from google.cloud.storage.client import Client
-from hca_orchestration.contrib.dagster import short_run_id
+from hca_orchestration.contrib.checkpoints import LoadCheckpointStore
+from hca_orchestration.contrib.dagster import instrumented, short_run_id
+from hca_orchestration.contrib.gcs import delete_blobs
 from hca_orchestration.models.hca_dataset import TdrDataset
 from hca_orchestration.support.typing import HcaScratchDatasetName
 
 
+PRE_PROCESS_METADATA_STAGE = "pre_process_metadata"
+
+
 @solid(
-    required_resource_keys={"gcs", "scratch_config"},
+    required_resource_keys={"gcs", "scratch_config", "load_checkpoints"},
     input_defs=[InputDefinition("ignore", Nothing)]
 )
+@instrumented
 def clear_scratch_dir(context: AbstractComputeExecutionContext) -> int:
     """
     Given a staging bucket + prefix, deletes all blobs present at that path
@@ -20,6 +26,11 @@ def clear_scratch_dir(context: AbstractComputeExecutionContext) -> int:
     scratch_bucket_name = context.resources.scratch_config.scratch_bucket_name
     scratch_prefix_name = context.resources.scratch_config.scratch_prefix_name
 
+    checkpoints: LoadCheckpointStore = context.resources.load_checkpoints
+    if checkpoints.is_complete(PRE_PROCESS_METADATA_STAGE):
+        context.log.info(f"Resuming load, keeping pre-processed metadata in scratch dir at {scratch_prefix_name}")
+        return 0
+
     context.log.info(f"Clearing scratch dir at {scratch_prefix_name}")
     deletions_count = clear_dir(scratch_bucket_name, scratch_prefix_name, context.resources.gcs)
     context.log.info(f"Deleted {deletions_count} blobs under {scratch_prefix_name}")
@@ -27,21 +38,25 @@ def clear_scratch_dir(context: AbstractComputeExecutionContext) -> int:
 
 
 def clear_dir(bucket: str, prefix: str, gcs: Client) -> int:
-    blobs = gcs.list_blobs(bucket, prefix=f"{prefix}/")
-    deletions_count = 0
-    for blob in blobs:
-        blob.delete()
-        deletions_count += 1
-    return deletions_count
+    """
+    Streams the listing of the given prefix into batched, concurrent deletes
+    :return: Number of deletions
+    """
+    blob_names = (blob.name for blob in gcs.list_blobs(bucket, prefix=f"{prefix}/"))
+    result = delete_blobs(gcs, bucket, blob_names)
+    if result.failed:
+        raise Failure(f"Failed to delete {len(result.failed)} blobs under gs://{bucket}/{prefix}")
+    return result.deleted
 
 
 @solid(
-    required_resource_keys={"beam_runner", "scratch_config"},
+    required_resource_keys={"beam_runner", "scratch_config", "load_checkpoints"},
     config_schema={
         "input_prefix": String,
     },
     input_defs=[InputDefinition("start", Nothing)],
 )
+@instrumented
 def pre_process_metadata(context: AbstractComputeExecutionContext) -> Nothing:  # type: ignore
     """
     Runs the Beam hca transformation pipeline flow over the given input prefix
@@ -53,8 +68,16 @@ def pre_process_metadata(context: AbstractComputeExecutionContext) -> Nothing:
     if input_prefix.endswith("/"):
         raise Failure(f"input_prefix must not end with trailing slash [input_prefix={input_prefix}]")
 
-    context.log.info(f"Pre-processing metadata [input_prefix={input_prefix}]")
+    checkpoints: LoadCheckpointStore = context.resources.load_checkpoints
+    if checkpoints.is_complete(PRE_PROCESS_METADATA_STAGE):
+        context.log.info(f"Resuming load, metadata already pre-processed [input_prefix={input_prefix}]")
+    else:
+        context.log.info(f"Pre-processing metadata [input_prefix={input_prefix}]")
+        _run_transformation_pipeline(context, input_prefix)
+        checkpoints.complete(PRE_PROCESS_METADATA_STAGE)
+
 
+def _run_transformation_pipeline(context: AbstractComputeExecutionContext, input_prefix: str) -> None:
     # not strictly required, but makes the ensuing lines a lot shorter
     bucket_name = context.resources.scratch_config.scratch_bucket_name
     prefix_name = f"{context.resources.scratch_config.scratch_prefix_name}"
@@ -74,9 +97,10 @@ def pre_process_metadata(context: AbstractComputeExecutionContext) -> Nothing:
 
 
 @solid(
-    required_resource_keys={"bigquery_client", "load_tag", "scratch_config", "target_hca_dataset"},
+    required_resource_keys={"bigquery_client", "load_tag", "scratch_config", "target_hca_dataset", "load_checkpoints"},
     input_defs=[InputDefinition("start", Nothing)],
 )
+@instrumented
 def create_scratch_dataset(context: AbstractComputeExecutionContext) -> HcaScratchDatasetName:
     """
     Creates a staging dataset that will house records for update/insertion into the
@@ -98,7 +122,8 @@ def create_scratch_dataset(context: AbstractComputeExecutionContext) -> HcaScrat
     dataset.default_table_expiration_ms = context.resources.scratch_config.scratch_table_expiration_ms
 
     bq_client = context.resources.bigquery_client
-    bq_client.create_dataset(dataset)
+    # a resumed load reuses the scratch dataset its earlier run created
+    bq_client.create_dataset(dataset, exists_ok=context.resources.load_checkpoints.resume)
 
     context.log.info(f"Created scratch dataset {dataset_name}")
 
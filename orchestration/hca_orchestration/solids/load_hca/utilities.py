@@ -4,7 +4,7 @@ from dagster_utils.contrib.data_repo.typing import JobId
 from typing import Optional
 
 from hca_manage.check import CheckManager
-from hca_orchestration.contrib.dagster import short_run_id
+from hca_orchestration.contrib.dagster import instrumented, short_run_id
 from hca_orchestration.models.hca_dataset import TdrDataset
 from hca_orchestration.solids.validate_egress import construct_validation_message
 
@@ -12,6 +12,7 @@ from hca_orchestration.solids.validate_egress import construct_validation_messag
 @solid(
     required_resource_keys={'slack', 'target_hca_dataset', 'dagit_config', 'data_repo_client'}
 )
+@instrumented
 def validate_and_send_finish_notification(
         context: AbstractComputeExecutionContext,
         results1: list[Optional[JobId]],
@@ -48,6 +49,7 @@ def validate_and_send_finish_notification(
 @solid(
     required_resource_keys={'slack', 'target_hca_dataset', 'dagit_config'}
 )
+@instrumented
 def send_start_notification(context: AbstractComputeExecutionContext) -> None:
     lines = (
         f'Staging area: {context.run_config["solids"]["pre_process_metadata"]["config"]["input_prefix"]}',
@@ -4,6 +4,7 @@ from dagster import (
     AssetKey,
     AssetMaterialization,
     Failure,
+    Field,
     In,
     MetadataValue,
     Nothing,
@@ -13,8 +14,9 @@ from dagster import (
 from dagster.core.execution.context.compute import AbstractComputeExecutionContext
 from hca_manage.check import CheckManager
 from hca_manage.common import ProblemCount
-from hca_manage.verify_subgraphs import verify_all_subgraphs_in_dataset
+from hca_manage.verify_subgraphs import verify_all_subgraphs_in_dataset, verify_all_subgraphs_server_side
 from hca_orchestration.contrib.bigquery import BigQueryService
+from hca_orchestration.contrib.dagster import instrumented
 from hca_orchestration.models.hca_dataset import TdrDataset
 from hca_orchestration.resources.hca_project_config import HcaProjectCopyingConfig
 
@@ -25,8 +27,14 @@ from hca_orchestration.resources.hca_project_config import HcaProjectCopyingConf
         "bigquery_service",
         "bigquery_client",
         "hca_project_copying_config"
+    },
+    config_schema={
+        # verify within BigQuery rather than loading the links table into memory; off by default until the
+        # server-side check has been validated against the client-side one on a real dataset
+        "server_side": Field(bool, default_value=False, is_required=False)
     }
 )
+@instrumented
 def verify_subgraphs(context: AbstractComputeExecutionContext, result: ProblemCount) -> None:
     """
     Loads all subgraphs from the copied dataset and ensures all descendent entities for each subgraph
@@ -47,6 +55,15 @@ def verify_subgraphs(context: AbstractComputeExecutionContext, result: ProblemCo
             f"Incorrect projects present in dataset {target_hca_dataset.dataset_name}, "
             f"should be {project_copying_config.source_hca_project_id}, found {projects_found}")
 
+    if context.solid_config["server_side"]:
+        verify_all_subgraphs_server_side(
+            target_hca_dataset.project_id,
+            f"datarepo_{target_hca_dataset.dataset_name}",
+            bigquery_service,
+            target_hca_dataset.bq_location
+        )
+        return
+
     links_rows = bigquery_service.get_links_in_dataset(target_hca_dataset.dataset_name,
                                                        target_hca_dataset.project_id,
                                                        target_hca_dataset.bq_location)
@@ -66,6 +83,7 @@ def verify_subgraphs(context: AbstractComputeExecutionContext, result: ProblemCo
     },
     ins={"start": In(Nothing)}
 )
+@instrumented
 def validate_copied_dataset(context: AbstractComputeExecutionContext) -> Iterator[Output]:
     """
     Ensures no null file IDs, duplicated rows or other structural issues are present in the copied
@@ -3,12 +3,13 @@ from dagster.core.execution.context.compute import AbstractComputeExecutionConte
 
 from hca_manage.check import CheckManager
 from hca_manage.common import ProblemCount
-from hca_orchestration.contrib.dagster import short_run_id
+from hca_orchestration.contrib.dagster import instrumented, short_run_id
 
 
 @solid(
     required_resource_keys={'data_repo_client', 'hca_dataset_operation_config', 'hca_manage_config'}
 )
+@instrumented
 def post_import_validate(context: AbstractComputeExecutionContext) -> ProblemCount:
     """
     Checks if the target dataset has any rows with duplicate IDs or null file references.
@@ -25,6 +26,7 @@ def post_import_validate(context: AbstractComputeExecutionContext) -> ProblemCou
 @solid(
     required_resource_keys={'slack', 'hca_dataset_operation_config'}
 )
+@instrumented
 def notify_slack_of_egress_validation_results(
     context: AbstractComputeExecutionContext,
     validation_results: ProblemCount
@@ -47,6 +49,9 @@ def construct_validation_message(validation_results: ProblemCount, dataset_name:
             "Empty links table: " + str(validation_results.empty_links_count),
             "Empty projects table: " + str(validation_results.empty_projects_count)
         ]
+        for problem, samples_by_table in validation_results.samples.items():
+            for table_name, row_ids in samples_by_table.items():
+                message_lines.append(f"Sample {problem} in {table_name}: {', '.join(row_ids)}")
     else:
         message_lines = [
             f"HCA dataset {dataset_name} has passed post-validation."
@@ -7,6 +7,7 @@ from dagster.core.execution.context.compute import (
 )
 from google.cloud.storage import Client
 from hca_manage.validation import HcaValidator
+from hca_orchestration.contrib.dagster import instrumented
 
 
 @solid(
@@ -18,6 +19,7 @@ from hca_manage.validation import HcaValidator
     #     OutputDefinition(name="total_retries"),
     # ],
 )
+@instrumented
 def pre_flight_validate(context: AbstractComputeExecutionContext) -> Any:
     """
     Runs the external validation code on the provided staging area.
@@ -44,6 +46,7 @@ def pre_flight_validate(context: AbstractComputeExecutionContext) -> Any:
 
 
 @solid(required_resource_keys={"slack"})
+@instrumented
 def notify_slack_of_successful_ingress_validation(
         context: AbstractComputeExecutionContext, staging_area: str
 ) -> str:
@@ -0,0 +1,72 @@
+"""
+Plans TDR bulk file ingest control files. Rather than taking whatever sharding a BigQuery extract job produces,
+the files to load are packed into control files that each hold a bounded number of files and bytes, balanced
+so that every bulk load job does roughly the same amount of work and they all finish around the same time.
+"""
+import heapq
+import json
+import math
+from dataclasses import dataclass, field
+from typing import Iterable
+
+
+@dataclass(frozen=True)
+class FileLoadRequest:
+    source_path: str
+    target_path: str
+    size_bytes: int
+
+
+@dataclass
+class ControlFile:
+    requests: list[FileLoadRequest] = field(default_factory=list)
+    total_bytes: int = 0
+
+    def add(self, request: FileLoadRequest) -> None:
+        self.requests.append(request)
+        self.total_bytes += request.size_bytes
+
+    def to_jsonl(self) -> str:
+        """
+        Renders the control file in the newline delimited JSON format TDR's bulk file load expects
+        """
+        return "".join(
+            json.dumps({"sourcePath": request.source_path, "targetPath": request.target_path}) + "\n"
+            for request in self.requests
+        )
+
+
+def plan_control_files(
+        requests: Iterable[FileLoadRequest],
+        max_files_per_control_file: int,
+        max_bytes_per_control_file: int
+) -> list[ControlFile]:
+    """
+    Packs the given requests into as few control files as the file and byte limits allow, balancing bytes
+    across them with the longest-processing-time-first heuristic: the largest files are placed first, each
+    into the control file with the fewest bytes so far. A single file larger than max_bytes_per_control_file
+    still gets loaded, in a control file of its own size.
+    """
+    sorted_requests = sorted(requests, key=lambda request: request.size_bytes, reverse=True)
+    if not sorted_requests:
+        return []
+
+    total_bytes = sum(request.size_bytes for request in sorted_requests)
+    control_file_count = max(
+        math.ceil(len(sorted_requests) / max_files_per_control_file),
+        math.ceil(total_bytes / max_bytes_per_control_file),
+        1
+    )
+    control_file_count = min(control_file_count, len(sorted_requests))
+    control_files = [ControlFile() for _ in range(control_file_count)]
+
+    # (bytes so far, files so far, index) of each control file that still has room for more files
+    open_files = [(0, 0, index) for index in range(control_file_count)]
+    for request in sorted_requests:
+        _, file_count, index = heapq.heappop(open_files)
+        control_file = control_files[index]
+        control_file.add(request)
+        if file_count + 1 < max_files_per_control_file:
+            heapq.heappush(open_files, (control_file.total_bytes, file_count + 1, index))
+
+    return control_files
@@ -1,9 +1,88 @@
+import json
 from collections import defaultdict
+from typing import Any, Iterable, Iterator, Mapping
 
 from hca_orchestration.models.entities import MetadataEntity, Subgraph
 from hca_orchestration.support.typing import MetadataType
 
 
+def iter_link_nodes(links: Iterable[Mapping[str, Any]]) -> Iterator[tuple[str, str]]:
+    """
+    Yields the (entity_type, entity_id) of every node referenced by the given links
+    """
+    for link in links:
+        link_type = link["link_type"]
+        if link_type == 'process_link':
+            yield link["process_type"], link["process_id"]
+
+            for input_link in link["inputs"]:
+                yield input_link["input_type"], input_link["input_id"]
+
+            for output_link in link["outputs"]:
+                yield output_link["output_type"], output_link["output_id"]
+
+            for protocol_link in link["protocols"]:
+                yield protocol_link["protocol_type"], protocol_link["protocol_id"]
+
+        elif link_type == 'supplementary_file_link':
+            yield link["entity"]["entity_type"], link["entity"]["entity_id"]
+
+            for file_link in link['files']:
+                yield file_link["file_type"], file_link["file_id"]
+        else:
+            raise Exception(f"Unknown link type {link_type} encountered")
+
+
+class SubgraphNodeIndex:
+    """
+    Distinct node ids per metadata type across a set of subgraphs. Shared nodes (protocols, inputs
+    reused across processes, the project) are stored once no matter how many subgraphs reference them,
+    and each metadata type string is held once as its dict key.
+    """
+
+    def __init__(self) -> None:
+        self._nodes: dict[MetadataType, set[str]] = {}
+        self.links_count = 0
+
+    def add(self, entity_type: str, entity_id: str) -> None:
+        ids = self._nodes.get(entity_type)  # type: ignore
+        if ids is None:
+            ids = self._nodes[MetadataType(entity_type)] = set()
+        ids.add(entity_id)
+
+    def add_links(self, links_id: str, links: Iterable[Mapping[str, Any]]) -> None:
+        self.links_count += 1
+        self.add("links", links_id)
+        for entity_type, entity_id in iter_link_nodes(links):
+            self.add(entity_type, entity_id)
+
+    def add_links_row(self, row: Mapping[str, Any]) -> None:
+        """
+        Indexes a links table row; the parsed content is discarded as soon as its nodes are added
+        """
+        self.add_links(row["links_id"], json.loads(row["content"])["links"])
+
+    def entity_ids(self, entity_type: str) -> set[str]:
+        return self._nodes.get(entity_type, set())  # type: ignore
+
+    def items(self) -> Iterator[tuple[MetadataType, set[str]]]:
+        return iter(self._nodes.items())
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self._nodes.values())
+
+
+def index_subgraph_nodes(links_rows: Iterable[Mapping[str, Any]]) -> SubgraphNodeIndex:
+    """
+    Builds a node index from links table rows, parsing one row at a time so only the distinct node ids are retained
+    """
+    index = SubgraphNodeIndex()
+    for row in links_rows:
+        index.add_links_row(row)
+    print(f"Indexed subgraphs [count={index.links_count}, distinct_nodes={len(index)}]")
+    return index
+
+
 def build_subgraph_nodes(links: list[Subgraph]) -> dict[MetadataType, list[MetadataEntity]]:
     nodes: dict[MetadataType, list[MetadataEntity]] = defaultdict(list)
     subgraphs = []
@@ -12,33 +91,9 @@ def build_subgraph_nodes(links: list[Subgraph]) -> dict[MetadataType, list[Metad
         nodes[MetadataType("links")].append(MetadataEntity(MetadataType("link"), subgraph.links_id))
 
     print(f"Hydrating subgraphs [count={len(subgraphs)}]")
-    for subgraph in subgraphs:   # type: ignore
-        for link in subgraph:    # type: ignore
-            link_type = link["link_type"]
-            if link_type == 'process_link':
-                process = MetadataEntity(link["process_type"], link["process_id"])
-                nodes[process.entity_type].append(process)
-
-                for input_link in link["inputs"]:
-                    input_entity = MetadataEntity(input_link["input_type"], input_link["input_id"])
-                    nodes[input_entity.entity_type].append(input_entity)
-
-                for output_link in link["outputs"]:
-                    output_entity = MetadataEntity(output_link["output_type"], output_link["output_id"])
-                    nodes[output_entity.entity_type].append(output_entity)
-
-                for protocol_link in link["protocols"]:
-                    protocol_entity = MetadataEntity(protocol_link["protocol_type"], protocol_link["protocol_id"])
-                    nodes[protocol_entity.entity_type].append(protocol_entity)
-
-            elif link_type == 'supplementary_file_link':
-                entity = MetadataEntity(link["entity"]["entity_type"], link["entity"]["entity_id"])
-                nodes[entity.entity_type].append(entity)
-
-                for file_link in link['files']:
-                    file_entity = MetadataEntity(file_link["file_type"], file_link["file_id"])
-                    nodes[file_entity.entity_type].append(file_entity)
-            else:
-                raise Exception(f"Unknown link type {link_type} encountered")
+    for subgraph in subgraphs:  # type: ignore
+        for entity_type, entity_id in iter_link_nodes(subgraph):  # type: ignore
+            entity = MetadataEntity(MetadataType(entity_type), entity_id)
+            nodes[entity.entity_type].append(entity)
 
     return nodes
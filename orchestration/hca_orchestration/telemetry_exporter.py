@@ -0,0 +1,43 @@
+"""
+Serves Prometheus metrics built from the telemetry that instrumented solids log to the Dagster event log (see
+contrib.dagster.instrumented). Solids run in short-lived run worker pods, so rather than each pod exposing its
+own metrics, this long-running process reads the hca_telemetry materializations from the instance's event log
+and serves the totals at /metrics. Run it with DAGSTER_HOME pointing at the deployment's instance config:
+
+    python -m hca_orchestration.telemetry_exporter --port 9090
+"""
+import argparse
+import logging
+import time
+from typing import Optional
+
+from dagster import DagsterInstance
+
+from hca_orchestration.contrib.dagster import export_telemetry
+from hca_orchestration.contrib.metrics import MetricsRegistry, start_metrics_server
+
+
+def run(instance: DagsterInstance, port: int, poll_interval_seconds: float) -> None:
+    registry = MetricsRegistry()
+    # catch up on the existing event log before serving, so the first scrape sees complete totals
+    cursor: Optional[int] = export_telemetry(instance, registry)
+    start_metrics_server(registry, port)
+    logging.info(f"Serving telemetry metrics on port {port}")
+
+    while True:
+        time.sleep(poll_interval_seconds)
+        try:
+            cursor = export_telemetry(instance, registry, cursor)
+        except Exception as e:
+            # a transient event log storage error should not take the exporter down; retry on the next poll
+            logging.warning(f"Failed to read telemetry from the event log: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m hca_orchestration.telemetry_exporter")
+    parser.add_argument("-p", "--port", type=int, default=9090)
+    parser.add_argument("-i", "--poll-interval-seconds", type=float, default=30.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    run(DagsterInstance.get(), args.port, args.poll_interval_seconds)
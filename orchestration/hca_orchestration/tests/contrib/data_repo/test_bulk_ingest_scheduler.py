@@ -0,0 +1,173 @@
+import threading
+from unittest.mock import MagicMock, Mock
+
+import pytest
+from data_repo_client import ApiException, RepositoryApi
+
+from hca_orchestration.contrib.checkpoints import LoadCheckpointStore
+from hca_orchestration.contrib.data_repo.bulk_ingest_scheduler import BulkIngestScheduler
+from hca_orchestration.contrib.data_repo.job_watcher import TdrJobWatcher
+from hca_orchestration.contrib.retry import RetryPolicy
+
+
+class FakeBulkLoads:
+    """
+    Fake TDR in which each bulk load job runs until released, tracking how many run at once
+    """
+
+    def __init__(self, failed_files: int = 0):
+        self.failed_files = failed_files
+        self.lock = threading.Lock()
+        self.submitted: list[str] = []
+        self.released: set[str] = set()
+        self.running = 0
+        self.max_running = 0
+        self.throttle_next = 0
+        self.polls: dict[str, int] = {}
+
+    def bulk_file_load(self, dataset_id, bulk_file_load):
+        with self.lock:
+            if self.throttle_next:
+                self.throttle_next -= 1
+                raise ApiException(status=429)
+            job_id = f"job_{len(self.submitted)}"
+            self.submitted.append(bulk_file_load["loadControlFile"])
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        job = Mock()
+        job.id = job_id
+        return job
+
+    def retrieve_job(self, job_id):
+        with self.lock:
+            # jobs finish in submission order, the oldest running job on its second poll
+            self.polls[job_id] = self.polls.get(job_id, 0) + 1
+            completed = job_id in self.released or (
+                int(job_id.split("_")[1]) == len(self.released) and self.polls[job_id] >= 2
+            )
+            if completed and job_id not in self.released:
+                self.released.add(job_id)
+                self.running -= 1
+        job_status = Mock()
+        job_status.completed = "2001-01-01 00:00:00" if completed else None
+        job_status.job_status = "succeeded" if completed else "running"
+        return job_status
+
+    def retrieve_job_result(self, job_id):
+        return {"succeededFiles": 10, "failedFiles": self.failed_files}
+
+
+@pytest.fixture
+def fake_tdr():
+    return FakeBulkLoads()
+
+
+def _scheduler(fake_tdr, max_in_flight, checkpoints=None):
+    data_repo_client = MagicMock(spec=RepositoryApi)
+    data_repo_client.bulk_file_load = Mock(side_effect=fake_tdr.bulk_file_load)
+    data_repo_client.retrieve_job = Mock(side_effect=fake_tdr.retrieve_job)
+    data_repo_client.retrieve_job_result = Mock(side_effect=fake_tdr.retrieve_job_result)
+    watcher = TdrJobWatcher(data_repo_client, initial_poll_interval_seconds=0.01, max_poll_interval_seconds=0.02)
+    scheduler = BulkIngestScheduler(
+        data_repo_client,
+        watcher,
+        dataset_id="dataset_id",
+        profile_id="profile_id",
+        load_tag="load_tag",
+        max_in_flight=max_in_flight,
+        max_wait_time_seconds=10,
+        submit_retry_policy=RetryPolicy(initial_delay_seconds=0.01, max_delay_seconds=0.01, max_wait_time_seconds=5),
+        checkpoints=checkpoints
+    )
+    return scheduler, watcher
+
+
+def test_scheduler_keeps_bounded_loads_in_flight(fake_tdr):
+    scheduler, watcher = _scheduler(fake_tdr, max_in_flight=3)
+    try:
+        summary = scheduler.run([f"gs://bucket/control_{i}.json" for i in range(8)])
+    finally:
+        watcher.close()
+
+    assert fake_tdr.submitted == [f"gs://bucket/control_{i}.json" for i in range(8)]
+    assert fake_tdr.max_running == 3
+    assert len(summary.results) == 8
+    assert summary.succeeded_files == 80
+    assert not summary.failures
+    assert summary.files_per_second > 0
+
+
+def test_scheduler_backs_off_when_throttled(fake_tdr):
+    fake_tdr.throttle_next = 2
+    scheduler, watcher = _scheduler(fake_tdr, max_in_flight=4)
+    try:
+        summary = scheduler.run([f"gs://bucket/control_{i}.json" for i in range(2)])
+    finally:
+        watcher.close()
+
+    assert summary.throttled_submissions == 2
+    assert len(summary.results) == 2
+    assert not summary.failures
+
+
+def test_scheduler_stops_submitting_after_a_failed_load():
+    fake_tdr = FakeBulkLoads(failed_files=1)
+    scheduler, watcher = _scheduler(fake_tdr, max_in_flight=1)
+    try:
+        summary = scheduler.run([f"gs://bucket/control_{i}.json" for i in range(3)])
+    finally:
+        watcher.close()
+
+    assert [result.job_id for result in summary.failures] == ["job_0"]
+    assert summary.not_submitted == ["gs://bucket/control_1.json", "gs://bucket/control_2.json"]
+
+
+def test_scheduler_drains_in_flight_loads_after_a_failed_submission(fake_tdr):
+    scheduler, watcher = _scheduler(fake_tdr, max_in_flight=2)
+
+    def _bulk_file_load(dataset_id, bulk_file_load):
+        if bulk_file_load["loadControlFile"] == "gs://bucket/control_1.json":
+            raise ApiException(status=400)
+        return fake_tdr.bulk_file_load(dataset_id, bulk_file_load)
+
+    scheduler.data_repo_client.bulk_file_load = Mock(side_effect=_bulk_file_load)
+    try:
+        summary = scheduler.run([f"gs://bucket/control_{i}.json" for i in range(3)])
+    finally:
+        watcher.close()
+
+    assert [(result.control_file_path, result.job_id) for result in summary.failures] == [
+        ("gs://bucket/control_1.json", None)
+    ]
+    assert summary.succeeded_files == 10
+    assert fake_tdr.released == {"job_0"}
+    assert summary.not_submitted == ["gs://bucket/control_2.json"]
+
+
+def test_scheduler_reattaches_to_checkpointed_loads(fake_tdr):
+    # an earlier run submitted the first control file before it stopped
+    checkpoints = LoadCheckpointStore("load_tag", "staging_area", resume=True)
+    earlier_job = fake_tdr.bulk_file_load("dataset_id", {"loadControlFile": "gs://bucket/control_0.json"})
+    checkpoints.record_job("bulk_file_load:gs://bucket/control_0.json", earlier_job.id)
+
+    scheduler, watcher = _scheduler(fake_tdr, max_in_flight=2, checkpoints=checkpoints)
+    try:
+        summary = scheduler.run([f"gs://bucket/control_{i}.json" for i in range(2)])
+    finally:
+        watcher.close()
+
+    assert fake_tdr.submitted == ["gs://bucket/control_0.json", "gs://bucket/control_1.json"]
+    assert sorted(result.job_id for result in summary.results) == ["job_0", "job_1"]
+    assert checkpoints.job_id("bulk_file_load:gs://bucket/control_1.json") == "job_1"
+
+
+def test_scheduler_forgets_failed_loads():
+    fake_tdr = FakeBulkLoads(failed_files=1)
+    checkpoints = LoadCheckpointStore("load_tag", "staging_area")
+    scheduler, watcher = _scheduler(fake_tdr, max_in_flight=1, checkpoints=checkpoints)
+    try:
+        scheduler.run(["gs://bucket/control_0.json"])
+    finally:
+        watcher.close()
+
+    assert checkpoints.job_id("bulk_file_load:gs://bucket/control_0.json") is None
@@ -0,0 +1,155 @@
+import threading
+import time
+from unittest.mock import MagicMock, Mock
+
+import pytest
+from dagster_utils.contrib.data_repo.jobs import JobFailureException, JobTimeoutException
+from data_repo_client import ApiException, RepositoryApi
+
+from hca_manage.common import JobId
+from hca_orchestration.contrib.data_repo import job_watcher
+from hca_orchestration.contrib.data_repo.job_watcher import TdrJobWatcher, default_job_watcher
+from hca_orchestration.contrib.retry import LatencyHistogram
+
+
+def _job_status(completed: bool, status: str = "succeeded") -> Mock:
+    job_status = Mock()
+    job_status.completed = "2001-01-01 00:00:00" if completed else None
+    job_status.job_status = status if completed else "running"
+    return job_status
+
+
+@pytest.fixture
+def data_repo_client():
+    return MagicMock(spec=RepositoryApi)
+
+
+def test_watcher_polls_all_jobs_from_one_thread(data_repo_client):
+    polls: dict[str, int] = {"a": 0, "b": 0}
+    polling_threads = set()
+
+    def _retrieve_job(job_id):
+        polling_threads.add(threading.current_thread().name)
+        polls[job_id] += 1
+        return _job_status(polls[job_id] >= 3)
+
+    data_repo_client.retrieve_job = Mock(side_effect=_retrieve_job)
+    watcher = TdrJobWatcher(data_repo_client, initial_poll_interval_seconds=0.01, max_poll_interval_seconds=0.05)
+    try:
+        futures = [watcher.watch(JobId(job_id), 10) for job_id in ["a", "b"]]
+
+        assert [future.result(timeout=5) for future in futures] == ["a", "b"]
+        assert polls == {"a": 3, "b": 3}
+        assert polling_threads == {"tdr-job-watcher"}
+    finally:
+        watcher.close()
+
+
+def test_watcher_does_not_repoll_finished_jobs(data_repo_client):
+    data_repo_client.retrieve_job = Mock(return_value=_job_status(True))
+    watcher = TdrJobWatcher(data_repo_client, initial_poll_interval_seconds=0.01)
+    try:
+        watcher.wait(JobId("a"), 10)
+        watcher.wait(JobId("a"), 10)
+
+        data_repo_client.retrieve_job.assert_called_once_with("a")
+    finally:
+        watcher.close()
+
+
+def test_watcher_backs_off_and_caps_interval(data_repo_client):
+    data_repo_client.retrieve_job = Mock(return_value=_job_status(False))
+    watcher = TdrJobWatcher(data_repo_client, initial_poll_interval_seconds=0.01, max_poll_interval_seconds=0.02,
+                            backoff_factor=2)
+    try:
+        future = watcher.watch(JobId("a"), 0.1)
+        job = watcher._jobs[JobId("a")]
+
+        with pytest.raises(JobTimeoutException):
+            future.result(timeout=5)
+        assert job.interval == 0.02
+    finally:
+        watcher.close()
+
+
+def test_watcher_raises_on_failed_job(data_repo_client):
+    data_repo_client.retrieve_job = Mock(return_value=_job_status(True, "failed"))
+    watcher = TdrJobWatcher(data_repo_client, initial_poll_interval_seconds=0.01)
+    try:
+        with pytest.raises(JobFailureException):
+            watcher.wait(JobId("a"), 10)
+    finally:
+        watcher.close()
+
+
+def test_watcher_retries_job_polls_on_5xx(data_repo_client):
+    data_repo_client.retrieve_job = Mock(side_effect=[ApiException(status=503), _job_status(True)])
+    watcher = TdrJobWatcher(data_repo_client, initial_poll_interval_seconds=0.01)
+    try:
+        assert watcher.wait(JobId("a"), 10) == "a"
+        assert watcher.polls == 2
+    finally:
+        watcher.close()
+
+
+def test_wait_for_result_retries_result_fetch(data_repo_client):
+    data_repo_client.retrieve_job = Mock(return_value=_job_status(True))
+    data_repo_client.retrieve_job_result = Mock(side_effect=[ApiException(status=502), None, {"failedFiles": 0}])
+    watcher = TdrJobWatcher(data_repo_client, initial_poll_interval_seconds=0.01)
+    try:
+        assert watcher.wait_for_result(JobId("a"), 10) == {"failedFiles": 0}
+        assert data_repo_client.retrieve_job_result.call_count == 3
+    finally:
+        watcher.close()
+
+
+def test_wait_for_result_fetches_within_remaining_deadline(data_repo_client):
+    finishes_at = time.monotonic() + 0.3
+    data_repo_client.retrieve_job = Mock(side_effect=lambda job_id: _job_status(time.monotonic() >= finishes_at))
+    data_repo_client.retrieve_job_result = Mock(return_value=None)
+    watcher = TdrJobWatcher(data_repo_client, initial_poll_interval_seconds=0.01)
+    latencies = LatencyHistogram()
+    try:
+        started = time.monotonic()
+        with pytest.raises(JobTimeoutException):
+            watcher.wait_for_result(JobId("a"), 0.5, result_initial_delay_seconds=0.01,
+                                    result_max_delay_seconds=0.05, result_latencies=latencies)
+
+        assert time.monotonic() - started < 0.7
+        assert latencies.count == data_repo_client.retrieve_job_result.call_count
+    finally:
+        watcher.close()
+
+
+def test_watch_backs_off_past_per_job_initial_interval(data_repo_client):
+    data_repo_client.retrieve_job = Mock(return_value=_job_status(False))
+    watcher = TdrJobWatcher(data_repo_client, initial_poll_interval_seconds=10, max_poll_interval_seconds=1,
+                            backoff_factor=2)
+    try:
+        watcher.watch(JobId("a"), 10, initial_poll_interval_seconds=0.05)
+        time.sleep(0.5)
+
+        assert data_repo_client.retrieve_job.call_count >= 3
+        assert watcher._jobs[JobId("a")].interval > 0.1
+    finally:
+        watcher.close()
+
+
+def test_watcher_forgets_oldest_finished_jobs(data_repo_client, monkeypatch):
+    monkeypatch.setattr(job_watcher, "MAX_FINISHED_JOBS", 2)
+    data_repo_client.retrieve_job = Mock(return_value=_job_status(True))
+    watcher = TdrJobWatcher(data_repo_client, initial_poll_interval_seconds=0.01)
+    try:
+        for job_id in ["a", "b", "c"]:
+            watcher.wait(JobId(job_id), 10)
+
+        assert list(watcher._finished) == ["b", "c"]
+    finally:
+        watcher.close()
+
+
+def test_default_job_watcher_is_shared_per_client(data_repo_client):
+    watcher = default_job_watcher(data_repo_client)
+
+    assert default_job_watcher(data_repo_client) is watcher
+    assert default_job_watcher(MagicMock(spec=RepositoryApi)) is not watcher
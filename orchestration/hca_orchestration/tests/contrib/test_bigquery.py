@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+from typing import Optional
+from unittest.mock import MagicMock
+
+import pytest
+from google.cloud.bigquery import Client, QueryJob
+from google.cloud.exceptions import BadRequest
+
+from hca_orchestration.contrib.bigquery import (
+    BigQueryJobHandle,
+    BigQueryJobTimeoutException,
+    BigQueryService,
+)
+
+
+def _job(job_id: str, polls_until_done: int = 0, error: Optional[Exception] = None) -> MagicMock:
+    job = MagicMock(spec=QueryJob)
+    job.job_id = job_id
+    job.done.side_effect = [False] * polls_until_done + [True]
+    job.exception.return_value = error
+    job.created = datetime(2021, 1, 1)
+    job.ended = job.created + timedelta(seconds=5)
+    job.total_bytes_processed = 1024
+    job.slot_millis = 100
+    return job
+
+
+def test_submit_query_does_not_wait_for_results():
+    client = MagicMock(spec=Client)
+    service = BigQueryService(client)
+
+    handle = service.submit_query("SELECT 1", "fake_project", "US")
+
+    assert handle.job == client.query.return_value
+    client.query.return_value.result.assert_not_called()
+
+
+def test_wait_for_jobs_returns_stats_in_input_order():
+    service = BigQueryService(MagicMock(spec=Client))
+    handles = [BigQueryJobHandle(_job("slow", polls_until_done=2)), BigQueryJobHandle(_job("fast"))]
+
+    stats = service.wait_for_jobs(handles, poll_interval_seconds=0)
+
+    assert [s.job_id for s in stats] == ["slow", "fast"]
+    assert stats[0].total_bytes_processed == 1024
+    assert stats[0].slot_millis == 100
+    assert stats[0].wall_time_seconds == 5.0
+
+
+def test_wait_for_jobs_raises_job_error():
+    service = BigQueryService(MagicMock(spec=Client))
+    handles = [BigQueryJobHandle(_job("ok")), BigQueryJobHandle(_job("bad", error=BadRequest("bad query")))]
+
+    with pytest.raises(BadRequest):
+        service.wait_for_jobs(handles, poll_interval_seconds=0)
+
+
+def test_wait_for_jobs_times_out():
+    service = BigQueryService(MagicMock(spec=Client))
+    handles = [BigQueryJobHandle(_job("stuck", polls_until_done=100))]
+
+    with pytest.raises(BigQueryJobTimeoutException):
+        service.wait_for_jobs(handles, poll_interval_seconds=0, max_wait_time_seconds=0)
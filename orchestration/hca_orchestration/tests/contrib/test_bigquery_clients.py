@@ -0,0 +1,50 @@
+import pytest
+from google.auth.credentials import AnonymousCredentials
+
+from hca_orchestration.contrib.bigquery_clients import (
+    clear_bigquery_clients,
+    get_bigquery_client,
+    register_bigquery_client,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    clear_bigquery_clients()
+    yield
+    clear_bigquery_clients()
+
+
+def test_get_bigquery_client_reuses_client_per_project_and_credentials():
+    credentials = AnonymousCredentials()
+
+    client = get_bigquery_client("project-a", credentials)
+
+    assert get_bigquery_client("project-a", credentials) is client
+    assert get_bigquery_client("project-b", credentials) is not client
+    assert get_bigquery_client("project-a", AnonymousCredentials()) is not client
+
+
+def test_get_bigquery_client_pools_connections():
+    client = get_bigquery_client("project-a", AnonymousCredentials(), pool_size=4)
+
+    adapter = client._http.get_adapter("https://bigquery.googleapis.com")
+    assert adapter._pool_maxsize == 4
+
+
+def test_register_bigquery_client_overrides_lookup():
+    credentials = AnonymousCredentials()
+    client = get_bigquery_client("project-b", credentials)
+
+    register_bigquery_client(client, "project-a", credentials)
+
+    assert get_bigquery_client("project-a", credentials) is client
+
+
+def test_clear_bigquery_clients_forgets_clients():
+    credentials = AnonymousCredentials()
+    client = get_bigquery_client("project-a", credentials)
+
+    clear_bigquery_clients()
+
+    assert get_bigquery_client("project-a", credentials) is not client
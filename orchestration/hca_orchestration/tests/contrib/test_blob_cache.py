@@ -0,0 +1,73 @@
+from unittest.mock import MagicMock
+
+from hca_orchestration.contrib.blob_cache import BlobCache
+
+
+def _blob(name: str, content: bytes, generation: int = 1) -> MagicMock:
+    blob = MagicMock()
+    blob.bucket.name = "fake-bucket"
+    blob.name = name
+    blob.generation = generation
+    blob.crc32c = "abcd1234"
+    blob.download_as_bytes.return_value = content
+    return blob
+
+
+def test_read_blob_text_downloads_once(tmp_path):
+    cache = BlobCache(str(tmp_path), max_size_bytes=1024)
+    blob = _blob("metadata/project/a.json", b"{}")
+
+    assert cache.read_blob_text(blob) == "{}"
+    assert cache.read_blob_text(blob) == "{}"
+
+    blob.download_as_bytes.assert_called_once()
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_new_generation_is_refetched(tmp_path):
+    cache = BlobCache(str(tmp_path), max_size_bytes=1024)
+    cache.read_blob_text(_blob("metadata/project/a.json", b"old", generation=1))
+
+    updated = _blob("metadata/project/a.json", b"new", generation=2)
+
+    assert cache.read_blob_text(updated) == "new"
+    updated.download_as_bytes.assert_called_once()
+
+
+def test_cache_persists_across_instances(tmp_path):
+    BlobCache(str(tmp_path), max_size_bytes=1024).read_blob_text(_blob("a.json", b"{}"))
+    blob = _blob("a.json", b"{}")
+
+    BlobCache(str(tmp_path), max_size_bytes=1024).read_blob_text(blob)
+
+    blob.download_as_bytes.assert_not_called()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = BlobCache(str(tmp_path), max_size_bytes=10)
+    first = _blob("first.json", b"12345")
+    cache.read_blob_text(first)
+    cache.read_blob_text(_blob("second.json", b"12345"))
+    cache.read_blob_text(_blob("third.json", b"12345"))
+
+    first_again = _blob("first.json", b"12345")
+    cache.read_blob_text(first_again)
+
+    first_again.download_as_bytes.assert_called_once()
+
+
+def test_cache_hit_refreshes_recency(tmp_path):
+    cache = BlobCache(str(tmp_path), max_size_bytes=20)
+    for name in ["first.json", "second.json", "third.json", "fourth.json"]:
+        cache.read_blob_text(_blob(name, b"12345"))
+    cache.read_blob_text(_blob("first.json", b"12345"))
+    cache.read_blob_text(_blob("fifth.json", b"12345"))
+
+    first_again = _blob("first.json", b"12345")
+    second_again = _blob("second.json", b"12345")
+    cache.read_blob_text(first_again)
+    cache.read_blob_text(second_again)
+
+    first_again.download_as_bytes.assert_not_called()
+    second_again.download_as_bytes.assert_called_once()
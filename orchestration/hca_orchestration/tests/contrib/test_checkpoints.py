@@ -0,0 +1,119 @@
+from unittest.mock import MagicMock
+
+import pytest
+from dagster import configured
+from dagster_utils.contrib.data_repo.typing import JobId
+from dagster_utils.testing.resources import initialize_resource
+from google.cloud.storage import Blob
+
+from hca_orchestration.contrib.checkpoints import GcsLoadCheckpointStore, LoadCheckpointStore
+from hca_orchestration.resources import load_tag
+
+
+def _gcs_with_blob(blob):
+    gcs = MagicMock()
+    gcs.bucket.return_value.blob.return_value = blob
+    return gcs
+
+
+def _blob(exists=False, content=None, generation=None):
+    blob = MagicMock(spec=Blob)
+    blob.name = "_checkpoints/load_tag/digest.json"
+    blob.exists.return_value = exists
+    blob.download_as_text.return_value = content
+    blob.generation = generation
+    return blob
+
+
+def test_checkpoint_store_records_stages_and_jobs():
+    checkpoints = LoadCheckpointStore("load_tag", "gs://staging/area")
+    checkpoints.complete("pre_process_metadata")
+    checkpoints.complete("diff_file_loads", ["control-file-00000.json"])
+    checkpoints.record_job("bulk_file_load:a", JobId("job_a"))
+
+    assert checkpoints.is_complete("pre_process_metadata")
+    assert not checkpoints.is_complete("load_table:file_descriptor")
+    assert checkpoints.stage_result("diff_file_loads") == ["control-file-00000.json"]
+    assert checkpoints.job_id("bulk_file_load:a") == "job_a"
+
+    checkpoints.forget_job("bulk_file_load:a")
+    assert checkpoints.job_id("bulk_file_load:a") is None
+
+
+def test_gcs_checkpoint_store_fresh_run_does_not_read_earlier_checkpoint():
+    blob = _blob(exists=True)
+    gcs = _gcs_with_blob(blob)
+
+    checkpoints = GcsLoadCheckpointStore(gcs, "bucket", "load_tag", "gs://staging/area")
+    checkpoints.complete("pre_process_metadata")
+
+    blob.download_as_text.assert_not_called()
+    _, kwargs = blob.upload_from_string.call_args
+    assert kwargs["if_generation_match"] is None
+    gcs.bucket.assert_called_once_with("bucket")
+    assert gcs.bucket.return_value.blob.call_args[0][0].startswith("_checkpoints/load_tag/")
+
+
+def test_gcs_checkpoint_store_resumes_from_saved_checkpoint():
+    saved = LoadCheckpointStore("load_tag", "gs://staging/area")
+    saved.complete("pre_process_metadata")
+    saved.record_job("bulk_file_load:a", JobId("job_a"))
+    blob = _blob(exists=True, content=saved._to_json(), generation=7)
+
+    checkpoints = GcsLoadCheckpointStore(_gcs_with_blob(blob), "bucket", "load_tag", "gs://staging/area",
+                                         resume=True)
+
+    blob.download_as_text.assert_called_once_with(if_generation_match=7)
+    assert checkpoints.is_complete("pre_process_metadata")
+    assert checkpoints.job_id("bulk_file_load:a") == "job_a"
+
+    checkpoints.complete("diff_file_loads", [])
+    _, kwargs = blob.upload_from_string.call_args
+    assert kwargs["if_generation_match"] == 7
+
+
+def test_gcs_checkpoint_store_resume_without_checkpoint_creates_one():
+    blob = _blob(exists=False)
+
+    checkpoints = GcsLoadCheckpointStore(_gcs_with_blob(blob), "bucket", "load_tag", "gs://staging/area",
+                                         resume=True)
+    checkpoints.record_job("bulk_file_load:a", JobId("job_a"))
+
+    _, kwargs = blob.upload_from_string.call_args
+    assert kwargs["if_generation_match"] == 0
+
+
+def test_gcs_checkpoint_store_resumes_run_with_run_id_in_load_tag():
+    load_tag_config = {"load_tag_prefix": "dcp_release", "append_run_id": True}
+    with initialize_resource(configured(load_tag)(load_tag_config)) as earlier_load_tag:
+        saved = LoadCheckpointStore(earlier_load_tag, "gs://staging/area")
+    saved.complete("pre_process_metadata")
+
+    gcs = _gcs_with_blob(_blob(exists=True, content=saved._to_json(), generation=3))
+    GcsLoadCheckpointStore(gcs, "bucket", earlier_load_tag, "gs://staging/area")
+    resumed_config = {**load_tag_config, "resume_load_tag": earlier_load_tag}
+    with initialize_resource(configured(load_tag)(resumed_config)) as resumed_load_tag:
+        checkpoints = GcsLoadCheckpointStore(gcs, "bucket", resumed_load_tag, "gs://staging/area", resume=True)
+
+    earlier_path, resumed_path = [call[0][0] for call in gcs.bucket.return_value.blob.call_args_list]
+    assert resumed_path == earlier_path
+    assert checkpoints.is_complete("pre_process_metadata")
+
+
+def test_gcs_checkpoint_store_keys_checkpoints_by_staging_area():
+    gcs = _gcs_with_blob(_blob())
+    GcsLoadCheckpointStore(gcs, "bucket", "load_tag", "gs://staging/one")
+    GcsLoadCheckpointStore(gcs, "bucket", "load_tag", "gs://staging/two")
+
+    first, second = [call[0][0] for call in gcs.bucket.return_value.blob.call_args_list]
+    assert first != second
+
+
+@pytest.mark.parametrize("stage", ["pre_process_metadata", "load_table:file_descriptor"])
+def test_checkpoint_store_round_trips_through_json(stage):
+    checkpoints = LoadCheckpointStore("load_tag", "staging_area")
+    checkpoints.complete(stage, "job_id")
+
+    restored = LoadCheckpointStore("load_tag", "staging_area")
+    restored._from_json(checkpoints._to_json())
+    assert restored.stage_result(stage) == "job_id"
@@ -0,0 +1,62 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, Mock
+
+from hca_orchestration.contrib.concurrency import BoundedJobScheduler, SlotBoundService
+
+
+class BoundedJobSchedulerTestCase(unittest.TestCase):
+    def test_map_preserves_input_order(self):
+        scheduler = BoundedJobScheduler(max_workers=4, bigquery_concurrency=2, tdr_ingest_concurrency=1)
+
+        result = scheduler.map(lambda x: x * 2, [1, 2, 3, 4, 5])
+
+        self.assertEqual(result, [2, 4, 6, 8, 10])
+
+    def test_map_raises_first_failure(self):
+        scheduler = BoundedJobScheduler(max_workers=2, bigquery_concurrency=2, tdr_ingest_concurrency=1)
+
+        def _fail_on_three(x: int) -> int:
+            if x == 3:
+                raise ValueError("boom")
+            return x
+
+        with self.assertRaises(ValueError):
+            scheduler.map(_fail_on_three, [1, 2, 3, 4])
+
+    def test_bigquery_slots_bound_outstanding_jobs_per_project(self):
+        scheduler = BoundedJobScheduler(max_workers=8, bigquery_concurrency=2, tdr_ingest_concurrency=1)
+        lock = threading.Lock()
+        outstanding = {"current": 0, "max": 0}
+
+        def _job(_: int) -> None:
+            with scheduler.bigquery_slot("fake_project"):
+                with lock:
+                    outstanding["current"] += 1
+                    outstanding["max"] = max(outstanding["max"], outstanding["current"])
+                time.sleep(0.01)
+                with lock:
+                    outstanding["current"] -= 1
+
+        scheduler.map(_job, range(8))
+
+        self.assertEqual(outstanding["max"], 2)
+
+    def test_invalid_limits_rejected(self):
+        with self.assertRaises(ValueError):
+            BoundedJobScheduler(max_workers=0, bigquery_concurrency=1, tdr_ingest_concurrency=1)
+
+
+class SlotBoundServiceTestCase(unittest.TestCase):
+    def test_method_calls_hold_slot(self):
+        slot = MagicMock()
+        service = Mock()
+        service.run_query = Mock(return_value="result")
+
+        bound = SlotBoundService(service, lambda: slot)
+
+        self.assertEqual(bound.run_query("query"), "result")
+        service.run_query.assert_called_once_with("query")
+        slot.__enter__.assert_called_once()
+        slot.__exit__.assert_called_once()
@@ -0,0 +1,80 @@
+from typing import Any
+
+from dagster import AssetKey, DagsterInstance, Output, graph, solid
+
+from hca_orchestration.contrib.dagster import TELEMETRY_ASSET_PREFIX, export_telemetry, instrumented
+from hca_orchestration.contrib.metrics import MetricsRegistry
+from hca_orchestration.contrib.telemetry import record_call, timed_call
+
+
+@solid
+@instrumented
+def query_solid(context) -> int:
+    record_call("bigquery", "query", 2.0, bytes_processed=1024)
+    return 1
+
+
+@solid
+@instrumented
+def generator_solid(context, rows: int):
+    record_call("gcs", "list", 0.5, blobs_listed=rows)
+    yield Output(rows)
+
+
+@solid
+@instrumented
+def failing_solid(context) -> None:
+    with timed_call("tdr", "retrieve_dataset"):
+        raise ValueError("not found")
+
+
+@graph
+def instrumented_graph():
+    generator_solid(query_solid())
+
+
+@graph
+def failing_graph():
+    failing_solid()
+
+
+def _telemetry(result, solid_name: str) -> dict[str, Any]:
+    [materialization] = result.asset_materializations_for_node(solid_name)
+    assert materialization.asset_key == AssetKey([TELEMETRY_ASSET_PREFIX, solid_name])
+    return {entry.label: entry.value.value for entry in materialization.metadata_entries}
+
+
+def test_instrumented_solids_report_their_service_calls():
+    result = instrumented_graph.to_job().execute_in_process()
+
+    query_telemetry = _telemetry(result, "query_solid")
+    assert query_telemetry["bigquery.query.calls"] == 1
+    assert query_telemetry["bigquery.query.bytes_processed"] == 1024
+    assert "duration_seconds" in query_telemetry
+
+    list_telemetry = _telemetry(result, "generator_solid")
+    assert list_telemetry["gcs.list.blobs_listed"] == 1
+    assert "bigquery.query.calls" not in list_telemetry
+
+
+def test_export_telemetry_reads_totals_from_event_log():
+    registry = MetricsRegistry()
+    with DagsterInstance.ephemeral() as instance:
+        instrumented_graph.to_job(name="instrumented_job").execute_in_process(instance=instance)
+        failing_graph.to_job(name="failing_job").execute_in_process(instance=instance, raise_on_error=False)
+
+        cursor = export_telemetry(instance, registry, page_size=1)
+        assert export_telemetry(instance, registry, cursor) == cursor
+
+    query_labels = {"job": "instrumented_job", "solid": "query_solid", "service": "bigquery", "operation": "query"}
+    assert registry.value("hca_service_calls_total", query_labels) == [1]
+    assert registry.value("hca_service_call_seconds_total", query_labels) == [2.0]
+    assert registry.value("hca_bigquery_bytes_processed_total", query_labels) == [1024]
+    duration = registry.value("hca_solid_duration_seconds",
+                              {"job": "instrumented_job", "solid": "query_solid", "status": "success"})
+    assert duration is not None and duration[0] == 1
+
+    failed_labels = {"job": "failing_job", "solid": "failing_solid", "service": "tdr", "operation": "retrieve_dataset"}
+    assert registry.value("hca_service_call_errors_total", failed_labels) == [1]
+    assert registry.value("hca_solid_duration_seconds",
+                          {"job": "failing_job", "solid": "failing_solid", "status": "failure"}) is not None
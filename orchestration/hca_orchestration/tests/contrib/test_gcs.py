@@ -0,0 +1,105 @@
+from unittest.mock import MagicMock, patch
+
+from google.cloud.storage.client import Client
+
+from hca_orchestration.contrib.gcs import _BatchOutcome, PrefixSummary, delete_blobs, get_blob_sizes, inspect_prefix, \
+    path_has_any_data, remove_empty_blobs
+
+
+def test_delete_blobs_batches_names():
+    batches = []
+
+    def _fake_delete_batch(gcs, bucket_name, blob_names):
+        batches.append(blob_names)
+        return _BatchOutcome(len(blob_names), [], [])
+
+    with patch("hca_orchestration.contrib.gcs._delete_batch", side_effect=_fake_delete_batch):
+        result = delete_blobs(MagicMock(spec=Client), "bucket", (f"blob-{i}" for i in range(250)), batch_size=100)
+
+    assert result.deleted == 250
+    assert not result.failed
+    assert sorted(len(batch) for batch in batches) == [50, 100, 100]
+
+
+def test_delete_blobs_retries_only_failed_items():
+    attempts = []
+
+    def _fake_delete_batch(gcs, bucket_name, blob_names):
+        attempts.append(list(blob_names))
+        if len(attempts) == 1:
+            return _BatchOutcome(1, ["b"], ["c"])
+        return _BatchOutcome(len(blob_names), [], [])
+
+    with patch("hca_orchestration.contrib.gcs._delete_batch", side_effect=_fake_delete_batch), \
+            patch("hca_orchestration.contrib.gcs.time.sleep"):
+        result = delete_blobs(MagicMock(spec=Client), "bucket", ["a", "b", "c"])
+
+    assert attempts == [["a", "b", "c"], ["b"]]
+    assert result.deleted == 2
+    assert result.failed == ["c"]
+
+
+def test_delete_blobs_gives_up_after_max_attempts():
+    def _failing_batch(gcs, bucket_name, blob_names):
+        raise ConnectionError("boom")
+
+    with patch("hca_orchestration.contrib.gcs._delete_batch", side_effect=_failing_batch), \
+            patch("hca_orchestration.contrib.gcs.time.sleep"):
+        result = delete_blobs(MagicMock(spec=Client), "bucket", ["a", "b"], max_attempts=2)
+
+    assert result.deleted == 0
+    assert sorted(result.failed) == ["a", "b"]
+
+
+def _listed_blob(name, size):
+    blob = MagicMock()
+    blob.name = name
+    blob.size = size
+    return blob
+
+
+def test_inspect_prefix_summarizes_in_one_listing():
+    gcs = MagicMock(spec=Client)
+    gcs.list_blobs.return_value = [_listed_blob("p/a", 10), _listed_blob("p/b", 0), _listed_blob("p/c", 5)]
+
+    summary = inspect_prefix("bucket", "p/", gcs)
+
+    assert summary == PrefixSummary(total_bytes=15, shard_count=3, empty_blobs=["p/b"])
+    assert summary.has_data
+    gcs.list_blobs.assert_called_once_with("bucket", prefix="p/", fields="items(name,size),nextPageToken")
+
+
+def test_inspect_prefix_short_circuits_on_first_data():
+    gcs = MagicMock(spec=Client)
+    listed = []
+
+    def _listing(*args, **kwargs):
+        for blob in [_listed_blob("p/a", 0), _listed_blob("p/b", 3), _listed_blob("p/c", 4)]:
+            listed.append(blob.name)
+            yield blob
+
+    gcs.list_blobs.side_effect = _listing
+
+    assert path_has_any_data("bucket", "p/", gcs)
+    assert listed == ["p/a", "p/b"]
+
+
+def test_remove_empty_blobs_reuses_summary():
+    gcs = MagicMock(spec=Client)
+    summary = PrefixSummary(total_bytes=1, shard_count=2, empty_blobs=["p/b"])
+
+    remove_empty_blobs("bucket", "p/", gcs, summary)
+
+    gcs.list_blobs.assert_not_called()
+    gcs.bucket.return_value.blob.assert_called_once_with("p/b")
+    gcs.bucket.return_value.blob.return_value.delete.assert_called_once()
+
+
+def test_get_blob_sizes_lists_each_directory_once():
+    gcs = MagicMock(spec=Client)
+    gcs.list_blobs.return_value = [_listed_blob("d/a", 10), _listed_blob("d/b", 20), _listed_blob("d/unwanted", 30)]
+
+    sizes = get_blob_sizes(["gs://bucket/d/a", "gs://bucket/d/b", "gs://bucket/d/missing"], gcs)
+
+    assert sizes == {"gs://bucket/d/a": 10, "gs://bucket/d/b": 20}
+    gcs.list_blobs.assert_called_once_with("bucket", prefix="d/", fields="items(name,size),nextPageToken")
@@ -0,0 +1,68 @@
+from urllib.request import Request, urlopen
+
+import pytest
+
+from hca_orchestration.contrib.metrics import (
+    OPENMETRICS_CONTENT_TYPE,
+    PROMETHEUS_CONTENT_TYPE,
+    MetricsRegistry,
+    start_metrics_server,
+)
+
+
+@pytest.fixture
+def registry() -> MetricsRegistry:
+    registry = MetricsRegistry()
+    registry.inc("hca_requests_total", "Requests", {"service": "tdr"})
+    registry.inc("hca_requests_total", "Requests", {"service": "tdr"}, 2)
+    registry.observe("hca_request_seconds", "Request time", {"service": "gcs"}, 0.5)
+    registry.observe("hca_request_seconds", "Request time", {"service": "gcs"}, 1.5)
+    return registry
+
+
+def test_render_prometheus_text_format(registry: MetricsRegistry):
+    assert registry.render() == "\n".join([
+        "# HELP hca_request_seconds Request time",
+        "# TYPE hca_request_seconds summary",
+        'hca_request_seconds_count{service="gcs"} 2.0',
+        'hca_request_seconds_sum{service="gcs"} 2.0',
+        "# HELP hca_requests_total Requests",
+        "# TYPE hca_requests_total counter",
+        'hca_requests_total{service="tdr"} 3.0',
+    ]) + "\n"
+
+
+def test_render_openmetrics_names_counter_families_without_total_suffix(registry: MetricsRegistry):
+    rendered = registry.render(openmetrics=True)
+
+    assert "# TYPE hca_requests counter\n" in rendered
+    assert 'hca_requests_total{service="tdr"} 3.0\n' in rendered
+    assert rendered.endswith("# EOF\n")
+
+
+def test_render_escapes_label_values():
+    registry = MetricsRegistry()
+    registry.inc("hca_requests_total", "Requests", {"solid": 'a"b\\c'})
+
+    assert 'hca_requests_total{solid="a\\"b\\\\c"} 1.0' in registry.render()
+
+
+def test_metric_kind_is_fixed_by_first_use(registry: MetricsRegistry):
+    with pytest.raises(AssertionError):
+        registry.observe("hca_requests_total", "Requests", {}, 1.0)
+
+
+def test_metrics_server_negotiates_format(registry: MetricsRegistry):
+    server = start_metrics_server(registry, 0, addr="127.0.0.1")
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urlopen(url) as response:
+            assert response.headers["Content-Type"] == PROMETHEUS_CONTENT_TYPE
+            assert response.read().decode() == registry.render()
+
+        with urlopen(Request(url, headers={"Accept": "application/openmetrics-text; version=1.0.0"})) as response:
+            assert response.headers["Content-Type"] == OPENMETRICS_CONTENT_TYPE
+            assert response.read().decode() == registry.render(openmetrics=True)
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -1,7 +1,8 @@
+import time
 import unittest
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
-from hca_orchestration.contrib.retry import retry, is_truthy, RetryException
+from hca_orchestration.contrib.retry import retry, is_truthy, LatencyHistogram, RetryException, RetryPolicy
 
 
 class RetryTestCase(unittest.TestCase):
@@ -27,3 +28,63 @@ class RetryTestCase(unittest.TestCase):
             retry(test_fn, 1, 1, is_truthy, "bar")
 
         test_fn.assert_called_with("bar")
+
+
+class RetryPolicyTestCase(unittest.TestCase):
+    def test_delay_backs_off_exponentially_up_to_cap(self):
+        policy = RetryPolicy(initial_delay_seconds=1, max_delay_seconds=5, multiplier=2, jitter=False)
+
+        self.assertEqual([policy.delay(attempt) for attempt in range(1, 6)], [1, 2, 4, 5, 5])
+
+    def test_delay_jitter_stays_below_ceiling(self):
+        policy = RetryPolicy(initial_delay_seconds=1, max_delay_seconds=4, multiplier=2)
+
+        for attempt in range(1, 10):
+            self.assertTrue(0 <= policy.delay(attempt) <= min(4, 2 ** (attempt - 1)))
+
+    @patch("hca_orchestration.contrib.retry.time.sleep")
+    def test_run_stops_after_max_attempts(self, sleep):
+        test_fn = Mock(return_value=None)
+        policy = RetryPolicy(max_attempts=3, jitter=False)
+
+        with self.assertRaisesRegex(RetryException, "3 attempts"):
+            policy.run(test_fn, is_truthy)
+
+        self.assertEqual(test_fn.call_count, 3)
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [1, 2])
+        self.assertEqual(policy.latencies.count, 3)
+
+    def test_run_deadline_counts_time_spent_in_call(self):
+        def _slow_fn():
+            time.sleep(0.05)
+            return None
+
+        policy = RetryPolicy(initial_delay_seconds=0.01, max_wait_time_seconds=0.1)
+        started = time.monotonic()
+
+        with self.assertRaisesRegex(RetryException, "timed out"):
+            policy.run(_slow_fn, is_truthy)
+
+        self.assertLess(time.monotonic() - started, 0.3)
+
+    @patch("hca_orchestration.contrib.retry.time.sleep")
+    def test_run_retries_listed_exceptions(self, _):
+        test_fn = Mock(side_effect=[ConnectionError("boom"), "ok"])
+        policy = RetryPolicy(max_attempts=2, retry_on=(ConnectionError,))
+
+        self.assertEqual(policy.run(test_fn, is_truthy), "ok")
+
+    def test_run_raises_unlisted_exceptions(self):
+        test_fn = Mock(side_effect=ValueError("boom"))
+        policy = RetryPolicy(max_attempts=2, retry_on=(ConnectionError,))
+
+        with self.assertRaises(ValueError):
+            policy.run(test_fn, is_truthy)
+        test_fn.assert_called_once()
+
+    def test_latency_histogram_buckets(self):
+        histogram = LatencyHistogram(buckets=(0.1, 1.0))
+        for seconds in [0.05, 0.5, 0.7, 2.0]:
+            histogram.observe(seconds)
+
+        self.assertEqual(histogram.snapshot(), {"le_0.1": 1, "le_1": 2, "le_inf": 1})
@@ -0,0 +1,83 @@
+from unittest.mock import MagicMock
+
+import pytest
+from google.cloud import bigquery
+
+from hca_orchestration.contrib.bigquery import BigQueryService
+from hca_orchestration.contrib.row_counts import TableRowCounts
+
+
+def _table(table_type, num_rows):
+    table = MagicMock(spec=bigquery.Table)
+    table.table_type = table_type
+    table.num_rows = num_rows
+    return table
+
+
+@pytest.fixture
+def bigquery_client():
+    client = MagicMock(spec=bigquery.Client)
+    client.project = "default-project"
+    return client
+
+
+def test_num_rows_reads_native_table_metadata_once(bigquery_client):
+    bigquery_client.get_table.return_value = _table("TABLE", 42)
+    row_counts = TableRowCounts(bigquery_client)
+
+    assert row_counts.num_rows("project", "dataset", "links") == 42
+    assert row_counts.num_rows("project", "dataset", "links") == 42
+
+    bigquery_client.get_table.assert_called_once_with("project.dataset.links")
+    bigquery_client.query.assert_not_called()
+
+
+def test_num_rows_counts_views(bigquery_client):
+    bigquery_client.get_table.return_value = _table("VIEW", None)
+    bigquery_client.query.return_value.result.return_value = [(7,)]
+    row_counts = TableRowCounts(bigquery_client)
+
+    assert row_counts.num_rows("project", "dataset", "links") == 7
+    assert "COUNT(1) FROM `project.dataset.links`" in bigquery_client.query.call_args.args[0]
+
+
+def test_prefetch_caches_native_tables_only(bigquery_client):
+    bigquery_client.query.return_value.result.return_value = [
+        {"table_id": "links_values", "row_count": 3, "type": 1},
+        {"table_id": "links", "row_count": 0, "type": 2},
+    ]
+    bigquery_client.get_table.return_value = _table("VIEW", None)
+    row_counts = TableRowCounts(bigquery_client)
+
+    assert row_counts.prefetch("project", "dataset") == {"links_values": 3}
+    assert row_counts.num_rows("project", "dataset", "links_values") == 3
+    bigquery_client.get_table.assert_not_called()
+
+
+def test_invalidate_drops_cached_counts(bigquery_client):
+    bigquery_client.get_table.side_effect = [_table("TABLE", 1), _table("TABLE", 2)]
+    row_counts = TableRowCounts(bigquery_client)
+
+    row_counts.num_rows("project", "dataset", "links")
+    row_counts.invalidate("project", "dataset")
+
+    assert row_counts.num_rows("project", "dataset", "links") == 2
+
+
+def test_service_invalidates_destination_tables(bigquery_client):
+    bigquery_client.get_table.side_effect = [_table("TABLE", 1), _table("TABLE", 5)]
+    service = BigQueryService(bigquery_client)
+
+    assert service.get_num_rows_in_table("links_values", "project.dataset") == 1
+    service.submit_query_with_destination("SELECT 1", "project.dataset.links_values", "project", "US")
+
+    assert service.get_num_rows_in_table("links_values", "project.dataset") == 5
+
+
+def test_service_qualifies_bare_datasets_with_client_project(bigquery_client):
+    bigquery_client.get_table.return_value = _table("TABLE", 1)
+    service = BigQueryService(bigquery_client)
+
+    service.get_num_rows_in_table("links_values", "dataset")
+
+    bigquery_client.get_table.assert_called_once_with("default-project.dataset.links_values")
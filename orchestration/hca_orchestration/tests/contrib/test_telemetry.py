@@ -0,0 +1,38 @@
+import pytest
+
+from hca_orchestration.contrib.telemetry import record_call, telemetry_scope, timed_call
+
+
+def test_scopes_collect_calls_made_while_open():
+    record_call("bigquery", "query", 1.0)
+
+    with telemetry_scope(solid="outer") as outer:
+        record_call("bigquery", "query", 2.0, bytes_processed=100)
+        with telemetry_scope(solid="inner") as inner:
+            record_call("bigquery", "query", 3.0, bytes_processed=50)
+            record_call("gcs", "list", 0.5, blobs_listed=10)
+
+    assert outer.flatten() == {
+        "bigquery.query.calls": 2,
+        "bigquery.query.seconds": 5.0,
+        "bigquery.query.bytes_processed": 150,
+        "gcs.list.calls": 1,
+        "gcs.list.seconds": 0.5,
+        "gcs.list.blobs_listed": 10,
+    }
+    assert inner.flatten()["bigquery.query.calls"] == 1
+
+
+def test_timed_call_records_errors():
+    with telemetry_scope() as scope:
+        with pytest.raises(ValueError):
+            with timed_call("tdr", "retrieve_dataset"):
+                raise ValueError("not found")
+        with timed_call("gcs", "list") as measurements:
+            measurements["blobs_listed"] = 4
+
+    flat = scope.flatten()
+    assert flat["tdr.retrieve_dataset.calls"] == 1
+    assert flat["tdr.retrieve_dataset.errors"] == 1
+    assert flat["gcs.list.blobs_listed"] == 4
+    assert "gcs.list.errors" not in flat
@@ -51,6 +51,9 @@ from hca_orchestration.resources.config.data_repo import (
 )
 from hca_orchestration.resources.config.datasets import passthrough_hca_dataset
 from hca_orchestration.resources.config.scratch import scratch_config
+from hca_orchestration.resources.load_checkpoints import in_memory_load_checkpoints
+from hca_orchestration.resources.load_scheduler import load_scheduler
+from hca_orchestration.resources.tdr_job_watcher import tdr_job_watcher
 
 
 def config_path(relative_path: str) -> str:
@@ -98,10 +101,13 @@ def test_load_hca_noop_resources(*mocks):
             "data_repo_client": ResourceDefinition.mock_resource(),
             "bigquery_client": ResourceDefinition.mock_resource(),
             "load_tag": load_tag,
+            "load_scheduler": load_scheduler,
+            "load_checkpoints": in_memory_load_checkpoints,
             "scratch_config": scratch_config,
             "target_hca_dataset": passthrough_hca_dataset,
             "bigquery_service": ResourceDefinition.mock_resource(),
             "data_repo_service": ResourceDefinition.hardcoded_resource(data_repo_service),
+            "tdr_job_watcher": tdr_job_watcher,
             "slack": console_slack_client,
             "dagit_config": preconfigure_resource_for_mode(dagit_config, "test")
         }
@@ -166,6 +172,7 @@ def test_cut_snapshot(*mocks):
         resource_defs={
             "data_repo_client": ResourceDefinition.hardcoded_resource(data_repo),
             "data_repo_service": ResourceDefinition.hardcoded_resource(Mock(spec=DataRepoService)),
+            "tdr_job_watcher": tdr_job_watcher,
             "hca_manage_config": preconfigure_resource_for_mode(hca_manage_config, "test"),
             "sam_client": ResourceDefinition.hardcoded_resource(Mock(spec=Sam)),
             "slack": console_slack_client,
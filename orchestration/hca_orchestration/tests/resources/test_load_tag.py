@@ -23,3 +23,12 @@ class LoadTagTestCase(unittest.TestCase):
         })
         with initialize_resource(configured_tag) as tag:
             self.assertEqual(tag, "fake_prefix")
+
+    def test_load_tag_resume_overrides_generated_tag(self):
+        configured_tag = configured(load_tag)({
+            "load_tag_prefix": "fake_prefix",
+            "append_run_id": True,
+            "resume_load_tag": "fake_prefix_earlier"
+        })
+        with initialize_resource(configured_tag) as tag:
+            self.assertEqual(tag, "fake_prefix_earlier")
@@ -1,42 +1,62 @@
 from unittest.mock import Mock, MagicMock
 
+import pytest
+
 from dagster import execute_solid, ModeDefinition, SolidExecutionResult, ResourceDefinition, resource
 
 from data_repo_client.api import RepositoryApi
 from data_repo_client.models import JobModel
 from hca_orchestration.models.hca_dataset import TdrDataset
 from hca_orchestration.resources.config.scratch import ScratchConfig
-from hca_orchestration.solids.load_hca.data_files.load_data_files import diff_file_loads, run_bulk_file_ingest
+from hca_orchestration.resources.tdr_job_watcher import tdr_job_watcher
+from hca_orchestration.solids.load_hca.data_files.load_data_files import (
+    bulk_ingest_control_files,
+    diff_file_loads,
+    run_bulk_file_ingest,
+)
+from hca_orchestration.solids.load_hca.poll_ingest_job import DataFileIngestionFailure
 from hca_orchestration.support.typing import HcaScratchDatasetName
 
-from google.cloud.storage import Client, Blob
+from google.cloud.storage import Client
+
+from hca_orchestration.contrib.bigquery import BigQueryService
+from hca_orchestration.resources.load_checkpoints import in_memory_load_checkpoints
+
+# ten staged files of 100, 200, ..., 1000 bytes
+_STAGED_SIZES = {f'staging/data/fake_file_{i}': (i + 1) * 100 for i in range(10)}
+
+
+def _staged_blob(name: str, size: int) -> Mock:
+    blob = Mock()
+    blob.name = name
+    blob.size = size
+    return blob
 
 
 @resource
 def _gcs(_init_context) -> Client:
     gcs = MagicMock(spec=Client)
     gcs.list_blobs = MagicMock(
-        return_value=[
-            Blob(name='fake_blob_0', bucket='fake_bucket'),
-            Blob(name='fake_blob_1', bucket='fake_bucket'),
-            Blob(name='fake_blob_2', bucket='fake_bucket'),
-            Blob(name='fake_blob_3', bucket='fake_bucket'),
-            Blob(name='fake_blob_4', bucket='fake_bucket'),
-            Blob(name='fake_blob_5', bucket='fake_bucket'),
-            Blob(name='fake_blob_6', bucket='fake_bucket'),
-            Blob(name='fake_blob_7', bucket='fake_bucket'),
-            Blob(name='fake_blob_8', bucket='fake_bucket'),
-            Blob(name='fake_blob_9', bucket='fake_bucket')]
+        return_value=[_staged_blob(name, size) for name, size in _STAGED_SIZES.items()]
     )
     return gcs
 
 
+@resource
+def _bigquery_service(_init_context) -> BigQueryService:
+    bigquery_service = MagicMock(spec=BigQueryService)
+    bigquery_service.run_query_using_external_schema.return_value = [
+        {"sourcePath": f"gs://fake_staging_bucket/{name}", "targetPath": f"/v1/{name}"} for name in _STAGED_SIZES
+    ]
+    return bigquery_service
+
+
 load_datafiles_test_mode: ModeDefinition = ModeDefinition(
     name="test",
     resource_defs={
         "gcs": _gcs,
         "bigquery_client": ResourceDefinition.mock_resource(),
-        "bigquery_service": ResourceDefinition.mock_resource(),
+        "bigquery_service": _bigquery_service,
         "target_hca_dataset": ResourceDefinition.hardcoded_resource(
             TdrDataset(
                 "fake_dataset_name",
@@ -54,7 +74,8 @@ load_datafiles_test_mode: ModeDefinition = ModeDefinition(
                 1
             )
         ),
-        "load_tag": ResourceDefinition.hardcoded_resource("fake_load_tag")
+        "load_tag": ResourceDefinition.hardcoded_resource("fake_load_tag"),
+        "load_checkpoints": in_memory_load_checkpoints
     }
 )
 
@@ -69,7 +90,27 @@ def test_diff_file_loads():
     )
 
     assert result.success
-    assert len(result.output_values["control_file_path"]) == 10
+    assert len(result.output_values["control_file_path"]) == 1
+
+
+def test_diff_file_loads_balances_control_files_by_size():
+    result: SolidExecutionResult = execute_solid(
+        diff_file_loads,
+        mode_def=load_datafiles_test_mode,
+        input_values={
+            'scratch_dataset_name': HcaScratchDatasetName("fake_bq_project.testing_dataset_prefix_fake_load_tag")
+        },
+        run_config={"solids": {"diff_file_loads": {"config": {
+            "control_file_max_files": 5,
+            "control_file_max_bytes": 10_000
+        }}}}
+    )
+
+    assert result.success
+    assert sorted(result.output_values["control_file_path"].values()) == [
+        'fake_prefix/data-transfer-requests-deduped/control-file-00000.json',
+        'fake_prefix/data-transfer-requests-deduped/control-file-00001.json',
+    ]
 
 
 def test_run_bulk_file_ingest_should_return_a_jade_job_id():
@@ -91,3 +132,50 @@ def test_run_bulk_file_ingest_should_return_a_jade_job_id():
 
     assert result.success
     assert result.output_values["result"] == job_id, f"Job ID should be {job_id}"
+
+
+def _bulk_ingest_mode(data_repo: RepositoryApi) -> ModeDefinition:
+    return ModeDefinition(
+        name="test_bulk_ingest",
+        resource_defs={
+            **load_datafiles_test_mode.resource_defs,
+            "data_repo_client": ResourceDefinition.hardcoded_resource(data_repo),
+            "tdr_job_watcher": tdr_job_watcher,
+        }
+    )
+
+
+def _completing_data_repo(failed_files: int = 0) -> RepositoryApi:
+    data_repo = Mock(spec=RepositoryApi)
+    data_repo.bulk_file_load = Mock(side_effect=lambda dataset_id, bulk_file_load: Mock(
+        spec=JobModel, id=f"job_for_{bulk_file_load['loadControlFile']}"))
+    data_repo.retrieve_job = Mock(return_value=Mock(completed="2001-01-01 00:00:00", job_status="succeeded"))
+    data_repo.retrieve_job_result = Mock(return_value={"succeededFiles": 1, "failedFiles": failed_files})
+    return data_repo
+
+
+def test_bulk_ingest_control_files_submits_every_control_file():
+    data_repo = _completing_data_repo()
+
+    result: SolidExecutionResult = execute_solid(
+        bulk_ingest_control_files,
+        mode_def=_bulk_ingest_mode(data_repo),
+        input_values={'control_file_paths': ["prefix/control-file-00000.json", "prefix/control-file-00001.json"]}
+    )
+
+    assert result.success
+    assert sorted(result.output_values["result"]) == [
+        "job_for_gs://fake_bucket/prefix/control-file-00000.json",
+        "job_for_gs://fake_bucket/prefix/control-file-00001.json",
+    ]
+
+
+def test_bulk_ingest_control_files_fails_on_failed_files():
+    data_repo = _completing_data_repo(failed_files=1)
+
+    with pytest.raises(DataFileIngestionFailure):
+        execute_solid(
+            bulk_ingest_control_files,
+            mode_def=_bulk_ingest_mode(data_repo),
+            input_values={'control_file_paths': ["prefix/control-file-00000.json"]}
+        )
@@ -7,12 +7,14 @@ from data_repo_client import RepositoryApi
 from google.cloud.storage import Client
 
 from hca_orchestration.contrib.bigquery import BigQueryService
+from hca_orchestration.contrib.concurrency import BoundedJobScheduler
 from hca_orchestration.contrib.data_repo.data_repo_service import DataRepoService
 from hca_orchestration.models.hca_dataset import TdrDataset
 from hca_orchestration.models.scratch import ScratchConfig
 from hca_orchestration.solids.load_hca.data_files.load_data_metadata_files import inject_file_ids_solid, \
-    file_metadata_fanout
+    file_metadata_fanout, build_file_id_lookup_solid, NullFileIdException
 from hca_orchestration.support.typing import HcaScratchDatasetName, MetadataType, MetadataTypeFanoutResult
+from hca_orchestration.resources.load_checkpoints import in_memory_load_checkpoints
 
 
 @pytest.fixture
@@ -24,7 +26,9 @@ def testing_mode_def():
             "data_repo_client": ResourceDefinition.hardcoded_resource(MagicMock(spec=RepositoryApi)),
             "target_hca_dataset": ResourceDefinition.hardcoded_resource(TdrDataset("fake", "fake", "fake", "fake", "fake")),
             "data_repo_service": ResourceDefinition.hardcoded_resource(MagicMock(spec=DataRepoService)),
-            "gcs": ResourceDefinition.hardcoded_resource(MagicMock(spec=Client))
+            "gcs": ResourceDefinition.hardcoded_resource(MagicMock(spec=Client)),
+            "load_scheduler": ResourceDefinition.hardcoded_resource(BoundedJobScheduler(1, 1, 1)),
+            "load_checkpoints": in_memory_load_checkpoints
         }
     )
 
@@ -58,3 +62,77 @@ def test_file_metadata_fanout(testing_mode_def):
     )
 
     assert result.success
+
+
+def test_build_file_id_lookup_passes_through_job_ids(testing_mode_def):
+    result: SolidExecutionResult = execute_solid(
+        build_file_id_lookup_solid,
+        mode_def=testing_mode_def,
+        input_values={
+            "result": [JobId("abcdef")],
+            "scratch_dataset_name": HcaScratchDatasetName("project.dataset")
+        },
+    )
+
+    assert result.success
+    assert result.output_value() == [JobId("abcdef")]
+
+
+def test_inject_file_ids_joins_on_lookup_table():
+    bigquery_service = MagicMock(spec=BigQueryService)
+    mode_def = ModeDefinition(
+        resource_defs={
+            "scratch_config": ResourceDefinition.hardcoded_resource(ScratchConfig("fake", "fake", "fake", "fake", 123)),
+            "bigquery_service": ResourceDefinition.hardcoded_resource(bigquery_service),
+            "data_repo_client": ResourceDefinition.hardcoded_resource(MagicMock(spec=RepositoryApi)),
+            "target_hca_dataset": ResourceDefinition.hardcoded_resource(TdrDataset("fake", "fake", "fake", "fake", "fake")),
+        }
+    )
+
+    result: SolidExecutionResult = execute_solid(
+        inject_file_ids_solid,
+        mode_def=mode_def,
+        input_values={
+            "file_metadata_fanout_result": MetadataTypeFanoutResult(
+                scratch_dataset_name=HcaScratchDatasetName("project.dataset"),
+                metadata_type=MetadataType("sequence_file"),
+                path="path"
+            )
+        },
+    )
+
+    assert result.success
+    query = bigquery_service.run_query_using_external_schema.call_args.args[0]
+    assert "`project.dataset.file_id_lookup`" in query
+    assert "JSON_EXTRACT_SCALAR" not in query
+
+
+def test_inject_file_ids_fails_on_null_file_ids():
+    bigquery_service = MagicMock(spec=BigQueryService)
+    bigquery_service.run_query.return_value = [{"null_file_id_count": 3, "sample_ids": ["a", "b"]}]
+    mode_def = ModeDefinition(
+        resource_defs={
+            "scratch_config": ResourceDefinition.hardcoded_resource(ScratchConfig("fake", "fake", "fake", "fake", 123)),
+            "bigquery_service": ResourceDefinition.hardcoded_resource(bigquery_service),
+            "data_repo_client": ResourceDefinition.hardcoded_resource(MagicMock(spec=RepositoryApi)),
+            "target_hca_dataset": ResourceDefinition.hardcoded_resource(TdrDataset("fake", "fake", "fake", "fake", "fake")),
+        }
+    )
+
+    with pytest.raises(NullFileIdException):
+        execute_solid(
+            inject_file_ids_solid,
+            mode_def=mode_def,
+            input_values={
+                "file_metadata_fanout_result": MetadataTypeFanoutResult(
+                    scratch_dataset_name=HcaScratchDatasetName("project.dataset"),
+                    metadata_type=MetadataType("sequence_file"),
+                    path="path"
+                )
+            },
+            run_config={"solids": {"inject_file_ids_solid": {"config": {"null_file_id_sample_size": 2}}}}
+        )
+
+    query = bigquery_service.run_query.call_args.args[0]
+    assert "LIMIT 2" in query
+    bigquery_service.build_extract_job.assert_not_called()
@@ -1,9 +1,11 @@
 from dagster import SolidExecutionResult, execute_solid, ModeDefinition, ResourceDefinition
 from dagster_utils.contrib.data_repo.typing import JobId
 
+from hca_orchestration.contrib.concurrency import BoundedJobScheduler
 from hca_orchestration.solids.load_hca.non_file_metadata.load_non_file_metadata import non_file_metadata_fanout
 from hca_orchestration.support.typing import HcaScratchDatasetName
 from hca_orchestration.models.hca_dataset import TdrDataset
+from hca_orchestration.resources.load_checkpoints import in_memory_load_checkpoints
 
 run_config = {
     "resources": {
@@ -33,7 +35,9 @@ def test_non_file_metadata_fanout():
             "gcs": ResourceDefinition.mock_resource(),
             "target_hca_dataset": ResourceDefinition.hardcoded_resource(target_dataset),
             "bigquery_service": ResourceDefinition.mock_resource(),
-            "data_repo_service": ResourceDefinition.mock_resource()
+            "data_repo_service": ResourceDefinition.mock_resource(),
+            "load_scheduler": ResourceDefinition.hardcoded_resource(BoundedJobScheduler(4, 2, 1)),
+            "load_checkpoints": in_memory_load_checkpoints
         }),
         input_values={
             "result": [JobId("abcdef")],
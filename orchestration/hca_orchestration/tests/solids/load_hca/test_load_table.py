@@ -6,12 +6,15 @@ from dagster_utils.contrib.data_repo.typing import JobId
 from google.cloud.storage import Client, Blob
 
 from hca_orchestration.contrib.bigquery import BigQueryService
+from hca_orchestration.contrib.checkpoints import LoadCheckpointStore
+from hca_orchestration.contrib.concurrency import BoundedJobScheduler
 from hca_orchestration.contrib.data_repo.data_repo_service import DataRepoService
 from hca_orchestration.models.hca_dataset import TdrDataset
 from hca_orchestration.models.scratch import ScratchConfig
-from hca_orchestration.solids.load_hca.load_table import load_table_solid, clear_outdated
+from hca_orchestration.solids.load_hca.load_table import load_table_solid, load_tables_solid, clear_outdated
 from hca_orchestration.support.typing import HcaScratchDatasetName, MetadataType, MetadataTypeFanoutResult
 from hca_orchestration.tests.support.gcs import FakeGCSClient, FakeGoogleBucket, HexBlobInfo
+from hca_orchestration.resources.load_checkpoints import in_memory_load_checkpoints
 
 
 @pytest.fixture
@@ -64,14 +67,16 @@ def load_table_test_mode(data_repo_service, test_bucket_name):
     scratch_config = ScratchConfig(fake_bucket_name, fake_prefix, "fake", "fake", 123)
     target_dataset = TdrDataset("fake", "fake", "fake", "fake", "fake")
     bigquery_service = Mock(spec=BigQueryService)
-    bigquery_service.get_num_rows_in_table = Mock(return_value=0)
+    bigquery_service.run_query = Mock(return_value=[])
 
     base_def = ModeDefinition(
         "test_load_table",
         resource_defs={
             "bigquery_service": ResourceDefinition.hardcoded_resource(bigquery_service),
             "scratch_config": ResourceDefinition.hardcoded_resource(scratch_config),
-            "target_hca_dataset": ResourceDefinition.hardcoded_resource(target_dataset)
+            "target_hca_dataset": ResourceDefinition.hardcoded_resource(target_dataset),
+            "load_scheduler": ResourceDefinition.hardcoded_resource(BoundedJobScheduler(4, 2, 1)),
+            "load_checkpoints": in_memory_load_checkpoints
         }
     )
 
@@ -142,6 +147,40 @@ def test_clear_outdated(data_repo_service):
     assert job_id == "fake_delete_job_id"
 
 
+def test_clear_outdated_incremental_restricts_to_appended_ids(data_repo_service):
+    scratch_config = ScratchConfig(
+        "fake_scratch_bucket",
+        "fake_scratch_prefix",
+        "fake_bq_project",
+        "fake_scratch_dataset_prefix",
+        0
+    )
+    target_hca_dataset = TdrDataset(
+        "fake_target_dataset_name",
+        "1234abc",
+        "fake_target_bq_project_id",
+        "fake_billing_profile_id",
+        "fake_location"
+    )
+    gcs = Mock(spec=Client)
+    gcs.list_blobs = Mock(return_value=[])
+    bigquery_service = Mock(spec=BigQueryService)
+
+    job_id = clear_outdated(
+        scratch_config,
+        target_hca_dataset,
+        MetadataType("sequence_file"),
+        bigquery_service,
+        data_repo_service,
+        gcs,
+        scratch_dataset_name=HcaScratchDatasetName("fake_bq_project.fake_scratch_dataset")
+    )
+
+    assert job_id is None
+    query = bigquery_service.run_query.call_args.args[0]
+    assert "`fake_bq_project.fake_scratch_dataset.sequence_file_values`" in query
+
+
 def test_load_table_yes_new_rows(
         load_table_test_mode,
         metadata_fanout_result,
@@ -150,7 +189,7 @@ def test_load_table_yes_new_rows(
     @resource
     def _mock_bq_service(_init_context) -> BigQueryService:
         svc = Mock(spec=BigQueryService)
-        svc.get_num_rows_in_table = Mock(return_value=1)
+        svc.run_query = Mock(return_value=[{"metadata_type": "metadata", "num_rows": 1}])
         return svc
 
     this_test_mode = ModeDefinition(
@@ -188,3 +227,102 @@ def test_load_table_no_new_rows(
 
     assert result.success
     assert result.output_value("result") is None
+
+
+def test_load_tables(
+        load_table_test_mode,
+        run_config
+):
+    fanout_results = [
+        MetadataTypeFanoutResult(HcaScratchDatasetName("dataset"), MetadataType(metadata_type), "path")
+        for metadata_type in ["project", "donor_organism", "links"]
+    ]
+
+    result: SolidExecutionResult = execute_solid(
+        load_tables_solid,
+        mode_def=load_table_test_mode,
+        input_values={
+            "metadata_fanout_results": fanout_results
+        },
+        run_config=run_config
+    )
+
+    assert result.success
+    assert result.output_value("result") == [None, None, None]
+
+
+def test_load_tables_diffs_all_types_in_one_job(
+        load_table_test_mode,
+        run_config
+):
+    bigquery_service = Mock(spec=BigQueryService)
+    bigquery_service.run_query = Mock(return_value=[
+        {"metadata_type": "project", "num_rows": 1},
+        {"metadata_type": "donor_organism", "num_rows": 0}
+    ])
+    this_test_mode = ModeDefinition(
+        "test_load_tables_batched_diff",
+        resource_defs={
+            **load_table_test_mode.resource_defs,
+            "bigquery_service": ResourceDefinition.hardcoded_resource(bigquery_service)
+        }
+    )
+    fanout_results = [
+        MetadataTypeFanoutResult(HcaScratchDatasetName("dataset"), MetadataType(metadata_type), "path")
+        for metadata_type in ["project", "donor_organism"]
+    ]
+
+    result: SolidExecutionResult = execute_solid(
+        load_tables_solid,
+        mode_def=this_test_mode,
+        input_values={
+            "metadata_fanout_results": fanout_results
+        },
+        run_config=run_config
+    )
+
+    assert result.success
+    assert result.output_value("result") == ["fake_delete_job_id", None]
+    diff_query = bigquery_service.run_query.call_args_list[0].args[0]
+    assert "`dataset.project_values`" in diff_query
+    assert "`dataset.donor_organism_values`" in diff_query
+    assert "`dataset.path_row_counts`" in diff_query
+    bigquery_service.get_num_rows_in_table.assert_not_called()
+    bigquery_service.build_extract_job.assert_called_once()
+
+
+def test_load_tables_skips_types_loaded_before_resume(
+        load_table_test_mode,
+        run_config
+):
+    bigquery_service = Mock(spec=BigQueryService)
+    bigquery_service.run_query = Mock(return_value=[{"metadata_type": "donor_organism", "num_rows": 1}])
+    checkpoints = LoadCheckpointStore("fake_load_tag", "staging_area", resume=True)
+    checkpoints.complete("load_table:project", "earlier_job_id")
+    this_test_mode = ModeDefinition(
+        "test_load_tables_resumed",
+        resource_defs={
+            **load_table_test_mode.resource_defs,
+            "bigquery_service": ResourceDefinition.hardcoded_resource(bigquery_service),
+            "load_checkpoints": ResourceDefinition.hardcoded_resource(checkpoints)
+        }
+    )
+    fanout_results = [
+        MetadataTypeFanoutResult(HcaScratchDatasetName("dataset"), MetadataType(metadata_type), "path")
+        for metadata_type in ["project", "donor_organism"]
+    ]
+
+    result: SolidExecutionResult = execute_solid(
+        load_tables_solid,
+        mode_def=this_test_mode,
+        input_values={
+            "metadata_fanout_results": fanout_results
+        },
+        run_config=run_config
+    )
+
+    assert result.success
+    assert result.output_value("result") == ["earlier_job_id", "fake_delete_job_id"]
+    diff_query = bigquery_service.run_query.call_args_list[0].args[0]
+    assert "`dataset.project_values`" not in diff_query
+    assert checkpoints.stage_result("load_table:donor_organism") == "fake_delete_job_id"
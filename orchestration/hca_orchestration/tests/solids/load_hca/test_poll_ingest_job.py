@@ -5,6 +5,7 @@ from dagster import execute_solid, SolidExecutionResult, ResourceDefinition, Fai
 from data_repo_client import RepositoryApi, ApiException
 
 from hca_manage.common import JobId
+from hca_orchestration.resources.tdr_job_watcher import tdr_job_watcher
 from hca_orchestration.solids.load_hca.poll_ingest_job import check_data_ingest_job_result, \
     base_check_data_ingest_job_result
 
@@ -19,7 +20,8 @@ class PollIngestJobTestCase(unittest.TestCase):
         mode_def = ModeDefinition(
             name='test',
             resource_defs={
-                "data_repo_client": ResourceDefinition.hardcoded_resource(data_repo)
+                "data_repo_client": ResourceDefinition.hardcoded_resource(data_repo),
+                "tdr_job_watcher": tdr_job_watcher
             }
         )
 
@@ -42,7 +44,8 @@ class PollIngestJobTestCase(unittest.TestCase):
         mode_def = ModeDefinition(
             name='test',
             resource_defs={
-                "data_repo_client": ResourceDefinition.hardcoded_resource(data_repo)
+                "data_repo_client": ResourceDefinition.hardcoded_resource(data_repo),
+                "tdr_job_watcher": tdr_job_watcher
             }
         )
 
@@ -64,7 +67,8 @@ class PollIngestJobTestCase(unittest.TestCase):
         mode_def = ModeDefinition(
             name='test',
             resource_defs={
-                "data_repo_client": ResourceDefinition.hardcoded_resource(data_repo)
+                "data_repo_client": ResourceDefinition.hardcoded_resource(data_repo),
+                "tdr_job_watcher": tdr_job_watcher
             }
         )
 
@@ -1,14 +1,18 @@
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
 from dagster import ModeDefinition, ResourceDefinition, SolidExecutionResult, execute_solid, Failure
 from dagster_utils.resources.beam.local_beam_runner import LocalBeamRunner
 from google.cloud.bigquery import Client
 
-from hca_orchestration.solids.load_hca.stage_data import clear_scratch_dir, pre_process_metadata, create_scratch_dataset
+from hca_orchestration.contrib.checkpoints import LoadCheckpointStore
+from hca_orchestration.contrib.gcs import _BatchOutcome
+from hca_orchestration.solids.load_hca.stage_data import clear_scratch_dir, pre_process_metadata, \
+    create_scratch_dataset, PRE_PROCESS_METADATA_STAGE
 from hca_orchestration.tests.support.gcs import FakeGCSClient, FakeGoogleBucket, HexBlobInfo
 from hca_orchestration.models.scratch import ScratchConfig
 from hca_orchestration.models.hca_dataset import TdrDataset
+from hca_orchestration.resources.load_checkpoints import in_memory_load_checkpoints
 
 
 @pytest.fixture
@@ -46,19 +50,38 @@ def testing_mode_def(beam_runner, bigquery_client):
             "scratch_config": ResourceDefinition.hardcoded_resource(scratch_config),
             "bigquery_client": ResourceDefinition.hardcoded_resource(bigquery_client),
             "load_tag": ResourceDefinition.hardcoded_resource("fake_load_tag"),
+            "load_checkpoints": in_memory_load_checkpoints,
             "target_hca_dataset": ResourceDefinition.hardcoded_resource(TdrDataset("fake", "fake", "fake", "fake", "fake"))
         }
     )
 
 
-def test_clear_scratch_dir(testing_mode_def):
-    result: SolidExecutionResult = execute_solid(
-        clear_scratch_dir,
-        mode_def=testing_mode_def
+@pytest.fixture
+def resumed_mode_def(testing_mode_def):
+    checkpoints = LoadCheckpointStore("fake_load_tag", "gs://foobar/example", resume=True)
+    checkpoints.complete(PRE_PROCESS_METADATA_STAGE)
+    return ModeDefinition(
+        resource_defs={
+            **testing_mode_def.resource_defs,
+            "load_checkpoints": ResourceDefinition.hardcoded_resource(checkpoints)
+        }
     )
 
+
+def _delete_all(gcs, bucket_name, blobs):
+    return _BatchOutcome(len(blobs), [], [])
+
+
+def test_clear_scratch_dir(testing_mode_def):
+    with patch("hca_orchestration.contrib.gcs._delete_batch", side_effect=_delete_all) as delete_batch:
+        result: SolidExecutionResult = execute_solid(
+            clear_scratch_dir,
+            mode_def=testing_mode_def
+        )
+
     assert result.success
     assert result.output_value() == 1
+    delete_batch.assert_called_once()
 
 
 def test_pre_process_metadata(testing_mode_def, beam_runner):
@@ -123,3 +146,26 @@ def test_create_scratch_dataset(testing_mode_def, bigquery_client):
 
     assert result.success
     assert bigquery_client.create_dataset.called_once()
+
+
+def test_clear_scratch_dir_keeps_pre_processed_metadata_on_resume(resumed_mode_def):
+    with patch("hca_orchestration.contrib.gcs._delete_batch", side_effect=_delete_all) as delete_batch:
+        result: SolidExecutionResult = execute_solid(
+            clear_scratch_dir,
+            mode_def=resumed_mode_def
+        )
+
+    assert result.success
+    assert result.output_value() == 0
+    delete_batch.assert_not_called()
+
+
+def test_pre_process_metadata_skipped_on_resume(resumed_mode_def, beam_runner):
+    result: SolidExecutionResult = execute_solid(
+        pre_process_metadata,
+        mode_def=resumed_mode_def,
+        run_config={"solids": {"pre_process_metadata": {"config": {"input_prefix": "gs://foobar/example"}}}}
+    )
+
+    assert result.success
+    beam_runner.run.assert_not_called()
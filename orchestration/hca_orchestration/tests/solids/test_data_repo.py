@@ -5,6 +5,7 @@ from dagster import execute_solid, Failure, ModeDefinition, ResourceDefinition
 from data_repo_client import RepositoryApi
 
 from hca_manage.common import JobId
+from hca_orchestration.resources.tdr_job_watcher import tdr_job_watcher
 from hca_orchestration.solids.data_repo import base_wait_for_job_completion
 
 
@@ -28,7 +29,8 @@ class WaitForJobCompletionTestCase(unittest.TestCase):
         self.test_mode = ModeDefinition(
             name="test",
             resource_defs={
-                "data_repo_client": ResourceDefinition.hardcoded_resource(data_repo)
+                "data_repo_client": ResourceDefinition.hardcoded_resource(data_repo),
+                "tdr_job_watcher": tdr_job_watcher
             }
         )
 
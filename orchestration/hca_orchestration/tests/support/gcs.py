@@ -104,5 +104,5 @@ class FakeGCSClient:
     def bucket(self, bucket_name):
         return self.get_bucket(bucket_name)
 
-    def list_blobs(self, bucket, prefix=None):
+    def list_blobs(self, bucket, prefix=None, **kwargs):
         return self._buckets[bucket]._blobs.values()
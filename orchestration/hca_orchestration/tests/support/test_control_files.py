@@ -0,0 +1,44 @@
+import json
+
+from hca_orchestration.support.control_files import FileLoadRequest, plan_control_files
+
+
+def _requests(sizes):
+    return [FileLoadRequest(f"gs://bucket/file_{i}", f"/v1/file_{i}", size) for i, size in enumerate(sizes)]
+
+
+def test_plan_control_files_balances_bytes():
+    control_files = plan_control_files(_requests([700, 600, 500, 400, 300, 200, 100, 100]), 10, 1500)
+
+    assert len(control_files) == 2
+    assert sorted(control_file.total_bytes for control_file in control_files) == [1400, 1500]
+
+
+def test_plan_control_files_respects_file_limit():
+    control_files = plan_control_files(_requests([1] * 10), 3, 10 ** 12)
+
+    assert len(control_files) == 4
+    assert all(len(control_file.requests) <= 3 for control_file in control_files)
+    assert sum(len(control_file.requests) for control_file in control_files) == 10
+
+
+def test_plan_control_files_gives_oversized_file_its_own_control_file():
+    control_files = plan_control_files(_requests([5000, 10, 10, 10]), 10, 1000)
+
+    assert [len(control_file.requests) for control_file in control_files][0] == 1
+    assert control_files[0].total_bytes == 5000
+
+
+def test_plan_control_files_with_no_requests():
+    assert plan_control_files([], 10, 1000) == []
+
+
+def test_control_file_renders_jsonl():
+    control_file = plan_control_files(_requests([1, 2]), 10, 1000)[0]
+
+    lines = [json.loads(line) for line in control_file.to_jsonl().splitlines()]
+
+    assert lines == [
+        {"sourcePath": "gs://bucket/file_1", "targetPath": "/v1/file_1"},
+        {"sourcePath": "gs://bucket/file_0", "targetPath": "/v1/file_0"},
+    ]
@@ -1,5 +1,7 @@
+import json
+
 from hca_orchestration.models.entities import Subgraph, MetadataEntity
-from hca_orchestration.support.subgraphs import build_subgraph_nodes
+from hca_orchestration.support.subgraphs import build_subgraph_nodes, index_subgraph_nodes
 from hca_orchestration.support.typing import MetadataType
 
 
@@ -58,3 +60,46 @@ def test_build_subgraph_nodes():
         'supplementary_file'), entity_id='fake_file_id1'), MetadataEntity(entity_type=MetadataType('supplementary_file'), entity_id='fake_file_id2')]
     assert nodes[MetadataType('analysis_file')] == [MetadataEntity(entity_type=MetadataType(
         'analysis_file'), entity_id='fake_output1'), MetadataEntity(entity_type=MetadataType('analysis_file'), entity_id='fake_output2')]
+
+
+def _process_links_row(links_id, input_id, protocol_id):
+    links = [{
+        'link_type': 'process_link',
+        'process_id': f'process_{links_id}', 'process_type': 'analysis_process',
+        'inputs': [{'input_id': input_id, 'input_type': 'sequence_file'}],
+        'outputs': [{'output_id': f'output_{links_id}', 'output_type': 'analysis_file'}],
+        'protocols': [{'protocol_id': protocol_id, 'protocol_type': 'analysis_protocol'}]
+    }]
+    return {'links_id': links_id, 'content': json.dumps({'links': links})}
+
+
+def test_index_subgraph_nodes_deduplicates_shared_nodes():
+    rows = [
+        _process_links_row('links1', 'shared_input', 'shared_protocol'),
+        _process_links_row('links2', 'shared_input', 'shared_protocol'),
+        _process_links_row('links3', 'other_input', 'shared_protocol'),
+    ]
+
+    index = index_subgraph_nodes(iter(rows))
+
+    assert index.links_count == 3
+    assert index.entity_ids('links') == {'links1', 'links2', 'links3'}
+    assert index.entity_ids('analysis_protocol') == {'shared_protocol'}
+    assert index.entity_ids('sequence_file') == {'shared_input', 'other_input'}
+    assert index.entity_ids('analysis_process') == {'process_links1', 'process_links2', 'process_links3'}
+    assert index.entity_ids('donor_organism') == set()
+    assert len(index) == 3 + 1 + 2 + 3 + 3
+
+
+def test_index_subgraph_nodes_matches_build_subgraph_nodes():
+    rows = [
+        _process_links_row('links1', 'shared_input', 'shared_protocol'),
+        _process_links_row('links2', 'shared_input', 'shared_protocol'),
+    ]
+    legacy_nodes = build_subgraph_nodes([Subgraph(row['links_id'], json.loads(row['content'])) for row in rows])
+
+    index = index_subgraph_nodes(rows)
+
+    assert {metadata_type: ids for metadata_type, ids in index.items()} == {
+        metadata_type: {entity.entity_id for entity in entities} for metadata_type, entities in legacy_nodes.items()
+    }
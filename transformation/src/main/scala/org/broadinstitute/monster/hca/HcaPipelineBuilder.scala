@@ -186,10 +186,25 @@ object HcaPipelineBuilder extends PipelineBuilder[Args] {
           Str("version") -> Str(entityVersion),
           Str("content") -> Str(encode(metadata)),
           Str("crc32c") -> descriptor.read[Msg]("crc32c"),
+          Str("target_path") -> fileTargetPath(descriptor).fold[Msg](upack.Null)(Str),
           Str("descriptor") -> Str(encode(descriptor))
         )
     }
 
+  /**
+    * Build the TDR target path that a described file is (or will be) ingested to, so that
+    * file ids can be looked up from the load history without re-parsing the descriptor.
+    *
+    * @param descriptor the content of a descriptor JSON file in Msg format
+    * @return the target path, or None if the descriptor is missing any of the fields that make it up
+    */
+  def fileTargetPath(descriptor: Msg): Option[String] =
+    for {
+      contentId <- descriptor.tryRead[String]("file_id")
+      crc32c <- descriptor.tryRead[String]("crc32c")
+      fileName <- descriptor.tryRead[String]("file_name")
+    } yield s"/v1/$contentId/$crc32c/$fileName"
+
   /**
     * Extract the necessary info from a file of table relationships and put it into a form that
     * makes it easy to pass in to the table format